@@ -11,7 +11,13 @@ def signal_handler(signal, frame):
         core.stop()
     sys.exit(0)
 
+
+def profile_signal_handler(signal, frame):
+    if core:
+        core.profile()
+
 if __name__ == '__main__':
     signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGUSR1, profile_signal_handler)
     core = Application.core(as_daemon=False)
     core.start()
@@ -1,17 +1,23 @@
 import json
+import threading
+from collections import OrderedDict
+from time import sleep
 
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 
 from motey.models.capability import Capability
-from motey.models.schemas import capability_json_schema
+from motey.models.schemas import validate_capabilities
 
 
 class CapabilityEngine(object):
     """
     This module provides a connection endpoint for third party apps like the hardware layer to add new capabilities.
+    Incoming capability events are collected for a short batch window. Within the window an add and a remove of the
+    same capability cancel each other out, so only the net change will be written to the database in a single write
+    and published as a single delta to the other nodes.
     """
 
-    def __init__(self, logger, capability_repository, communication_manager):
+    def __init__(self, logger, capability_repository, communication_manager, batch_window=0.5):
         """
         Constructor the the capability engine.
 
@@ -21,11 +27,23 @@ class CapabilityEngine(object):
         :type capability_repository: motey.repositories.capability_repository.CapabilityRepository
         :param communication_manager: DI injected
         :type communication_manager: motey.communication.communication_manager.CommunicationManager
+        :param batch_window: the time in seconds capability events will be collected before they are applied.
+                             Default is ``0.5``. A value of ``0`` applies every event immediately.
         """
 
         self.logger = logger
         self.capability_repository = capability_repository
         self.communication_manager = communication_manager
+        self.batch_window = batch_window
+        self.pending_changes = OrderedDict()
+        self.lock = threading.Lock()
+        # serializes the read-modify-write of the capability repository and keeps the published deltas in order
+        self.flush_lock = threading.Lock()
+        self.pending_event = threading.Event()
+        self.stopped = False
+
+        self.flush_thread = threading.Thread(target=self.__run_flush_thread, args=())
+        self.flush_thread.daemon = True
 
     def start(self):
         """
@@ -34,15 +52,23 @@ class CapabilityEngine(object):
 
         self.communication_manager.add_capability_event_stream.subscribe(self.perform_add_capability)
         self.communication_manager.remove_capability_event_stream.subscribe(self.perform_remove_capability)
+        if self.batch_window > 0:
+            self.flush_thread.start()
         self.logger.info('capability engine started')
 
     def stop(self):
         """
-        Should be executed to clean up the capability engine
+        Should be executed to clean up the capability engine.
+        Waits until the flush thread has applied its batch and applies the remaining changes afterwards.
         """
 
         self.communication_manager.add_capability_event_stream.dispose()
         self.communication_manager.remove_capability_event_stream.dispose()
+        self.stopped = True
+        self.pending_event.set()
+        if self.flush_thread.is_alive():
+            self.flush_thread.join()
+        self.flush()
         self.logger.info('capability engine stopped')
 
     def parse_capability(self, data):
@@ -56,7 +82,7 @@ class CapabilityEngine(object):
         output = []
         try:
             json_result = json.loads(data)
-            validate(json_result, capability_json_schema)
+            validate_capabilities(json_result)
             for entry in json_result:
                 capability_entry = Capability.transform(entry)
                 output.append(capability_entry)
@@ -66,26 +92,85 @@ class CapabilityEngine(object):
 
     def perform_add_capability(self, data):
         """
-        Adds a capability entry to the database.
+        Queues capability entries to be added to the database.
 
         :param data: the capability entry which should be added.
                       The entry must match the `motey.models.schemas.capability_json_schema`
         :type data: str
         """
 
-        results = self.parse_capability(data=data)
-        for entry in results:
-            self.capability_repository.add(capability=entry.capability, capability_type=entry.capability_type)
+        self.__queue_changes(results=self.parse_capability(data=data), added=True)
 
     def perform_remove_capability(self, data):
         """
-        Removes a capability entry from the database.
+        Queues capability entries to be removed from the database.
 
         :param data: the capability entry which should be removed.
                       The entry must match the `motey.models.schemas.capability_json_schema`
         :type data: str
         """
 
-        results = self.parse_capability(data=data)
-        for entry in results:
-            self.capability_repository.remove(capability=entry.capability, capability_type=entry.capability_type)
+        self.__queue_changes(results=self.parse_capability(data=data), added=False)
+
+    def flush(self):
+        """
+        Applies all queued capability changes with a single database write and publishes the net change to the other
+        nodes. Concurrent calls are executed one after another.
+        """
+
+        with self.flush_lock:
+            with self.lock:
+                pending_changes = self.pending_changes
+                self.pending_changes = OrderedDict()
+                self.pending_event.clear()
+
+            if not pending_changes:
+                return
+
+            added = [key for key, is_added in pending_changes.items() if is_added]
+            removed = [key for key, is_added in pending_changes.items() if not is_added]
+            applied_added, applied_removed = self.capability_repository.apply_changes(added=added, removed=removed)
+            if applied_added or applied_removed:
+                self.communication_manager.publish_capabilities_delta(
+                    added=[{'capability': capability, 'capability_type': capability_type}
+                           for capability, capability_type in applied_added],
+                    removed=[{'capability': capability, 'capability_type': capability_type}
+                             for capability, capability_type in applied_removed])
+
+    def __queue_changes(self, results, added):
+        """
+        Queues parsed capabilities as added or removed.
+        The last event of a capability within a batch window wins, so an add and a remove cancel each other out.
+
+        :param results: list with the parsed capability models
+        :param added: True if the capabilities should be added, False if they should be removed
+        """
+
+        if not results:
+            return
+
+        with self.lock:
+            for entry in results:
+                key = (entry.capability, entry.capability_type)
+                self.pending_changes.pop(key, None)
+                self.pending_changes[key] = added
+            self.pending_event.set()
+
+        if self.batch_window <= 0:
+            self.flush()
+
+    def __run_flush_thread(self):
+        """
+        Private function which is be executed after the start method is called.
+        The method waits for queued capability events and applies them after the batch window.
+        """
+
+        while not self.stopped:
+            self.pending_event.wait()
+            if self.stopped:
+                break
+            sleep(self.batch_window)
+            try:
+                self.flush()
+            except Exception as exception:
+                self.logger.error('capability engine > could not apply capability changes: %s' % exception)
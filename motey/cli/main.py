@@ -15,6 +15,8 @@ Usage:
    --version        Print the version.
 """
 
+import signal
+
 from docopt import docopt
 
 from motey import __version__ as VERSION
@@ -25,6 +27,8 @@ def main():
     options = docopt(__doc__, version=VERSION)
 
     core = Application.core(as_daemon=True)
+    # the handler is inherited by the daemon
+    signal.signal(signal.SIGUSR1, lambda signum, frame: core.profile())
 
     if options['start']:
         core.start()
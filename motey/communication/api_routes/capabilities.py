@@ -1,8 +1,9 @@
-from flask import jsonify, request
+from flask import request
 from flask.views import MethodView
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 
-from motey.models.schemas import capability_json_schema
+from motey.communication.api_routes.listing import list_entries
+from motey.models.schemas import validate_capabilities
 
 
 class Capabilities(MethodView):
@@ -15,12 +16,17 @@ class Capabilities(MethodView):
     def get(self):
         """
         Returns a list off all existing capabilities of this node.
+        The list can be paginated, projected and filtered by ``capability`` and ``type``, see
+        ``motey.communication.api_routes.listing.list_entries``.
 
-        :return: a JSON object with all the existing capabilities of this node
+        :return: a JSON object with the existing capabilities of this node or 304 - Not Modified if nothing has been
+                 changed
         """
         from motey.di.app_module import DIRepositories
-        results = DIRepositories.capability_repository().all()
-        return jsonify(results), 200
+        return list_entries(DIRepositories.capability_repository(), filters={
+            'capability': lambda capability: [capability.get('capability')],
+            'type': lambda capability: [capability.get('type')]
+        })
 
     def put(self):
         """
@@ -35,7 +41,7 @@ class Capabilities(MethodView):
         if request.content_type == 'application/json':
             data = request.json
             try:
-                validate(data, capability_json_schema)
+                validate_capabilities(data)
                 capability_repository = DIRepositories.capability_repository()
                 nothing_added = True
                 for entry in data:
@@ -64,7 +70,7 @@ class Capabilities(MethodView):
         if request.content_type == 'application/json':
             data = request.json
             try:
-                validate(data, capability_json_schema)
+                validate_capabilities(data)
                 capability_repository = DIRepositories.capability_repository()
                 nothing_removed = True
                 for entry in data:
@@ -0,0 +1,27 @@
+from flask import Response, request
+from flask.views import MethodView
+
+
+class Events(MethodView):
+    """
+    This REST API endpoint streams the changes of the services, the nodes and the capabilities as server-sent events.
+    Clients like the webclient can use it instead of polling the other endpoints.
+    """
+
+    def get(self):
+        """
+        Opens a server-sent event stream.
+        The topics can be limited via the ``topics`` query parameter, e.g. ``?topics=services,nodes``.
+
+        :return: a ``text/event-stream`` response or 400 - Bad Request if an unknown topic was requested
+        """
+        from motey.di.app_module import DIServices
+        event_broadcaster = DIServices.event_broadcaster()
+        topics = [topic for topic in request.args.get('topics', '').split(',') if topic]
+        if any(topic not in event_broadcaster.TOPICS for topic in topics):
+            return 'Unknown topic', 400
+
+        client = event_broadcaster.register(topics)
+        return Response(event_broadcaster.stream(client),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -0,0 +1,67 @@
+import zlib
+
+from flask import jsonify, request, Response
+
+from motey.configuration.configreader import config
+
+
+def list_entries(repository, filters=None):
+    """
+    Returns the entries of a repository as a JSON response.
+    The entries can be controlled via the following query parameters:
+
+     * ``limit``: the maximum number of entries of a page. The cursor of the next page will be sent in the
+       ``X-Next-Cursor`` header.
+     * ``cursor``: the cursor of the page to be fetched.
+     * ``fields``: comma separated list of the fields which should be returned.
+     * all parameters of ``filters``: only entries which match one of the given values will be returned.
+
+    Every response has an ``ETag`` which is based on the version of the repository. If the ``If-None-Match`` header
+    of the request matches, ``304 - Not Modified`` will be returned without reading the repository.
+
+    :param repository: the repository with the entries
+    :type repository: motey.repositories.base_repository.BaseRepository
+    :param filters: dict with the name of the query parameter as key and a function as value, which returns a list
+                    with the values of an entry to be compared with.
+    :return: the HTTP response
+    """
+    filters = filters or {}
+    etag = '%s-%s-%08x' % (repository.epoch, repository.version, zlib.crc32(request.query_string))
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    try:
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        cursor = int(request.args['cursor']) if 'cursor' in request.args else None
+    except ValueError:
+        return 'Invalid Parameter', 400
+    max_page_size = int(config['WEBSERVER']['max_page_size'])
+    if limit is not None:
+        limit = min(max(limit, 1), max_page_size)
+
+    active_filters = [(filters[name], set(request.args.getlist(name))) for name in filters if name in request.args]
+
+    def __matches(entry):
+        """
+        Inner function which checks if an entry matches all active filters.
+
+        :param entry: the entry to be checked
+        :return: True if the entry matches, otherwise False
+        """
+        return all(any(str(value) in values for value in get_values(entry)) for get_values, values in active_filters)
+
+    entries, next_cursor = repository.find_page(predicate=__matches if active_filters else None,
+                                                cursor=cursor,
+                                                limit=limit)
+
+    if 'fields' in request.args:
+        fields = [field for field in request.args['fields'].split(',') if field]
+        entries = [{field: entry[field] for field in fields if field in entry} for entry in entries]
+
+    response = jsonify(entries)
+    response.set_etag(etag)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
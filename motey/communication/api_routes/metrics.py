@@ -0,0 +1,19 @@
+from flask import Response
+from flask.views import MethodView
+
+from motey.utils import metrics
+
+
+class Metrics(MethodView):
+    """
+    This REST API endpoint exposes the metrics of the node in the Prometheus text format.
+    """
+
+    def get(self):
+        """
+        Returns all metrics of the node.
+
+        :return: the metrics in the Prometheus text format
+        """
+        return Response(metrics.registry.render(), status=200, mimetype=None,
+                        content_type=metrics.MetricsRegistry.CONTENT_TYPE)
@@ -1,7 +1,8 @@
-from flask import jsonify
 from flask.views import MethodView
 from rx.subjects import Subject
 
+from motey.communication.api_routes.listing import list_entries
+
 
 class Nodes(MethodView):
     """
@@ -14,9 +15,12 @@ class Nodes(MethodView):
     def get(self):
         """
         Returns a list off all registered nodes.
+        The list can be paginated, projected and filtered by ``ip``, see
+        ``motey.communication.api_routes.listing.list_entries``.
 
-        :return: a JSON object with all registered nodes
+        :return: a JSON object with the registered nodes or 304 - Not Modified if nothing has been changed
         """
         from motey.di.app_module import DIRepositories
-        results = DIRepositories.nodes_repository().all()
-        return jsonify(results), 200
+        return list_entries(DIRepositories.nodes_repository(), filters={
+            'ip': lambda node: [node.get('ip')]
+        })
@@ -0,0 +1,51 @@
+from flask import Response, abort, jsonify, request
+from flask.views import MethodView
+
+from motey.utils import profiling
+
+
+class Profiler(MethodView):
+    """
+    This REST API endpoint controls the sampling profiler of the node, which can be started without a restart of the
+    node. The samples are returned in the collapsed stack format, which can be rendered as flame graph.
+    """
+
+    def get(self):
+        """
+        Returns the state of the running or the latest profile.
+        With the query parameter ``format=collapsed`` the samples are returned in the collapsed stack format instead.
+
+        :return: a JSON object with the state of the profile or the collapsed stacks as text
+        """
+        if request.args.get('format') == 'collapsed':
+            return Response(profiling.profiler.get_collapsed(), status=200, mimetype='text/plain')
+        return jsonify(profiling.profiler.get_status()), 200
+
+    def post(self):
+        """
+        Starts a profile. The JSON body can contain the ``duration`` and the ``interval`` between two samples in
+        seconds.
+
+        :return: HTTP status code 202 - Accepted with the state of the profile, 409 - Conflict if a profile is already
+                 running, otherwise 400 - Bad Request.
+        """
+        data = request.get_json(silent=True) or {}
+        try:
+            duration = float(data.get('duration', 30))
+            interval = float(data['interval']) if 'interval' in data else None
+        except (TypeError, ValueError):
+            return abort(400)
+        if duration <= 0 or (interval is not None and interval <= 0):
+            return abort(400)
+        if not profiling.profiler.start(duration, interval=interval):
+            return abort(409)
+        return jsonify(profiling.profiler.get_status()), 202
+
+    def delete(self):
+        """
+        Stops the running profile. The samples up to now are kept.
+
+        :return: HTTP status code 200 - OK with the state of the profile
+        """
+        profiling.profiler.stop()
+        return jsonify(profiling.profiler.get_status()), 200
@@ -2,11 +2,15 @@ import yaml
 from flask import jsonify
 from flask import request, abort
 from flask.views import MethodView
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
 from rx.subjects import Subject
 
-from motey.models.schemas import blueprint_yaml_schema
+from motey.communication.api_routes.listing import list_entries
+from motey.configuration.configreader import config
+from motey.models.schemas import validate_blueprint
 from motey.models.service import Service as ServiceModel
+from motey.utils import yaml_loader
+from motey.utils.yaml_loader import YAMLLimitError
 
 
 class Service(MethodView):
@@ -21,13 +25,18 @@ class Service(MethodView):
 
     def get(self):
         """
-        Returns a list off all existing capabilities of this node.
+        Returns a list of all services of this node.
+        The list can be paginated, projected and filtered by ``state``, ``service_name`` and ``node``, see
+        ``motey.communication.api_routes.listing.list_entries``.
 
-        :return: a JSON object with all the existing capabilities of this node
+        :return: a JSON object with the services of this node or 304 - Not Modified if nothing has been changed
         """
         from motey.di.app_module import DIRepositories
-        results = DIRepositories.service_repository().all()
-        return jsonify(results), 200
+        return list_entries(DIRepositories.service_repository(), filters={
+            'state': lambda service: [service.get('state')],
+            'service_name': lambda service: [service.get('service_name')],
+            'node': lambda service: [image.get('node') for image in service.get('images', [])]
+        })
 
     def post(self):
         """
@@ -35,20 +44,15 @@ class Service(MethodView):
         Receive the YAMl file and validates them.
         The content type of the request must be ``application/x-yaml``, otherwiese the request will end up in a HTTP
         status code 400 - Bad Request.
-        If validation was successful the given service will be instantiate by the ``InterNodeOrchestrator``.
+        The YAML file can contain multiple blueprints as separate YAML documents. Every blueprint will be handed over to
+        the ``InterNodeOrchestrator`` as soon as it is parsed and validated.
 
-        :return: HTTP status code 201 - Created, if the request is successful, otherwise 400 - Bad Request.
+        :return: HTTP status code 201 - Created with a list of the ids of the accepted services, if the request is
+                 successful, 413 - Payload Too Large if the request exceeds one of the configured limits, otherwise
+                 400 - Bad Request.
         """
         if request.content_type == 'application/x-yaml':
-            result = request.get_data(cache=False, as_text=True)
-            try:
-                loaded_data = yaml.load(result)
-                validate(loaded_data, blueprint_yaml_schema)
-                service = ServiceModel.transform(loaded_data)
-                self.yaml_post_stream.on_next(service)
-            except (yaml.YAMLError, ValidationError):
-                return abort(400)
-            return '', 201
+            return self.__process_blueprints(self.yaml_post_stream)
         else:
             return abort(400)
 
@@ -58,19 +62,51 @@ class Service(MethodView):
         Receive the YAMl file and validates them.
         The content type of the request must be ``application/x-yaml``, otherwiese the request will end up in a HTTP
         status code 400 - Bad Request.
-        If validation was successful the given service will be terminated by the ``InterNodeOrchestrator``.
+        The YAML file can contain multiple blueprints as separate YAML documents. Every blueprint will be handed over to
+        the ``InterNodeOrchestrator`` to be terminated as soon as it is parsed and validated.
 
-        :return: HTTP status code 201 - Created, if the request is successful, otherwise 400 - Bad Request.
+        :return: HTTP status code 201 - Created with a list of the ids of the accepted services, if the request is
+                 successful, 413 - Payload Too Large if the request exceeds one of the configured limits, otherwise
+                 400 - Bad Request.
         """
         if request.content_type == 'application/x-yaml':
-            result = request.get_data(cache=False, as_text=True)
-            try:
-                loaded_data = yaml.load(result)
-                validate(loaded_data, blueprint_yaml_schema)
-                service = ServiceModel.transform(loaded_data)
-                self.yaml_delete_stream.on_next(service)
-            except (yaml.YAMLError, ValidationError):
-                return abort(400)
-            return '', 201
+            return self.__process_blueprints(self.yaml_delete_stream)
         else:
             return abort(400)
+
+    def __process_blueprints(self, output_stream):
+        """
+        Parses the blueprints of the request body with the safe YAML loader and emits every valid blueprint on the
+        given stream.
+        The limits of the request can be configured in the ``BLUEPRINT`` section of the ``config.ini``.
+        If an error occurs after some blueprints were already emitted, the ids of these services will be returned
+        together with the error.
+
+        :param output_stream: the stream where the parsed services should be emitted
+        :type output_stream: rx.subjects.Subject
+        :return: the HTTP response
+        """
+        max_size = int(config['BLUEPRINT']['max_size'])
+        if request.content_length and request.content_length > max_size:
+            return abort(413)
+
+        accepted_services = []
+        try:
+            for loaded_data in yaml_loader.load_all(request.stream,
+                                                    max_size=max_size,
+                                                    max_depth=int(config['BLUEPRINT']['max_depth']),
+                                                    max_documents=int(config['BLUEPRINT']['max_documents']),
+                                                    max_nodes=int(config['BLUEPRINT']['max_nodes'])):
+                validate_blueprint(loaded_data)
+                service = ServiceModel.transform(loaded_data)
+                output_stream.on_next(service)
+                accepted_services.append(service.id)
+        except (yaml.YAMLError, ValidationError) as error:
+            status_code = 413 if isinstance(error, YAMLLimitError) else 400
+            if not accepted_services:
+                return abort(status_code)
+            return jsonify({'accepted': accepted_services, 'error': getattr(error, 'message', str(error))}), status_code
+
+        if not accepted_services:
+            return abort(400)
+        return jsonify(accepted_services), 201
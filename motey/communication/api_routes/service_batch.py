@@ -0,0 +1,139 @@
+import yaml
+from flask import jsonify
+from flask import request, abort
+from flask.views import MethodView
+from jsonschema import ValidationError
+from rx.subjects import Subject
+
+from motey.configuration.configreader import config
+from motey.models.job import Job
+from motey.models.job_state import JobState
+from motey.models.schemas import validate_blueprint, validate_service_ids
+from motey.models.service import Service as ServiceModel
+from motey.utils import yaml_loader
+from motey.utils.yaml_loader import YAMLLimitError
+
+
+class ServiceBatch(MethodView):
+    """
+    This REST API endpoint instantiates or terminates multiple services with a single request.
+    All entries of a request are validated before anything is handed over to the ``InterNodeOrchestrator``. The batch
+    is processed in the background and can be tracked via the returned job id.
+    """
+
+    # RX subjects which send a tuple with the job and the services, after a batch is received and validated.
+    batch_post_stream = Subject()
+    batch_delete_stream = Subject()
+
+    def get(self, job_id):
+        """
+        Returns the progress of a batch job.
+
+        :param job_id: the id of the job
+        :return: a JSON object with the job or 404 - Not Found if the job does not exist
+        """
+        from motey.di.app_module import DIRepositories
+        job = DIRepositories.job_repository().get(job_id)
+        if not job:
+            return abort(404)
+        return jsonify(job), 200
+
+    def post(self):
+        """
+        POST endpoint.
+        Receive a list of blueprints and validates them.
+        The blueprints can be sent as a YAML stream with one document per blueprint (``application/x-yaml``) or as a
+        JSON list (``application/json``).
+        If all blueprints are valid, the services will be instantiated by the ``InterNodeOrchestrator``.
+
+        :return: HTTP status code 202 - Accepted with the job id and the service ids, 413 - Payload Too Large if the
+                 request exceeds one of the configured limits, otherwise 400 - Bad Request.
+        """
+        max_size = int(config['BLUEPRINT']['max_size'])
+        max_batch_size = int(config['BLUEPRINT']['max_batch_size'])
+        if request.content_length and request.content_length > max_size:
+            return abort(413)
+
+        try:
+            if request.content_type == 'application/x-yaml':
+                blueprints = list(yaml_loader.load_all(request.stream,
+                                                       max_size=max_size,
+                                                       max_depth=int(config['BLUEPRINT']['max_depth']),
+                                                       max_documents=max_batch_size,
+                                                       max_nodes=int(config['BLUEPRINT']['max_nodes'])))
+            elif request.content_type == 'application/json':
+                blueprints = request.get_json(silent=True)
+                if not isinstance(blueprints, list):
+                    return 'Validation Error', 400
+                if len(blueprints) > max_batch_size:
+                    return abort(413)
+            else:
+                return 'Wrong Content type', 400
+        except YAMLLimitError:
+            return abort(413)
+        except yaml.YAMLError:
+            return 'Validation Error', 400
+
+        if not blueprints:
+            return 'Validation Error', 400
+
+        for index, blueprint in enumerate(blueprints):
+            try:
+                validate_blueprint(blueprint)
+            except ValidationError as error:
+                return jsonify({'index': index, 'error': error.message}), 400
+
+        services = [ServiceModel.transform(blueprint) for blueprint in blueprints]
+        job = self.__create_job(action=Job.INSTANTIATE, service_ids=[service.id for service in services])
+        self.batch_post_stream.on_next((job, services))
+        return jsonify({'job_id': job.id, 'service_ids': job.service_ids}), 202
+
+    def delete(self):
+        """
+        DELETE endpoint.
+        Receive a JSON list of service ids and terminates the related services.
+        The content type of the request must be ``application/json``, otherwise the request will fail.
+        Ids of services which do not exist will be marked as failed in the job.
+
+        :return: HTTP status code 202 - Accepted with the job id, 413 - Payload Too Large if the list is too long,
+                 otherwise 400 - Bad Request.
+        """
+        from motey.di.app_module import DIRepositories
+        if request.content_type != 'application/json':
+            return 'Wrong Content type', 400
+
+        service_ids = request.get_json(silent=True)
+        try:
+            validate_service_ids(service_ids)
+        except ValidationError:
+            return 'Validation Error', 400
+        if len(service_ids) > int(config['BLUEPRINT']['max_batch_size']):
+            return abort(413)
+
+        services = [ServiceModel.transform(service)
+                    for service in DIRepositories.service_repository().find_by_ids(service_ids)]
+        found_ids = set(service.id for service in services)
+        job = self.__create_job(action=Job.TERMINATE,
+                                service_ids=service_ids,
+                                failed=[service_id for service_id in service_ids if service_id not in found_ids])
+        if services:
+            self.batch_delete_stream.on_next((job, services))
+        return jsonify({'job_id': job.id, 'service_ids': job.service_ids}), 202
+
+    def __create_job(self, action, service_ids, failed=None):
+        """
+        Creates a new job and stores them in the ``JobRepository``.
+        A job without any services to process will be finished immediately.
+
+        :param action: the action of the job
+        :param service_ids: the ids of the services of the job
+        :param failed: the ids of services which already failed
+        :return: the new job
+        :rtype: motey.models.job.Job
+        """
+        from motey.di.app_module import DIRepositories
+        job = Job(action=action, service_ids=service_ids, failed=failed)
+        if len(job.failed) >= len(job.service_ids):
+            job.state = JobState.FINISHED
+        DIRepositories.job_repository().add(dict(job))
+        return job
@@ -0,0 +1,19 @@
+from flask import jsonify, request
+from flask.views import MethodView
+
+from motey.utils import profiling
+
+
+class SlowOperations(MethodView):
+    """
+    This REST API endpoint exposes the latest operations of the node which took longer than the configured threshold.
+    """
+
+    def get(self):
+        """
+        Returns the latest slow operations, the latest first.
+        The operations can be filtered with the ``name`` query parameter.
+
+        :return: a JSON list with the slow operations
+        """
+        return jsonify(profiling.slow_operations.get_operations(name=request.args.get('name'))), 200
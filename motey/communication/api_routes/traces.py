@@ -0,0 +1,23 @@
+from flask import abort, jsonify, request
+from flask.views import MethodView
+
+from motey.utils import tracing
+
+
+class Traces(MethodView):
+    """
+    This REST API endpoint exposes the latest spans of the node, if the spans are kept in the ring buffer.
+    """
+
+    def get(self):
+        """
+        Returns the latest spans of the node.
+        The spans can be filtered with the ``trace_id`` query parameter. The id of the trace of a request is returned
+        in the ``X-Trace-Id`` header of the response.
+
+        :return: a JSON list with the spans or 404 - Not Found if the spans are not kept in the ring buffer
+        """
+        exporter = tracing.tracer.exporter
+        if not isinstance(exporter, tracing.RingBufferExporter):
+            return abort(404)
+        return jsonify(exporter.get_spans(trace_id=request.args.get('trace_id'))), 200
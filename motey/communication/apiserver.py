@@ -1,14 +1,32 @@
 import threading
+from time import perf_counter
 
-from flask import Flask, request
+from flask import Flask, g, request
 from flask_cors import CORS
 
 from motey.communication.api_routes.capabilities import Capabilities
+from motey.communication.api_routes.events import Events
+from motey.communication.api_routes.metrics import Metrics
 from motey.communication.api_routes.nodes import Nodes
 from motey.communication.api_routes.nodestatus import NodeStatus
+from motey.communication.api_routes.profiler import Profiler
 from motey.communication.api_routes.service import Service
+from motey.communication.api_routes.service_batch import ServiceBatch
+from motey.communication.api_routes.slow_operations import SlowOperations
+from motey.communication.api_routes.traces import Traces
+from motey.utils import metrics, profiling
 from motey.utils.heartbeat import register_callback, register_heartbeat
 
+REQUESTS = metrics.registry.counter('motey_http_requests', 'Number of handled HTTP requests',
+                                    ['endpoint', 'method', 'status'])
+REQUEST_DURATION = metrics.registry.histogram('motey_http_request_duration_seconds',
+                                              'Time until the response of a HTTP request was created',
+                                              ['endpoint', 'method'])
+
+# endpoints which are polled or streamed and would flood the traces
+UNTRACED_ENDPOINTS = ('/v1/events', '/v1/metrics', '/v1/traces', '/v1/heartbeat', '/v1/profiler',
+                      '/v1/slow_operations')
+
 
 class APIServer(object):
     """
@@ -16,11 +34,15 @@ class APIServer(object):
     The webserver runs in a separate thread and will not block the main thread.
     """
 
-    def __init__(self, logger, host='127.0.0.1', port=5023):
+    def __init__(self, logger, event_broadcaster, tracer, host='127.0.0.1', port=5023):
         """
         Constructor of the webserver.
 
         :param logger: the DI injected logger instance
+        :param event_broadcaster: DI injected
+        :type event_broadcaster: motey.communication.event_broadcaster.EventBroadcaster
+        :param tracer: DI injected
+        :type tracer: motey.utils.tracing.Tracer
         :param host: the hostname to listen on. Set this to ``'0.0.0.0'`` to
                      have the server available externally as well. Defaults to
                      ``'127.0.0.1'``.
@@ -29,8 +51,10 @@ class APIServer(object):
         self.host = host
         self.port = port
         self.logger = logger
+        self.event_broadcaster = event_broadcaster
+        self.tracer = tracer
         self.webserver = Flask(__name__)
-        CORS(self.webserver)
+        CORS(self.webserver, expose_headers=['ETag', 'X-Next-Cursor', 'X-Trace-Id'])
         self.configure_url()
         self.run_server_thread = threading.Thread(target=self.run_server, args=())
         self.run_server_thread.daemon = True
@@ -39,6 +63,7 @@ class APIServer(object):
         """
         Starts the execution thread.
         """
+        self.event_broadcaster.start()
         self.run_server_thread.start()
 
     def run_server(self):
@@ -55,10 +80,77 @@ class APIServer(object):
         self.webserver.add_url_rule('/v1/capabilities', view_func=Capabilities.as_view('capabilities'))
         self.webserver.add_url_rule('/v1/nodestatus', view_func=NodeStatus.as_view('nodestatus'))
         self.webserver.add_url_rule('/v1/service', view_func=Service.as_view('service'))
+        service_batch_view = ServiceBatch.as_view('service_batch')
+        self.webserver.add_url_rule('/v1/service/batch', view_func=service_batch_view, methods=['POST', 'DELETE'])
+        self.webserver.add_url_rule('/v1/service/batch/<job_id>', view_func=service_batch_view, methods=['GET'])
         self.webserver.add_url_rule('/v1/nodes', view_func=Nodes.as_view('nodes'))
+        self.webserver.add_url_rule('/v1/events', view_func=Events.as_view('events'))
+        self.webserver.add_url_rule('/v1/metrics', view_func=Metrics.as_view('metrics'))
+        self.webserver.add_url_rule('/v1/traces', view_func=Traces.as_view('traces'))
+        self.webserver.add_url_rule('/v1/profiler', view_func=Profiler.as_view('profiler'))
+        self.webserver.add_url_rule('/v1/slow_operations', view_func=SlowOperations.as_view('slow_operations'))
+        self.webserver.before_request(self.start_request_timer)
+        self.webserver.before_request(self.start_request_span)
+        self.webserver.after_request(self.observe_request)
+        self.webserver.teardown_request(self.finish_request_span)
         register_callback(self.check_heartbeat)
         register_heartbeat(self.webserver)
 
+    def start_request_timer(self):
+        """
+        Stores the start time of the current request.
+        """
+        g.request_start = perf_counter()
+
+    def observe_request(self, response):
+        """
+        Counts the current request and observes its duration. If the request is traced, the id of the trace is added
+        as ``X-Trace-Id`` header.
+        Requests are labeled with the url rule instead of the url, so that ids in the url do not create new labels.
+
+        :param response: the response of the request
+        :return: the unchanged response
+        """
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUESTS.labels(endpoint=endpoint, method=request.method, status=response.status_code).inc()
+        if 'request_span' in g:
+            g.request_span.set_attribute('status', response.status_code)
+            response.headers['X-Trace-Id'] = g.request_span.trace_id
+        if 'request_start' in g:
+            REQUEST_DURATION.labels(endpoint=endpoint, method=request.method).observe(
+                perf_counter() - g.request_start)
+        return response
+
+    def start_request_span(self):
+        """
+        Starts the root span of the trace of the current request and activates it, so that the handlers of the request
+        and the nodes which are requested by them continue the trace. The request is also observed by the slow
+        operation recorder, even if the trace is not sampled.
+        """
+        if request.path in UNTRACED_ENDPOINTS:
+            return
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.request_operation = profiling.slow_operations.begin('%s %s' % (request.method, endpoint))
+        span = self.tracer.start_span('%s %s' % (request.method, endpoint))
+        if span:
+            self.tracer.activate(span)
+            g.request_span = span
+
+    def finish_request_span(self, error=None):
+        """
+        Finishes the root span of the current request.
+
+        :param error: the exception which was raised while the request was handled or None
+        """
+        span = g.pop('request_span', None)
+        error_message = '%s: %s' % (type(error).__name__, error) if error is not None else None
+        profiling.slow_operations.end(g.pop('request_operation', None), trace_id=span.trace_id if span else None,
+                                      error=error_message)
+        if span:
+            span.error = error_message
+            self.tracer.deactivate(span)
+            span.finish()
+
     def is_running(self):
         """
         Checks if the webserver is still running.
@@ -70,6 +162,7 @@ class APIServer(object):
         """
         Stops the webserver and add an info the logs, that the webserver is stopped.
         """
+        self.event_broadcaster.stop()
         self.logger.info('Webserver stopped')
 
     def check_heartbeat(self):
@@ -1,4 +1,5 @@
-from motey.utils import network_utils
+import threading
+from time import time
 
 
 class CommunicationManager(object):
@@ -8,7 +9,7 @@ class CommunicationManager(object):
     It covers all method calls and can start and stop the mentioned components.
     """
 
-    def __init__(self, api_server, mqtt_server, zeromq_server):
+    def __init__(self, api_server, mqtt_server, zeromq_server, nodes_repository, node_announcer, node_identity):
         """
         Constructor of the class.
 
@@ -18,16 +19,31 @@ class CommunicationManager(object):
         :type mqtt_server: motey.communication.mqttserver.MQTTServer
         :param zeromq_server: DI injected.
         :type zeromq_server: motey.communication.zeromq_server.ZeroMQServer
+        :param nodes_repository: DI injected.
+        :type nodes_repository: motey.repositories.nodes_repository.NodesRepository
+        :param node_announcer: DI injected.
+        :type node_announcer: motey.communication.node_announcer.NodeAnnouncer
+        :param node_identity: DI injected.
+        :type node_identity: motey.utils.node_identity.NodeIdentity
         """
         self.api_server = api_server
         self.mqtt_server = mqtt_server
         self.zeromq_server = zeromq_server
+        self.nodes_repository = nodes_repository
+        self.node_announcer = node_announcer
+        self.node_identity = node_identity
 
         self.mqtt_server.after_connect = self.after_connect_callback
         self.mqtt_server.nodes_request_callback = self.__nodes_request_callback
 
         self.add_capability_event_stream = self.zeromq_server.add_capability_event_stream
         self.remove_capability_event_stream = self.zeromq_server.remove_capability_event_stream
+        self.capabilities_delta_stream = self.mqtt_server.capabilities_delta_stream
+        self.node_announcement_stream = self.mqtt_server.node_announcement_stream.subscribe(
+            self.node_announcer.record_announcement)
+        self.nodes_answered_stream = self.mqtt_server.nodes_answered_stream.subscribe(
+            self.node_announcer.record_answer)
+        self.ip_change_stream = self.node_identity.ip_change_stream.subscribe(self.handle_ip_change)
 
     def start(self):
         """
@@ -43,27 +59,74 @@ class CommunicationManager(object):
         Will send out a mqtt message to remove the current node.
         """
         self.zeromq_server.stop()
-        self.mqtt_server.remove_node(network_utils.get_own_ip())
+        self.mqtt_server.remove_node(self.node_identity.get_ip())
         self.mqtt_server.stop()
         self.api_server.stop()
 
     def after_connect_callback(self):
         """
         Will be called after the MQTTServer has established a connection to the broker.
-        Send out a request to fetch the ip from all existing nodes.
+        Subscribes to the snapshots for this node and sends out a request to fetch the ip from all existing nodes.
         """
-        self.mqtt_server.publish_node_request(network_utils.get_own_ip())
+        own_ip = self.node_identity.get_ip()
+        self.mqtt_server.subscribe_nodes_snapshot(own_ip)
+        self.mqtt_server.publish_node_request(own_ip)
+
+    def handle_ip_change(self, change):
+        """
+        Will be called if the ip of the node has changed.
+        Announces the change together with the node id, so the other nodes rename the node instead of removing it and
+        rescheduling its images. The current ip is announced as well.
+
+        :param change: dict with the ``previous`` and the ``current`` ip of the node
+        """
+        self.mqtt_server.publish_ip_change(node_id=self.node_identity.get_node_id(), previous=change['previous'],
+                                           current=change['current'])
+        self.mqtt_server.subscribe_nodes_snapshot(change['current'])
+        self.mqtt_server.publish_new_node(change['current'])
 
     def __nodes_request_callback(self, client, userdata, message):
         """
         Will be called if a request to fetch the ip from all existing nodes comes in.
-        Send out the ip of the node.
+        The designated responder sends a snapshot with all known nodes to the requesting node. All other nodes send out
+        their own ip after a random delay, but only if the request was not answered in the meantime.
 
         :param client:     the client instance for this callback
         :param userdata:   the private user data as set in Client() or userdata_set()
         :param message:    the data which was send
         """
-        self.mqtt_server.publish_new_node(network_utils.get_own_ip())
+        requester_ip = message.payload.decode('utf-8')
+        own_ip = self.node_identity.get_ip()
+        if requester_ip == own_ip:
+            return
+
+        known_ips = [node['ip'] for node in self.nodes_repository.all()]
+        if self.node_announcer.is_designated_responder(own_ip, requester_ip, known_ips):
+            nodes = sorted(set(known_ips) | {own_ip, requester_ip})
+            self.mqtt_server.publish_nodes_snapshot(ip=own_ip, requester_ip=requester_ip, nodes=nodes)
+            return
+
+        reply_timer = threading.Timer(self.node_announcer.reply_delay(), self.__announce_node,
+                                      args=(own_ip, requester_ip, time()))
+        reply_timer.daemon = True
+        reply_timer.start()
+
+    def __announce_node(self, own_ip, requester_ip, requested_at):
+        """
+        Sends out the ip of the node, if the request was not answered in the meantime.
+
+        :param own_ip: the ip of the node
+        :param requester_ip: the ip of the node which sent the nodes request
+        :param requested_at: the time of the request
+        """
+        if self.node_announcer.should_reply(own_ip, requester_ip, since=requested_at):
+            self.mqtt_server.publish_new_node(own_ip)
+
+    def publish_heartbeat(self):
+        """
+        Sends out a liveness beacon of this node.
+        """
+        self.mqtt_server.publish_heartbeat(self.node_identity.get_ip())
 
     def deploy_image(self, image):
         """
@@ -105,5 +168,26 @@ class CommunicationManager(object):
 
         :param image: the image instance to be terminated
         :type image: motey.models.image.Image
+        :return: True if the node answered in time, otherwise False
+        """
+        return self.zeromq_server.terminate_image(image)
+
+    def prepull_image(self, image):
+        """
+        Facades the ``ZeroMQServer.prepull_image()`` method.
+        Will request the node stored in the ``Image.node`` attribute to pull the image in the background.
+
+        :param image: the image to be pulled
+        :type image: motey.models.image.Image
+        """
+        self.zeromq_server.prepull_image(image)
+
+    def publish_capabilities_delta(self, added, removed):
+        """
+        Facades the ``MQTTServer.publish_capabilities_delta()`` method.
+        Will publish the capabilities which were changed on this node to all other nodes.
+
+        :param added: list of the added capabilities as dicts with ``capability`` and ``capability_type``.
+        :param removed: list of the removed capabilities as dicts with ``capability`` and ``capability_type``.
         """
-        self.zeromq_server.terminate_image(image)
+        self.mqtt_server.publish_capabilities_delta(ip=self.node_identity.get_ip(), added=added, removed=removed)
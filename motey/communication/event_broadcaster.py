@@ -0,0 +1,143 @@
+import itertools
+import json
+import queue
+import threading
+
+
+class EventBroadcaster(object):
+    """
+    Forwards the change events of the repositories to all clients which are connected to the event stream endpoint.
+    Every client has its own bounded queue. If a client is too slow to consume its events, the oldest events will be
+    dropped, so a single client can not block the repositories.
+    The events are grouped into the topics ``services``, ``nodes`` and ``capabilities``.
+    """
+
+    TOPICS = ('services', 'nodes', 'capabilities')
+
+    def __init__(self, logger, service_repository, nodes_repository, capability_repository, queue_size=100,
+                 keepalive_interval=15):
+        """
+        Constructor of the EventBroadcaster.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param service_repository: DI injected
+        :type service_repository: motey.repositories.service_repository.ServiceRepository
+        :param nodes_repository: DI injected
+        :type nodes_repository: motey.repositories.nodes_repository.NodesRepository
+        :param capability_repository: DI injected
+        :type capability_repository: motey.repositories.capability_repository.CapabilityRepository
+        :param queue_size: the maximum number of pending events of a client. Default is ``100``.
+        :param keepalive_interval: the interval in seconds after a keepalive comment will be sent to an idle client.
+                                   Default is ``15``.
+        """
+        self.logger = logger
+        self.repositories = {
+            'services': service_repository,
+            'nodes': nodes_repository,
+            'capabilities': capability_repository
+        }
+        self.queue_size = queue_size
+        self.keepalive_interval = keepalive_interval
+        self.clients = []
+        self.lock = threading.Lock()
+        self.event_ids = itertools.count(1)
+        self.subscriptions = []
+
+    def start(self):
+        """
+        Subscribes to the change streams of the repositories.
+        """
+        for topic, repository in self.repositories.items():
+            self.subscriptions.append(repository.change_stream.subscribe(
+                lambda event, topic=topic: self.publish(topic, event)))
+
+    def stop(self):
+        """
+        Disposes the subscriptions and closes the streams of all connected clients.
+        """
+        for subscription in self.subscriptions:
+            subscription.dispose()
+        self.subscriptions = []
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            self.__put(client, None)
+
+    def register(self, topics=None):
+        """
+        Registers a new client.
+
+        :param topics: list of the topics the client is interested in. Default is None, which means all topics.
+        :return: the client which should be passed to ``stream``
+        """
+        client = {
+            'topics': set(topics) if topics else set(self.TOPICS),
+            'queue': queue.Queue(maxsize=self.queue_size)
+        }
+        with self.lock:
+            self.clients.append(client)
+        return client
+
+    def unregister(self, client):
+        """
+        Removes a client. No events will be sent to the client afterwards.
+
+        :param client: the client to be removed
+        """
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def publish(self, topic, event):
+        """
+        Sends an event to all clients which are interested in the topic.
+
+        :param topic: the topic of the event
+        :param event: dict with the ``event`` name and the related ``data``
+        """
+        message = 'id: %s\nevent: %s\ndata: %s\n\n' % (next(self.event_ids), event['event'], json.dumps(event['data']))
+        with self.lock:
+            clients = [client for client in self.clients if topic in client['topics']]
+        for client in clients:
+            self.__put(client, message)
+
+    def stream(self, client):
+        """
+        Generator which yields the server-sent events of a client until the broadcaster is stopped or the client
+        disconnects. A keepalive comment will be sent if there are no events for ``keepalive_interval`` seconds.
+
+        :param client: the registered client
+        :return: generator with the formatted server-sent events
+        """
+        try:
+            yield 'retry: 1000\n\n'
+            while True:
+                try:
+                    message = client['queue'].get(timeout=self.keepalive_interval)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self.unregister(client)
+
+    def __put(self, client, message):
+        """
+        Adds a message to the queue of a client.
+        If the queue is full, the oldest message will be dropped.
+
+        :param client: the client
+        :param message: the message to be added
+        """
+        while True:
+            try:
+                client['queue'].put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    client['queue'].get_nowait()
+                except queue.Empty:
+                    pass
@@ -1,16 +1,36 @@
+import json
 import threading
+from time import sleep
 
 import paho.mqtt.client as mqtt
+from rx.subjects import Subject
+
+from motey.utils import metrics
+
+MESSAGES_PUBLISHED = metrics.registry.counter('motey_mqtt_messages_published', 'Number of published MQTT messages',
+                                              ['route'])
+MESSAGES_RECEIVED = metrics.registry.counter('motey_mqtt_messages_received', 'Number of received MQTT messages',
+                                             ['route'])
 
 
 class MQTTServer(object):
     """
     MQTT server to register and unregister adjacent fog nodes.
     The webserver runs in a separate thread and will not block the main thread.
+
+    Every route defines the QoS level which is used to publish and subscribe its messages. Messages of routes which
+    are marked as ``batchable`` can be collected for ``batch_interval`` seconds and sent out as a single message on
+    the ``batch`` route. The receiving nodes unpack the batch and handle every message with the callback of its route.
     """
 
-    def __init__(self, logger, nodes_repository, host='127.0.0.1', port=1883, username=None, password=None,
-                 keepalive=60):
+    capabilities_delta_stream = Subject()
+    # emits the ip of a node which was announced by a register message
+    node_announcement_stream = Subject()
+    # emits the ip of a node whose nodes request was answered with a snapshot
+    nodes_answered_stream = Subject()
+
+    def __init__(self, logger, nodes_repository, node_identity, host='127.0.0.1', port=1883, username=None, password=None,
+                 keepalive=60, client_id='', clean_session=True, max_inflight=20, batch_interval=0, batch_size=50):
         """
         Constructor ot the MQTT server.
 
@@ -18,6 +38,8 @@ class MQTTServer(object):
         :type logger: motey.utils.logger.Logger
         :param nodes_repository: DI injected
         :type nodes_repository: motey.repositories.nodes_repository.NodesRepository
+        :param node_identity: DI injected
+        :type node_identity: motey.utils.node_identity.NodeIdentity
         :param host: The host of the MQTT broker. Default is ``'127.0.0.1'``.
         :param port: The port of the MQTT broker. Default is ``1883``.
         :param username: Username to authenticate on the MQTT broker. Default is None.
@@ -25,21 +47,71 @@ class MQTTServer(object):
         :param keepalive: Maximum period in seconds between communications with the
         broker. If no other messages are being exchanged, this controls the
         rate at which the client will send ping messages to the broker.
+        :param client_id: The client id which is used to connect to the broker. Default is ``''``, which will use a
+        random id. A persistent session needs a stable id, so the id ``motey-<node id>`` is used in this case.
+        :param clean_session: If False, the broker keeps the subscriptions and queues the QoS 1 and 2 messages while
+        the node is disconnected. Default is True.
+        :param max_inflight: Maximum number of QoS 1 and 2 messages which can be in flight at once. Default is ``20``.
+        :param batch_interval: The time in seconds the messages of batchable routes are collected before they are
+        sent out as a single message. Default is ``0``, which disables the batching.
+        :param batch_size: Maximum number of messages in a batch. A full batch is sent out immediately.
+        Default is ``50``.
         """
 
         # Routes for registering and unregistering nodes
         self.ROUTES = {
             'register_node': {
                 'topic': 'motey/v1/register',
-                'callback': self.handle_register_node
+                'callback': self.handle_register_node,
+                'qos': 1,
+                'batchable': True
             },
             'remove_node': {
                 'topic': 'motey/v1/remove',
-                'callback': self.handle_nodes_removal
+                'callback': self.handle_nodes_removal,
+                'qos': 1,
+                'batchable': True
+            },
+            'ip_change': {
+                'topic': 'motey/v1/ip_change',
+                'callback': self.handle_ip_change,
+                'qos': 1,
+                'batchable': True
             },
             'nodes_request': {
                 'topic': 'motey/v1/nodes_request',
-                'callback': self.handle_nodes_request
+                'callback': self.handle_nodes_request,
+                'qos': 1
+            },
+            'capabilities_delta': {
+                'topic': 'motey/v1/capabilities_delta',
+                'callback': self.handle_capabilities_delta,
+                'qos': 1,
+                'batchable': True
+            },
+            'nodes_snapshot': {
+                # every node only subscribes to the snapshots which are addressed to itself
+                'topic': 'motey/v1/nodes_snapshot/+',
+                'callback': self.handle_nodes_snapshot,
+                'qos': 1,
+                'subscribe': False
+            },
+            'nodes_answered': {
+                # a lost notice only causes some additional replies
+                'topic': 'motey/v1/nodes_answered',
+                'callback': self.handle_nodes_answered,
+                'qos': 0
+            },
+            'heartbeat': {
+                # a lost heartbeat is tolerated by the heartbeat timeout
+                'topic': 'motey/v1/heartbeat',
+                'callback': self.handle_heartbeat,
+                'qos': 0
+            },
+            'batch': {
+                'topic': 'motey/v1/batch',
+                'callback': self.handle_batch,
+                'qos': 1
             },
         }
 
@@ -50,7 +122,18 @@ class MQTTServer(object):
         self.password = password
         self.logger = logger
         self.nodes_repository = nodes_repository
-        self.client = mqtt.Client()
+        self.clean_session = clean_session
+        self.client_id = client_id
+        if not clean_session and not client_id:
+            self.client_id = 'motey-%s' % node_identity.get_node_id()
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self.pending_messages = []
+        self.batch_lock = threading.Lock()
+        self.pending_event = threading.Event()
+        self.stopped = False
+        self.client = mqtt.Client(client_id=self.client_id, clean_session=clean_session)
+        self.client.max_inflight_messages_set(max_inflight)
         if username and password:
             self.client.username_pw_set(username=self.username, password=self.password)
         self.client.on_connect = self.handle_on_connect
@@ -60,6 +143,8 @@ class MQTTServer(object):
         self.nodes_request_callback = None
         self.run_server_thread = threading.Thread(target=self.run_server, args=())
         self.run_server_thread.daemon = True
+        self.batch_thread = threading.Thread(target=self.__run_batch_thread, args=())
+        self.batch_thread.daemon = True
 
     @property
     def after_connect(self):
@@ -75,13 +160,16 @@ class MQTTServer(object):
         """
         for key, value in self.ROUTES.items():
             if value['callback']:
-                self.client.message_callback_add(sub=value['topic'], callback=value['callback'])
+                self.client.message_callback_add(sub=value['topic'],
+                                                 callback=self.__count_received(key, value['callback']))
 
     def start(self):
         """
        Starts the execution thread.
        """
         self.run_server_thread.start()
+        if self.batch_interval > 0:
+            self.batch_thread.start()
 
     def run_server(self):
         """
@@ -98,10 +186,51 @@ class MQTTServer(object):
     def stop(self):
         """
         Stops the MQTT server and add an info the logs, that the server is stopped.
+        Pending batched messages will be sent out before.
         """
+        self.stopped = True
+        self.pending_event.set()
+        self.flush()
         self.client.loop_stop()
         self.logger.info('MQTT server stopped')
 
+    def publish(self, route, payload, topic=None):
+        """
+        Publish a message with the QoS level of the route.
+        Messages of batchable routes will be queued if the batching is enabled.
+
+        :param route: the key of the route in ``ROUTES``
+        :param payload: the payload of the message
+        :type payload: str
+        :param topic: optional topic which overrides the topic of the route. Default is None.
+        """
+        settings = self.ROUTES[route]
+        if self.batch_interval > 0 and settings.get('batchable') and not self.stopped:
+            with self.batch_lock:
+                self.pending_messages.append({'route': route, 'payload': payload})
+                full = len(self.pending_messages) >= self.batch_size
+            if full:
+                self.flush()
+            else:
+                self.pending_event.set()
+            return
+        self.client.publish(topic=topic or settings['topic'], payload=payload, qos=settings.get('qos', 0))
+        MESSAGES_PUBLISHED.labels(route=route).inc()
+
+    def flush(self):
+        """
+        Sends out all queued messages as a single message on the ``batch`` route.
+        The batch is sent with the highest QoS level of the contained messages.
+        """
+        with self.batch_lock:
+            messages, self.pending_messages = self.pending_messages, []
+            self.pending_event.clear()
+        if not messages:
+            return
+        qos = max(self.ROUTES[message['route']].get('qos', 0) for message in messages)
+        self.client.publish(topic=self.ROUTES['batch']['topic'], payload=json.dumps(messages), qos=qos)
+        MESSAGES_PUBLISHED.labels(route='batch').inc()
+
     def publish_new_node(self, ip=None):
         """
         Publish the info that a new node is available to the all subscribers.
@@ -110,7 +239,7 @@ class MQTTServer(object):
         :param ip: The IP address of the new node. Default is None.
         """
         if ip:
-            self.client.publish(topic=self.ROUTES['register_node']['topic'], payload=ip)
+            self.publish('register_node', ip)
 
     def publish_node_request(self, ip=None):
         """
@@ -119,7 +248,33 @@ class MQTTServer(object):
         :param ip: the own ip to let the other nodes know where the request cames from.
         """
         if ip:
-            self.client.publish(topic=self.ROUTES['nodes_request']['topic'], payload=ip)
+            self.publish('nodes_request', ip)
+
+    def subscribe_nodes_snapshot(self, ip=None):
+        """
+        Subscribe to the snapshots which are addressed to a node.
+        If the ``ip`` is none, nothing will be subscribed.
+
+        :param ip: The IP address of the own node. Default is None.
+        """
+        if ip:
+            route = self.ROUTES['nodes_snapshot']
+            self.client.subscribe(topic=route['topic'].replace('+', ip), qos=route['qos'])
+
+    def publish_nodes_snapshot(self, ip=None, requester_ip=None, nodes=None):
+        """
+        Publish a snapshot with all known nodes as answer to a nodes request.
+        The snapshot is only sent to the requesting node. All other nodes are only informed that the request was
+        answered. If the ``ip`` or the ``requester_ip`` is none, nothing will be send.
+
+        :param ip: The IP address of the node which sends the snapshot. Default is None.
+        :param requester_ip: The IP address of the node which sent the nodes request. Default is None.
+        :param nodes: list with the IP addresses of all known nodes.
+        """
+        if ip and requester_ip:
+            self.publish('nodes_snapshot', json.dumps({'ip': ip, 'nodes': nodes or []}),
+                         topic=self.ROUTES['nodes_snapshot']['topic'].replace('+', requester_ip))
+            self.publish('nodes_answered', requester_ip)
 
     def remove_node(self, ip=None):
         """
@@ -129,7 +284,42 @@ class MQTTServer(object):
         :param ip: The IP address of the new node. Default is None.
         """
         if ip:
-            self.client.publish(topic=self.ROUTES['remove_node']['topic'], payload=ip)
+            self.publish('remove_node', ip)
+
+    def publish_ip_change(self, node_id=None, previous=None, current=None):
+        """
+        Publish the new ip of a node together with its previous ip and its stable node id.
+        If one of the values is none, nothing will be send.
+
+        :param node_id: The stable id of the node. Default is None.
+        :param previous: The previous IP address of the node. Default is None.
+        :param current: The current IP address of the node. Default is None.
+        """
+        if node_id and previous and current:
+            self.publish('ip_change', json.dumps({'node_id': node_id, 'previous': previous, 'current': current}))
+
+    def publish_heartbeat(self, ip=None):
+        """
+        Publish a liveness beacon of a node.
+        If the ``ip`` is none, nothing will be send.
+
+        :param ip: The IP address of the node. Default is None.
+        """
+        if ip:
+            self.publish('heartbeat', ip)
+
+    def publish_capabilities_delta(self, ip=None, added=None, removed=None):
+        """
+        Publish the capabilities which were added and removed on a node in a single message.
+        If the ``ip`` is none or nothing has been changed, nothing will be send.
+
+        :param ip: The IP address of the node where the capabilities were changed. Default is None.
+        :param added: list of the added capabilities as dicts with ``capability`` and ``capability_type``.
+        :param removed: list of the removed capabilities as dicts with ``capability`` and ``capability_type``.
+        """
+        if ip and (added or removed):
+            payload = json.dumps({'ip': ip, 'added': added or [], 'removed': removed or []})
+            self.publish('capabilities_delta', payload)
 
     def handle_on_connect(self, client, userdata, flags, resultcode):
         """
@@ -163,24 +353,68 @@ class MQTTServer(object):
             self.logger.info("Connection to the broker failed")
         else:
             for key, value in self.ROUTES.items():
-                client.subscribe(topic=value['topic'])
+                if value.get('subscribe', True):
+                    client.subscribe(topic=value['topic'], qos=value.get('qos', 0))
         if self._after_connect:
             self._after_connect()
 
     def handle_nodes_request(self, client, userdata, message):
         """
         Define the node request callback implementation.
-        Will execute the callback of the request to fetch the ip from all existing nodes.
+        Adds the requesting node to the ``NodesRepository`` and will execute the callback of the request to fetch the
+        ip from all existing nodes.
 
         :param client:     the client instance for this callback
         :param userdata:   the private user data as set in Client() or userdata_set()
         :param message:    the data which was send
         """
+        self.nodes_repository.add(ip=message.payload.decode('utf-8'))
         if self.nodes_request_callback:
             self.nodes_request_callback(client, userdata, message)
 
     def handle_nodes_removal(self, client, userdata, message):
-        pass
+        """
+        Define the remove node callback implementation.
+        Removes the node from the ``NodesRepository``.
+
+        :param client:     the client instance for this callback
+        :param userdata:   the private user data as set in Client() or userdata_set()
+        :param message:    the data which was send
+        """
+        removed_node = message.payload.decode('utf-8')
+        self.nodes_repository.remove(ip=removed_node)
+
+    def handle_ip_change(self, client, userdata, message):
+        """
+        Define the ip change callback implementation.
+        Renames the node in the ``NodesRepository``, so the node is not removed and its images are not rescheduled.
+
+        :param client:     the client instance for this callback
+        :param userdata:   the private user data as set in Client() or userdata_set()
+        :param message:    the data which was send
+        """
+        try:
+            change = json.loads(message.payload.decode('utf-8'))
+            previous, current = change['previous'], change['current']
+            if not isinstance(previous, str) or not isinstance(current, str):
+                raise TypeError()
+        except (UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError):
+            self.logger.error('received an invalid ip change')
+            return
+        self.logger.info('Node %s changed its ip from %s to %s' % (change.get('node_id'), previous, current))
+        self.nodes_repository.rename(previous=previous, current=current)
+
+    def handle_heartbeat(self, client, userdata, message):
+        """
+        Define the heartbeat callback implementation.
+        Marks the node as seen in the ``NodesRepository``. Unknown nodes will be added.
+
+        :param client:     the client instance for this callback
+        :param userdata:   the private user data as set in Client() or userdata_set()
+        :param message:    the data which was send
+        """
+        node = message.payload.decode('utf-8')
+        self.nodes_repository.touch(ip=node)
 
     def handle_register_node(self, client, userdata, message):
         """
@@ -193,6 +427,77 @@ class MQTTServer(object):
                 """
         new_node = message.payload.decode('utf-8')
         self.nodes_repository.add(ip=new_node)
+        self.node_announcement_stream.on_next(new_node)
+
+    def handle_nodes_snapshot(self, client, userdata, message):
+        """
+        Define the nodes snapshot callback implementation.
+        Adds all nodes of the snapshot to the ``NodesRepository`` with a single write.
+
+        :param client:     the client instance for this callback
+        :param userdata:   the private user data as set in Client() or userdata_set()
+        :param message:    the data which was send
+        """
+        try:
+            snapshot = json.loads(message.payload.decode('utf-8'))
+            nodes = [node for node in snapshot['nodes'] if isinstance(node, str)]
+        except (UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError):
+            self.logger.error('received an invalid nodes snapshot')
+            return
+        self.nodes_repository.add_multiple(nodes)
+
+    def handle_nodes_answered(self, client, userdata, message):
+        """
+        Define the nodes answered callback implementation.
+        Emits the ip of the node whose nodes request was answered on the ``nodes_answered_stream``.
+
+        :param client:     the client instance for this callback
+        :param userdata:   the private user data as set in Client() or userdata_set()
+        :param message:    the data which was send
+        """
+        self.nodes_answered_stream.on_next(message.payload.decode('utf-8'))
+
+    def handle_batch(self, client, userdata, message):
+        """
+        Define the batch callback implementation.
+        Unpacks the batch and executes the callback of the route of every message. Messages of routes which are not
+        batchable are ignored.
+
+        :param client:     the client instance for this callback
+        :param userdata:   the private user data as set in Client() or userdata_set()
+        :param message:    the data which was send
+        """
+        try:
+            messages = json.loads(message.payload.decode('utf-8'))
+            if not isinstance(messages, list):
+                raise TypeError()
+        except (UnicodeDecodeError, json.JSONDecodeError, TypeError):
+            self.logger.error('received an invalid batch')
+            return
+        for entry in messages:
+            route = self.ROUTES.get(entry.get('route')) if isinstance(entry, dict) else None
+            if not route or not route.get('batchable') or not isinstance(entry.get('payload'), str):
+                self.logger.error('received an invalid message in a batch')
+                continue
+            unpacked_message = mqtt.MQTTMessage(topic=route['topic'].encode('utf-8'))
+            unpacked_message.payload = entry['payload'].encode('utf-8')
+            route['callback'](client, userdata, unpacked_message)
+
+    def handle_capabilities_delta(self, client, userdata, message):
+        """
+        Define the capabilities delta callback implementation.
+        Emits the decoded delta on the ``capabilities_delta_stream``.
+
+        :param client:     the client instance for this callback
+        :param userdata:   the private user data as set in Client() or userdata_set()
+        :param message:    the data which was send
+        """
+        try:
+            delta = json.loads(message.payload.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            self.logger.error('received an invalid capabilities delta')
+            return
+        self.capabilities_delta_stream.on_next(delta)
 
     def handle_on_disconnect(self, client, userdata, resultcode):
         """
@@ -203,3 +508,33 @@ class MQTTServer(object):
         :param resultcode: the connection result
         """
         self.logger.info("Disconnected from MQTT broker " + str(resultcode))
+
+    def __count_received(self, route, callback):
+        """
+        Wraps a route callback to count the received messages of the route.
+
+        :param route: the key of the route in ``ROUTES``
+        :param callback: the callback of the route
+        :return: the wrapped callback
+        """
+        counter = MESSAGES_RECEIVED.labels(route=route)
+
+        def counting_callback(client, userdata, message):
+            counter.inc()
+            callback(client, userdata, message)
+        return counting_callback
+
+    def __run_batch_thread(self):
+        """
+        Private function which is be executed after the start method is called.
+        The method waits for queued messages and sends them out after the batch interval.
+        """
+        while not self.stopped:
+            self.pending_event.wait()
+            if self.stopped:
+                break
+            sleep(self.batch_interval)
+            try:
+                self.flush()
+            except Exception as exception:
+                self.logger.error('MQTT server > could not send batch: %s' % exception)
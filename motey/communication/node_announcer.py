@@ -0,0 +1,109 @@
+import ipaddress
+import random
+import threading
+from time import time
+
+
+class NodeAnnouncer(object):
+    """
+    Decides how a node answers the nodes request of a joining node.
+    Instead of letting every node answer at once, a single designated node, the known node with the lowest ip, answers
+    immediately with a snapshot of all known nodes. All other nodes only announce themselves after a random delay and
+    only if the request was not answered in the meantime, neither by a snapshot nor by an own announcement for
+    another joining node. So the other nodes only answer if the designated node is not available.
+    Announcements before the request are not taken into account, because the joining node may have missed them.
+    """
+
+    def __init__(self, reply_jitter=2.0, clock=time, random_generator=None):
+        """
+        Constructor of the NodeAnnouncer.
+
+        :param reply_jitter: the maximum delay in seconds of the announcement of a node which is not the designated
+                             responder. Default is ``2.0``.
+        :param clock: function which returns the current time. Default is ``time.time``.
+        :param random_generator: optional ``random.Random`` instance. Default is None, which will create a new one.
+        """
+        self.reply_jitter = reply_jitter
+        self.clock = clock
+        self.random = random_generator if random_generator else random.Random()
+        self.announcements = {}
+        self.answers = {}
+        self.lock = threading.Lock()
+
+    def record_announcement(self, ip, now=None):
+        """
+        Stores that a node was announced.
+
+        :param ip: the ip of the announced node
+        :param now: the current time. Default is None, which will use the clock.
+        """
+        with self.lock:
+            self.announcements[ip] = self.clock() if now is None else now
+
+    def record_answer(self, requester_ip, now=None):
+        """
+        Stores that the nodes request of a node was answered with a snapshot.
+
+        :param requester_ip: the ip of the node which sent the nodes request
+        :param now: the current time. Default is None, which will use the clock.
+        """
+        with self.lock:
+            self.answers[requester_ip] = self.clock() if now is None else now
+
+    def should_reply(self, own_ip, requester_ip, since):
+        """
+        Checks if a node should still announce itself for a nodes request.
+
+        :param own_ip: the ip of the own node
+        :param requester_ip: the ip of the node which sent the nodes request
+        :param since: the time of the request
+        :return: False if the request was answered or the own node was announced since the request, otherwise True
+        """
+        with self.lock:
+            announced_at = self.announcements.get(own_ip)
+            answered_at = self.answers.get(requester_ip)
+        return not any(timestamp is not None and timestamp >= since for timestamp in (announced_at, answered_at))
+
+    def is_designated_responder(self, own_ip, requester_ip, known_ips):
+        """
+        Checks if the own node should answer a nodes request with a snapshot.
+
+        :param own_ip: the ip of the own node
+        :param requester_ip: the ip of the node which sent the request
+        :param known_ips: the ips of all known nodes
+        :return: True if the own node is the known node with the lowest ip, otherwise False
+        """
+        return self.designated_responder(requester_ip, set(known_ips) | {own_ip}) == own_ip
+
+    def designated_responder(self, requester_ip, known_ips):
+        """
+        Returns the node which should answer a nodes request with a snapshot.
+
+        :param requester_ip: the ip of the node which sent the request
+        :param known_ips: the ips of all known nodes
+        :return: the known node with the lowest ip or None if there is no other node
+        """
+        candidates = set(known_ips)
+        candidates.discard(requester_ip)
+        return min(candidates, key=self.__ip_key) if candidates else None
+
+    def reply_delay(self):
+        """
+        Returns the random delay of an announcement.
+        The delay is at least a quarter of the jitter, which leaves the designated responder time to answer.
+
+        :return: the delay in seconds
+        """
+        return self.random.uniform(self.reply_jitter / 4, self.reply_jitter)
+
+    def __ip_key(self, ip):
+        """
+        Returns the sort key of an ip. Addresses which can not be parsed are sorted after the valid ones.
+
+        :param ip: the ip to be sorted
+        :return: the sort key
+        """
+        try:
+            return 0, int(ipaddress.ip_address(ip)), ip
+        except ValueError:
+            return 1, 0, ip
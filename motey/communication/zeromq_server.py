@@ -6,7 +6,14 @@ from rx.subjects import Subject
 
 from motey.configuration.configreader import config
 from motey.models.image import Image
+from motey.models import model
 from motey.models.image_state import ImageState
+from motey.utils import metrics, tracing
+
+REPLY_DURATION = metrics.registry.histogram('motey_zeromq_reply_duration_seconds',
+                                            'Time to handle a ZeroMQ request of another node', ['endpoint'])
+REQUEST_DURATION = metrics.registry.histogram('motey_zeromq_request_duration_seconds',
+                                              'Time until another node replied to a ZeroMQ request', ['endpoint'])
 
 
 class ZeroMQServer(object):
@@ -17,8 +24,10 @@ class ZeroMQServer(object):
 
     add_capability_event_stream = Subject()
     remove_capability_event_stream = Subject()
+    prepull_image_stream = Subject()
 
-    def __init__(self, logger, valmanager, capability_repository):
+    def __init__(self, logger, valmanager, capability_repository, request_timeout=10, deploy_timeout=300,
+                 prepull_timeout=1):
         """
         Constructor ot the ZeroMQ server.
 
@@ -26,16 +35,25 @@ class ZeroMQServer(object):
         :type logger: motey.utils.logger.Logger
         :param valmanager: DI injected
         :type valmanager: motey.val.valmanager.VALManager
+        :param request_timeout: the time in seconds to wait for the reply of another node. Default is ``10``.
+        :param deploy_timeout: the time in seconds to wait until another node has deployed an image, which includes
+                               pulling the image. Default is ``300``.
+        :param prepull_timeout: the maximum time in seconds to hand over a pre pull request to another node. Default
+                                is ``1``.
         """
         self.logger = logger
         self.valmanager = valmanager
         self.capability_repository = capability_repository
+        self.request_timeout = request_timeout
+        self.deploy_timeout = deploy_timeout
+        self.prepull_timeout = prepull_timeout
         self.context = zmq.Context()
         self.capabilities_subscriber = self.context.socket(zmq.SUB)
         self.capabilities_replier = self.context.socket(zmq.REP)
         self.deploy_image_replier = self.context.socket(zmq.REP)
         self.image_status_replier = self.context.socket(zmq.REP)
         self.image_terminate_replier = self.context.socket(zmq.REP)
+        self.prepull_image_replier = self.context.socket(zmq.REP)
 
         self.capabilities_subscriber_thread = threading.Thread(target=self.__run_capabilities_subscriber_thread, args=())
         self.capabilities_subscriber_thread.daemon = True
@@ -52,31 +70,39 @@ class ZeroMQServer(object):
         self.image_terminate_thread = threading.Thread(target=self.__run_image_termiate_thread, args=())
         self.image_terminate_thread.daemon = True
 
+        self.prepull_image_replier_thread = threading.Thread(target=self.__run_prepull_image_replier_thread, args=())
+        self.prepull_image_replier_thread.daemon = True
+
         self.stopped = False
 
     def start(self):
         """
         Starts the listening on a given port.
+        The repliers are bound to the ``bind_address`` of the ``NODE`` section or to all interfaces if it is empty.
         This method will be executed on a separate thread.
         """
 
+        bind_address = config['NODE']['bind_address'] or '*'
         self.capabilities_subscriber.bind('ipc://%s' % config['ZEROMQ']['capability_engine_ipc_path'])
         self.capabilities_subscriber.setsockopt_string(zmq.SUBSCRIBE, 'add_capability')
         self.capabilities_subscriber.setsockopt_string(zmq.SUBSCRIBE, 'remove_capability')
         self.capabilities_subscriber_thread.start()
 
-        self.capabilities_replier.bind('tcp://*:%s' % config['ZEROMQ']['capabilities_replier'])
+        self.capabilities_replier.bind('tcp://%s:%s' % (bind_address, config['ZEROMQ']['capabilities_replier']))
         self.capabilities_replier_thread.start()
 
-        self.deploy_image_replier.bind('tcp://*:%s' % config['ZEROMQ']['deploy_image_replier'])
+        self.deploy_image_replier.bind('tcp://%s:%s' % (bind_address, config['ZEROMQ']['deploy_image_replier']))
         self.deploy_image_replier_thread.start()
 
-        self.image_status_replier.bind('tcp://*:%s' % config['ZEROMQ']['image_status_replier'])
+        self.image_status_replier.bind('tcp://%s:%s' % (bind_address, config['ZEROMQ']['image_status_replier']))
         self.image_status_replier_thread.start()
 
-        self.image_terminate_replier.bind('tcp://*:%s' % config['ZEROMQ']['image_terminate_replier'])
+        self.image_terminate_replier.bind('tcp://%s:%s' % (bind_address, config['ZEROMQ']['image_terminate_replier']))
         self.image_terminate_thread.start()
 
+        self.prepull_image_replier.bind('tcp://%s:%s' % (bind_address, config['ZEROMQ']['prepull_image_replier']))
+        self.prepull_image_replier_thread.start()
+
         self.logger.info('ZeroMQ server started')
 
     def stop(self):
@@ -110,27 +136,38 @@ class ZeroMQServer(object):
         """
 
         while not self.stopped:
-            result = self.capabilities_replier.recv_string()
-            self.capabilities_replier.send_string(json.dumps(self.capability_repository.all()))
+            result = self.capabilities_replier.recv()
+            parent = None
+            try:
+                parent = tracing.tracer.extract(model.decode(result))
+            except ValueError:
+                # nodes without tracing send an empty request
+                pass
+            with REPLY_DURATION.labels(endpoint='capabilities').time(), \
+                    tracing.tracer.span('zeromq.reply.capabilities', parent=parent):
+                reply = json.dumps(self.capability_repository.all())
+            self.capabilities_replier.send_string(reply)
 
     def __run_deploy_image_replier_thread(self):
         """
         Private function which is be executed after the start method is called.
         The method will wait for an event where it is subscribed on.
-        After receiving an event the data will be parsed as JSON and validated.
+        After receiving an event the data will be decoded with the model codec and validated.
         Afterwards it will be used to instantiate an image instance.
         Finally it will send out the id of the instantiated instance or None if something went wrong.
         """
         while not self.stopped:
-            result = self.deploy_image_replier.recv_string()
+            result = self.deploy_image_replier.recv()
             image_id = None
-            try:
-                image_json = json.loads(result)
-                image = Image.transform(image_json)
-                if image:
-                    image_id = self.valmanager.instantiate(image=image)
-            except json.JSONDecodeError:
-                pass
+            with REPLY_DURATION.labels(endpoint='deploy_image').time():
+                try:
+                    image_json = model.decode(result)
+                    with tracing.tracer.span('zeromq.reply.deploy_image', parent=tracing.tracer.extract(image_json)):
+                        image = Image.transform(image_json)
+                        if image:
+                            image_id = self.valmanager.instantiate(image=image)
+                except ValueError:
+                    pass
             self.deploy_image_replier.send_string(image_id if image_id else '')
 
     def __run_image_status_replier_thread(self):
@@ -140,16 +177,18 @@ class ZeroMQServer(object):
         After receiving an event the ``ImageState`` of an image instance will be returned.
         """
         while not self.stopped:
-            result = self.image_status_replier.recv_string()
+            result = self.image_status_replier.recv()
             state = ImageState.ERROR
-            try:
-                image_json = json.loads(result)
-                image = Image.transform(image_json)
-                if image:
-                    state = self.valmanager.get_instance_state(image=image)
-            except json.JSONDecodeError:
-                state = ImageState.ERROR
-            self.image_status_replier.send_string(state)
+            with REPLY_DURATION.labels(endpoint='image_status').time():
+                try:
+                    image_json = model.decode(result)
+                    with tracing.tracer.span('zeromq.reply.image_status', parent=tracing.tracer.extract(image_json)):
+                        image = Image.transform(image_json)
+                        if image:
+                            state = self.valmanager.get_instance_state(image=image)
+                except ValueError:
+                    state = ImageState.ERROR
+            self.image_status_replier.send_string(str(state))
 
     def __run_image_termiate_thread(self):
         """
@@ -158,16 +197,40 @@ class ZeroMQServer(object):
         After receiving an event the image instance which matches the send id will be terminated.
         """
         while not self.stopped:
-            result = self.image_terminate_replier.recv_string()
-            try:
-                image_json = json.loads(result)
-                image = Image.transform(image_json)
-                if image:
-                    self.valmanager.terminate(image=image)
-            except json.JSONDecodeError:
-                pass
+            result = self.image_terminate_replier.recv()
+            with REPLY_DURATION.labels(endpoint='image_terminate').time():
+                try:
+                    image_json = model.decode(result)
+                    with tracing.tracer.span('zeromq.reply.image_terminate', parent=tracing.tracer.extract(image_json)):
+                        image = Image.transform(image_json)
+                        if image:
+                            self.valmanager.terminate(image=image)
+                except ValueError:
+                    pass
             self.image_terminate_replier.send_string('')
 
+    def __run_prepull_image_replier_thread(self):
+        """
+        Private function which is be executed after the start method is called.
+        The method will wait for an event where it is subscribed on.
+        After receiving an event the image will be passed to the ``prepull_image_stream``. The reply will be send
+        immediately and does not wait until the image is pulled.
+        """
+        while not self.stopped:
+            result = self.prepull_image_replier.recv()
+            with REPLY_DURATION.labels(endpoint='prepull_image').time():
+                try:
+                    image_json = model.decode(result)
+                    with tracing.tracer.span('zeromq.reply.prepull_image', parent=tracing.tracer.extract(image_json)):
+                        image = Image.transform(image_json)
+                        if image:
+                            self.prepull_image_stream.on_next(image)
+                except ValueError:
+                    pass
+            self.prepull_image_replier.send_string('')
+
+    @metrics.timed(REQUEST_DURATION, endpoint='capabilities')
+    @tracing.traced('zeromq.request.capabilities')
     def request_capabilities(self, ip):
         """
         Method to request all capabilities from another node.
@@ -175,23 +238,24 @@ class ZeroMQServer(object):
         After the request is send, the method will wait for the response.
 
         :param ip: the IP address of the node to request the capabilities
-        :return: the capabilities as a JSON object
+        :return: the capabilities as a JSON object or an empty list if the node did not answer in time
         """
 
         if not ip:
             return None
 
-        socket = self.context.socket(zmq.REQ)
-        socket.connect("tcp://%s:%s" % (ip, config['ZEROMQ']['capabilities_replier']))
-        socket.send_string("")
-        capabilities = socket.recv_string()
+        capabilities = self.__request(ip, config['ZEROMQ']['capabilities_replier'], tracing.tracer.inject({}))
         json_capabilities = []
+        if capabilities is None:
+            return json_capabilities
         try:
             json_capabilities = json.loads(capabilities)
         except json.JSONDecodeError:
             self.logger.error("Got invalid json from capability request")
         return json_capabilities
 
+    @metrics.timed(REQUEST_DURATION, endpoint='deploy_image')
+    @tracing.traced('zeromq.request.deploy_image')
     def deploy_image(self, image):
         """
         Will deploy an image to the node stored in the ``Image.node`` attribute.
@@ -204,12 +268,12 @@ class ZeroMQServer(object):
         if not image or not image.node:
             return None
 
-        socket = self.context.socket(zmq.REQ)
-        socket.connect("tcp://%s:%s" % (image.node, config['ZEROMQ']['deploy_image_replier']))
-        socket.send_string(json.dumps(dict(image)))
-        external_image_id = socket.recv_string()
-        return external_image_id
+        external_image_id = self.__request(image.node, config['ZEROMQ']['deploy_image_replier'],
+                                           tracing.tracer.inject(image.to_dict()), timeout=self.deploy_timeout)
+        return external_image_id or None
 
+    @metrics.timed(REQUEST_DURATION, endpoint='image_status')
+    @tracing.traced('zeromq.request.image_status')
     def request_image_status(self, image):
         """
         Request the status of an specific ``ImageState`` instance or ``ImageState.ERROR`` if something went
@@ -217,28 +281,84 @@ class ZeroMQServer(object):
 
         :param image: Image to be used to get the status.
         :type image: motey.models.image.Image
-        :return: the ``ImageState`` or ``ImageState.ERROR`` if something went wrong
+        :return: the ``ImageState``, ``ImageState.ERROR`` if something went wrong or None if the node did not answer
+                 in time
         """
         if not image or not image.id or not image.node:
             return None
 
-        socket = self.context.socket(zmq.REQ)
-        socket.connect("tcp://%s:%s" % (image.node, config['ZEROMQ']['image_status_replier']))
-        socket.send_string(json.dumps(dict(image)))
-        external_image_status = socket.recv_string()
-        return external_image_status
+        external_image_status = self.__request(image.node, config['ZEROMQ']['image_status_replier'],
+                                               tracing.tracer.inject(image.to_dict()))
+        if external_image_status is None:
+            return None
+        try:
+            return int(external_image_status)
+        except ValueError:
+            return ImageState.ERROR
 
+    @metrics.timed(REQUEST_DURATION, endpoint='image_terminate')
+    @tracing.traced('zeromq.request.image_terminate')
     def terminate_image(self, image):
         """
         Will terminate an image instance.
 
         :param image: the image instance to be terminated
         :type image: motey.models.image.Image
+        :return: True if the node answered in time, otherwise False
         """
         if not image or not image.id or not image.node:
+            return False
+
+        result = self.__request(image.node, config['ZEROMQ']['image_terminate_replier'],
+                                tracing.tracer.inject(image.to_dict()))
+        return result is not None
+
+    @metrics.timed(REQUEST_DURATION, endpoint='prepull_image')
+    @tracing.traced('zeromq.request.prepull_image')
+    def prepull_image(self, image):
+        """
+        Request the node stored in the ``Image.node`` attribute to pull the image in the background.
+        The request is fire and forget, the reply of the other node is not awaited. The method returns as soon as the
+        request is sent, but not later than ``prepull_timeout`` seconds, e.g. if the node is not available or does not
+        support pre pulls.
+
+        :param image: the image to be pulled
+        :type image: motey.models.image.Image
+        """
+        if not image or not image.node:
             return None
 
         socket = self.context.socket(zmq.REQ)
-        socket.connect("tcp://%s:%s" % (image.node, config['ZEROMQ']['image_terminate_replier']))
-        socket.send_string(json.dumps(dict(image)))
-        result = socket.recv_string()
+        try:
+            socket.connect("tcp://%s:%s" % (image.node, config['ZEROMQ']['prepull_image_replier']))
+            socket.send(model.encode(tracing.tracer.inject(image.to_dict())), zmq.NOBLOCK)
+        except zmq.ZMQError as zmqe:
+            self.logger.error('Pre pull request to node %s failed: %s' % (image.node, zmqe))
+        finally:
+            # the linger period bounds the time to flush the request
+            socket.close(linger=int(self.prepull_timeout * 1000))
+
+    def __request(self, ip, port, message, timeout=None):
+        """
+        Sends a request via the `ZeroMQ.REQ` pattern and waits for the reply.
+        The socket is closed afterwards without lingering, so a node which is not available does not block the
+        caller or the ZeroMQ context.
+
+        :param ip: the IP address of the node
+        :param port: the port of the replier
+        :param message: the message which will be encoded with the model codec, see ``motey.models.model.encode``
+        :param timeout: the time in seconds to wait for the reply. Default is the ``request_timeout``.
+        :return: the reply or None if the node did not answer in time
+        """
+        timeout = self.request_timeout if timeout is None else timeout
+        socket = self.context.socket(zmq.REQ)
+        socket.setsockopt(zmq.LINGER, 0)
+        try:
+            socket.connect("tcp://%s:%s" % (ip, port))
+            socket.send(model.encode(message))
+            if not socket.poll(timeout * 1000, zmq.POLLIN):
+                self.logger.error('Node %s did not answer within %s seconds on port %s' % (ip, timeout, port))
+                return None
+            return socket.recv_string()
+        finally:
+            socket.close(linger=0)
@@ -1,4 +1,8 @@
 import configparser
+import os
 
 config = configparser.ConfigParser()
 config.read('motey/configuration/config.ini')
+# a file with overrides of the default configuration, e.g. to run several nodes on one host
+if os.environ.get('MOTEY_CONFIG'):
+    config.read(os.environ['MOTEY_CONFIG'])
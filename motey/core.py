@@ -15,8 +15,10 @@ class Core(object):
     After it is started via self.start() it will be executed until self.stop() is executed.
     """
 
-    def __init__(self, logger, capability_repository, nodes_repository, valmanager, inter_node_orchestrator,
-                 communication_manager, capability_engine, as_daemon=True):
+    def __init__(self, logger, capability_repository, nodes_repository, valmanager, image_prepull_manager,
+                 inter_node_orchestrator, service_recovery, service_reconciler, communication_manager,
+                 capability_engine, membership_manager, heartbeat_monitor, profiler, slow_operation_recorder,
+                 as_daemon=True):
         """
         Constructor of the core.
 
@@ -28,12 +30,26 @@ class Core(object):
         :type nodes_repository: motey.repositories.nodes_repository.NodesRepository
         :param valmanager: DI injected
         :type valmanager: motey.val.valmanager.VALManager
+        :param image_prepull_manager: DI injected
+        :type image_prepull_manager: motey.val.image_prepull_manager.ImagePrePullManager
         :param inter_node_orchestrator: DI injected
         :type inter_node_orchestrator: motey.orchestrator.inter_node_orchestrator.InterNodeOrchestrator
+        :param service_recovery: DI injected
+        :type service_recovery: motey.orchestrator.service_recovery.ServiceRecovery
+        :param service_reconciler: DI injected
+        :type service_reconciler: motey.orchestrator.service_reconciler.ServiceReconciler
         :param communication_manager: DI injected
         :type communication_manager: motey.communication.communication_manger.CommunicationManger
         :param capability_engine: DI injected
         :type capability_engine: motey.capabilityengine.capability_engine.CapabilityEngine
+        :param membership_manager: DI injected
+        :type membership_manager: motey.membership.membership_manager.MembershipManager
+        :param heartbeat_monitor: DI injected
+        :type heartbeat_monitor: motey.membership.heartbeat_monitor.HeartbeatMonitor
+        :param profiler: DI injected
+        :type profiler: motey.utils.profiling.SamplingProfiler
+        :param slow_operation_recorder: DI injected
+        :type slow_operation_recorder: motey.utils.profiling.SlowOperationRecorder
         :param as_daemon: Executes the core as a daemon. Default is True.
         """
 
@@ -47,8 +63,15 @@ class Core(object):
         self.capability_repository = capability_repository
         self.nodes_repository = nodes_repository
         self.valmanager = valmanager
+        self.image_prepull_manager = image_prepull_manager
         self.inter_node_orchestrator = inter_node_orchestrator
+        self.service_recovery = service_recovery
+        self.service_reconciler = service_reconciler
         self.capability_engine = capability_engine
+        self.membership_manager = membership_manager
+        self.heartbeat_monitor = heartbeat_monitor
+        self.profiler = profiler
+        self.slow_operation_recorder = slow_operation_recorder
 
     def start(self):
         """
@@ -69,12 +92,20 @@ class Core(object):
         """
         The method is the main app loop.
         It starts the ``Communication Manager Components`` and it will be executed until ``self.stop()`` is executed.
+        The services of the last run are recovered after the VAL plugins are registered. Afterwards they are kept in
+        sync with their images by the ``ServiceReconciler``.
         """
 
         self.logger.info('Core started')
+        self.slow_operation_recorder.start()
         self.communication_manager.start()
+        self.membership_manager.start()
+        self.heartbeat_monitor.start()
         self.capability_engine.start()
         self.valmanager.start()
+        self.service_recovery.start()
+        self.service_reconciler.start()
+        self.image_prepull_manager.start()
 
         while not self.stopped:
             sleep(.1)
@@ -95,16 +126,32 @@ class Core(object):
         """
 
         self.stopped = True
+        self.image_prepull_manager.stop()
+        self.service_reconciler.stop()
         self.valmanager.close()
         self.capability_engine.stop()
+        self.heartbeat_monitor.stop()
+        self.membership_manager.stop()
         self.communication_manager.stop()
+        self.profiler.stop()
+        self.slow_operation_recorder.stop()
         if self.daemon:
             self.daemon.exit()
         self.logger.info('Core stopped')
 
+    def profile(self, duration=None):
+        """
+        Starts the sampling profiler, e.g. if the ``SIGUSR1`` signal is received.
+
+        :param duration: optional duration of the profile in seconds. Default is None, which will use the
+                         ``signal_duration`` of the config.ini.
+        """
+        self.profiler.start(duration if duration else float(config['PROFILER']['signal_duration']))
+
     def startup_clean(self):
         """
         Clean up the capability and node database to remove old entries.
+        The services are kept, they are recovered by the ``ServiceRecovery``.
         """
         self.capability_repository.clear()
         self.nodes_repository.clear()
@@ -3,66 +3,179 @@ import dependency_injector.providers as providers
 from yapsy.PluginManager import PluginManager
 
 from motey.capabilityengine.capability_engine import CapabilityEngine
+from motey.communication.api_routes.service import Service as ServiceEndpoint
 from motey.communication.apiserver import APIServer
 from motey.communication.communication_manager import CommunicationManager
+from motey.communication.event_broadcaster import EventBroadcaster
 from motey.communication.mqttserver import MQTTServer
+from motey.communication.node_announcer import NodeAnnouncer
 from motey.communication.zeromq_server import ZeroMQServer
 from motey.configuration.configreader import config
 from motey.core import Core
+from motey.membership.heartbeat_monitor import HeartbeatMonitor
+from motey.membership.membership_manager import MembershipManager
+from motey.membership.transport import UdpTransport
+from motey.models.image import Image
 from motey.orchestrator.inter_node_orchestrator import InterNodeOrchestrator
+from motey.orchestrator.service_reconciler import ServiceReconciler
+from motey.orchestrator.service_recovery import ServiceRecovery
 from motey.repositories.capability_repository import CapabilityRepository
+from motey.repositories.job_repository import JobRepository
 from motey.repositories.nodes_repository import NodesRepository
 from motey.repositories.service_repository import ServiceRepository
+from motey.utils import profiling, tracing
 from motey.utils.logger import Logger
+from motey.utils.node_identity import NodeIdentity
+from motey.val.image_prepull_manager import ImagePrePullManager
+from motey.val.plugin_locator import ManifestPluginLocator
 from motey.val.valmanager import VALManager
+from motey.val.warm_pool import WarmPool
 
 
 class DICore(containers.DeclarativeContainer):
     logger = providers.Singleton(Logger)
+    node_identity = providers.Singleton(NodeIdentity,
+                                        logger=logger,
+                                        advertise_address=config['NODE']['advertise_address'],
+                                        node_id_path='%s/node_id' % config['DATABASE']['path'],
+                                        ttl=float(config['NODE']['ip_ttl']),
+                                        interface_check_interval=float(config['NODE']['interface_check_interval']))
+    tracer = providers.Singleton(tracing.configure,
+                                 logger=logger,
+                                 exporter=config['TRACING']['exporter'],
+                                 sample_rate=float(config['TRACING']['sample_rate']),
+                                 ring_size=int(config['TRACING']['ring_size']),
+                                 file_path=config['TRACING']['file_path'],
+                                 otlp_endpoint=config['TRACING']['otlp_endpoint'],
+                                 node_identity=node_identity)
+    profiler = providers.Singleton(profiling.configure_profiler,
+                                   logger=logger,
+                                   interval=float(config['PROFILER']['interval']),
+                                   output_path=config['PROFILER']['output_path'],
+                                   max_duration=float(config['PROFILER']['max_duration']))
+    slow_operation_recorder = providers.Singleton(profiling.configure_slow_operations,
+                                                  threshold=float(config['PROFILER']['slow_operation_threshold']),
+                                                  size=int(config['PROFILER']['slow_operation_size']))
 
 
 class DIRepositories(containers.DeclarativeContainer):
     capability_repository = providers.Singleton(CapabilityRepository)
     nodes_repository = providers.Singleton(NodesRepository)
     service_repository = providers.Singleton(ServiceRepository)
+    job_repository = providers.Singleton(JobRepository,
+                                         ttl=float(config['BLUEPRINT']['job_ttl']),
+                                         max_jobs=int(config['BLUEPRINT']['max_jobs']))
 
 
 class DIServices(containers.DeclarativeContainer):
-    plugin_manager = PluginManager()
+    plugin_manager = PluginManager(plugin_locator=ManifestPluginLocator(
+        manifest_path='%s/plugin_manifest.json' % config['DATABASE']['path']))
+
+    warm_pool = providers.Singleton(WarmPool,
+                                    logger=DICore.logger,
+                                    max_size=int(config['WARMPOOL']['max_size']),
+                                    max_total=int(config['WARMPOOL']['max_total']),
+                                    idle_timeout=int(config['WARMPOOL']['idle_timeout']))
 
     valmanager = providers.Singleton(VALManager,
                                      logger=DICore.logger,
                                      capability_repository=DIRepositories.capability_repository,
-                                     plugin_manager=plugin_manager)
+                                     plugin_manager=plugin_manager,
+                                     default_engine=config['VAL']['default_engine'],
+                                     excluded_engines=[engine.strip() for engine in
+                                                       config['VAL']['excluded_engines'].split(',') if engine.strip()],
+                                     warm_pool=warm_pool,
+                                     warm_pool_images=[Image(name=image_name.strip(),
+                                                             engine=config['WARMPOOL']['engine'],
+                                                             warm_pool=int(config['WARMPOOL']['size']))
+                                                       for image_name in config['WARMPOOL']['images'].split(',')
+                                                       if image_name.strip()])
+
+    image_prepull_manager = providers.Singleton(ImagePrePullManager,
+                                                logger=DICore.logger,
+                                                valmanager=valmanager,
+                                                capability_repository=DIRepositories.capability_repository,
+                                                service_stream=ServiceEndpoint.yaml_post_stream,
+                                                prepull_image_stream=ZeroMQServer.prepull_image_stream,
+                                                cache_size=int(config['VAL']['image_cache_size']),
+                                                workers=int(config['VAL']['prepull_workers']))
 
     zeromq_server = providers.Singleton(ZeroMQServer,
                                         logger=DICore.logger,
                                         valmanager=valmanager,
-                                        capability_repository=DIRepositories.capability_repository)
+                                        capability_repository=DIRepositories.capability_repository,
+                                        request_timeout=float(config['ZEROMQ']['request_timeout']),
+                                        deploy_timeout=float(config['ZEROMQ']['deploy_timeout']),
+                                        prepull_timeout=float(config['ZEROMQ']['prepull_timeout']))
+
+    event_broadcaster = providers.Singleton(EventBroadcaster,
+                                            logger=DICore.logger,
+                                            service_repository=DIRepositories.service_repository,
+                                            nodes_repository=DIRepositories.nodes_repository,
+                                            capability_repository=DIRepositories.capability_repository,
+                                            queue_size=int(config['WEBSERVER']['event_queue_size']),
+                                            keepalive_interval=int(config['WEBSERVER']['event_keepalive_interval']))
 
     api_server = providers.Singleton(APIServer,
                                      logger=DICore.logger,
+                                     event_broadcaster=event_broadcaster,
+                                     tracer=DICore.tracer,
                                      host=config['WEBSERVER']['ip'],
                                      port=config['WEBSERVER']['port'])
 
     mqtt_server = providers.Singleton(MQTTServer,
                                       logger=DICore.logger,
                                       nodes_repository=DIRepositories.nodes_repository,
+                                      node_identity=DICore.node_identity,
                                       host=config['MQTT']['ip'],
                                       port=int(config['MQTT']['port']),
                                       username=config['MQTT']['username'],
                                       password=config['MQTT']['password'],
-                                      keepalive=int(config['MQTT']['keepalive']))
+                                      keepalive=int(config['MQTT']['keepalive']),
+                                      client_id=config['MQTT']['client_id'],
+                                      clean_session=config['MQTT'].getboolean('clean_session'),
+                                      max_inflight=int(config['MQTT']['max_inflight']),
+                                      batch_interval=float(config['MQTT']['batch_interval']),
+                                      batch_size=int(config['MQTT']['batch_size']))
+
+    node_announcer = providers.Singleton(NodeAnnouncer, reply_jitter=float(config['MQTT']['reply_jitter']))
 
     communication_manager = providers.Singleton(CommunicationManager,
                                                 api_server=api_server,
                                                 mqtt_server=mqtt_server,
-                                                zeromq_server=zeromq_server)
+                                                zeromq_server=zeromq_server,
+                                                nodes_repository=DIRepositories.nodes_repository,
+                                                node_announcer=node_announcer,
+                                                node_identity=DICore.node_identity)
 
     capability_engine = providers.Singleton(CapabilityEngine,
                                             logger=DICore.logger,
                                             capability_repository=DIRepositories.capability_repository,
-                                            communication_manager=communication_manager)
+                                            communication_manager=communication_manager,
+                                            batch_window=float(config['CAPABILITYENGINE']['batch_window']))
+
+    membership_manager = providers.Singleton(MembershipManager,
+                                             logger=DICore.logger,
+                                             nodes_repository=DIRepositories.nodes_repository,
+                                             node_identity=DICore.node_identity,
+                                             transport=providers.Singleton(UdpTransport,
+                                                                           logger=DICore.logger,
+                                                                           host=config['NODE']['bind_address'] or '0.0.0.0',
+                                                                           port=int(config['MEMBERSHIP']['port'])),
+                                             seeds=[seed.strip() for seed in config['MEMBERSHIP']['seeds'].split(',')
+                                                    if seed.strip()],
+                                             protocol_period=float(config['MEMBERSHIP']['protocol_period']),
+                                             ping_timeout=float(config['MEMBERSHIP']['ping_timeout']),
+                                             indirect_probes=int(config['MEMBERSHIP']['indirect_probes']),
+                                             suspicion_timeout=float(config['MEMBERSHIP']['suspicion_timeout']))
+
+    heartbeat_monitor = providers.Singleton(HeartbeatMonitor,
+                                            logger=DICore.logger,
+                                            nodes_repository=DIRepositories.nodes_repository,
+                                            node_identity=DICore.node_identity,
+                                            communication_manager=communication_manager,
+                                            interval=float(config['HEARTBEAT']['interval']),
+                                            timeout=float(config['HEARTBEAT']['timeout']))
 
     inter_node_orchestrator = providers.Singleton(InterNodeOrchestrator,
                                                   logger=DICore.logger,
@@ -70,7 +183,37 @@ class DIServices(containers.DeclarativeContainer):
                                                   service_repository=DIRepositories.service_repository,
                                                   capability_repository=DIRepositories.capability_repository,
                                                   node_repository=DIRepositories.nodes_repository,
-                                                  communication_manager=communication_manager)
+                                                  communication_manager=communication_manager,
+                                                  job_repository=DIRepositories.job_repository,
+                                                  node_identity=DICore.node_identity,
+                                                  image_prepull_manager=image_prepull_manager,
+                                                  capabilities_ttl=float(
+                                                      config['CAPABILITYENGINE']['peer_capabilities_ttl']))
+
+    service_recovery = providers.Singleton(ServiceRecovery,
+                                           logger=DICore.logger,
+                                           service_repository=DIRepositories.service_repository,
+                                           valmanager=valmanager,
+                                           communication_manager=communication_manager,
+                                           inter_node_orchestrator=inter_node_orchestrator,
+                                           node_identity=DICore.node_identity)
+
+    service_reconciler = providers.Singleton(ServiceReconciler,
+                                             logger=DICore.logger,
+                                             service_repository=DIRepositories.service_repository,
+                                             valmanager=valmanager,
+                                             communication_manager=communication_manager,
+                                             inter_node_orchestrator=inter_node_orchestrator,
+                                             node_identity=DICore.node_identity,
+                                             service_recovery=service_recovery,
+                                             workers=int(config['RECONCILER']['workers']),
+                                             resync_interval=float(config['RECONCILER']['resync_interval']),
+                                             resync_shards=int(config['RECONCILER']['resync_shards']),
+                                             rate=float(config['RECONCILER']['rate']),
+                                             backoff_base=float(config['RECONCILER']['backoff_base']),
+                                             backoff_max=float(config['RECONCILER']['backoff_max']),
+                                             max_retries=int(config['RECONCILER']['max_retries']),
+                                             pending_interval=float(config['RECONCILER']['pending_interval']))
 
 
 class Application(containers.DeclarativeContainer):
@@ -79,6 +222,13 @@ class Application(containers.DeclarativeContainer):
                               capability_repository=DIRepositories.capability_repository,
                               nodes_repository=DIRepositories.nodes_repository,
                               valmanager=DIServices.valmanager,
+                              image_prepull_manager=DIServices.image_prepull_manager,
                               inter_node_orchestrator=DIServices.inter_node_orchestrator,
+                              service_recovery=DIServices.service_recovery,
+                              service_reconciler=DIServices.service_reconciler,
                               communication_manager=DIServices.communication_manager,
-                              capability_engine=DIServices.capability_engine)
+                              capability_engine=DIServices.capability_engine,
+                              membership_manager=DIServices.membership_manager,
+                              heartbeat_monitor=DIServices.heartbeat_monitor,
+                              profiler=DICore.profiler,
+                              slow_operation_recorder=DICore.slow_operation_recorder)
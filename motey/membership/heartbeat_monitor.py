@@ -0,0 +1,79 @@
+import threading
+from time import sleep
+
+
+class HeartbeatMonitor(object):
+    """
+    Sends out a periodic liveness beacon of this node and evicts nodes from the ``NodesRepository`` which were not
+    seen for a configurable time. Nodes which disappear without a clean shutdown will be removed this way, which lets
+    the ``InterNodeOrchestrator`` reschedule the images hosted on them.
+    The monitor will be executed in a separate thread and will not block the main thread.
+    """
+
+    def __init__(self, logger, nodes_repository, node_identity, communication_manager, interval=5, timeout=15):
+        """
+        Constructor of the HeartbeatMonitor.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param nodes_repository: DI injected
+        :type nodes_repository: motey.repositories.nodes_repository.NodesRepository
+        :param node_identity: DI injected
+        :type node_identity: motey.utils.node_identity.NodeIdentity
+        :param communication_manager: DI injected
+        :type communication_manager: motey.communication.communication_manager.CommunicationManager
+        :param interval: the time in seconds between two beacons. Default is ``5``.
+        :param timeout: the time in seconds after a node which was not seen will be evicted. Should be a multiple of
+                        the interval to tolerate lost beacons. Default is ``15``.
+        """
+        self.logger = logger
+        self.nodes_repository = nodes_repository
+        self.node_identity = node_identity
+        self.communication_manager = communication_manager
+        self.interval = interval
+        self.timeout = timeout
+        self.stopped = False
+
+        self.heartbeat_thread = threading.Thread(target=self.__run_heartbeat_thread, args=())
+        self.heartbeat_thread.daemon = True
+
+    def start(self):
+        """
+        Starts the heartbeat thread.
+        """
+        self.heartbeat_thread.start()
+
+    def stop(self):
+        """
+        Stops the heartbeat thread.
+        """
+        self.stopped = True
+
+    def evict_stale_nodes(self, now=None):
+        """
+        Removes all nodes which were not seen within the timeout. The own node will never be evicted.
+
+        :param now: the current timestamp. Default is None, which will use the current time.
+        :return: a list with the ips of the evicted nodes
+        """
+        evicted = []
+        own_ip = self.node_identity.get_ip()
+        for node in self.nodes_repository.find_stale(self.timeout, now=now):
+            if node['ip'] == own_ip:
+                continue
+            self.logger.info('Node %s was not seen for %s seconds and will be evicted' % (node['ip'], self.timeout))
+            self.nodes_repository.remove(node['ip'])
+            evicted.append(node['ip'])
+        return evicted
+
+    def __run_heartbeat_thread(self):
+        """
+        Sends the beacons and evicts the stale nodes until the monitor is stopped.
+        """
+        while not self.stopped:
+            try:
+                self.communication_manager.publish_heartbeat()
+                self.evict_stale_nodes()
+            except Exception as error:
+                self.logger.error('Heartbeat failed: %s' % error)
+            sleep(self.interval)
@@ -0,0 +1,124 @@
+import threading
+from time import sleep, time
+
+from motey.membership.swim import Swim
+from motey.models.member_state import MemberState
+
+
+class MembershipManager(object):
+    """
+    Keeps the ``NodesRepository`` in sync with the members of the cluster.
+    The members are detected via the SWIM gossip protocol, which scales with the number of nodes and does not depend
+    on the MQTT broker. Nodes which are announced via MQTT are used as additional seeds, so both mechanisms can be
+    used side by side. Alive members are marked as seen regularly, so that they will not be evicted by the
+    ``HeartbeatMonitor`` if the broker is not available.
+    """
+
+    def __init__(self, logger, nodes_repository, node_identity, transport, seeds=None, protocol_period=1.0, ping_timeout=0.3,
+                 indirect_probes=3, suspicion_timeout=5.0):
+        """
+        Constructor of the MembershipManager.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param nodes_repository: DI injected
+        :type nodes_repository: motey.repositories.nodes_repository.NodesRepository
+        :param node_identity: DI injected
+        :type node_identity: motey.utils.node_identity.NodeIdentity
+        :param transport: DI injected
+        :type transport: motey.membership.transport.UdpTransport
+        :param seeds: list with the ips of the nodes which will be contacted to join the cluster.
+        :param protocol_period: the time in seconds between two probes. Default is ``1.0``.
+        :param ping_timeout: the time in seconds after a probe will be sent indirectly. Default is ``0.3``.
+        :param indirect_probes: the number of nodes which are asked to probe indirectly. Default is ``3``.
+        :param suspicion_timeout: the time in seconds after a suspected node is declared as dead. Default is ``5.0``.
+        """
+        self.logger = logger
+        self.nodes_repository = nodes_repository
+        self.node_identity = node_identity
+        self.transport = transport
+        self.seeds = seeds or []
+        self.protocol_period = protocol_period
+        self.ping_timeout = ping_timeout
+        self.indirect_probes = indirect_probes
+        self.suspicion_timeout = suspicion_timeout
+        self.swim = None
+        self.subscriptions = []
+        self.stopped = False
+
+        self.protocol_thread = threading.Thread(target=self.__run_protocol_thread, args=())
+        self.protocol_thread.daemon = True
+
+    def start(self):
+        """
+        Joins the cluster and starts the protocol thread.
+        """
+        self.swim = Swim(address=self.node_identity.get_ip(),
+                         transport=self.transport,
+                         seeds=self.seeds,
+                         protocol_period=self.protocol_period,
+                         ping_timeout=self.ping_timeout,
+                         indirect_probes=self.indirect_probes,
+                         suspicion_timeout=self.suspicion_timeout)
+        self.subscriptions.append(self.swim.change_stream.subscribe(self.handle_member_change))
+        self.subscriptions.append(self.nodes_repository.change_stream.subscribe(self.handle_node_change))
+        self.transport.start(lambda message: self.swim.handle_message(message))
+        self.swim.start()
+        self.protocol_thread.start()
+
+    def stop(self):
+        """
+        Announces that the node leaves the cluster and stops the protocol thread.
+        """
+        self.stopped = True
+        for subscription in self.subscriptions:
+            subscription.dispose()
+        self.subscriptions = []
+        if self.swim:
+            self.swim.leave()
+        self.transport.stop()
+
+    def handle_member_change(self, change):
+        """
+        Adds alive members to the ``NodesRepository`` and removes dead members.
+        Suspected members will be kept until they are declared as dead.
+
+        :param change: dict with the ``address`` and the new ``state`` of the member
+        """
+        if change['state'] == MemberState.ALIVE:
+            self.nodes_repository.add(change['address'])
+        elif change['state'] == MemberState.DEAD:
+            self.logger.info('Node %s left the cluster' % change['address'])
+            self.nodes_repository.remove(change['address'])
+
+    def handle_node_change(self, event):
+        """
+        Contacts nodes which were added to the ``NodesRepository`` by other components, e.g. via MQTT, but are not
+        known by the membership protocol yet. Nodes which changed their ip are contacted at their current ip.
+
+        :param event: the change event of the ``NodesRepository``
+        """
+        if event['event'] == 'node_added':
+            address = event['data']['ip']
+        elif event['event'] == 'node_renamed':
+            address = event['data']['current']
+        else:
+            return
+        if address not in self.swim.members:
+            self.swim.join(address)
+
+    def __run_protocol_thread(self):
+        """
+        Executes the time based parts of the protocol until the manager is stopped.
+        """
+        interval = min(self.ping_timeout, self.protocol_period) / 3
+        next_touch = 0
+        while not self.stopped:
+            try:
+                self.swim.tick()
+                if time() >= next_touch:
+                    self.nodes_repository.touch_multiple(self.swim.get_members())
+                    next_touch = time() + self.suspicion_timeout
+            except Exception as error:
+                self.logger.error('Membership protocol failed: %s' % error)
+            sleep(interval)
@@ -0,0 +1,374 @@
+import itertools
+import math
+import random
+import threading
+import time
+
+from rx.subjects import Subject
+
+from motey.models.member_state import MemberState
+
+
+class Swim(object):
+    """
+    Implementation of the SWIM membership protocol.
+    Every protocol period a random member will be pinged. If it does not answer within the ping timeout, other
+    members are asked to ping it indirectly. If there is still no answer at the end of the period, the member will be
+    suspected. Suspected members, which do not refute the suspicion within the suspicion timeout, will be declared as
+    dead. All membership changes are disseminated by piggybacking them on the protocol messages.
+
+    The protocol is driven by ``tick`` and ``handle_message`` and does not start any thread itself, so it can be
+    executed with a real transport or in a simulation. Membership changes will be emitted on the ``change_stream`` as
+    dict with the ``address`` and the new ``state`` of the member.
+    """
+
+    def __init__(self, address, transport, seeds=None, protocol_period=1.0, ping_timeout=0.3, indirect_probes=3,
+                 suspicion_timeout=5.0, sync_interval=30.0, retransmit_multiplier=3, max_piggyback=15,
+                 clock=time.time, random_generator=None):
+        """
+        Constructor of the Swim protocol.
+
+        :param address: the address of this member
+        :param transport: the transport which is used to send the messages. Must provide a ``send(address, message)``
+                          method.
+        :param seeds: list with the addresses of members which will be contacted to join the cluster.
+        :param protocol_period: the time in seconds between two probes. Default is ``1.0``.
+        :param ping_timeout: the time in seconds after a probe will be sent indirectly. Default is ``0.3``.
+        :param indirect_probes: the number of members which are asked to probe indirectly. Default is ``3``.
+        :param suspicion_timeout: the time in seconds after a suspected member is declared as dead. The timeout grows
+                                  with ``log10`` of the number of members, because it takes longer to disseminate the
+                                  refutation in large clusters. Default is ``5.0``.
+        :param sync_interval: the time in seconds between two full state synchronisations with a random member. Speeds
+                              up the convergence after a network partition or a join of many members.
+                              Default is ``30.0``.
+        :param retransmit_multiplier: multiplier for the number of times a membership change is piggybacked. The change
+                                      will be sent ``retransmit_multiplier * ceil(log2(members + 1))`` times.
+                                      Default is ``3``.
+        :param max_piggyback: the maximum number of membership changes of a single message. Default is ``15``.
+        :param clock: function which returns the current time. Default is ``time.time``.
+        :param random_generator: optional ``random.Random`` instance, e.g. to run deterministic simulations.
+        """
+        self.address = address
+        self.transport = transport
+        self.seeds = [seed for seed in (seeds or []) if seed != address]
+        self.protocol_period = protocol_period
+        self.ping_timeout = ping_timeout
+        self.indirect_probes = indirect_probes
+        self.suspicion_timeout = suspicion_timeout
+        self.sync_interval = sync_interval
+        self.retransmit_multiplier = retransmit_multiplier
+        self.max_piggyback = max_piggyback
+        self.clock = clock
+        self.random = random_generator if random_generator else random.Random()
+
+        self.incarnation = 0
+        self.members = {}
+        self.updates = {}
+        self.probe = None
+        self.probe_targets = []
+        self.relays = {}
+        self.next_probe = 0
+        self.next_sync = None
+        self.left = False
+        self.sequence = itertools.count(1)
+        self.update_counter = itertools.count()
+        self.lock = threading.RLock()
+        self.change_stream = Subject()
+
+    def start(self):
+        """
+        Joins the cluster by contacting all seeds.
+        """
+        for seed in self.seeds:
+            self.join(seed)
+
+    def join(self, address):
+        """
+        Contacts a member to join the cluster.
+        The own member list will be sent to the contacted member, which will answer with its member list.
+
+        :param address: the address of the member to be contacted
+        """
+        if address == self.address:
+            return
+        with self.lock:
+            self.__send(address, 'join', seq=next(self.sequence), members=self.__snapshot())
+
+    def leave(self):
+        """
+        Announces that this member leaves the cluster to some random members.
+        Afterwards all received messages will be ignored.
+        """
+        with self.lock:
+            self.left = True
+            self.__queue_update(self.address, MemberState.DEAD, self.incarnation)
+            for address in self.__random_members(self.indirect_probes):
+                self.__send(address, 'ping', seq=next(self.sequence))
+
+    def get_members(self, state=MemberState.ALIVE):
+        """
+        Returns the addresses of all members with a specific state.
+
+        :param state: the state of the members. Default is ``MemberState.ALIVE``.
+        :return: list with the addresses of the members
+        """
+        with self.lock:
+            return [address for address, member in self.members.items() if member['state'] == state]
+
+    def tick(self, now=None):
+        """
+        Executes the time based parts of the protocol. Should be called frequently, at least a few times per
+        protocol period.
+
+        :param now: the current time. Default is None, which will use the clock.
+        """
+        now = self.clock() if now is None else now
+        with self.lock:
+            self.__check_probe(now)
+            self.__check_suspects(now)
+            for seq, relay in list(self.relays.items()):
+                if now - relay['started'] >= self.protocol_period:
+                    del self.relays[seq]
+            if self.probe is None and now >= self.next_probe:
+                if not self.get_members():
+                    # the join messages or all other members got lost, so try it again
+                    self.start()
+                self.__start_probe(now)
+                self.next_probe = now + self.protocol_period
+            if self.next_sync is None:
+                self.next_sync = now + self.random.uniform(0, self.sync_interval)
+            elif now >= self.next_sync:
+                for address in self.__random_members(1):
+                    self.join(address)
+                self.next_sync = now + self.sync_interval
+
+    def handle_message(self, message, now=None):
+        """
+        Handles a received protocol message.
+
+        :param message: the decoded message
+        :type message: dict
+        :param now: the current time. Default is None, which will use the clock.
+        """
+        now = self.clock() if now is None else now
+        sender = message.get('from')
+        message_type = message.get('type')
+        if not sender or sender == self.address or self.left:
+            return
+
+        with self.lock:
+            # a message is the best prove that the sender is alive
+            self.__apply_update({'address': sender, 'state': MemberState.ALIVE,
+                                 'incarnation': message.get('incarnation', 0)}, now)
+            member = self.members.get(sender)
+            if member['state'] != MemberState.ALIVE:
+                # gossip the suspicion again, so that the sender gets the chance to refute it
+                self.__queue_update(sender, member['state'], member['incarnation'])
+            for update in message.get('updates', []) + message.get('members', []):
+                self.__apply_update(update, now)
+
+            if message_type == 'ping':
+                self.__send(sender, 'ack', seq=message.get('seq'))
+            elif message_type == 'join':
+                self.__send(sender, 'ack', seq=message.get('seq'), members=self.__snapshot())
+            elif message_type == 'ping-req':
+                seq = next(self.sequence)
+                self.relays[seq] = {'requester': sender, 'seq': message.get('seq'), 'started': now}
+                self.__send(message.get('target'), 'ping', seq=seq)
+            elif message_type == 'ack':
+                seq = message.get('seq')
+                if self.probe and self.probe['seq'] == seq:
+                    self.probe = None
+                elif seq in self.relays:
+                    relay = self.relays.pop(seq)
+                    self.__send(relay['requester'], 'ack', seq=relay['seq'])
+
+    def __check_probe(self, now):
+        """
+        Sends indirect probes or suspects the probed member if the current probe has timed out.
+
+        :param now: the current time
+        """
+        if not self.probe:
+            return
+        elapsed = now - self.probe['started']
+        if elapsed >= self.protocol_period:
+            target = self.probe['target']
+            self.probe = None
+            member = self.members.get(target)
+            if member and member['state'] == MemberState.ALIVE:
+                self.__set_state(target, MemberState.SUSPECT, member['incarnation'], now)
+        elif elapsed >= self.ping_timeout and not self.probe['indirect']:
+            self.probe['indirect'] = True
+            for address in self.__random_members(self.indirect_probes, exclude=self.probe['target']):
+                self.__send(address, 'ping-req', seq=self.probe['seq'], target=self.probe['target'])
+
+    def __check_suspects(self, now):
+        """
+        Declares suspected members as dead after the suspicion timeout and forgets dead members after a while.
+
+        :param now: the current time
+        """
+        suspicion_timeout = self.suspicion_timeout * max(1, math.log10(len(self.members) + 1))
+        for address, member in list(self.members.items()):
+            if member['state'] == MemberState.SUSPECT and now - member['changed'] >= suspicion_timeout:
+                self.__set_state(address, MemberState.DEAD, member['incarnation'], now)
+            elif member['state'] == MemberState.DEAD and now - member['changed'] >= self.suspicion_timeout * 10:
+                del self.members[address]
+
+    def __start_probe(self, now):
+        """
+        Pings the next member of the shuffled member list.
+
+        :param now: the current time
+        """
+        target = self.__next_target()
+        if not target:
+            return
+        self.probe = {'target': target, 'seq': next(self.sequence), 'started': now, 'indirect': False}
+        self.__send(target, 'ping', seq=self.probe['seq'])
+
+    def __next_target(self):
+        """
+        Returns the next member to be probed.
+        All members are probed in a random order, before the order is shuffled again.
+
+        :return: the address of the next member or None if there are no other members
+        """
+        while self.probe_targets:
+            address = self.probe_targets.pop()
+            member = self.members.get(address)
+            if member and member['state'] != MemberState.DEAD:
+                return address
+        self.probe_targets = [address for address, member in self.members.items()
+                              if member['state'] != MemberState.DEAD]
+        self.random.shuffle(self.probe_targets)
+        return self.probe_targets.pop() if self.probe_targets else None
+
+    def __random_members(self, count, exclude=None):
+        """
+        Returns random alive members.
+
+        :param count: the maximum number of members
+        :param exclude: optional address which should not be returned
+        :return: list with the addresses of the members
+        """
+        candidates = [address for address, member in self.members.items()
+                      if member['state'] == MemberState.ALIVE and address != exclude]
+        return self.random.sample(candidates, min(count, len(candidates)))
+
+    def __apply_update(self, update, now):
+        """
+        Applies a membership change, if it is newer than the known state of the member.
+        Suspicions about this member will be refuted by increasing the own incarnation.
+
+        :param update: dict with the ``address``, the ``state`` and the ``incarnation`` of the member
+        :param now: the current time
+        """
+        address = update.get('address')
+        state = update.get('state')
+        incarnation = update.get('incarnation', 0)
+        if not address:
+            return
+
+        if address == self.address:
+            if state != MemberState.ALIVE:
+                # outdated suspicions are refuted as well, because some members may not know the current incarnation
+                self.incarnation = max(self.incarnation, incarnation + 1)
+                self.__queue_update(self.address, MemberState.ALIVE, self.incarnation)
+            return
+
+        member = self.members.get(address)
+        if member is None:
+            override = True
+        elif state == MemberState.ALIVE:
+            override = incarnation > member['incarnation']
+        elif state == MemberState.SUSPECT:
+            override = incarnation > member['incarnation'] or \
+                (incarnation == member['incarnation'] and member['state'] == MemberState.ALIVE)
+        else:
+            override = incarnation > member['incarnation'] or \
+                (incarnation == member['incarnation'] and member['state'] != MemberState.DEAD)
+
+        if override:
+            self.__set_state(address, state, incarnation, now)
+
+    def __set_state(self, address, state, incarnation, now):
+        """
+        Stores the new state of a member, disseminates it and emits it on the ``change_stream``.
+
+        :param address: the address of the member
+        :param state: the new state
+        :param incarnation: the incarnation of the state
+        :param now: the current time
+        """
+        member = self.members.get(address)
+        previous_state = member['state'] if member else None
+        self.members[address] = {'state': state, 'incarnation': incarnation, 'changed': now}
+        self.__queue_update(address, state, incarnation)
+
+        if previous_state is None and state != MemberState.DEAD:
+            # probe new members within the current round
+            self.probe_targets.insert(self.random.randint(0, len(self.probe_targets)), address)
+        if state == MemberState.SUSPECT and previous_state != state:
+            # the direct ping carries the suspicion to the member and its answer carries the refutation back, which
+            # does not depend on the dissemination of the refutation through the whole cluster
+            self.__send(address, 'ping', seq=next(self.sequence))
+        if previous_state != state and not (previous_state is None and state == MemberState.DEAD):
+            self.change_stream.on_next({'address': address, 'state': state})
+
+    def __queue_update(self, address, state, incarnation):
+        """
+        Queues a membership change to be piggybacked on the next messages.
+
+        :param address: the address of the member
+        :param state: the state of the member
+        :param incarnation: the incarnation of the state
+        """
+        self.updates[address] = {
+            'update': {'address': address, 'state': state, 'incarnation': incarnation},
+            'transmissions': 0,
+            'queued': next(self.update_counter)
+        }
+
+    def __piggyback(self, receiver):
+        """
+        Returns the membership changes which were sent the fewest times, the newest changes first.
+        Changes about the receiver itself are always sent first, so that it can refute suspicions as fast as possible.
+        Changes which were sent often enough will be removed.
+
+        :param receiver: the address of the receiver
+        :return: list with the membership changes
+        """
+        limit = self.retransmit_multiplier * int(math.ceil(math.log(len(self.members) + 2, 2)))
+        selected = sorted(self.updates.items(),
+                          key=lambda item: (item[0] != receiver, item[1]['transmissions'], -item[1]['queued']))[:self.max_piggyback]
+        updates = []
+        for address, entry in selected:
+            entry['transmissions'] += 1
+            if entry['transmissions'] >= limit:
+                del self.updates[address]
+            updates.append(entry['update'])
+        return updates
+
+    def __snapshot(self):
+        """
+        Returns the state of all members which are not dead.
+
+        :return: list with the membership states
+        """
+        return [{'address': address, 'state': member['state'], 'incarnation': member['incarnation']}
+                for address, member in self.members.items() if member['state'] != MemberState.DEAD]
+
+    def __send(self, address, message_type, **fields):
+        """
+        Sends a protocol message with the piggybacked membership changes.
+
+        :param address: the address of the receiver
+        :param message_type: the type of the message
+        :param fields: additional fields of the message
+        """
+        message = {'type': message_type, 'from': self.address, 'incarnation': self.incarnation,
+                   'updates': self.__piggyback(address)}
+        message.update(fields)
+        self.transport.send(address, message)
@@ -0,0 +1,212 @@
+import heapq
+import itertools
+import json
+import random
+import socket
+import threading
+
+
+class UdpTransport(object):
+    """
+    Sends and receives the membership protocol messages as JSON encoded UDP datagrams.
+    All members of a cluster use the same port. Received messages are handed over to the handler which was passed to
+    ``start``. The listener will be executed in a separate thread and will not block the main thread.
+    """
+
+    MAX_DATAGRAM_SIZE = 65507
+
+    def __init__(self, logger, host='0.0.0.0', port=5096):
+        """
+        Constructor of the UdpTransport.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param host: the host the socket will be bound to. Default is ``0.0.0.0``.
+        :param port: the port which is used by all members. Default is ``5096``.
+        """
+        self.logger = logger
+        self.host = host
+        self.port = port
+        self.handler = None
+        self.socket = None
+        self.stopped = False
+        self.receiver_thread = threading.Thread(target=self.__run_receiver_thread, args=())
+        self.receiver_thread.daemon = True
+
+    def start(self, handler):
+        """
+        Binds the socket and starts the listening.
+
+        :param handler: function which will be called with every received message
+        """
+        self.handler = handler
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.receiver_thread.start()
+
+    def stop(self):
+        """
+        Stops the listening and closes the socket.
+        """
+        self.stopped = True
+        if self.socket:
+            self.socket.close()
+
+    def send(self, address, message):
+        """
+        Sends a message to a member.
+        Errors will be logged, a lost message is handled by the protocol itself.
+
+        :param address: the ip of the member
+        :param message: the message to be sent
+        :type message: dict
+        """
+        if not self.socket or self.stopped:
+            return
+        try:
+            self.socket.sendto(json.dumps(message).encode('utf-8'), (address, self.port))
+        except (OSError, TypeError, ValueError) as error:
+            self.logger.error('Membership message to %s could not be sent: %s' % (address, error))
+
+    def __run_receiver_thread(self):
+        """
+        Receives the datagrams and hands them over to the handler.
+        """
+        while not self.stopped:
+            try:
+                data, _ = self.socket.recvfrom(self.MAX_DATAGRAM_SIZE)
+            except OSError:
+                break
+            try:
+                message = json.loads(data.decode('utf-8'))
+            except ValueError:
+                self.logger.error('Received invalid membership message')
+                continue
+            if isinstance(message, dict):
+                self.handler(message)
+
+
+class SimulatedNetwork(object):
+    """
+    In-process network to simulate a cluster with many members.
+    Messages are delayed by a random latency and dropped with the given loss rate. The simulation time is driven by
+    ``deliver``, which makes simulations fast and reproducible.
+    """
+
+    def __init__(self, loss_rate=0.0, min_latency=0.001, max_latency=0.01, random_generator=None):
+        """
+        Constructor of the SimulatedNetwork.
+
+        :param loss_rate: the probability that a message gets lost. Default is ``0.0``.
+        :param min_latency: the minimum latency of a message in seconds. Default is ``0.001``.
+        :param max_latency: the maximum latency of a message in seconds. Default is ``0.01``.
+        :param random_generator: optional ``random.Random`` instance. Default is None, which will create a new one.
+        """
+        self.loss_rate = loss_rate
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.random = random_generator if random_generator else random.Random()
+        self.handlers = {}
+        self.partitioned = set()
+        self.in_flight = []
+        self.counter = itertools.count()
+        self.now = 0
+        self.sent_messages = {}
+
+    def create_transport(self, address):
+        """
+        Creates a transport for a member of the simulated network.
+
+        :param address: the address of the member
+        :return: the transport
+        :rtype: SimulatedTransport
+        """
+        self.sent_messages[address] = 0
+        return SimulatedTransport(self, address)
+
+    def register(self, address, handler):
+        """
+        Registers the handler of a member. All messages to the member will be delivered to the handler.
+
+        :param address: the address of the member
+        :param handler: the function which will be called with the message and the current simulation time
+        """
+        self.handlers[address] = handler
+        self.partitioned.discard(address)
+
+    def disconnect(self, address):
+        """
+        Disconnects a member. All messages from and to the member will be dropped.
+
+        :param address: the address of the member
+        """
+        self.partitioned.add(address)
+
+    def send(self, sender, address, message):
+        """
+        Queues a message to be delivered after a random latency.
+
+        :param sender: the address of the sender
+        :param address: the address of the receiver
+        :param message: the message
+        """
+        self.sent_messages[sender] = self.sent_messages.get(sender, 0) + 1
+        if sender in self.partitioned or self.random.random() < self.loss_rate:
+            return
+        arrival = self.now + self.random.uniform(self.min_latency, self.max_latency)
+        heapq.heappush(self.in_flight, (arrival, next(self.counter), address, message))
+
+    def deliver(self, until):
+        """
+        Delivers all messages which arrive before the given simulation time.
+
+        :param until: the simulation time
+        """
+        while self.in_flight and self.in_flight[0][0] <= until:
+            arrival, _, address, message = heapq.heappop(self.in_flight)
+            self.now = arrival
+            handler = self.handlers.get(address)
+            if handler and address not in self.partitioned:
+                handler(message, arrival)
+        self.now = until
+
+
+class SimulatedTransport(object):
+    """
+    Transport of a single member of a ``SimulatedNetwork``.
+    """
+
+    def __init__(self, network, address):
+        """
+        Constructor of the SimulatedTransport.
+
+        :param network: the simulated network
+        :type network: SimulatedNetwork
+        :param address: the address of the member
+        """
+        self.network = network
+        self.address = address
+
+    def start(self, handler):
+        """
+        Starts receiving messages.
+
+        :param handler: function which will be called with every received message and the current simulation time
+        """
+        self.network.register(self.address, handler)
+
+    def stop(self):
+        """
+        Disconnects the member from the network.
+        """
+        self.network.disconnect(self.address)
+
+    def send(self, address, message):
+        """
+        Sends a message to a member.
+
+        :param address: the address of the receiver
+        :param message: the message
+        """
+        self.network.send(self.address, address, message)
@@ -1,8 +1,16 @@
-class Capability(object):
+from motey.models.model import Field, Model
+
+
+class Capability(Model):
     """
     Model object. Represent a capability.
     """
 
+    fields = (
+        Field('capability'),
+        Field('capability_type')
+    )
+
     def __init__(self, capability, capability_type):
         """
         Constructor of the model object.
@@ -15,23 +23,3 @@ class Capability(object):
 
         self.capability = capability
         self.capability_type = capability_type
-
-    def __iter__(self):
-        yield 'capability', self.capability
-        yield 'capability_type', self.capability_type
-
-    @staticmethod
-    def transform(data):
-        """
-        Static method to translate a capability dict into a capability model.
-
-        :param data: a dict with capability data
-        :type data: dict
-        :return: the translated capability model, None if something goes wrong
-        """
-        if 'capability' not in data or 'capability_type' not in data:
-            return None
-        return Capability(
-            capability=data['capability'],
-            capability_type=data['capability_type']
-        )
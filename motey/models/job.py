@@ -0,0 +1,52 @@
+import uuid
+
+from motey.models.job_state import JobState
+from motey.models.model import Field, Model
+
+
+class Job(Model):
+    """
+    Model object. Represent a batch job which instantiates or terminates multiple services.
+    """
+
+    INSTANTIATE = 'instantiate'
+    TERMINATE = 'terminate'
+
+    fields = (
+        Field('id', default=None),
+        Field('action'),
+        Field('service_ids'),
+        Field('state', default=JobState.QUEUED),
+        Field('completed', default=None),
+        Field('failed', default=None),
+        Field('finished_at', default=None)
+    )
+
+    def __init__(self, action, service_ids, id=None, state=JobState.QUEUED, completed=None, failed=None,
+                 finished_at=None):
+        """
+        Constructor of the job model.
+
+        :param action: the action of the job. Either ``Job.INSTANTIATE`` or ``Job.TERMINATE``.
+        :type action: str
+        :param service_ids: the ids of the services which are handled by the job
+        :type service_ids: list
+        :param id: the id of the job. Will be generated if it is None.
+        :type id: str
+        :param state: current state of the job. Default `QUEUED`.
+        :type state: motey.models.job_state.JobState
+        :param completed: the ids of the services which were handled successfully
+        :type completed: list
+        :param failed: the ids of the services which could not be handled
+        :type failed: list
+        :param finished_at: the time when the job was finished as unix timestamp. Default None.
+        :type finished_at: float
+        """
+
+        self.id = id if id else uuid.uuid4().hex
+        self.action = action
+        self.service_ids = service_ids
+        self.state = state
+        self.completed = completed if completed else []
+        self.failed = failed if failed else []
+        self.finished_at = finished_at
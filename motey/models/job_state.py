@@ -0,0 +1,10 @@
+class JobState(object):
+    """
+    Enum with batch job states.
+     * QUEUED
+     * RUNNING
+     * FINISHED
+    """
+    QUEUED = 0
+    RUNNING = 1
+    FINISHED = 2
@@ -0,0 +1,10 @@
+class MemberState(object):
+    """
+    Enum with the states of a cluster member.
+     * ALIVE
+     * SUSPECT
+     * DEAD
+    """
+    ALIVE = 0
+    SUSPECT = 1
+    DEAD = 2
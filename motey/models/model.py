@@ -0,0 +1,198 @@
+import json
+
+try:
+    import msgpack
+    # msgpack 0.5.2 replaced the ``encoding`` option with ``raw``, 1.0 removed ``encoding``
+    msgpack_unpack_options = {'raw': False} if msgpack.version >= (0, 5, 2) else {'encoding': 'utf-8'}
+except ImportError:
+    msgpack = None
+
+# created once, ``json.dumps`` creates a new encoder for every call with other separators than the default
+json_encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+def encode(data):
+    """
+    Encodes data with MessagePack if it is installed, otherwise as compact JSON.
+
+    :param data: the data to be encoded, e.g. the dict of a model
+    :return: the encoded data
+    :rtype: bytes
+    """
+    if msgpack:
+        return msgpack.packb(data, use_bin_type=True)
+    return json_encoder.encode(data).encode('utf-8')
+
+
+def decode(data):
+    """
+    Decodes data which was encoded with ``encode``. JSON is detected and decoded independent of msgpack.
+
+    :param data: the encoded data
+    :type data: bytes
+    :return: the decoded data
+    :raises ValueError: if the data is invalid or MessagePack encoded data can not be decoded
+    """
+    if data[:1] in (b'{', b'[', b' ', b'\n'):
+        return json.loads(data.decode('utf-8'))
+    if not msgpack:
+        raise ValueError('MessagePack encoded data can not be decoded without the msgpack package')
+    return msgpack.unpackb(data, **msgpack_unpack_options)
+
+
+# marks a field without a default value, which is required by ``from_dict``
+REQUIRED = object()
+
+
+class Field(object):
+    """
+    Describes an attribute of a model.
+    """
+
+    __slots__ = ('name', 'default', 'model')
+
+    def __init__(self, name, default=REQUIRED, model=None):
+        """
+        Constructor of the field.
+
+        :param name: the name of the attribute and of the key in the dict
+        :param default: the value which is passed to the constructor if the key is missing. Default is ``REQUIRED``.
+                        Mutable defaults must be created by the constructor, e.g. ``None`` for an empty dict.
+        :param model: optional model class of the items of a list, e.g. the images of a service
+        """
+        self.name = name
+        self.default = default
+        self.model = model
+
+
+class ModelMeta(type):
+    """
+    Creates the ``__slots__`` of a model from its ``fields`` and generates the codecs ``to_dict`` and ``from_dict``.
+    The generated code accesses the attributes and keys directly instead of looping over the fields.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = namespace.get('fields', ())
+        namespace.setdefault('__slots__', tuple(field.name for field in fields))
+        cls = super().__new__(mcs, name, bases, namespace)
+        if fields:
+            cls.to_dict = mcs.compile(mcs.generate_to_dict(fields), 'to_dict', fields)
+            cls.from_dict = classmethod(mcs.compile(mcs.generate_from_dict(fields), 'from_dict', fields))
+        return cls
+
+    @staticmethod
+    def generate_to_dict(fields):
+        """
+        :return: the source code of the ``to_dict`` method
+        """
+        entries = []
+        for field in fields:
+            if field.model:
+                entries.append("'%s': [item.to_dict() for item in self.%s]" % (field.name, field.name))
+            else:
+                entries.append("'%s': self.%s" % (field.name, field.name))
+        return 'def to_dict(self):\n    return {%s}\n' % ', '.join(entries)
+
+    @staticmethod
+    def generate_from_dict(fields):
+        """
+        :return: the source code of the ``from_dict`` class method
+        """
+        lines = ['def from_dict(cls, data):']
+        required = [field for field in fields if field.default is REQUIRED]
+        if required:
+            lines.append('    try:')
+            lines.extend("        %s = data['%s']" % (field.name, field.name) for field in required)
+            lines.append('    except KeyError:')
+            lines.append('        return None')
+        lines.append('    get = data.get')
+        arguments = []
+        for index, field in enumerate(fields):
+            value = field.name if field.default is REQUIRED else "get('%s', default_%s)" % (field.name, index)
+            if field.model:
+                value = '[model_%s.from_dict(item) for item in %s]' % (index, value)
+            arguments.append('%s=%s' % (field.name, value))
+        lines.append('    return cls(%s)' % ', '.join(arguments))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def compile(source, name, fields):
+        """
+        Compiles a generated method.
+
+        :param source: the source code of the method
+        :param name: the name of the method
+        :param fields: the fields of the model, their defaults and models are available in the method
+        :return: the function
+        """
+        scope = {}
+        for index, field in enumerate(fields):
+            scope['default_%s' % index] = field.default
+            scope['model_%s' % index] = field.model
+        exec(compile(source, '<%s codec>' % name, 'exec'), scope)
+        return scope[name]
+
+
+class Model(object, metaclass=ModelMeta):
+    """
+    Base class of the model objects. The attributes of a model are defined in ``fields``, which are used to create the
+    ``__slots__`` and the codecs. The codecs ``to_bytes`` and ``from_bytes`` use MessagePack if it is installed,
+    otherwise compact JSON. ``from_bytes`` reads both formats.
+    """
+
+    __slots__ = ()
+    fields = ()
+
+    def __iter__(self):
+        return iter(self.to_dict().items())
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__,
+                           ', '.join('%s=%r' % (field.name, getattr(self, field.name)) for field in self.fields))
+
+    def to_bytes(self):
+        """
+        :return: the model encoded as bytes
+        """
+        return encode(self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decodes a model which was encoded with ``to_bytes``.
+
+        :param data: the encoded model
+        :type data: bytes
+        :return: the model or None if a required key is missing
+        """
+        return cls.from_dict(decode(data))
+
+    def to_dict(self):
+        """
+        Generated by the ``ModelMeta``.
+
+        :return: the model as dict
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Translates a dict into a model, generated by the ``ModelMeta``. Missing optional keys get their default value.
+
+        :param data: the dict with the model data
+        :type data: dict
+        :return: the model or None if a required key is missing
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def transform(cls, data):
+        """
+        Translates a dict into a model. Alias of ``from_dict``, which is kept for the existing callers.
+
+        :param data: a dict with the model data
+        :type data: dict
+        :return: the translated model, None if something goes wrong
+        """
+        return cls.from_dict(data)
@@ -0,0 +1,12 @@
+class PullState(object):
+    """
+    Enum with image pull states.
+     * QUEUED
+     * PULLING
+     * PULLED
+     * ERROR
+    """
+    QUEUED = 0
+    PULLING = 1
+    PULLED = 2
+    ERROR = 3
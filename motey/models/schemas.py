@@ -1,3 +1,11 @@
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
 # Schema to validate a yaml blueprint
 blueprint_yaml_schema = {
     "type": "object",
@@ -29,6 +37,10 @@ blueprint_yaml_schema = {
                         },
                         "minItems": 1,
                         "uniqueItems": True,
+                    },
+                    "warm_pool": {
+                        "type": "integer",
+                        "minimum": 0
                     }
                 },
                 "required": ["name", "engine"]
@@ -56,3 +68,52 @@ capability_json_schema = {
         "required": ["capability", "capability_type"]
     }
 }
+
+# The schema to validate a list of service ids.
+service_ids_json_schema = {
+    "type": "array",
+    "items": {
+        "type": "string"
+    },
+    "minItems": 1,
+    "uniqueItems": True
+}
+
+
+def compile_validator(schema):
+    """
+    Compiles a schema once into a validation function.
+    If ``fastjsonschema`` is installed, the schema will be compiled into Python code, otherwise the matching
+    ``jsonschema`` validator will be created once and reused.
+
+    :param schema: the schema to be compiled
+    :type schema: dict
+    :return: a function which takes the data to be validated and raises a ``jsonschema.ValidationError`` if the data
+             does not match the schema
+    """
+    if fastjsonschema:
+        compiled_validator = fastjsonschema.compile(schema)
+        schema_exception = fastjsonschema.JsonSchemaException
+
+        def __validate(data):
+            """
+            Inner function which translates the ``fastjsonschema`` errors into ``jsonschema`` errors.
+
+            :param data: the data to be validated
+            """
+            try:
+                compiled_validator(data)
+            except schema_exception as exception:
+                raise ValidationError(str(exception))
+
+        return __validate
+
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema).validate
+
+
+# Precompiled validators, which should be used instead of ``jsonschema.validate``.
+validate_blueprint = compile_validator(blueprint_yaml_schema)
+validate_capabilities = compile_validator(capability_json_schema)
+validate_service_ids = compile_validator(service_ids_json_schema)
@@ -1,4 +1,7 @@
-class SystemStatus(object):
+from motey.models.model import Field, Model
+
+
+class SystemStatus(Model):
     """
     Model which represents the status of the whole system.
     Possible status values are:
@@ -8,7 +11,14 @@ class SystemStatus(object):
      * network_rx_bytes
     """
 
-    def __init__(self):
+    fields = (
+        Field('used_memory', default=0),
+        Field('used_cpu', default=0),
+        Field('network_tx_bytes', default=0),
+        Field('network_rx_bytes', default=0)
+    )
+
+    def __init__(self, used_memory=0, used_cpu=0, network_tx_bytes=0, network_rx_bytes=0):
         """
         Constructor of the model.
         Possible status values are:
@@ -17,7 +27,7 @@ class SystemStatus(object):
          * network_tx_bytes
          * network_rx_bytes
         """
-        self.used_memory = 0
-        self.used_cpu = 0
-        self.network_tx_bytes = 0
-        self.network_rx_bytes = 0
+        self.used_memory = used_memory
+        self.used_cpu = used_cpu
+        self.network_tx_bytes = network_tx_bytes
+        self.network_rx_bytes = network_rx_bytes
@@ -1,4 +1,7 @@
-class VALInstanceStatus(object):
+from motey.models.model import Field, Model
+
+
+class VALInstanceStatus(Model):
     """
     Model which represents the status of an VAL instance.
     Possible status values are:
@@ -12,7 +15,21 @@ class VALInstanceStatus(object):
      * network_tx_bytes
      * network_rx_bytes
     """
-    def __init__(self):
+
+    fields = (
+        Field('name', default=None),
+        Field('image_name', default=None),
+        Field('created_at', default=None),
+        Field('status', default=None),
+        Field('ip', default='0.0.0.0'),
+        Field('used_memory', default=0),
+        Field('used_cpu', default=0),
+        Field('network_tx_bytes', default=0),
+        Field('network_rx_bytes', default=0)
+    )
+
+    def __init__(self, name=None, image_name=None, created_at=None, status=None, ip='0.0.0.0', used_memory=0,
+                 used_cpu=0, network_tx_bytes=0, network_rx_bytes=0):
         """
         Constructor of the class.
         Possible status values are:
@@ -26,12 +43,12 @@ class VALInstanceStatus(object):
          * network_tx_bytes
          * network_rx_bytes
         """
-        self.name = None
-        self.image_name = None
-        self.created_at = None
-        self.status = None
-        self.ip = '0.0.0.0'
-        self.used_memory = 0
-        self.used_cpu = 0
-        self.network_tx_bytes = 0
-        self.network_rx_bytes = 0
+        self.name = name
+        self.image_name = image_name
+        self.created_at = created_at
+        self.status = status
+        self.ip = ip
+        self.used_memory = used_memory
+        self.used_cpu = used_cpu
+        self.network_tx_bytes = network_tx_bytes
+        self.network_rx_bytes = network_rx_bytes
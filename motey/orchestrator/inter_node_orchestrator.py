@@ -1,9 +1,18 @@
 import threading
+import time
 
 from motey.communication.api_routes.service import Service as ServiceEndpoint
+from motey.communication.api_routes.service_batch import ServiceBatch as ServiceBatchEndpoint
+from motey.models.image import Image
 from motey.models.image_state import ImageState
+from motey.models.job_state import JobState
+from motey.models.service import Service as ServiceModel
 from motey.models.service_state import ServiceState
-from motey.utils.network_utils import get_own_ip
+from motey.utils import metrics, tracing
+
+PHASE_DURATION = metrics.registry.histogram('motey_orchestrator_phase_duration_seconds',
+                                            'Duration of the orchestration phases', ['phase'])
+SERVICES = metrics.registry.counter('motey_orchestrator_services', 'Number of handled services', ['result'])
 
 
 class InterNodeOrchestrator(object):
@@ -15,7 +24,8 @@ class InterNodeOrchestrator(object):
     """
 
     def __init__(self, logger, valmanager, service_repository, capability_repository, node_repository,
-                 communication_manager):
+                 communication_manager, job_repository, node_identity, image_prepull_manager=None,
+                 capabilities_ttl=60):
         """
         Constructor of the class.
 
@@ -31,6 +41,15 @@ class InterNodeOrchestrator(object):
         :type node_repository: motey.repositories.node_repository.NodeRepository
         :param communication_manager: DI injected
         :type communication_manager: motey.communication.communication_manager.CommunicationManager
+        :param job_repository: DI injected
+        :type job_repository: motey.repositories.job_repository.JobRepository
+        :param node_identity: DI injected
+        :type node_identity: motey.utils.node_identity.NodeIdentity
+        :param image_prepull_manager: optional DI injected manager to pull the images of the node in the background.
+                                      Default is None.
+        :type image_prepull_manager: motey.val.image_prepull_manager.ImagePrePullManager
+        :param capabilities_ttl: seconds after which the cached capabilities of a node will be requested again.
+                                 Default is 60.
         """
         self.logger = logger
         self.valmanager = valmanager
@@ -38,8 +57,25 @@ class InterNodeOrchestrator(object):
         self.capability_repository = capability_repository
         self.node_repository = node_repository
         self.communication_manager = communication_manager
+        self.job_repository = job_repository
+        self.node_identity = node_identity
+        self.image_prepull_manager = image_prepull_manager
+        # instances of removed nodes which were rescheduled on other nodes, will be terminated if the node rejoins
+        self.superseded_images = {}
+        self.superseded_images_lock = threading.Lock()
+        # capabilities of the other nodes, kept up to date by the capabilities deltas they publish
+        self.capabilities_ttl = capabilities_ttl
+        self.node_capabilities = {}
+        self.node_capabilities_lock = threading.Lock()
         self.yaml_post_stream = ServiceEndpoint.yaml_post_stream.subscribe(self.instantiate_service)
         self.yaml_delete_stream = ServiceEndpoint.yaml_delete_stream.subscribe(self.terminate_service)
+        self.batch_post_stream = ServiceBatchEndpoint.batch_post_stream.subscribe(
+            lambda batch: self.instantiate_services(*batch))
+        self.batch_delete_stream = ServiceBatchEndpoint.batch_delete_stream.subscribe(
+            lambda batch: self.terminate_services(*batch))
+        self.node_change_stream = self.node_repository.change_stream.subscribe(self.handle_node_change)
+        self.capabilities_delta_stream = self.communication_manager.capabilities_delta_stream.subscribe(
+            self.handle_capabilities_delta)
 
     def instantiate_service(self, service):
         """
@@ -49,49 +85,287 @@ class InterNodeOrchestrator(object):
         :type service: motey.models.service.Service
         """
 
-        def __inner_instantiate(inner_service):
+        # the worker thread continues the trace of the current request
+        worker_thread = threading.Thread(target=self.__instantiate, args=(service, tracing.tracer.current_context()))
+        worker_thread.daemon = True
+        worker_thread.start()
+
+    def instantiate_services(self, job, services):
+        """
+        Instantiate a batch of services.
+        All services will be stored with a single write and will be instantiated one after another in a single thread.
+        The progress is tracked in the ``JobRepository``.
+
+        :param job: the job of the batch
+        :type job: motey.models.job.Job
+        :param services: the services to be instantiated
+        :type services: list
+        """
+
+        def __inner_instantiate_batch(inner_job, inner_services, trace_context):
             """
-            Inner function which is used to run in a thread to instantiate a service.
+            Inner function which is used to run in a thread to instantiate a batch of services.
 
-            :param inner_service: the service to be used.
-            :type inner_service: motey.models.service.Service
+            :param inner_job: the job of the batch
+            :type inner_job: motey.models.job.Job
+            :param inner_services: the services to be instantiated
+            :type inner_services: list
+            :param trace_context: the trace context of the request which started the batch
             """
-            inner_service.state = ServiceState.INSTANTIATING
-            self.service_repository.add(dict(inner_service))
-            for image in inner_service.images:
-                if not image.capabilities:
-                    # no capabilities, deploy locally
-                    image.node = get_own_ip()
-                    continue
+            try:
+                with tracing.tracer.span('orchestrator.instantiate_batch', parent=trace_context,
+                                         attributes={'job_id': inner_job.id}):
+                    self.job_repository.set_state(inner_job.id, JobState.RUNNING)
+                    for inner_service in inner_services:
+                        inner_service.state = ServiceState.INSTANTIATING
+                    self.service_repository.add_multiple([dict(inner_service) for inner_service in inner_services])
+                    for inner_service in inner_services:
+                        self.__run_batch_service(inner_job, inner_service, self.__instantiate)
+            except Exception as exception:
+                self.logger.error('Batch job `%s` failed: %s' % (inner_job.id, exception))
+            finally:
+                # services which were not handled because of an error are marked as failed
+                self.job_repository.finish(inner_job.id)
 
-                for capability in image.capabilities:
-                    if not self.capability_repository.has(capability=capability):
-                        # if a single capability is not satisfied, search for external node
-                        node = self.find_node(image)
-                        if node:
-                            image.node = node['ip']
-                            # found a node which handle the container - we can break the loop
-                            break
-                        else:
-                            # does not found any node - error
-                            inner_service.state = ServiceState.ERROR
-                            break
-                else:
-                    # never broke - all capabilities are succeeded locally
-                    image.node = get_own_ip()
-
-                if inner_service.state == ServiceState.ERROR:
-                    self.service_repository.update(dict(inner_service))
-                    break
+        worker_thread = threading.Thread(target=__inner_instantiate_batch,
+                                         args=(job, services, tracing.tracer.current_context()))
+        worker_thread.daemon = True
+        worker_thread.start()
+
+    def __run_batch_service(self, job, service, handler):
+        """
+        Handles a single service of a batch job and marks it in the job.
+        An exception of the handler only fails the service, the remaining services of the batch are still handled.
+
+        :param job: the job of the batch
+        :type job: motey.models.job.Job
+        :param service: the service to be handled
+        :type service: motey.models.service.Service
+        :param handler: function which handles the service and returns True on success
+        """
+        try:
+            succeeded = handler(service)
+        except Exception as exception:
+            self.logger.error('Service `%s` of batch job `%s` failed: %s' % (service.id, job.id, exception))
+            succeeded = False
+        self.job_repository.mark_service(job.id, service.id, succeeded)
+
+    def __instantiate(self, service, trace_context=None):
+        """
+        Places all images of a service on the nodes which fulfill the capabilities and deploys them.
+
+        :param service: the service to be used.
+        :type service: motey.models.service.Service
+        :param trace_context: optional trace context of the request which started the instantiation
+        :return: True if the service was deployed, otherwise False
+        """
+        with tracing.tracer.span('orchestrator.instantiate', parent=trace_context,
+                                 attributes={'service_id': service.id}):
+            return self.__place_and_deploy(service)
+
+    def __place_and_deploy(self, service):
+        """
+        Places all images of a service and deploys them if every image was placed.
+        The service will be set to the ``ERROR`` state if an image could not be placed or deployed.
+
+        :param service: the service to be used.
+        :type service: motey.models.service.Service
+        :return: True if all images of the service were deployed, otherwise False
+        """
+        service.state = ServiceState.INSTANTIATING
+        self.service_repository.add(service.to_dict())
+        for image in service.images:
+            image.node = self.place_image(image)
+            if not image.node:
+                # does not found any node - error
+                service.state = ServiceState.ERROR
+                self.service_repository.update(service.to_dict())
+                SERVICES.labels(result='failed').inc()
+                return False
+            # warm the placement target while the remaining images are placed
+            self.prepull_image(image)
+
+        # never broke - no errors occurred - deploy
+        self.service_repository.update(service.to_dict())
+        self.deploy_service(service=service)
+        failed_images = [image.name for image in service.images if not image.id]
+        if failed_images:
+            # a node did not answer in time or could not start the instance
+            service.state = ServiceState.ERROR
+            service.state_message = 'Images could not be deployed: %s' % ', '.join(failed_images)
+            self.service_repository.update(service.to_dict())
+            SERVICES.labels(result='failed').inc()
+            return False
+        SERVICES.labels(result='deployed').inc()
+        return True
+
+    def prepull_image(self, image):
+        """
+        Requests the node of a placed image to pull the image in the background.
+        Images of the current node are queued directly, other nodes are requested fire and forget. Failures are only
+        logged, because the image is pulled by the deployment anyway.
+
+        :param image: the placed image
+        :type image: motey.models.image.Image
+        """
+        try:
+            if image.node == self.node_identity.get_ip():
+                if self.image_prepull_manager:
+                    self.image_prepull_manager.prepull(image)
             else:
-                # never broke - no errors occurred - deploy
-                self.service_repository.update(dict(inner_service))
-                self.deploy_service(service=inner_service)
+                self.communication_manager.prepull_image(image)
+        except Exception as exception:
+            self.logger.error('Pre pull of image `%s` on node %s failed: %s' % (image.name, image.node, exception))
+
+    @metrics.timed(PHASE_DURATION, phase='placement')
+    @tracing.traced('orchestrator.place_image')
+    def place_image(self, image):
+        """
+        Returns the node where an image should be executed.
+        The image will be executed locally if all capabilities are fulfilled by the current node.
+
+        :param image: the image to be placed
+        :type image: motey.models.image.Image
+        :return: the IP of the node or None if no node fulfills all capabilities
+        """
+        for capability in image.capabilities:
+            if not self.capability_repository.has(capability=capability):
+                # if a single capability is not satisfied, search for external node
+                node = self.find_node(image)
+                return node['ip'] if node else None
+        # no capabilities or all capabilities are succeeded locally
+        return self.node_identity.get_ip()
+
+    def handle_node_change(self, event):
+        """
+        Reschedules the images of a node after it has been removed from the ``NodesRepository``.
+        If a removed node rejoins, the instances which were rescheduled in the meantime will be terminated on it.
+        The images of a node which changed its ip are moved to the current ip.
+        The cached capabilities of the node will be dropped in any case.
+
+        :param event: the change event of the ``NodesRepository``
+        """
+        with self.node_capabilities_lock:
+            for key in ('ip', 'previous', 'current'):
+                self.node_capabilities.pop(event['data'].get(key), None)
+        if event['event'] == 'node_removed':
+            self.reschedule_node(event['data']['ip'])
+        elif event['event'] == 'node_added':
+            self.terminate_superseded_images(event['data']['ip'])
+        elif event['event'] == 'node_renamed':
+            self.rename_node(event['data']['previous'], event['data']['current'])
+
+    def rename_node(self, previous, current):
+        """
+        Moves all images of a node which changed its ip to the current ip.
+        The instances are still running on the node, so they are not rescheduled.
+
+        :param previous: the previous ip of the node
+        :param current: the current ip of the node
+        """
+        for entry in self.service_repository.find_by_node(previous):
+            service = ServiceModel.transform(entry)
+            for image in service.images:
+                if image.node == previous:
+                    image.node = current
+            self.service_repository.update(service.to_dict())
+        with self.superseded_images_lock:
+            superseded_images = self.superseded_images.pop(previous, [])
+            for image in superseded_images:
+                image.node = current
+            if superseded_images:
+                self.superseded_images.setdefault(current, []).extend(superseded_images)
+
+    def terminate_superseded_images(self, ip):
+        """
+        Terminates all instances on a node which were rescheduled on other nodes while the node was not available.
+        Instances which could not be terminated are kept and will be terminated when the node rejoins the next time.
 
-        worker_thread = threading.Thread(target=__inner_instantiate, args=(service,))
+        :param ip: the ip of the rejoined node
+        """
+        with self.superseded_images_lock:
+            images = self.superseded_images.pop(ip, [])
+        if not images:
+            return
+
+        worker_thread = threading.Thread(target=self.__terminate_superseded_images, args=(ip, images))
+        worker_thread.daemon = True
+        worker_thread.start()
+
+    def __terminate_superseded_images(self, ip, images):
+        """
+        Terminates the given superseded instances on the rejoined node.
+
+        :param ip: the ip of the rejoined node
+        :param images: the superseded instances
+        :type images: list
+        """
+        remaining = []
+        for image in images:
+            self.logger.info('Terminate superseded instance `%s` on node %s' % (image.id, ip))
+            try:
+                terminated = self.communication_manager.terminate_image(image)
+            except Exception as exception:
+                self.logger.error('Superseded instance `%s` on node %s could not be terminated: %s' %
+                                  (image.id, ip, exception))
+                terminated = False
+            if not terminated:
+                remaining.append(image)
+        if remaining:
+            with self.superseded_images_lock:
+                self.superseded_images.setdefault(ip, []).extend(remaining)
+
+    def reschedule_node(self, ip):
+        """
+        Places all images, which were executed on a node which is not available anymore, on other nodes.
+
+        :param ip: the ip of the node which is not available anymore
+        """
+
+        worker_thread = threading.Thread(target=self.__reschedule, args=(ip,))
         worker_thread.daemon = True
         worker_thread.start()
 
+    @metrics.timed(PHASE_DURATION, phase='reschedule')
+    @tracing.traced('orchestrator.reschedule')
+    def __reschedule(self, ip):
+        """
+        Places and deploys the images of all active services which were executed on the given node.
+        Services with images which can not be placed or deployed anymore will be set to the ``ERROR`` state.
+        The old instances are remembered, so that they can be terminated if the node rejoins.
+
+        :param ip: the ip of the node which is not available anymore
+        """
+        for entry in self.service_repository.find_by_node(ip):
+            service = ServiceModel.transform(entry)
+            if service.state not in (ServiceState.INSTANTIATING, ServiceState.RUNNING):
+                continue
+            self.logger.info('Reschedule service `%s` with the id `%s`' % (service.service_name, service.id))
+            for image in service.images:
+                if image.node != ip:
+                    continue
+                if image.id:
+                    with self.superseded_images_lock:
+                        self.superseded_images.setdefault(ip, []).append(Image.from_dict(image.to_dict()))
+                image.node = self.place_image(image)
+                if not image.node:
+                    service.state = ServiceState.ERROR
+                    service.state_message = 'Node %s is not available anymore' % ip
+                    break
+                image.id = self.communication_manager.deploy_image(image)
+                if not image.id:
+                    # the reconciler ignores images without an instance, so the failure has to be visible here
+                    service.state = ServiceState.ERROR
+                    service.state_message = 'Image `%s` could not be redeployed after node %s was removed' % (
+                        image.name, ip)
+                    break
+            self.service_repository.update(service.to_dict())
+        if self.node_repository.has(ip):
+            # the node rejoined while its images were rescheduled
+            self.terminate_superseded_images(ip)
+
+    @metrics.timed(PHASE_DURATION, phase='deployment')
+    @tracing.traced('orchestrator.deploy_service')
     def deploy_service(self, service):
         """
         Deploy all images of a service to the related nodes.
@@ -102,8 +376,9 @@ class InterNodeOrchestrator(object):
         for image in service.images:
             image.id = self.communication_manager.deploy_image(image)
         # TODO: store new image id
-        self.service_repository.update(dict(service))
+        self.service_repository.update(service.to_dict())
 
+    @metrics.timed(PHASE_DURATION, phase='status')
     def get_service_status(self, service):
         """
         Returns the service status.
@@ -136,9 +411,59 @@ class InterNodeOrchestrator(object):
         else:
             service.state = ServiceState.ERROR
 
-        self.service_repository.update(dict(service))
+        self.service_repository.update(service.to_dict())
         return service.state
 
+    def handle_capabilities_delta(self, delta):
+        """
+        Applies a capabilities delta of another node to its cached capabilities.
+        Deltas of nodes without cached capabilities will be ignored, they will be requested on the next placement.
+
+        :param delta: dict with the ``ip`` of the node and the ``added`` and ``removed`` capabilities as dicts with
+                      ``capability`` and ``capability_type``
+        """
+        try:
+            ip = delta['ip']
+            added = [(entry['capability'], entry.get('capability_type')) for entry in delta.get('added') or []]
+            removed = [(entry['capability'], entry.get('capability_type')) for entry in delta.get('removed') or []]
+        except (KeyError, TypeError, AttributeError):
+            self.logger.error('received an invalid capabilities delta')
+            return
+
+        with self.node_capabilities_lock:
+            if ip not in self.node_capabilities:
+                return
+            fetched_at, capabilities = self.node_capabilities[ip]
+            capabilities = [entry for entry in capabilities
+                            if not any(entry['capability'] == capability and capability_type in (None, entry.get('type'))
+                                       for capability, capability_type in removed)]
+            known = set(entry['capability'] for entry in capabilities)
+            for capability, capability_type in added:
+                if capability not in known:
+                    known.add(capability)
+                    capabilities.append({'capability': capability, 'type': capability_type})
+            self.node_capabilities[ip] = (fetched_at, capabilities)
+
+    def get_node_capabilities(self, ip):
+        """
+        Returns the capabilities of a node.
+        They will be taken from the cache, which is kept up to date by the capabilities deltas, and only requested
+        from the node if they are not cached or older than ``capabilities_ttl``.
+
+        :param ip: the ip of the node
+        :return: the capabilities of the node
+        """
+        with self.node_capabilities_lock:
+            cached = self.node_capabilities.get(ip)
+            if cached and time.monotonic() - cached[0] < self.capabilities_ttl:
+                return list(cached[1])
+
+        capabilities = self.communication_manager.request_capabilities(ip)
+        if capabilities:
+            with self.node_capabilities_lock:
+                self.node_capabilities[ip] = (time.monotonic(), list(capabilities))
+        return capabilities
+
     def compare_capabilities(self, needed_capabilities_list, node_capabilities_dict):
         """
         Compares two dicts with capabilities.
@@ -159,6 +484,7 @@ class InterNodeOrchestrator(object):
                 return False
         return True
 
+    @tracing.traced('orchestrator.find_node')
     def find_node(self, image):
         """
         Try to find a node in the cluster which can be used to deploy the given image.
@@ -168,7 +494,7 @@ class InterNodeOrchestrator(object):
         :return: the IP of the node to be used or None if it does not found a node which fulfill all capabilities
         """
         for node in self.node_repository.all():
-            capabilities = self.communication_manager.request_capabilities(node['ip'])
+            capabilities = self.get_node_capabilities(node['ip'])
             if self.compare_capabilities(needed_capabilities_list=image.capabilities, node_capabilities_dict=capabilities):
                 return node
         return None
@@ -181,22 +507,76 @@ class InterNodeOrchestrator(object):
         :type service: motey.models.service.Service
         """
 
-        def __inner_terminate(inner_service):
+        worker_thread = threading.Thread(target=self.__terminate, args=(service, tracing.tracer.current_context()))
+        worker_thread.daemon = True
+        worker_thread.start()
+
+    def terminate_services(self, job, services):
+        """
+        Terminates a batch of services one after another in a single thread.
+        The progress is tracked in the ``JobRepository``.
+
+        :param job: the job of the batch
+        :type job: motey.models.job.Job
+        :param services: the services to be terminated
+        :type services: list
+        """
+
+        def __inner_terminate_batch(inner_job, inner_services, trace_context):
             """
-            Inner function which is used to run in a thread to terminates a service.
+            Inner function which is used to run in a thread to terminate a batch of services.
 
-            :param inner_service: the service to be used.
-            :type inner_service: motey.models.service.Service
+            :param inner_job: the job of the batch
+            :type inner_job: motey.models.job.Job
+            :param inner_services: the services to be terminated
+            :type inner_services: list
+            :param trace_context: the trace context of the request which started the batch
             """
-            if self.service_repository.has(service_id=inner_service.id):
-                inner_service.state = ServiceState.STOPPING
-                self.service_repository.update(dict(inner_service))
-                for image in inner_service.images:
-                    self.communication_manager.terminate_image(image)
-            else:
-                self.logger.error(
-                    'Service `%s` with the id `%s` is not available' % (inner_service.service_name, inner_service.id))
+            try:
+                with tracing.tracer.span('orchestrator.terminate_batch', parent=trace_context,
+                                         attributes={'job_id': inner_job.id}):
+                    self.job_repository.set_state(inner_job.id, JobState.RUNNING)
+                    for inner_service in inner_services:
+                        self.__run_batch_service(inner_job, inner_service, self.__terminate)
+            except Exception as exception:
+                self.logger.error('Batch job `%s` failed: %s' % (inner_job.id, exception))
+            finally:
+                # services which were not handled because of an error are marked as failed
+                self.job_repository.finish(inner_job.id)
 
-        worker_thread = threading.Thread(target=__inner_terminate, args=(service,))
+        worker_thread = threading.Thread(target=__inner_terminate_batch,
+                                         args=(job, services, tracing.tracer.current_context()))
         worker_thread.daemon = True
         worker_thread.start()
+
+    @metrics.timed(PHASE_DURATION, phase='termination')
+    def __terminate(self, service, trace_context=None):
+        """
+        Terminates all image instances of a service.
+
+        :param service: the service to be used.
+        :type service: motey.models.service.Service
+        :param trace_context: optional trace context of the request which started the termination
+        :return: True if the service exists, otherwise False
+        """
+        with tracing.tracer.span('orchestrator.terminate', parent=trace_context,
+                                 attributes={'service_id': service.id}):
+            return self.__terminate_images(service)
+
+    def __terminate_images(self, service):
+        """
+        Terminates all image instances of a service if the service exists.
+
+        :param service: the service to be used.
+        :type service: motey.models.service.Service
+        :return: True if the service exists, otherwise False
+        """
+        if not self.service_repository.has(service_id=service.id):
+            self.logger.error('Service `%s` with the id `%s` is not available' % (service.service_name, service.id))
+            return False
+
+        service.state = ServiceState.STOPPING
+        self.service_repository.update(service.to_dict())
+        for image in service.images:
+            self.communication_manager.terminate_image(image)
+        return True
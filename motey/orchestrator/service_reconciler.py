@@ -0,0 +1,299 @@
+import threading
+import zlib
+from time import sleep
+
+from motey.models.image_state import ImageState
+from motey.models.service import Service as ServiceModel
+from motey.models.service_state import ServiceState
+from motey.utils import metrics, tracing
+from motey.utils.work_queue import RateLimiter, WorkQueue
+
+RECONCILE_ACTIONS = metrics.registry.counter('motey_reconciler_actions', 'Number of actions of the reconciler',
+                                             ['action'])
+QUEUE_DEPTH = metrics.registry.gauge('motey_reconciler_queue_depth', 'Number of services waiting for a reconciliation')
+
+# services in these states are reconciled
+ACTIVE_STATES = (ServiceState.INSTANTIATING, ServiceState.RUNNING)
+
+# images in these states are starting or stopping, the service is checked again later
+PENDING_IMAGE_STATES = (ImageState.INITIAL, ImageState.INSTANTIATING, ImageState.STOPPING)
+
+
+class ServiceReconciler(object):
+    """
+    Keeps the services of the ``ServiceRepository`` in sync with the observed states of their images.
+    The ids of changed services are added to a ``WorkQueue``, which is processed by a few worker threads. Failed images
+    of running services are restarted on their node or rescheduled on another node if the restart fails. Services
+    which can not be reconciled are retried with an exponential backoff and are set to ``ERROR`` after
+    ``max_retries`` failures. Services with images which are still starting or stopping are checked again after
+    ``pending_interval`` seconds, their state is not changed until all images are running.
+    Additionally all services are resynced periodically, but only one of ``resync_shards`` shards per tick, so every
+    service is checked once per ``resync_interval`` without polling all services on every tick. The number of
+    reconciliations per second is limited by ``rate``.
+    """
+
+    def __init__(self, logger, service_repository, valmanager, communication_manager, inter_node_orchestrator,
+                 node_identity, service_recovery=None, workers=2, resync_interval=60, resync_shards=12, rate=20,
+                 backoff_base=1, backoff_max=300, max_retries=5, pending_interval=5):
+        """
+        Constructor of the ServiceReconciler.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param service_repository: DI injected
+        :type service_repository: motey.repositories.service_repository.ServiceRepository
+        :param valmanager: DI injected
+        :type valmanager: motey.val.valmanager.VALManager
+        :param communication_manager: DI injected
+        :type communication_manager: motey.communication.communication_manager.CommunicationManager
+        :param inter_node_orchestrator: DI injected
+        :type inter_node_orchestrator: motey.orchestrator.inter_node_orchestrator.InterNodeOrchestrator
+        :param node_identity: DI injected
+        :type node_identity: motey.utils.node_identity.NodeIdentity
+        :param service_recovery: optional DI injected recovery. The reconciliation waits until the recovery is
+                                 finished. Default is None.
+        :type service_recovery: motey.orchestrator.service_recovery.ServiceRecovery
+        :param workers: the number of parallel reconciliation threads. Default is ``2``.
+        :param resync_interval: the time in seconds after which every service is resynced. ``0`` disables the
+                                resync. Default is ``60``.
+        :param resync_shards: the number of shards which are resynced one after another. Default is ``12``.
+        :param rate: the maximum number of reconciliations per second. ``0`` disables the limit. Default is ``20``.
+        :param backoff_base: the delay in seconds before a failed service is retried the first time. Default is ``1``.
+        :param backoff_max: the maximum delay in seconds before a failed service is retried. Default is ``300``.
+        :param max_retries: the number of failed reconciliations until the service is set to ``ERROR``.
+                            Default is ``5``.
+        :param pending_interval: the time in seconds after which a service with starting or stopping images is
+                                 checked again. Default is ``5``.
+        """
+        self.logger = logger
+        self.service_repository = service_repository
+        self.valmanager = valmanager
+        self.communication_manager = communication_manager
+        self.inter_node_orchestrator = inter_node_orchestrator
+        self.node_identity = node_identity
+        self.service_recovery = service_recovery
+        self.resync_interval = resync_interval
+        self.resync_shards = max(resync_shards, 1)
+        self.max_retries = max_retries
+        self.pending_interval = pending_interval
+        self.work_queue = WorkQueue(backoff_base=backoff_base, backoff_max=backoff_max)
+        self.rate_limiter = RateLimiter(rate=rate, burst=rate)
+        self.stopped = False
+        self.subscription = None
+
+        self.worker_threads = []
+        for index in range(workers):
+            worker_thread = threading.Thread(target=self.__run_worker_thread, args=())
+            worker_thread.daemon = True
+            self.worker_threads.append(worker_thread)
+        self.resync_thread = threading.Thread(target=self.__run_resync_thread, args=())
+        self.resync_thread.daemon = True
+
+    def start(self):
+        """
+        Subscribes to the changes of the ``ServiceRepository`` and starts the worker and the resync threads.
+        """
+        self.subscription = self.service_repository.change_stream.subscribe(self.handle_service_change)
+        QUEUE_DEPTH.set_function(lambda: len(self.work_queue))
+        for worker_thread in self.worker_threads:
+            worker_thread.start()
+        if self.resync_interval > 0:
+            self.resync_thread.start()
+        self.logger.info('service reconciler started')
+
+    def stop(self):
+        """
+        Stops the worker and the resync threads. Services which are reconciled at the moment are finished.
+        """
+        self.stopped = True
+        if self.subscription:
+            self.subscription.dispose()
+        self.work_queue.shut_down()
+        self.logger.info('service reconciler stopped')
+
+    def handle_service_change(self, event):
+        """
+        Queues the services which were added or updated.
+
+        :param event: the change event of the ``ServiceRepository``
+        """
+        if event['event'] in ('service_added', 'service_updated'):
+            self.work_queue.add(event['data']['id'])
+
+    def resync(self, shard):
+        """
+        Queues all active services of a shard.
+
+        :param shard: the number of the shard
+        :return: the number of queued services
+        """
+        service_ids = [entry['id'] for entry in self.service_repository.all() if entry.get('state') in ACTIVE_STATES]
+        service_ids = [service_id for service_id in service_ids if self.get_shard(service_id) == shard]
+        for service_id in service_ids:
+            self.work_queue.add(service_id)
+        return len(service_ids)
+
+    def get_shard(self, service_id):
+        """
+        :param service_id: the id of the service
+        :return: the shard of the service, which is stable across restarts
+        """
+        return zlib.crc32(service_id.encode('utf-8')) % self.resync_shards
+
+    @tracing.traced('reconciler.reconcile')
+    def reconcile(self, service_id):
+        """
+        Compares the desired state of a service with the observed states of its images and repairs failed images.
+        Services which are not instantiating or running, and services which are still deployed by the orchestrator,
+        are ignored. A service becomes ``RUNNING`` only if all images are running, services with starting or stopping
+        images are queued again after ``pending_interval`` seconds.
+
+        :param service_id: the id of the service
+        :return: True if the service is in sync or pending afterwards, False if it should be retried
+        """
+        service = self.__find_active(service_id)
+        if not service or not all(image.node and image.id for image in service.images):
+            return True
+
+        stored_service = service.to_dict()
+        ip = self.node_identity.get_ip()
+        in_sync = True
+        pending = False
+        for image in service.images:
+            if image.node == ip:
+                image_state = self.valmanager.get_instance_state(image)
+            else:
+                image_state = self.communication_manager.request_image_status(image)
+            if image_state == ImageState.RUNNING:
+                continue
+            if image_state in PENDING_IMAGE_STATES:
+                pending = True
+                continue
+            # the service could have been terminated in the meantime
+            if not self.__find_active(service_id):
+                return True
+            # an unknown state means that the node did not answer in time, the service is retried with a backoff
+            # until the node answers again or is evicted and its images are rescheduled
+            if image_state is None or not self.repair(image, ip):
+                in_sync = False
+
+        if in_sync and pending:
+            self.work_queue.add_after(service_id, self.pending_interval)
+        elif in_sync:
+            service.state = ServiceState.RUNNING
+        if service.to_dict() != stored_service and self.__find_active(service_id):
+            self.service_repository.update(service.to_dict())
+        return in_sync
+
+    def repair(self, image, ip):
+        """
+        Restarts a failed image on its node. If the restart fails, the image is placed and deployed again.
+
+        :param image: the failed image
+        :type image: motey.models.image.Image
+        :param ip: the ip of the current node
+        :return: True if the image has a new instance, otherwise False
+        """
+        instance_id = self.__deploy(image, ip)
+        if instance_id:
+            image.id = instance_id
+            RECONCILE_ACTIONS.labels(action='restarted').inc()
+            self.logger.info('Restarted image `%s` on node %s' % (image.name, image.node))
+            return True
+
+        node = self.inter_node_orchestrator.place_image(image)
+        if node:
+            previous_node, image.node = image.node, node
+            instance_id = self.__deploy(image, ip)
+            if instance_id:
+                image.id = instance_id
+                RECONCILE_ACTIONS.labels(action='rescheduled').inc()
+                self.logger.info('Rescheduled image `%s` from node %s to %s' % (image.name, previous_node, node))
+                return True
+            image.node = previous_node
+
+        RECONCILE_ACTIONS.labels(action='failed').inc()
+        return False
+
+    def fail(self, service_id):
+        """
+        Sets a service to ``ERROR`` after it could not be reconciled ``max_retries`` times, if it is still active.
+
+        :param service_id: the id of the service
+        """
+        service = self.__find_active(service_id)
+        if not service:
+            return
+        service.state = ServiceState.ERROR
+        service.state_message = 'Images could not be repaired after %s attempts' % self.max_retries
+        self.service_repository.update(service.to_dict())
+        RECONCILE_ACTIONS.labels(action='given_up').inc()
+
+    def __deploy(self, image, ip):
+        """
+        Starts a new instance of an image on its node.
+
+        :return: the id of the instance or None if something went wrong
+        """
+        if image.node == ip:
+            return self.valmanager.instantiate(image)
+        return self.communication_manager.deploy_image(image)
+
+    def __find_active(self, service_id):
+        """
+        :return: the service if it is instantiating or running, otherwise None
+        """
+        entry = next(iter(self.service_repository.find_by_ids([service_id])), None)
+        service = ServiceModel.transform(entry) if entry else None
+        if service and service.state in ACTIVE_STATES:
+            return service
+        return None
+
+    def __wait_for_recovery(self):
+        if self.service_recovery:
+            self.service_recovery.finished.wait()
+
+    def __run_worker_thread(self):
+        """
+        Takes the ids of the services from the work queue and reconciles them until the reconciler is stopped.
+        """
+        self.__wait_for_recovery()
+        while True:
+            service_id = self.work_queue.get()
+            if service_id is None:
+                break
+            try:
+                self.rate_limiter.acquire()
+                in_sync = self.reconcile(service_id)
+            except Exception as exception:
+                self.logger.error('Reconciliation of service `%s` failed: %s' % (service_id, exception))
+                in_sync = False
+
+            try:
+                if in_sync:
+                    self.work_queue.forget(service_id)
+                elif self.work_queue.retries(service_id) >= self.max_retries:
+                    self.work_queue.forget(service_id)
+                    self.fail(service_id)
+                else:
+                    self.work_queue.add_rate_limited(service_id)
+            except Exception as exception:
+                self.logger.error('Reconciliation of service `%s` failed: %s' % (service_id, exception))
+            finally:
+                self.work_queue.done(service_id)
+
+    def __run_resync_thread(self):
+        """
+        Queues the services of the next shard every ``resync_interval / resync_shards`` seconds.
+        """
+        self.__wait_for_recovery()
+        shard = 0
+        while not self.stopped:
+            sleep(self.resync_interval / self.resync_shards)
+            if self.stopped:
+                break
+            try:
+                self.resync(shard)
+            except Exception as exception:
+                self.logger.error('Resync of the services failed: %s' % exception)
+            shard = (shard + 1) % self.resync_shards
@@ -0,0 +1,171 @@
+import threading
+
+from motey.models.service import Service as ServiceModel
+from motey.models.service_state import ServiceState
+from motey.utils import metrics, tracing
+
+RECOVERED_IMAGES = metrics.registry.counter('motey_recovery_images', 'Number of images handled by the recovery',
+                                            ['result'])
+
+# services in these states were interrupted while they were deployed or running
+ACTIVE_STATES = (ServiceState.INITIAL, ServiceState.INSTANTIATING, ServiceState.RUNNING)
+
+
+class ServiceRecovery(object):
+    """
+    Recovers the services of the ``ServiceRepository`` after a restart of the node.
+    The stored images of the node are compared with the running instances of the VAL plugins in a single pass, every
+    plugin is asked only once. Images which are still running are kept, interrupted deployments are resumed and
+    interrupted terminations are finished. All repaired services are stored with a single write.
+    Images which are executed on other nodes are only deployed if they never got an instance id, their state is
+    handled by the other nodes.
+    """
+
+    def __init__(self, logger, service_repository, valmanager, communication_manager, inter_node_orchestrator,
+                 node_identity):
+        """
+        Constructor of the class.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param service_repository: DI injected
+        :type service_repository: motey.repositories.service_repository.ServiceRepository
+        :param valmanager: DI injected
+        :type valmanager: motey.val.valmanager.VALManager
+        :param communication_manager: DI injected
+        :type communication_manager: motey.communication.communication_manager.CommunicationManager
+        :param inter_node_orchestrator: DI injected
+        :type inter_node_orchestrator: motey.orchestrator.inter_node_orchestrator.InterNodeOrchestrator
+        :param node_identity: DI injected
+        :type node_identity: motey.utils.node_identity.NodeIdentity
+        """
+        self.logger = logger
+        self.service_repository = service_repository
+        self.valmanager = valmanager
+        self.communication_manager = communication_manager
+        self.inter_node_orchestrator = inter_node_orchestrator
+        self.node_identity = node_identity
+        self.recovery_thread = None
+        # set after the recovery is finished, even if it failed
+        self.finished = threading.Event()
+
+    def start(self):
+        """
+        Starts the recovery in a background thread, so the node is available while the services are recovered.
+        """
+        self.recovery_thread = threading.Thread(target=self.__run_recovery_thread, args=())
+        self.recovery_thread.daemon = True
+        self.recovery_thread.start()
+
+    def __run_recovery_thread(self):
+        try:
+            self.recover()
+        except Exception as exception:
+            self.logger.error('Recovery of the services failed: %s' % exception)
+        finally:
+            self.finished.set()
+
+    @tracing.traced('recovery.recover')
+    def recover(self):
+        """
+        Recovers all services which were active or stopping when the node stopped.
+
+        :return: dict with the number of images per result, e.g. ``{'kept': 3, 'redeployed': 1}``
+        """
+        services = [ServiceModel.transform(entry) for entry in self.service_repository.all()
+                    if entry.get('state') in ACTIVE_STATES + (ServiceState.STOPPING,)]
+        services = [service for service in services if service]
+        if not services:
+            return {}
+
+        ip = self.node_identity.get_ip()
+        local_images = [image for service in services for image in service.images if image.node == ip and image.id]
+        running_instances = self.valmanager.get_running_instances(local_images) if local_images else set()
+
+        results = {}
+        repaired_services = []
+        for service in services:
+            stored_service = service.to_dict()
+            if service.state == ServiceState.STOPPING:
+                self.__finish_termination(service, ip, running_instances, results)
+            else:
+                self.__resume_deployment(service, ip, running_instances, results)
+            if service.to_dict() != stored_service:
+                repaired_services.append(service.to_dict())
+
+        self.service_repository.update_multiple(repaired_services)
+        for result, count in results.items():
+            RECOVERED_IMAGES.labels(result=result).inc(count)
+        self.logger.info('Recovered %s services, images: %s' % (
+            len(services), ', '.join('%s %s' % (count, result) for result, count in sorted(results.items()))))
+        return results
+
+    def __resume_deployment(self, service, ip, running_instances, results):
+        """
+        Places and deploys all images of a service which have no running instance.
+        The service will be ``RUNNING`` if all images have an instance, otherwise it will be ``ERROR``. Images of nodes
+        which do not answer in time are counted as failed.
+
+        :param service: the service to be recovered
+        :type service: motey.models.service.Service
+        :param ip: the ip of the current node
+        :param running_instances: set with the ids of the running instances of the current node
+        :param results: dict with the number of images per result, which will be updated
+        """
+        for image in service.images:
+            if image.node == ip and image.id in running_instances:
+                self.__count(results, 'kept')
+                continue
+            if image.node != ip and image.node and image.id:
+                self.__count(results, 'remote')
+                continue
+
+            if not image.node:
+                image.node = self.inter_node_orchestrator.place_image(image)
+                if not image.node:
+                    service.state = ServiceState.ERROR
+                    service.state_message = 'Image `%s` could not be placed after a restart' % image.name
+                    self.__count(results, 'failed')
+                    return
+
+            if image.node == ip:
+                image.id = self.valmanager.instantiate(image)
+            else:
+                image.id = self.communication_manager.deploy_image(image)
+            if not image.id:
+                service.state = ServiceState.ERROR
+                service.state_message = 'Image `%s` could not be deployed after a restart' % image.name
+                self.__count(results, 'failed')
+                return
+            self.__count(results, 'redeployed')
+
+        service.state = ServiceState.RUNNING
+
+    def __finish_termination(self, service, ip, running_instances, results):
+        """
+        Terminates the remaining instances of a service which was stopped while the node stopped.
+        The service stays ``STOPPING`` if another node did not answer in time.
+
+        :param service: the service to be terminated
+        :type service: motey.models.service.Service
+        :param ip: the ip of the current node
+        :param running_instances: set with the ids of the running instances of the current node
+        :param results: dict with the number of images per result, which will be updated
+        """
+        terminated = True
+        for image in service.images:
+            if image.node == ip and image.id in running_instances:
+                self.valmanager.terminate(image)
+            elif image.node and image.node != ip and image.id:
+                if not self.communication_manager.terminate_image(image):
+                    # the node did not answer, the termination is tried again after the next restart
+                    self.__count(results, 'failed')
+                    terminated = False
+                    continue
+            self.__count(results, 'terminated')
+        if terminated:
+            service.state = ServiceState.TERMINATED
+
+    @staticmethod
+    def __count(results, result):
+        results[result] = results.get(result, 0) + 1
@@ -1,7 +1,15 @@
 import errno
 import os
+import uuid
+
+from rx.subjects import Subject
 
 from motey.configuration.configreader import config
+from motey.utils import metrics
+
+# observes the public methods of the repositories, see ``metrics.timed_methods``
+OPERATION_DURATION = metrics.registry.histogram('motey_repository_operation_duration_seconds',
+                                                'Duration of the repository operations', ['repository', 'operation'])
 
 
 class BaseRepository(object):
@@ -14,6 +22,11 @@ class BaseRepository(object):
         Constructor of the class.
         """
         self.db = None
+        # changes with every process start, so versions of different runs can not be mixed up
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        # emits a dict with the ``event`` and the related ``data`` after an entry has been changed
+        self.change_stream = Subject()
         directory = config['DATABASE']['path']
         if not os.path.exists(directory):
             try:
@@ -30,7 +43,43 @@ class BaseRepository(object):
 
         :return: a list of all existing entries.
         """
-        return self.db.all() if self.db else None
+        return self.db.all() if self.db is not None else None
+
+    def find_page(self, predicate=None, cursor=None, limit=None):
+        """
+        Returns a page of entries in the order they were inserted.
+
+        :param predicate: optional function which returns True for all entries which should be returned.
+        :param cursor: optional cursor of the previous page. Only entries after the cursor will be returned.
+        :type cursor: int
+        :param limit: optional maximum number of entries of the page.
+        :type limit: int
+        :return: a tuple with the list of entries and the cursor of the next page or None if there is no next page.
+        """
+        if not self.db:
+            return [], None
+
+        entries = sorted(self.db.all(), key=lambda entry: entry.eid)
+        if cursor is not None:
+            entries = [entry for entry in entries if entry.eid > cursor]
+        if predicate:
+            entries = [entry for entry in entries if predicate(entry)]
+        if limit is not None and len(entries) > limit:
+            return entries[:limit], entries[limit - 1].eid
+        return entries, None
+
+    def changed(self, event=None, data=None):
+        """
+        Increases the version of the repository and emits the change on the ``change_stream``.
+        Must be called after every write to the database.
+
+        :param event: optional name of the change event. If it is None, nothing will be emitted.
+        :type event: str
+        :param data: the data of the change event
+        """
+        self.version += 1
+        if event:
+            self.change_stream.on_next({'event': event, 'data': data})
 
     def clear(self):
         """
@@ -38,3 +87,4 @@ class BaseRepository(object):
         """
         if self.db:
             self.db.purge()
+            self.changed()
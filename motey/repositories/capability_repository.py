@@ -1,9 +1,13 @@
+import threading
+
 from tinydb import TinyDB, Query
 
 from motey.configuration.configreader import config
-from motey.repositories.base_repository import BaseRepository
+from motey.repositories.base_repository import BaseRepository, OPERATION_DURATION
+from motey.utils import metrics
 
 
+@metrics.timed_methods(OPERATION_DURATION, exclude=('changed',), repository='capability')
 class CapabilityRepository(BaseRepository):
     """
     Repository for all capability specific actions.
@@ -16,6 +20,8 @@ class CapabilityRepository(BaseRepository):
         """
         super(CapabilityRepository, self).__init__()
         self.db = TinyDB('%s/capabilities.json' % config['DATABASE']['path'])
+        # serializes the read and the writes of ``apply_changes``
+        self.lock = threading.Lock()
 
     def add(self, capability, capability_type):
         """
@@ -26,6 +32,10 @@ class CapabilityRepository(BaseRepository):
         """
         if not self.has(capability):
             self.db.insert({'capability': capability, 'type': capability_type})
+            self.changed('capabilities_changed', {
+                'added': [{'capability': capability, 'capability_type': capability_type}],
+                'removed': []
+            })
 
     def remove(self, capability, capability_type=None):
         """
@@ -38,6 +48,55 @@ class CapabilityRepository(BaseRepository):
             self.db.remove((Query().capability == capability) & (Query().type == capability_type))
         else:
             self.db.remove(Query().capability == capability)
+        self.changed('capabilities_changed', {
+            'added': [],
+            'removed': [{'capability': capability, 'capability_type': capability_type}]
+        })
+
+    def apply_changes(self, added=None, removed=None):
+        """
+        Adds and removes a batch of capabilities with at most one removal and one insertion.
+        Capabilities which should be added but already exist and capabilities which should be removed but do not exist
+        will be ignored.
+
+        :param added: list of ``(capability, capability_type)`` tuples to be added. Default is None.
+        :param removed: list of ``(capability, capability_type)`` tuples to be removed. Default is None.
+        :return: a tuple with the lists of the capabilities which were actually added and removed
+        """
+        added = added or []
+        removed = removed or []
+        if not added and not removed:
+            return [], []
+
+        removed_keys = set(removed)
+        with self.lock:
+            entries = self.db.all()
+            removed_entries = [entry for entry in entries
+                               if (entry.get('capability'), entry.get('type')) in removed_keys]
+            removed_eids = set(entry.eid for entry in removed_entries)
+            existing_capabilities = set(entry.get('capability') for entry in entries if entry.eid not in removed_eids)
+
+            applied_added = []
+            for capability, capability_type in added:
+                if capability not in existing_capabilities:
+                    existing_capabilities.add(capability)
+                    applied_added.append((capability, capability_type))
+            applied_removed = [(entry['capability'], entry['type']) for entry in removed_entries]
+
+            if removed_eids:
+                self.db.remove(eids=list(removed_eids))
+            if applied_added:
+                self.db.insert_multiple([{'capability': capability, 'type': capability_type}
+                                         for capability, capability_type in applied_added])
+
+        if applied_added or applied_removed:
+            self.changed('capabilities_changed', {
+                'added': [{'capability': capability, 'capability_type': capability_type}
+                          for capability, capability_type in applied_added],
+                'removed': [{'capability': capability, 'capability_type': capability_type}
+                            for capability, capability_type in applied_removed]
+            })
+        return applied_added, applied_removed
 
     def remove_all_from_type(self, capability_type):
         """
@@ -45,7 +104,12 @@ class CapabilityRepository(BaseRepository):
 
         :param capability_type: the capability type where all related capabilitys should be removed.
         """
+        removed = self.db.search(Query().type == capability_type)
         self.db.remove(Query().type == capability_type)
+        self.changed('capabilities_changed', {
+            'added': [],
+            'removed': [{'capability': entry['capability'], 'capability_type': entry['type']} for entry in removed]
+        })
 
     def has(self, capability):
         """
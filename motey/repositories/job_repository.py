@@ -0,0 +1,138 @@
+from time import time
+
+from tinydb import TinyDB, Query
+from tinydb.storages import MemoryStorage
+
+from motey.models.job_state import JobState
+from motey.repositories.base_repository import BaseRepository, OPERATION_DURATION
+from motey.utils import metrics
+
+
+@metrics.timed_methods(OPERATION_DURATION, exclude=('changed',), repository='job')
+class JobRepository(BaseRepository):
+    """
+    Repository for all batch job specific actions.
+    Jobs are only used to track the progress of batch requests, so they will be kept in memory and will not be
+    persisted. Finished jobs are removed after ``ttl`` seconds or if more than ``max_jobs`` jobs are stored.
+    """
+
+    def __init__(self, ttl=3600, max_jobs=1000):
+        """
+        Start the in-memory ``TinyDB``` instance.
+
+        :param ttl: seconds after which a finished job will be removed. Default 3600.
+        :type ttl: float
+        :param max_jobs: maximum number of stored jobs. The oldest finished jobs will be removed first. Default 1000.
+        :type max_jobs: int
+        """
+        super(JobRepository, self).__init__()
+        self.db = TinyDB(storage=MemoryStorage)
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+
+    def add(self, job):
+        """
+        Add a new job to the database.
+        Expired finished jobs will be removed beforehand.
+
+        :param job: a job model to be stored
+        :type job: dict
+        """
+        if job.get('state') == JobState.FINISHED and not job.get('finished_at'):
+            job['finished_at'] = time()
+        self.__evict()
+        self.db.insert(job)
+        self.changed()
+
+    def get(self, job_id):
+        """
+        Returns a specific job.
+
+        :param job_id: the id of the job
+        :type job_id: str
+        :return: the job as dict or None if the job does not exist
+        """
+        return self.db.get(Query().id == job_id)
+
+    def set_state(self, job_id, state):
+        """
+        Updates the state of a job.
+
+        :param job_id: the id of the job
+        :type job_id: str
+        :param state: the new state of the job
+        :type state: motey.models.job_state.JobState
+        """
+        update = {'state': state}
+        if state == JobState.FINISHED:
+            update['finished_at'] = time()
+        self.db.update(update, Query().id == job_id)
+        self.changed()
+
+    def mark_service(self, job_id, service_id, succeeded):
+        """
+        Marks a service of a job as handled.
+        If all services of the job are handled, the job will be finished. Duplicated service ids are counted once.
+
+        :param job_id: the id of the job
+        :type job_id: str
+        :param service_id: the id of the handled service
+        :type service_id: str
+        :param succeeded: True if the service was handled successfully, otherwise False
+        """
+
+        def __mark(element):
+            """
+            Inner function which updates the job element in place.
+
+            :param element: the stored job
+            """
+            element['completed' if succeeded else 'failed'].append(service_id)
+            handled = set(element['completed']) | set(element['failed'])
+            if element['state'] != JobState.FINISHED and handled >= set(element['service_ids']):
+                element['state'] = JobState.FINISHED
+                element['finished_at'] = time()
+
+        self.db.update(__mark, Query().id == job_id)
+        self.changed()
+
+    def finish(self, job_id):
+        """
+        Finishes a job. All services of the job which are not handled yet will be marked as failed.
+        Does nothing if the job is already finished.
+
+        :param job_id: the id of the job
+        :type job_id: str
+        """
+
+        def __finish(element):
+            """
+            Inner function which updates the job element in place.
+
+            :param element: the stored job
+            """
+            if element['state'] == JobState.FINISHED:
+                return
+            handled = set(element['completed']) | set(element['failed'])
+            element['failed'].extend(service_id for service_id in element['service_ids'] if service_id not in handled)
+            element['state'] = JobState.FINISHED
+            element['finished_at'] = time()
+
+        self.db.update(__finish, Query().id == job_id)
+        self.changed()
+
+    def __evict(self):
+        """
+        Removes the finished jobs which are older than the ``ttl``.
+        If the number of jobs still reaches ``max_jobs``, the oldest finished jobs will be removed as well.
+        Jobs which are not finished yet are never removed.
+        """
+        finished = sorted((job for job in self.db.all() if job.get('state') == JobState.FINISHED),
+                          key=lambda job: job.eid)
+        expired_before = time() - self.ttl
+        expired = [job.eid for job in finished if (job.get('finished_at') or 0) < expired_before]
+        overflow = len(self.db) - len(expired) - self.max_jobs + 1
+        if overflow > 0:
+            expired.extend([job.eid for job in finished if job.eid not in expired][:overflow])
+        if expired:
+            self.db.remove(eids=expired)
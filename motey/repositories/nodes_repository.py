@@ -1,12 +1,20 @@
+from time import time
+
 from tinydb import TinyDB, Query
 
 from motey.configuration.configreader import config
-from motey.repositories.base_repository import BaseRepository
+from motey.repositories.base_repository import BaseRepository, OPERATION_DURATION
+from motey.utils import metrics
+
+
+KNOWN_NODES = metrics.registry.gauge('motey_known_nodes', 'Number of nodes in the nodes repository')
 
 
+@metrics.timed_methods(OPERATION_DURATION, exclude=('changed',), repository='nodes')
 class NodesRepository(BaseRepository):
     """
     Repository for all node specific actions.
+    Every node has a ``last_seen`` timestamp, which is refreshed by the liveness beacons of the node.
     """
 
     def __init__(self):
@@ -16,6 +24,7 @@ class NodesRepository(BaseRepository):
         """
         super(NodesRepository, self).__init__()
         self.db = TinyDB('%s/nodes.json' % config['DATABASE']['path'])
+        KNOWN_NODES.set_function(lambda: len(self.db))
 
     def add(self, ip):
         """
@@ -24,15 +33,88 @@ class NodesRepository(BaseRepository):
         :param ip: the ip of the new node.
         """
         if not self.has(ip):
-            self.db.insert({'ip': ip})
+            self.db.insert({'ip': ip, 'last_seen': time()})
+            self.changed('node_added', {'ip': ip})
+
+    def add_multiple(self, ips):
+        """
+        Add multiple nodes to the database with a single write.
+        Nodes which already exist will be ignored.
+
+        :param ips: list with the ips of the new nodes.
+        """
+        ips = set(ips)
+        if not ips:
+            return
+        known_ips = set(entry['ip'] for entry in self.db.search(Query().ip.test(lambda ip: ip in ips)))
+        new_ips = [ip for ip in ips if ip not in known_ips]
+        if new_ips:
+            now = time()
+            self.db.insert_multiple([{'ip': ip, 'last_seen': now} for ip in new_ips])
+            self.changed()
+            for ip in new_ips:
+                self.change_stream.on_next({'event': 'node_added', 'data': {'ip': ip}})
+
+    def touch(self, ip):
+        """
+        Marks a node as seen right now.
+        Unknown nodes will be added.
+
+        :param ip: the ip of the node.
+        """
+        self.touch_multiple([ip])
+
+    def touch_multiple(self, ips):
+        """
+        Marks multiple nodes as seen right now with a single write.
+        Unknown nodes will be added.
+
+        :param ips: list with the ips of the nodes.
+        """
+        ips = set(ips)
+        if not ips:
+            return
+        known_ips = set(entry['ip'] for entry in self.db.search(Query().ip.test(lambda ip: ip in ips)))
+        if known_ips:
+            self.db.update({'last_seen': time()}, Query().ip.test(lambda ip: ip in known_ips))
+            self.changed()
+        self.add_multiple(ips - known_ips)
+
+    def find_stale(self, timeout, now=None):
+        """
+        Returns all nodes which were not seen within the given time.
+
+        :param timeout: the time in seconds
+        :param now: the current timestamp. Default is None, which will use the current time.
+        :return: a list with the stale nodes
+        """
+        threshold = (now if now is not None else time()) - timeout
+        return [node for node in self.db.all() if node.get('last_seen', 0) < threshold]
 
     def remove(self, ip):
         """
         Remove a node from the database.
+        The removal will only be emitted if the node existed.
 
         :param ip: the ip of the node to be removed.
         """
-        self.db.remove(Query().ip == ip)
+        if self.db.remove(Query().ip == ip):
+            self.changed('node_removed', {'ip': ip})
+
+    def rename(self, previous, current):
+        """
+        Replaces the ip of a node which has changed its ip.
+        Emits a ``node_renamed`` event instead of a removal and an addition, because the node is still available.
+
+        :param previous: the previous ip of the node.
+        :param current: the current ip of the node.
+        """
+        if previous == current:
+            return
+        self.db.remove(Query().ip == previous)
+        if not self.has(current):
+            self.db.insert({'ip': current, 'last_seen': time()})
+        self.changed('node_renamed', {'previous': previous, 'current': current})
 
     def has(self, ip):
         """
@@ -1,9 +1,13 @@
+import threading
+
 from tinydb import TinyDB, Query
 
 from motey.configuration.configreader import config
-from motey.repositories.base_repository import BaseRepository
+from motey.repositories.base_repository import BaseRepository, OPERATION_DURATION
+from motey.utils import metrics
 
 
+@metrics.timed_methods(OPERATION_DURATION, exclude=('changed',), repository='service')
 class ServiceRepository(BaseRepository):
     """
     Repository for all service specific actions.
@@ -16,6 +20,8 @@ class ServiceRepository(BaseRepository):
         """
         super(ServiceRepository, self).__init__()
         self.db = TinyDB('%s/services.json' % config['DATABASE']['path'])
+        # serializes the read and the writes of ``update_multiple``
+        self.lock = threading.Lock()
 
     def add(self, service):
         """
@@ -26,6 +32,43 @@ class ServiceRepository(BaseRepository):
         """
         if not self.has(service['id']):
             self.db.insert(service)
+            self.changed('service_added', service)
+
+    def add_multiple(self, services):
+        """
+        Add multiple services to the database with a single write.
+        Services which already exist will be ignored.
+
+        :param services: a list of service models to be stored
+        :type services: list
+        """
+        existing_ids = set(entry['id'] for entry in self.find_by_ids([service['id'] for service in services]))
+        new_services = [service for service in services if service['id'] not in existing_ids]
+        if new_services:
+            self.db.insert_multiple(new_services)
+            self.changed()
+            for service in new_services:
+                self.change_stream.on_next({'event': 'service_added', 'data': service})
+
+    def find_by_ids(self, service_ids):
+        """
+        Returns all services with the given ids in a single query.
+
+        :param service_ids: the ids of the services to search for.
+        :type service_ids: list
+        :return: a list with the found services
+        """
+        service_ids = set(service_ids)
+        return self.db.search(Query().id.test(lambda service_id: service_id in service_ids))
+
+    def find_by_node(self, ip):
+        """
+        Returns all services with at least one image which is executed on the given node.
+
+        :param ip: the ip of the node
+        :return: a list with the found services
+        """
+        return self.db.search(Query().images.any(Query().node == ip))
 
     def update(self, service):
         """
@@ -35,6 +78,31 @@ class ServiceRepository(BaseRepository):
         :type service: dict
         """
         self.db.update(service, Query().id == service['id'])
+        self.changed('service_updated', service)
+
+    def update_multiple(self, services):
+        """
+        Update multiple services in the database with a single query to find them.
+        Services which do not exist will be ignored.
+
+        :param services: a list of service models to be updated
+        :type services: list
+        """
+        updates = {service['id']: service for service in services}
+        if not updates:
+            return
+
+        updated_services = []
+        with self.lock:
+            for entry in self.find_by_ids(updates.keys()):
+                service = updates[entry['id']]
+                self.db.update(service, eids=[entry.eid])
+                updated_services.append(service)
+
+        if updated_services:
+            self.changed()
+            for service in updated_services:
+                self.change_stream.on_next({'event': 'service_updated', 'data': service})
 
     def remove(self, service_id):
         """
@@ -44,6 +112,7 @@ class ServiceRepository(BaseRepository):
         :type service: str
         """
         self.db.remove(Query().id == service_id)
+        self.changed('service_removed', {'id': service_id})
 
     def has(self, service_id):
         """
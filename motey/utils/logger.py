@@ -1,21 +1,37 @@
+import atexit
 import errno
+import json
 import os
+import queue
+import random
 import sys
+import threading
 
-from logbook import Logger as LogbookLogger, FileHandler, StreamHandler
+from logbook import Handler, Logger as LogbookLogger, NOTSET, RotatingFileHandler, StreamHandler, lookup_level
 
 from motey.configuration.configreader import config
+from motey.utils import metrics, tracing
+
+DROPPED_RECORDS = metrics.registry.counter('motey_log_records_dropped',
+                                           'Number of log records which were dropped because the log queue was full')
+
+# the handler of the application, which is installed only once by ``setup``
+application_handler = None
+setup_lock = threading.Lock()
 
 
 class Logger(LogbookLogger):
     """
     Wrapper to configure the LogbookLogger.
+    The records are written asynchronously by the handler of the application, see ``setup``. The id of the active
+    trace is added to the records as ``trace_id``.
     """
 
     def __init__(self):
         """
         Constructor of the Logger.
         Configures them and create the path to the output file if necessary.
+        The handlers are installed with the first logger, further loggers reuse them.
         """
         super().__init__(config['LOGGER']['name'])
         self.logger_path = config['LOGGER']['log_path']
@@ -27,5 +43,184 @@ class Logger(LogbookLogger):
             else:
                 raise
 
-        StreamHandler(sys.stdout).push_application()
-        FileHandler('%s%s' % (self.logger_path, config['LOGGER']['file_name'])).push_application()
+        setup()
+
+    def process_record(self, record):
+        """
+        Adds the id of the active trace to the record. Executed in the thread which logs the record.
+
+        :param record: the log record
+        """
+        super().process_record(record)
+        context = tracing.tracer.current_context()
+        if context:
+            record.extra['trace_id'] = context['trace_id']
+
+
+class AsyncHandler(Handler):
+    """
+    Handler which hands the records over to a background thread, which writes them with the wrapped handlers.
+    The logging thread only formats the message and never blocks. If the queue is full, the record is dropped and
+    counted in the ``motey_log_records_dropped`` metric.
+    """
+
+    def __init__(self, handlers, queue_size=10000, level=NOTSET, filter=None):
+        """
+        Constructor of the AsyncHandler.
+
+        :param handlers: list with the logbook handlers which write the records
+        :param queue_size: the maximum number of records which wait for the writer thread. Default is ``10000``.
+        :param level: the minimum level of the records. Default is ``NOTSET``.
+        :param filter: optional filter of the records, e.g. a ``LevelSampler``
+        """
+        super().__init__(level=level, filter=filter, bubble=False)
+        self.handlers = handlers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.writer_thread = threading.Thread(target=self.__run_writer_thread, args=())
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+    def emit(self, record):
+        """
+        Prepares the record for the writer thread and adds it to the queue.
+
+        :param record: the log record
+        """
+        self.prepare(record)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED_RECORDS.inc()
+
+    @staticmethod
+    def prepare(record):
+        """
+        Pulls the information which depends on the logging thread into the record and releases the frames.
+        Information about the calling frame, e.g. the line number, is not available afterwards.
+
+        :param record: the log record
+        """
+        record.message
+        record.thread
+        record.thread_name
+        if record.exc_info:
+            record.formatted_exception
+        record.close()
+
+    def flush(self):
+        """
+        Blocks until all queued records are written.
+        """
+        if self.writer_thread.is_alive():
+            self.queue.join()
+
+    def close(self):
+        """
+        Writes the queued records, stops the writer thread and closes the wrapped handlers.
+        """
+        if self.writer_thread.is_alive():
+            self.queue.put(None)
+            self.writer_thread.join()
+        for handler in self.handlers:
+            handler.close()
+
+    def __run_writer_thread(self):
+        while True:
+            record = self.queue.get()
+            try:
+                if record is None:
+                    return
+                for handler in self.handlers:
+                    if record.level >= handler.level:
+                        handler.handle(record)
+            finally:
+                self.queue.task_done()
+
+
+class LevelSampler(object):
+    """
+    Filter which keeps only a fraction of the records of the configured levels, e.g. of the debug messages of hot
+    paths. Records of levels without a rate are always kept.
+    """
+
+    def __init__(self, rates, random_generator=None):
+        """
+        Constructor of the LevelSampler.
+
+        :param rates: dict with the level name or number and the fraction of the records which are kept, e.g.
+                      ``{'DEBUG': 0.01}``
+        :param random_generator: optional random generator. Default is None, which will use the ``random`` module.
+        """
+        self.rates = {lookup_level(level.upper() if isinstance(level, str) else level): float(rate)
+                      for level, rate in rates.items()}
+        self.random = random_generator if random_generator else random
+
+    def __call__(self, record, handler):
+        rate = self.rates.get(record.level)
+        return rate is None or rate >= 1 or self.random.random() < rate
+
+    @staticmethod
+    def parse(rates):
+        """
+        Parses the rates of the ``config.ini`` file.
+
+        :param rates: comma separated list of levels and rates, e.g. ``debug:0.01, info:0.5``
+        :return: dict with the level names and the rates
+        """
+        entries = [entry.split(':') for entry in rates.split(',') if entry.strip()]
+        return {level.strip(): float(rate) for level, rate in entries}
+
+
+def json_formatter(record, handler):
+    """
+    Formats a record as a single line JSON object with the time, the level, the channel, the message, the thread, the
+    extra fields, e.g. the ``trace_id``, and the exception.
+
+    :param record: the log record
+    :param handler: the handler which writes the record
+    :return: the JSON object as string
+    """
+    entry = {
+        'time': record.time.isoformat() + 'Z',
+        'level': record.level_name,
+        'channel': record.channel,
+        'message': record.message,
+        'thread': record.thread_name
+    }
+    entry.update(record.extra)
+    if record.formatted_exception:
+        entry['exception'] = record.formatted_exception
+    return json.dumps(entry, default=str)
+
+
+def setup():
+    """
+    Creates the handler of the application and installs it. The handler is created only once, further calls return
+    the existing handler. The queued records are written when the process exits.
+
+    :return: the handler of the application
+    :rtype: AsyncHandler
+    """
+    global application_handler
+    with setup_lock:
+        if application_handler:
+            return application_handler
+
+        settings = config['LOGGER']
+        file_handler = RotatingFileHandler('%s%s' % (settings['log_path'], settings['file_name']),
+                                           max_size=int(settings['max_size']),
+                                           backup_count=int(settings['backup_count']),
+                                           level=settings['level'])
+        if settings['format'] == 'json':
+            file_handler.formatter = json_formatter
+        handlers = [file_handler]
+        if settings.getboolean('stdout'):
+            handlers.append(StreamHandler(sys.stdout, level=settings['level']))
+
+        sample_rates = LevelSampler.parse(settings['sample_rates'])
+        application_handler = AsyncHandler(handlers,
+                                           queue_size=int(settings['queue_size']),
+                                           filter=LevelSampler(sample_rates) if sample_rates else None)
+        application_handler.push_application()
+        atexit.register(application_handler.close)
+        return application_handler
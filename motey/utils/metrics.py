@@ -0,0 +1,483 @@
+import bisect
+import functools
+import inspect
+import math
+import threading
+import types
+from time import perf_counter
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class ThreadCells(object):
+    """
+    Holds one cell per thread, so that the values can be updated without a lock.
+    Only the owning thread writes into its cell. The cells of finished threads are merged into a base cell whenever a
+    new cell is registered or the values are collected, so the number of cells is bounded by the running threads.
+    """
+
+    def __init__(self, size):
+        """
+        Constructor of the ThreadCells.
+
+        :param size: the number of values in a cell
+        """
+        self.size = size
+        self.local = threading.local()
+        self.cells = {}
+        self.base = [0] * size
+        self.lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns the cell of the current thread.
+
+        :return: list with the values of the current thread
+        """
+        try:
+            return self.local.cell
+        except AttributeError:
+            cell = [0] * self.size
+            with self.lock:
+                self.__merge_finished()
+                self.cells[threading.current_thread()] = cell
+            self.local.cell = cell
+            return cell
+
+    def collect(self):
+        """
+        Sums up the cells of all threads.
+
+        :return: list with the summed up values
+        """
+        with self.lock:
+            self.__merge_finished()
+            cells = list(self.cells.values())
+            result = list(self.base)
+        for cell in cells:
+            for index, value in enumerate(cell):
+                result[index] += value
+        return result
+
+    def __merge_finished(self):
+        """
+        Merges the cells of finished threads into the base cell and drops them.
+        Must be called while holding the lock.
+        """
+        for thread in [thread for thread in self.cells if not thread.is_alive()]:
+            cell = self.cells.pop(thread)
+            self.base = [value + other for value, other in zip(self.base, cell)]
+
+
+class Metric(object):
+    """
+    Base class of all metrics. A metric with labels has a child metric for every combination of label values.
+    """
+
+    TYPE = None
+    # suffix of the name of the samples, e.g. ``_total`` for counters
+    SUFFIX = ''
+
+    def __init__(self, name, documentation, labelnames=(), labelvalues=()):
+        """
+        Constructor of the Metric.
+
+        :param name: the name of the metric
+        :param documentation: the description of the metric
+        :param labelnames: the names of the labels of the metric
+        :param labelvalues: the values of the labels of a child metric
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.labelvalues = tuple(labelvalues)
+        self.children = {}
+        self.lock = threading.Lock()
+
+    def labels(self, **labels):
+        """
+        Returns the child metric for the given label values.
+
+        :param labels: the values of all labels of the metric
+        :return: the child metric
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError('%s expects the labels %s' % (self.name, ', '.join(self.labelnames)))
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.get(key)
+                if child is None:
+                    child = self.create_child(key)
+                    self.children[key] = child
+        return child
+
+    def create_child(self, labelvalues):
+        """
+        Creates a child metric for the given label values.
+
+        :param labelvalues: the values of the labels
+        :return: the child metric
+        """
+        raise NotImplementedError()
+
+    def samples(self):
+        """
+        Returns the samples of the metric and of all its children.
+
+        :return: list of tuples with the sample name, the labels as list of tuples and the value
+        """
+        if not self.labelnames:
+            return self.own_samples([])
+        samples = []
+        for labelvalues, child in sorted(self.children.items()):
+            samples.extend(child.own_samples(list(zip(self.labelnames, labelvalues))))
+        return samples
+
+    def own_samples(self, labels):
+        """
+        Returns the samples of the metric itself.
+
+        :param labels: list of tuples with the label names and values
+        :return: list of tuples with the sample name, the labels and the value
+        """
+        raise NotImplementedError()
+
+
+class Counter(Metric):
+    """
+    A value which only goes up, e.g. the number of handled requests.
+    """
+
+    TYPE = 'counter'
+    SUFFIX = '_total'
+
+    def __init__(self, name, documentation, labelnames=(), labelvalues=()):
+        super(Counter, self).__init__(name, documentation, labelnames, labelvalues)
+        self.cells = ThreadCells(1)
+
+    def create_child(self, labelvalues):
+        return Counter(self.name, self.documentation, labelvalues=labelvalues)
+
+    def inc(self, amount=1):
+        """
+        Increases the counter.
+
+        :param amount: the amount to be added. Must not be negative. Default is ``1``.
+        """
+        if amount < 0:
+            raise ValueError('counters can only be increased')
+        self.cells.get()[0] += amount
+
+    def get(self):
+        """
+        :return: the current value of the counter
+        """
+        return self.cells.collect()[0]
+
+    def own_samples(self, labels):
+        return [(self.name + self.SUFFIX, labels, self.get())]
+
+
+class Gauge(Metric):
+    """
+    A value which can go up and down, e.g. the number of known nodes.
+    The value can also be read from a function when the metrics are collected.
+    """
+
+    TYPE = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), labelvalues=()):
+        super(Gauge, self).__init__(name, documentation, labelnames, labelvalues)
+        self.value = 0
+        self.function = None
+
+    def create_child(self, labelvalues):
+        return Gauge(self.name, self.documentation, labelvalues=labelvalues)
+
+    def set(self, value):
+        """
+        Sets the gauge to the given value.
+
+        :param value: the new value
+        """
+        self.value = value
+
+    def inc(self, amount=1):
+        """
+        Increases the gauge.
+
+        :param amount: the amount to be added. Default is ``1``.
+        """
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        """
+        Decreases the gauge.
+
+        :param amount: the amount to be subtracted. Default is ``1``.
+        """
+        self.inc(-amount)
+
+    def set_function(self, function):
+        """
+        Reads the value of the gauge from a function when the metrics are collected.
+
+        :param function: function without arguments which returns the current value
+        """
+        self.function = function
+
+    def get(self):
+        """
+        :return: the current value of the gauge
+        """
+        return self.function() if self.function else self.value
+
+    def own_samples(self, labels):
+        return [(self.name, labels, self.get())]
+
+
+class Histogram(Metric):
+    """
+    Counts observed values, e.g. durations, in buckets.
+    """
+
+    TYPE = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), labelvalues=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames, labelvalues)
+        self.buckets = tuple(sorted(buckets))
+        # one counter per bucket, one for the values above the last bucket and the sum of all values
+        self.cells = ThreadCells(len(self.buckets) + 2)
+
+    def create_child(self, labelvalues):
+        return Histogram(self.name, self.documentation, labelvalues=labelvalues, buckets=self.buckets)
+
+    def observe(self, value):
+        """
+        Counts a value in the matching bucket.
+
+        :param value: the observed value
+        """
+        cell = self.cells.get()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self):
+        """
+        Returns a context manager which observes the duration of the enclosed block in seconds.
+
+        :return: the context manager
+        """
+        return Timer(self)
+
+    def get(self):
+        """
+        :return: tuple with the cumulative counts of all buckets, the number and the sum of all values
+        """
+        values = self.cells.collect()
+        cumulative = []
+        total = 0
+        for count in values[:-1]:
+            total += count
+            cumulative.append(total)
+        return cumulative, total, values[-1]
+
+    def own_samples(self, labels):
+        cumulative, count, total = self.get()
+        samples = []
+        for bucket, bucket_count in zip(self.buckets + (math.inf,), cumulative):
+            samples.append((self.name + '_bucket', labels + [('le', format_value(bucket))], bucket_count))
+        samples.append((self.name + '_count', labels, count))
+        samples.append((self.name + '_sum', labels, total))
+        return samples
+
+
+class Timer(object):
+    """
+    Context manager which observes the duration of a block in a histogram.
+    """
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(perf_counter() - self.start)
+
+
+class MetricsRegistry(object):
+    """
+    Holds all metrics of the node and renders them in the Prometheus text format.
+    Metrics are created on the first request and returned on every further request with the same name.
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        """
+        Returns the counter with the given name.
+
+        :param name: the name of the counter without the ``_total`` suffix
+        :param documentation: the description of the counter
+        :param labelnames: the names of the labels of the counter
+        :return: the counter
+        :rtype: Counter
+        """
+        return self.__get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """
+        Returns the gauge with the given name.
+
+        :param name: the name of the gauge
+        :param documentation: the description of the gauge
+        :param labelnames: the names of the labels of the gauge
+        :return: the gauge
+        :rtype: Gauge
+        """
+        return self.__get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Returns the histogram with the given name.
+
+        :param name: the name of the histogram
+        :param documentation: the description of the histogram
+        :param labelnames: the names of the labels of the histogram
+        :param buckets: the upper bounds of the buckets. Default is ``DEFAULT_BUCKETS``.
+        :return: the histogram
+        :rtype: Histogram
+        """
+        return self.__get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """
+        Renders all metrics in the Prometheus text format.
+
+        :return: the metrics as string
+        """
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            documentation = metric.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append('# HELP %s%s %s' % (metric.name, metric.SUFFIX, documentation))
+            lines.append('# TYPE %s%s %s' % (metric.name, metric.SUFFIX, metric.TYPE))
+            for name, labels, value in metric.samples():
+                if labels:
+                    name += '{%s}' % ','.join('%s="%s"' % (label, escape_label_value(label_value))
+                                              for label, label_value in labels)
+                lines.append('%s %s' % (name, format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+    def __get_or_create(self, metric_type, name, documentation, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = metric_type(name, documentation, labelnames=labelnames, **kwargs)
+                self.metrics[name] = metric
+            elif not isinstance(metric, metric_type) or metric.labelnames != tuple(labelnames):
+                raise ValueError('metric %s is already registered with another type or other labels' % name)
+            return metric
+
+
+def escape_label_value(value):
+    """
+    Escapes a label value for the Prometheus text format.
+
+    :param value: the label value
+    :return: the escaped value
+    """
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_value(value):
+    """
+    Formats a sample value for the Prometheus text format.
+
+    :param value: the value
+    :return: the formatted value
+    """
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    return repr(float(value))
+
+
+def timed(histogram, **labels):
+    """
+    Decorator which observes the duration of every call of the decorated function in seconds.
+
+    :param histogram: the histogram to be used
+    :param labels: optional label values of the histogram
+    :return: the decorator
+    """
+    metric = histogram.labels(**labels) if labels else histogram
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metric.observe(perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def counted(counter, **labels):
+    """
+    Decorator which counts every call of the decorated function.
+
+    :param counter: the counter to be used
+    :param labels: optional label values of the counter
+    :return: the decorator
+    """
+    metric = counter.labels(**labels) if labels else counter
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            metric.inc()
+            return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_methods(histogram, exclude=(), **labels):
+    """
+    Class decorator which observes the duration of all public methods of a class, including the inherited ones.
+    The name of the method is used as value of the ``operation`` label.
+
+    :param histogram: the histogram to be used. Must have an ``operation`` label.
+    :param exclude: names of the methods which should not be observed
+    :param labels: the values of the other labels of the histogram
+    :return: the decorator
+    """
+
+    def decorator(cls):
+        for name, function in inspect.getmembers(cls, inspect.isfunction):
+            # static methods are returned as functions as well, but must not be replaced by a plain function
+            if name.startswith('_') or name in exclude or \
+                    not isinstance(inspect.getattr_static(cls, name), types.FunctionType):
+                continue
+            setattr(cls, name, timed(histogram, operation=name, **labels)(function))
+        return cls
+    return decorator
+
+
+# the registry of the node, which is exposed via the ``/v1/metrics`` endpoint
+registry = MetricsRegistry()
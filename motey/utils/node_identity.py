@@ -0,0 +1,154 @@
+import os
+import socket
+import threading
+import uuid
+from time import time
+
+import psutil
+from rx.subjects import Subject
+
+from motey.utils import network_utils
+
+
+class NodeIdentity(object):
+    """
+    Provides the ip and the id of the own node.
+    The ip is resolved once and cached. It will be resolved again after the ``ttl`` or if the addresses of the network
+    interfaces have changed, which is checked at most every ``interface_check_interval`` seconds. If the route lookup
+    fails, e.g. on an air-gapped site, the first address of an interface which is up will be used. A configured
+    ``advertise_address`` will always be used instead of the resolved ip.
+    The node id is generated once and persisted, so it stays the same if the ip of the node changes.
+    """
+
+    def __init__(self, logger, advertise_address='', node_id_path=None, ttl=300, interface_check_interval=5,
+                 clock=time):
+        """
+        Constructor of the NodeIdentity.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param advertise_address: the address which will be announced to the other nodes. Default is ``''``, which
+                                  will resolve the ip of the node.
+        :param node_id_path: the path of the file where the node id is stored. Default is None, which will generate a
+                             new id on every start.
+        :param ttl: the time in seconds after the ip will be resolved again. Default is ``300``.
+        :param interface_check_interval: the time in seconds between two checks of the network interfaces.
+                                         Default is ``5``.
+        :param clock: function which returns the current time. Default is ``time.time``.
+        """
+        self.logger = logger
+        self.advertise_address = advertise_address
+        self.node_id_path = node_id_path
+        self.ttl = ttl
+        self.interface_check_interval = interface_check_interval
+        self.clock = clock
+        self.ip = None
+        self.node_id = None
+        self.interfaces = None
+        self.expires_at = 0
+        self.next_interface_check = 0
+        self.lock = threading.Lock()
+        # emits a dict with the ``previous`` and the ``current`` ip if the ip of the node has changed
+        self.ip_change_stream = Subject()
+
+    def get_ip(self):
+        """
+        Returns the ip of the node.
+
+        :return: the configured advertise address or the cached ip of the node
+        """
+        if self.advertise_address:
+            return self.advertise_address
+
+        now = self.clock()
+        with self.lock:
+            if self.ip and now < self.next_interface_check and now < self.expires_at:
+                return self.ip
+            self.next_interface_check = now + self.interface_check_interval
+            interfaces = self.get_interface_addresses()
+            if self.ip and interfaces == self.interfaces and now < self.expires_at:
+                return self.ip
+            previous_ip = self.ip
+            self.ip = self.resolve_ip()
+            self.interfaces = interfaces
+            self.expires_at = now + self.ttl
+            current_ip = self.ip
+
+        if previous_ip and previous_ip != current_ip:
+            self.logger.info('own ip changed from %s to %s' % (previous_ip, current_ip))
+            self.ip_change_stream.on_next({'previous': previous_ip, 'current': current_ip})
+        return current_ip
+
+    def get_node_id(self):
+        """
+        Returns the id of the node.
+        The id will be loaded from the ``node_id_path`` or generated and stored there on the first call.
+
+        :return: the id of the node
+        """
+        with self.lock:
+            if not self.node_id:
+                self.node_id = self.__load_node_id()
+            return self.node_id
+
+    def resolve_ip(self):
+        """
+        Resolves the ip of the node without using the cache.
+        The ip of the interface with the default route is preferred. If there is no default route, the first address
+        of an interface which is up will be used, or ``127.0.0.1`` if there is none.
+
+        :return: the ip of the node
+        """
+        try:
+            ip = network_utils.get_own_ip()
+            if ip:
+                return ip
+        except OSError as error:
+            self.logger.info('own ip could not be resolved via the default route: %s' % error)
+
+        for name, address in self.get_interface_addresses() or []:
+            if not address.startswith('127.'):
+                return address
+        return '127.0.0.1'
+
+    def get_interface_addresses(self):
+        """
+        Returns the IPv4 addresses of all network interfaces which are up.
+
+        :return: sorted list of tuples with the interface name and the address or None if the interfaces could not be
+                 read
+        """
+        try:
+            stats = psutil.net_if_stats()
+            return sorted((name, address.address)
+                          for name, addresses in psutil.net_if_addrs().items()
+                          if name in stats and stats[name].isup
+                          for address in addresses if address.family == socket.AF_INET)
+        except OSError as error:
+            self.logger.error('network interfaces could not be read: %s' % error)
+            return None
+
+    def __load_node_id(self):
+        """
+        Loads the node id from the ``node_id_path``. A new id will be generated and stored if there is none.
+
+        :return: the id of the node
+        """
+        if self.node_id_path:
+            try:
+                with open(self.node_id_path) as node_id_file:
+                    node_id = node_id_file.read().strip()
+                if node_id:
+                    return node_id
+            except OSError:
+                pass
+
+        node_id = uuid.uuid4().hex
+        if self.node_id_path:
+            try:
+                os.makedirs(os.path.dirname(self.node_id_path), exist_ok=True)
+                with open(self.node_id_path, 'w') as node_id_file:
+                    node_id_file.write(node_id)
+            except OSError as error:
+                self.logger.error('node id could not be stored: %s' % error)
+        return node_id
@@ -0,0 +1,319 @@
+import itertools
+import os
+import sys
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from time import perf_counter, time
+
+from motey.utils import metrics
+
+SLOW_OPERATIONS = metrics.registry.counter('motey_slow_operations', 'Number of operations which exceeded the threshold',
+                                           ['operation'])
+
+
+class SamplingProfiler(object):
+    """
+    Wall clock profiler which samples the stacks of all threads of the process for a limited time, e.g. the ZeroMQ
+    repliers, the MQTT client and the worker threads of the orchestrator.
+    Threads which are blocked, e.g. while they are waiting for a ZeroMQ message, are sampled as well.
+    The samples are written in the collapsed stack format, which can be rendered as flame graph, e.g. with
+    ``flamegraph.pl`` or speedscope.
+    """
+
+    def __init__(self, logger=None, interval=0.01, output_path=None, max_duration=300):
+        """
+        Constructor of the SamplingProfiler.
+
+        :param logger: optional logger
+        :type logger: motey.utils.logger.Logger
+        :param interval: the default time in seconds between two samples. Default is ``0.01``.
+        :param output_path: optional folder in which every profile is stored as ``profile-<time>.collapsed`` file
+        :param max_duration: the maximum duration of a profile in seconds. Default is ``300``.
+        """
+        self.logger = logger
+        self.interval = interval
+        self.output_path = output_path
+        self.max_duration = max_duration
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.sampling_thread = None
+        self.status = {}
+        self.stacks = Counter()
+        self.frame_labels = {}
+
+    def start(self, duration, interval=None):
+        """
+        Starts a profile in a separate thread, which stops after ``duration`` seconds.
+
+        :param duration: the duration of the profile in seconds, limited to ``max_duration``
+        :param interval: optional time in seconds between two samples. Default is None, which will use the
+                         ``interval`` of the profiler.
+        :return: True if the profile was started, False if a profile is already running
+        """
+        with self.lock:
+            if self.is_running():
+                return False
+            self.stop_event.clear()
+            self.stacks = Counter()
+            self.status = {
+                'started_at': time(),
+                'duration': min(float(duration), self.max_duration),
+                'interval': float(interval) if interval else self.interval,
+                'samples': 0,
+                'path': None
+            }
+            self.sampling_thread = threading.Thread(target=self.__run_sampling_thread, args=(dict(self.status),))
+            self.sampling_thread.daemon = True
+            self.sampling_thread.start()
+        if self.logger:
+            self.logger.info('profiling started for %ss' % self.status['duration'])
+        return True
+
+    def stop(self):
+        """
+        Stops the running profile. The samples up to now are kept.
+        """
+        self.stop_event.set()
+        if self.sampling_thread and self.sampling_thread is not threading.current_thread():
+            self.sampling_thread.join()
+
+    def is_running(self):
+        """
+        :return: True if a profile is running, otherwise False
+        """
+        return bool(self.sampling_thread and self.sampling_thread.is_alive())
+
+    def get_status(self):
+        """
+        :return: dict with the state of the running or the latest profile
+        """
+        return dict(self.status, running=self.is_running())
+
+    def sample(self):
+        """
+        Records the current stacks of all threads except the sampling thread.
+        """
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own_ident = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(self.__get_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(ident, 'thread-%s' % ident))
+            labels.reverse()
+            self.stacks[';'.join(labels)] += 1
+        self.status['samples'] += 1
+
+    def get_collapsed(self):
+        """
+        Returns the samples of the running or the latest profile in the collapsed stack format. Every line contains the
+        frames from the thread down to the sampled function, separated by ``;``, and the number of samples.
+
+        :return: the collapsed stacks as string
+        """
+        return ''.join('%s %s\n' % (stack, count) for stack, count in sorted(self.stacks.copy().items()))
+
+    def write(self):
+        """
+        Writes the collapsed stacks into a new file in the ``output_path``.
+
+        :return: the path of the file or None if no ``output_path`` is configured
+        """
+        if not self.output_path:
+            return None
+        os.makedirs(self.output_path, exist_ok=True)
+        path = os.path.join(self.output_path, 'profile-%s.collapsed' % datetime.utcnow().strftime('%Y%m%d-%H%M%S'))
+        with open(path, 'w') as profile_file:
+            profile_file.write(self.get_collapsed())
+        return path
+
+    def __get_label(self, code):
+        """
+        Returns the label of a frame in the flame graph, e.g. ``deploy_service (inter_node_orchestrator.py)``.
+
+        :param code: the code object of the frame
+        :return: the label
+        """
+        label = self.frame_labels.get(code)
+        if label is None:
+            label = '%s (%s)' % (code.co_name, os.path.basename(code.co_filename))
+            self.frame_labels[code] = label
+        return label
+
+    def __run_sampling_thread(self, settings):
+        start = perf_counter()
+        while not self.stop_event.is_set() and perf_counter() - start < settings['duration']:
+            self.sample()
+            self.stop_event.wait(settings['interval'])
+        try:
+            self.status['path'] = self.write()
+        except OSError as error:
+            if self.logger:
+                self.logger.error('profile could not be written: %s' % error)
+        if self.logger:
+            self.logger.info('profiling finished with %s samples' % self.status['samples'])
+
+
+class SlowOperationRecorder(object):
+    """
+    Lightweight, always-on recorder of operations which take longer than a threshold, e.g. ZeroMQ requests, docker
+    calls and orchestration phases.
+    A watchdog thread checks the running operations and captures the stack of an operation as soon as it exceeds the
+    threshold, which shows where the operation was stuck. The latest slow operations are kept in memory.
+    """
+
+    def __init__(self, threshold=1.0, size=100, check_interval=None):
+        """
+        Constructor of the SlowOperationRecorder.
+
+        :param threshold: the duration in seconds from which on an operation is slow. ``0`` disables the recorder.
+                          Default is ``1.0``.
+        :param size: the number of slow operations which are kept. Default is ``100``.
+        :param check_interval: optional time in seconds between two checks of the watchdog. Default is None, which will
+                               use half of the threshold.
+        """
+        self.threshold = threshold
+        self.size = size
+        self.check_interval = check_interval
+        self.operations = deque(maxlen=size)
+        self.running = {}
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watchdog_thread = None
+
+    def start(self):
+        """
+        Starts the watchdog thread.
+        """
+        if self.threshold <= 0 or (self.watchdog_thread and self.watchdog_thread.is_alive()):
+            return
+        self.stop_event.clear()
+        self.watchdog_thread = threading.Thread(target=self.__run_watchdog_thread, args=())
+        self.watchdog_thread.daemon = True
+        self.watchdog_thread.start()
+
+    def stop(self):
+        """
+        Stops the watchdog thread.
+        """
+        self.stop_event.set()
+
+    def begin(self, name):
+        """
+        Marks the start of an operation in the current thread.
+
+        :param name: the name of the operation
+        :return: the token which has to be passed to ``end`` or None if the recorder is disabled
+        """
+        if self.threshold <= 0:
+            return None
+        token = next(self.counter)
+        with self.lock:
+            self.running[token] = {'name': name, 'thread': threading.get_ident(), 'start': perf_counter(),
+                                   'stack': None}
+        return token
+
+    def end(self, token, trace_id=None, error=None):
+        """
+        Marks the end of an operation. The operation is recorded if it took longer than the threshold.
+
+        :param token: the token which was returned by ``begin``
+        :param trace_id: optional id of the trace of the operation
+        :param error: optional error of the operation
+        """
+        if token is None:
+            return
+        with self.lock:
+            operation = self.running.pop(token, None)
+        if not operation:
+            return
+        duration = perf_counter() - operation['start']
+        if duration < self.threshold:
+            return
+        SLOW_OPERATIONS.labels(operation=operation['name']).inc()
+        self.operations.append({
+            'name': operation['name'],
+            'started_at': time() - duration,
+            'duration': duration,
+            'thread': threading.current_thread().name,
+            'trace_id': trace_id,
+            'error': error,
+            'stack': operation['stack']
+        })
+
+    def get_operations(self, name=None):
+        """
+        Returns the recorded slow operations, the latest first.
+
+        :param name: optional name of the operations
+        :return: list with the slow operations as dicts
+        """
+        return [operation for operation in reversed(self.operations) if name is None or operation['name'] == name]
+
+    def check(self):
+        """
+        Captures the stacks of all running operations which exceeded the threshold.
+        """
+        now = perf_counter()
+        with self.lock:
+            exceeded = [operation for operation in self.running.values()
+                        if operation['stack'] is None and now - operation['start'] >= self.threshold]
+        if not exceeded:
+            return
+        frames = sys._current_frames()
+        for operation in exceeded:
+            frame = frames.get(operation['thread'])
+            stack = []
+            while frame is not None:
+                stack.append('%s (%s:%s)' % (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename),
+                                             frame.f_lineno))
+                frame = frame.f_back
+            operation['stack'] = list(reversed(stack))
+
+    def __run_watchdog_thread(self):
+        interval = self.check_interval or self.threshold / 2
+        while not self.stop_event.wait(interval):
+            self.check()
+
+
+def configure_profiler(logger, interval=0.01, output_path=None, max_duration=300):
+    """
+    Configures the sampling profiler of the node.
+
+    :param logger: the logger of the node
+    :param interval: the default time in seconds between two samples. Default is ``0.01``.
+    :param output_path: optional folder in which the profiles are stored
+    :param max_duration: the maximum duration of a profile in seconds. Default is ``300``.
+    :return: the profiler of the node
+    :rtype: SamplingProfiler
+    """
+    profiler.logger = logger
+    profiler.interval = interval
+    profiler.output_path = output_path
+    profiler.max_duration = max_duration
+    return profiler
+
+
+def configure_slow_operations(threshold=1.0, size=100):
+    """
+    Configures the slow operation recorder of the node.
+
+    :param threshold: the duration in seconds from which on an operation is slow. ``0`` disables the recorder.
+    :param size: the number of slow operations which are kept
+    :return: the slow operation recorder of the node
+    :rtype: SlowOperationRecorder
+    """
+    slow_operations.threshold = threshold
+    slow_operations.size = size
+    slow_operations.operations = deque(slow_operations.operations, maxlen=size)
+    return slow_operations
+
+
+# the profiler and the slow operation recorder of the node, which are used by all components
+profiler = SamplingProfiler()
+slow_operations = SlowOperationRecorder()
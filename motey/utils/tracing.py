@@ -0,0 +1,431 @@
+import collections
+import functools
+import json
+import queue
+import random
+import threading
+from time import perf_counter, sleep, time
+
+import requests
+
+from motey.utils import profiling
+
+
+class Span(object):
+    """
+    A timed operation of a trace. Spans of different nodes are linked via the trace id and the id of the parent span.
+    """
+
+    def __init__(self, tracer, name, trace_id, parent_id=None, attributes=None):
+        """
+        Constructor of the Span.
+
+        :param tracer: the tracer which exports the span after it is finished
+        :param name: the name of the operation
+        :param trace_id: the id of the trace
+        :param parent_id: the id of the parent span or None if it is the root span of the trace
+        :param attributes: optional dict with additional information about the operation
+        """
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start = time()
+        self.start_counter = perf_counter()
+        self.duration = None
+
+    @property
+    def context(self):
+        """
+        :return: the context of the span which is sent to other nodes
+        """
+        return {'trace_id': self.trace_id, 'span_id': self.span_id}
+
+    def set_attribute(self, key, value):
+        """
+        Adds an attribute to the span.
+
+        :param key: the name of the attribute
+        :param value: the value of the attribute
+        """
+        self.attributes[key] = value
+
+    def finish(self):
+        """
+        Stops the timing of the span and hands it over to the exporter. Further calls have no effect.
+        """
+        if self.duration is None:
+            self.duration = perf_counter() - self.start_counter
+            self.tracer.export(self)
+
+    def to_dict(self):
+        """
+        :return: the span as dict
+        """
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'node': self.tracer.get_node(),
+            'start': self.start,
+            'duration': self.duration,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class Tracer(object):
+    """
+    Creates the spans of the node and keeps track of the active span of every thread.
+    The context of the active span can be injected into the messages to other nodes, which extract it to create child
+    spans. Root spans are sampled with the ``sample_rate``, all spans of a sampled trace are recorded.
+    """
+
+    # key of the trace context in the JSON messages
+    MESSAGE_KEY = '_trace'
+
+    def __init__(self, exporter=None, sample_rate=1.0, node_identity=None):
+        """
+        Constructor of the Tracer.
+
+        :param exporter: the exporter of the finished spans. Default is None, which disables the tracing.
+        :param sample_rate: the probability that a new trace is recorded. Default is ``1.0``.
+        :param node_identity: optional node identity, the ip of the node will be added to the spans
+        :type node_identity: motey.utils.node_identity.NodeIdentity
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.node_identity = node_identity
+        self.local = threading.local()
+
+    def get_node(self):
+        """
+        :return: the ip of the node or None if no node identity is configured
+        """
+        return self.node_identity.get_ip() if self.node_identity else None
+
+    def start_span(self, name, parent=None, attributes=None):
+        """
+        Creates a new span. The span is not activated.
+        If there is no parent, the span will be a child of the active span or the root span of a new trace.
+
+        :param name: the name of the operation
+        :param parent: optional context of the parent span, e.g. extracted from a message
+        :param attributes: optional dict with additional information about the operation
+        :return: the span or None if the tracing is disabled or the trace is not sampled
+        """
+        if not self.exporter:
+            return None
+        parent = parent or self.current_context()
+        if parent:
+            return Span(self, name, parent['trace_id'], parent_id=parent['span_id'], attributes=attributes)
+        if random.random() >= self.sample_rate:
+            return None
+        return Span(self, name, '%032x' % random.getrandbits(128), attributes=attributes)
+
+    def activate(self, span):
+        """
+        Makes a span the active span of the current thread.
+
+        :param span: the span or None
+        """
+        if span:
+            self.__get_stack().append(span)
+
+    def deactivate(self, span):
+        """
+        Makes the previous span the active span of the current thread again.
+
+        :param span: the span which was activated or None
+        """
+        stack = self.__get_stack()
+        if span and stack and stack[-1] is span:
+            stack.pop()
+
+    def current_span(self):
+        """
+        :return: the active span of the current thread or None
+        """
+        stack = self.__get_stack()
+        return stack[-1] if stack else None
+
+    def current_context(self):
+        """
+        :return: the context of the active span of the current thread or None
+        """
+        span = self.current_span()
+        return span.context if span else None
+
+    @property
+    def span(self):
+        """
+        Returns a context manager which records the enclosed block as an active span.
+        Exceptions are added to the span and raised again.
+
+            with tracer.span('deploy_image', attributes={'node': ip}) as span:
+                ...
+
+        :return: the context manager factory, which takes the same arguments as ``start_span``
+        """
+        return functools.partial(ActiveSpan, self)
+
+    def inject(self, message):
+        """
+        Adds the context of the active span to a message.
+
+        :param message: the message which will be sent as JSON
+        :type message: dict
+        :return: the message
+        """
+        context = self.current_context()
+        if context:
+            message[self.MESSAGE_KEY] = context
+        return message
+
+    def extract(self, message):
+        """
+        Removes the trace context from a received message.
+
+        :param message: the received message
+        :return: the context of the parent span or None if the message does not contain a valid context
+        """
+        if not isinstance(message, dict):
+            return None
+        context = message.pop(self.MESSAGE_KEY, None)
+        if isinstance(context, dict) and isinstance(context.get('trace_id'), str) and \
+                isinstance(context.get('span_id'), str):
+            return {'trace_id': context['trace_id'], 'span_id': context['span_id']}
+        return None
+
+    def export(self, span):
+        """
+        Hands a finished span over to the exporter.
+
+        :param span: the finished span
+        """
+        if self.exporter:
+            self.exporter.export(span.to_dict())
+
+    def __get_stack(self):
+        try:
+            return self.local.stack
+        except AttributeError:
+            self.local.stack = []
+            return self.local.stack
+
+
+class ActiveSpan(object):
+    """
+    Context manager which records the enclosed block as the active span of the current thread.
+    """
+
+    def __init__(self, tracer, name, parent=None, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.span = tracer.start_span(name, parent=parent, attributes=attributes)
+        self.operation = None
+
+    def __enter__(self):
+        self.tracer.activate(self.span)
+        # slow operations are recorded even if the trace is not sampled
+        self.operation = profiling.slow_operations.begin(self.name)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.deactivate(self.span)
+        error = '%s: %s' % (exc_type.__name__, exc_value) if exc_value is not None else None
+        profiling.slow_operations.end(self.operation, trace_id=self.span.trace_id if self.span else None, error=error)
+        if self.span:
+            self.span.error = error
+            self.span.finish()
+
+
+class RingBufferExporter(object):
+    """
+    Keeps the latest spans in memory. The spans can be fetched via the ``/v1/traces`` endpoint.
+    """
+
+    def __init__(self, size=1000):
+        """
+        Constructor of the RingBufferExporter.
+
+        :param size: the maximum number of spans. Default is ``1000``.
+        """
+        self.spans = collections.deque(maxlen=size)
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def get_spans(self, trace_id=None):
+        """
+        Returns the stored spans.
+
+        :param trace_id: optional id of a trace. If it is set, only the spans of this trace will be returned.
+        :return: list with the spans as dicts
+        """
+        return [span for span in list(self.spans) if trace_id is None or span['trace_id'] == trace_id]
+
+
+class FileExporter(object):
+    """
+    Appends every span as a JSON line to a file.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor of the FileExporter.
+
+        :param path: the path of the file
+        """
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span) + '\n'
+        with self.lock:
+            with open(self.path, 'a') as trace_file:
+                trace_file.write(line)
+
+
+class OtlpExporter(object):
+    """
+    Sends the spans as OTLP/HTTP JSON to a collector, e.g. the OpenTelemetry collector or Jaeger.
+    The spans are sent in batches from a separate thread and will not block the traced operations. Spans which can
+    not be sent are dropped.
+    """
+
+    def __init__(self, logger, endpoint, batch_size=100, interval=1.0, max_queue_size=10000):
+        """
+        Constructor of the OtlpExporter.
+
+        :param logger: the logger which is used to log failed requests
+        :param endpoint: the url of the OTLP/HTTP traces endpoint, e.g. ``http://127.0.0.1:4318/v1/traces``
+        :param batch_size: the maximum number of spans in a request. Default is ``100``.
+        :param interval: the time in seconds between two requests. Default is ``1.0``.
+        :param max_queue_size: the maximum number of queued spans. Default is ``10000``.
+        """
+        self.logger = logger
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.sender_thread = threading.Thread(target=self.__run_sender_thread, args=())
+        self.sender_thread.daemon = True
+        self.sender_thread.start()
+
+    def export(self, span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+    def flush(self):
+        """
+        Sends all queued spans.
+        """
+        spans = []
+        while len(spans) < self.batch_size:
+            try:
+                spans.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if not spans:
+            return
+        try:
+            requests.post(self.endpoint, json=self.encode(spans), timeout=5)
+        except requests.RequestException as error:
+            self.logger.error('spans could not be sent to %s: %s' % (self.endpoint, error))
+
+    @staticmethod
+    def encode(spans):
+        """
+        Encodes spans as OTLP/HTTP JSON request.
+
+        :param spans: list with the spans as dicts
+        :return: the request body
+        """
+        def attribute(key, value):
+            return {'key': key, 'value': {'stringValue': str(value)}}
+
+        encoded_spans = []
+        for span in spans:
+            start = int(span['start'] * 1e9)
+            attributes = [attribute(key, value) for key, value in sorted(span['attributes'].items())]
+            if span['node']:
+                attributes.append(attribute('motey.node', span['node']))
+            encoded_span = {
+                'traceId': span['trace_id'],
+                'spanId': span['span_id'],
+                'name': span['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(start),
+                'endTimeUnixNano': str(start + int(span['duration'] * 1e9)),
+                'attributes': attributes,
+                'status': {'code': 2, 'message': span['error']} if span['error'] else {'code': 1}
+            }
+            if span['parent_id']:
+                encoded_span['parentSpanId'] = span['parent_id']
+            encoded_spans.append(encoded_span)
+        return {'resourceSpans': [{
+            'resource': {'attributes': [attribute('service.name', 'motey')]},
+            'scopeSpans': [{'scope': {'name': 'motey'}, 'spans': encoded_spans}]
+        }]}
+
+    def __run_sender_thread(self):
+        while True:
+            sleep(self.interval)
+            while not self.queue.empty():
+                self.flush()
+
+
+def traced(name):
+    """
+    Decorator which records every call of the decorated function as a span of the node tracer.
+
+    :param name: the name of the span
+    :return: the decorator
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure(logger, exporter='ring', sample_rate=1.0, ring_size=1000, file_path=None, otlp_endpoint=None,
+              node_identity=None):
+    """
+    Configures the tracer of the node.
+
+    :param logger: the logger of the node
+    :param exporter: the exporter of the spans, one of ``none``, ``ring``, ``file`` or ``otlp``. Default is ``ring``.
+    :param sample_rate: the probability that a new trace is recorded. Default is ``1.0``.
+    :param ring_size: the maximum number of spans of the ``ring`` exporter. Default is ``1000``.
+    :param file_path: the path of the file of the ``file`` exporter.
+    :param otlp_endpoint: the url of the collector of the ``otlp`` exporter.
+    :param node_identity: optional node identity, the ip of the node will be added to the spans
+    :return: the tracer of the node
+    :rtype: Tracer
+    """
+    if exporter == 'ring':
+        tracer.exporter = RingBufferExporter(size=ring_size)
+    elif exporter == 'file':
+        tracer.exporter = FileExporter(path=file_path)
+    elif exporter == 'otlp':
+        tracer.exporter = OtlpExporter(logger=logger, endpoint=otlp_endpoint)
+    else:
+        tracer.exporter = None
+    tracer.sample_rate = sample_rate
+    tracer.node_identity = node_identity
+    return tracer
+
+
+# the tracer of the node, which is used by all components
+tracer = Tracer(exporter=RingBufferExporter())
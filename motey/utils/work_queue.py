@@ -0,0 +1,194 @@
+import collections
+import heapq
+import itertools
+import threading
+from time import monotonic, sleep
+
+
+class WorkQueue(object):
+    """
+    Queue of keys which have to be processed, e.g. the ids of services which have to be reconciled.
+    A key is queued only once, no matter how often it is added. If a key is added while it is processed, it will be
+    queued again after ``done`` was called, so a key is never processed by two workers at the same time.
+    Keys can be added with a delay. Failed keys are added again with an exponential backoff, see ``add_rate_limited``.
+    """
+
+    def __init__(self, backoff_base=1.0, backoff_max=300.0, clock=monotonic):
+        """
+        Constructor of the WorkQueue.
+
+        :param backoff_base: the delay in seconds after the first failure of a key. Default is ``1``.
+        :param backoff_max: the maximum delay in seconds after a failure. Default is ``300``.
+        :param clock: optional function which returns the current time in seconds. Default is ``time.monotonic``.
+        """
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self.queue = collections.deque()
+        self.dirty = set()
+        self.processing = set()
+        self.delayed = []
+        self.counter = itertools.count()
+        self.failures = {}
+        self.stopped = False
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        with self.condition:
+            return len(self.queue)
+
+    def add(self, key):
+        """
+        Queues a key if it is not queued yet.
+
+        :param key: the key to be processed
+        """
+        with self.condition:
+            self.__add(key)
+
+    def add_after(self, key, delay):
+        """
+        Queues a key after a delay.
+
+        :param key: the key to be processed
+        :param delay: the delay in seconds
+        """
+        with self.condition:
+            if delay <= 0:
+                self.__add(key)
+                return
+            heapq.heappush(self.delayed, (self.clock() + delay, next(self.counter), key))
+            self.condition.notify()
+
+    def add_rate_limited(self, key):
+        """
+        Queues a key again after its processing failed. The delay doubles with every failure of the key until it
+        reaches ``backoff_max``.
+
+        :param key: the key which failed
+        :return: the delay in seconds
+        """
+        with self.condition:
+            self.failures[key] = self.failures.get(key, 0) + 1
+            delay = min(self.backoff_base * 2 ** (self.failures[key] - 1), self.backoff_max)
+        self.add_after(key, delay)
+        return delay
+
+    def forget(self, key):
+        """
+        Resets the backoff of a key, e.g. after it was processed successfully.
+
+        :param key: the key
+        """
+        with self.condition:
+            self.failures.pop(key, None)
+
+    def retries(self, key):
+        """
+        :param key: the key
+        :return: the number of failures of the key since the last ``forget``
+        """
+        with self.condition:
+            return self.failures.get(key, 0)
+
+    def get(self):
+        """
+        Blocks until a key can be processed. The key has to be marked as ``done`` afterwards.
+
+        :return: the key or None if the queue was shut down
+        """
+        with self.condition:
+            while True:
+                if self.stopped:
+                    return None
+                timeout = self.__move_delayed()
+                if self.queue:
+                    key = self.queue.popleft()
+                    self.dirty.discard(key)
+                    self.processing.add(key)
+                    return key
+                self.condition.wait(timeout)
+
+    def done(self, key):
+        """
+        Marks a key as processed. If it was added while it was processed, it will be queued again.
+
+        :param key: the processed key
+        """
+        with self.condition:
+            self.processing.discard(key)
+            if key in self.dirty:
+                self.queue.append(key)
+                self.condition.notify()
+
+    def shut_down(self):
+        """
+        Wakes up all waiting workers, ``get`` returns None afterwards.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def __add(self, key):
+        if key in self.dirty:
+            return
+        self.dirty.add(key)
+        if key not in self.processing:
+            self.queue.append(key)
+            self.condition.notify()
+
+    def __move_delayed(self):
+        """
+        Queues all delayed keys which are due.
+
+        :return: the time in seconds until the next delayed key is due or None if there is no delayed key
+        """
+        now = self.clock()
+        while self.delayed and self.delayed[0][0] <= now:
+            self.__add(heapq.heappop(self.delayed)[2])
+        return self.delayed[0][0] - now if self.delayed else None
+
+
+class RateLimiter(object):
+    """
+    Token bucket which limits the number of operations per second. Up to ``burst`` operations can be executed without
+    waiting.
+    """
+
+    def __init__(self, rate, burst=1, clock=monotonic):
+        """
+        Constructor of the RateLimiter.
+
+        :param rate: the number of operations per second. ``0`` disables the limit.
+        :param burst: the maximum number of operations which can be executed without waiting. Default is ``1``.
+        :param clock: optional function which returns the current time in seconds. Default is ``time.monotonic``.
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes a token.
+
+        :return: the time in seconds the caller has to wait before the operation can be executed
+        """
+        if self.rate <= 0:
+            return 0
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def acquire(self):
+        """
+        Blocks until the operation can be executed.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            sleep(delay)
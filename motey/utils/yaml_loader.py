@@ -0,0 +1,153 @@
+import yaml
+from yaml.nodes import MappingNode, SequenceNode
+
+# Use the C-accelerated safe loader if libyaml is available.
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class YAMLLimitError(yaml.YAMLError):
+    """
+    Will be raised if a YAML stream exceeds one of the configured limits.
+    """
+    pass
+
+
+class LimitedStream(object):
+    """
+    Wraps a file-like object and raises a ``YAMLLimitError`` if more than ``max_size`` bytes are read.
+    """
+
+    def __init__(self, stream, max_size):
+        """
+        Constructor of the LimitedStream.
+
+        :param stream: the file-like object to be wrapped
+        :param max_size: the maximum number of bytes which can be read
+        """
+        self.stream = stream
+        self.max_size = max_size
+        self.size = 0
+
+    def read(self, size=-1):
+        """
+        Reads from the wrapped stream.
+
+        :param size: the number of bytes to be read. Default is ``-1``, which reads up to the size limit.
+        :return: the read bytes
+        """
+        if size is None or size < 0:
+            size = self.max_size - self.size + 1
+        data = self.stream.read(size)
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise YAMLLimitError('the YAML stream exceeds the maximum size of %s bytes' % self.max_size)
+        return data
+
+
+def load_all(stream, max_size=1048576, max_depth=20, max_documents=100, max_nodes=100000):
+    """
+    Parses a stream with one or more YAML documents with the safe loader.
+    The documents will be yielded as soon as they are parsed, so the whole stream does not need to be in memory.
+    Only plain YAML types will be constructed. Documents which are nested deeper than ``max_depth``, which have more
+    than ``max_nodes`` nodes or which contain recursive aliases will be rejected before they are constructed.
+
+    :param stream: a string, bytes or a file-like object with the YAML documents
+    :param max_size: the maximum size of the stream in bytes. Default is ``1048576``.
+    :param max_depth: the maximum nesting depth of a document. Default is ``20``.
+    :param max_documents: the maximum number of documents in the stream. Default is ``100``.
+    :param max_nodes: the maximum number of nodes of a document with expanded aliases. Default is ``100000``.
+    :return: generator which yields the parsed documents
+    :raises yaml.YAMLError: if the stream is not valid YAML or exceeds one of the limits
+    """
+    if isinstance(stream, str):
+        stream = stream.encode('utf-8')
+    if isinstance(stream, bytes):
+        if len(stream) > max_size:
+            raise YAMLLimitError('the YAML stream exceeds the maximum size of %s bytes' % max_size)
+    else:
+        stream = LimitedStream(stream, max_size)
+
+    loader = SafeLoader(stream)
+    try:
+        number_of_documents = 0
+        while loader.check_node():
+            number_of_documents += 1
+            if number_of_documents > max_documents:
+                raise YAMLLimitError('the YAML stream contains more than %s documents' % max_documents)
+            node = loader.get_node()
+            check_node(node, max_depth, max_nodes)
+            yield loader.construct_document(node)
+    finally:
+        loader.dispose()
+
+
+def load(stream, max_size=1048576, max_depth=20, max_nodes=100000):
+    """
+    Parses a stream with a single YAML document with the safe loader.
+
+    :param stream: a string, bytes or a file-like object with the YAML document
+    :param max_size: the maximum size of the stream in bytes. Default is ``1048576``.
+    :param max_depth: the maximum nesting depth of the document. Default is ``20``.
+    :param max_nodes: the maximum number of nodes of the document with expanded aliases. Default is ``100000``.
+    :return: the parsed document or None if the stream is empty
+    :raises yaml.YAMLError: if the stream is not valid YAML, contains multiple documents or exceeds one of the limits
+    """
+    documents = list(load_all(stream, max_size=max_size, max_depth=max_depth, max_documents=1,
+                              max_nodes=max_nodes))
+    return documents[0] if documents else None
+
+
+def check_node(node, max_depth, max_nodes):
+    """
+    Checks the nesting depth and the size of a YAML node graph.
+    Every node will be visited only once, even if it is referenced multiple times via aliases, but the size is
+    counted as if all aliases were expanded, so documents which explode on serialization are rejected as well.
+
+    :param node: the root node of the document
+    :param max_depth: the maximum nesting depth
+    :param max_nodes: the maximum number of nodes with expanded aliases
+    :raises YAMLLimitError: if the document exceeds one of the limits or contains recursive aliases
+    """
+    checked_nodes = {}
+    active = set()
+
+    def __check(current_node, level):
+        """
+        Inner function which returns the height and the expanded size of a node.
+
+        :param current_node: the node to be checked
+        :param level: the nesting level of the node
+        :return: a tuple with the height and the expanded size of the node
+        """
+        if level > max_depth:
+            raise YAMLLimitError('the YAML document exceeds the maximum depth of %s' % max_depth)
+        node_id = id(current_node)
+        if node_id in checked_nodes:
+            height, size = checked_nodes[node_id]
+            if level + height - 1 > max_depth:
+                raise YAMLLimitError('the YAML document exceeds the maximum depth of %s' % max_depth)
+            return height, size
+        if node_id in active:
+            raise YAMLLimitError('the YAML document contains recursive aliases')
+
+        if isinstance(current_node, SequenceNode):
+            children = current_node.value
+        elif isinstance(current_node, MappingNode):
+            children = [child for pair in current_node.value for child in pair]
+        else:
+            children = []
+
+        active.add(node_id)
+        height = 1
+        size = 1
+        for child in children:
+            child_height, child_size = __check(child, level + 1)
+            height = max(height, child_height + 1)
+            size += child_size
+            if size > max_nodes:
+                raise YAMLLimitError('the YAML document exceeds the maximum of %s nodes' % max_nodes)
+        active.discard(node_id)
+        checked_nodes[node_id] = (height, size)
+        return height, size
+
+    __check(node, 1)
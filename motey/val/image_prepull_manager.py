@@ -0,0 +1,220 @@
+import queue
+import threading
+from collections import OrderedDict
+
+from motey.models.pull_state import PullState
+
+
+class ImagePrePullManager(object):
+    """
+    Pulls images in the background before they are instantiated.
+    Images of an accepted blueprint which can be executed on this node will be pulled as soon as the blueprint is
+    received. Other nodes can request a pre pull via the ``ZeroMQServer.prepull_image_stream``.
+    All pulled images are tracked in a LRU bounded cache. If the cache exceeds its size, the least recently used image
+    will be deleted from the node, unless instances of the image still exist.
+    """
+
+    def __init__(self, logger, valmanager, capability_repository, service_stream=None, prepull_image_stream=None,
+                 cache_size=20, workers=2):
+        """
+        Constructor of the ImagePrePullManager.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param valmanager: DI injected
+        :type valmanager: motey.val.valmanager.VALManager
+        :param capability_repository: DI injected
+        :type capability_repository: motey.repositories.capability_repository.CapabilityRepository
+        :param service_stream: optional DI injected stream of the accepted services, e.g. the
+                               ``yaml_post_stream`` of the service endpoint. Default is None.
+        :type service_stream: rx.subjects.Subject
+        :param prepull_image_stream: optional DI injected stream of the images which other nodes requested to pull,
+                                     e.g. the ``ZeroMQServer.prepull_image_stream``. Default is None.
+        :type prepull_image_stream: rx.subjects.Subject
+        :param cache_size: the maximum number of images which will be kept on the node. Default is ``20``.
+        :param workers: the number of parallel pull threads. Default is ``2``.
+        """
+        self.logger = logger
+        self.valmanager = valmanager
+        self.capability_repository = capability_repository
+        self.service_stream = service_stream
+        self.prepull_image_stream = prepull_image_stream
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.progress = {}
+        self.lock = threading.Lock()
+        self.pull_queue = queue.Queue()
+        self.subscriptions = []
+        self.worker_threads = []
+        for index in range(workers):
+            worker_thread = threading.Thread(target=self.__run_worker_thread, args=())
+            worker_thread.daemon = True
+            self.worker_threads.append(worker_thread)
+
+    def start(self):
+        """
+        Subscribes to the blueprint, the remote pre pull and the instantiation streams and starts the pull threads.
+        """
+        self.subscriptions = [self.valmanager.instantiate_stream.subscribe(self.touch)]
+        if self.service_stream:
+            self.subscriptions.append(self.service_stream.subscribe(self.prepull_service))
+        if self.prepull_image_stream:
+            self.subscriptions.append(self.prepull_image_stream.subscribe(self.prepull))
+        for worker_thread in self.worker_threads:
+            worker_thread.start()
+        self.logger.info('image pre pull manager started')
+
+    def stop(self):
+        """
+        Should be executed to clean up the image pre pull manager.
+        """
+        for subscription in self.subscriptions:
+            subscription.dispose()
+        for worker_thread in self.worker_threads:
+            self.pull_queue.put(None)
+        self.logger.info('image pre pull manager stopped')
+
+    def prepull_service(self, service):
+        """
+        Queues all images of a service which can be executed on this node.
+
+        :param service: the accepted service
+        :type service: motey.models.service.Service
+        """
+        for image in service.images:
+            if all(self.capability_repository.has(capability=capability) for capability in image.capabilities):
+                self.prepull(image)
+
+    def prepull(self, image):
+        """
+        Queues a single image to be pulled in the background.
+        Images which are already queued, pulling or cached will not be queued again.
+
+        :param image: the image to be pulled
+        :type image: motey.models.image.Image
+        """
+        with self.lock:
+            if image.name in self.cache:
+                self.cache.move_to_end(image.name)
+                return
+            pending_states = (PullState.QUEUED, PullState.PULLING)
+            if image.name in self.progress and self.progress[image.name]['state'] in pending_states:
+                return
+            self.progress[image.name] = {'state': PullState.QUEUED, 'current': 0, 'total': 0}
+        self.pull_queue.put(image)
+
+    def pull(self, image):
+        """
+        Pulls an image synchronously and adds them to the cache.
+
+        :param image: the image to be pulled
+        :type image: motey.models.image.Image
+        :return: True if the image is available on the node afterwards, otherwise False
+        """
+
+        def __progress_callback(current, total):
+            """
+            Inner function which is used to track the download progress of the image.
+
+            :param current: the already downloaded bytes
+            :param total: the total bytes to be downloaded
+            """
+            with self.lock:
+                self.progress[image.name] = {'state': PullState.PULLING, 'current': current, 'total': total}
+
+        with self.lock:
+            self.progress[image.name] = {'state': PullState.PULLING, 'current': 0, 'total': 0}
+
+        if not self.valmanager.has_image(image):
+            self.valmanager.load_image(image, progress_callback=__progress_callback)
+
+        if not self.valmanager.has_image(image):
+            self.logger.error('pre pull of image `%s` failed' % image.name)
+            self.__set_state(image.name, PullState.ERROR)
+            return False
+
+        self.__set_state(image.name, PullState.PULLED)
+        self.touch(image)
+        return True
+
+    def touch(self, image):
+        """
+        Marks an image as recently used.
+        If the cache exceeds its size afterwards, the least recently used images will be deleted. Images with existing
+        instances are kept and marked as recently used again.
+
+        :param image: the used image
+        :type image: motey.models.image.Image
+        """
+        evicted_images = []
+        with self.lock:
+            self.cache[image.name] = image
+            self.cache.move_to_end(image.name)
+            while len(self.cache) > self.cache_size:
+                evicted_name, evicted_image = self.cache.popitem(last=False)
+                evicted_images.append(evicted_image)
+
+        for evicted_image in evicted_images:
+            self.__evict(evicted_image)
+
+    def __evict(self, image):
+        """
+        Deletes an image which was removed from the cache from the node.
+        If instances of the image still exist, the image is added to the cache again instead.
+
+        :param image: the evicted image
+        :type image: motey.models.image.Image
+        """
+        try:
+            if self.valmanager.has_image_instances(image):
+                self.logger.info('image `%s` is still used and will not be evicted' % image.name)
+                with self.lock:
+                    self.cache.setdefault(image.name, image)
+                return
+            self.logger.info('evict image `%s` from the image cache' % image.name)
+            if not self.valmanager.delete_image(image):
+                self.logger.error('eviction of image `%s` failed' % image.name)
+        except Exception as exception:
+            self.logger.error('eviction of image `%s` failed: %s' % (image.name, exception))
+        with self.lock:
+            if image.name not in self.cache:
+                self.progress.pop(image.name, None)
+
+    def get_progress(self, image_name):
+        """
+        Returns the pull progress of an image.
+
+        :param image_name: the name of the image
+        :return: a dict with the ``state`` as ``PullState`` and the ``current`` and ``total`` bytes or None if the
+                 image is unknown
+        """
+        with self.lock:
+            progress = self.progress.get(image_name)
+            return dict(progress) if progress else None
+
+    def __run_worker_thread(self):
+        """
+        Private function which is be executed after the start method is called.
+        The method will wait for queued images and will pull them one after another.
+        """
+        while True:
+            image = self.pull_queue.get()
+            if image is None:
+                break
+            try:
+                self.pull(image)
+            except Exception as exception:
+                self.logger.error('pre pull of image `%s` failed: %s' % (image.name, exception))
+                self.__set_state(image.name, PullState.ERROR)
+
+    def __set_state(self, image_name, state):
+        """
+        Updates the pull state of an image, if the image was not evicted in the meantime.
+
+        :param image_name: the name of the image
+        :param state: the ``PullState`` of the image
+        """
+        with self.lock:
+            progress = self.progress.get(image_name)
+            if progress:
+                progress['state'] = state
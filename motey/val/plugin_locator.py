@@ -0,0 +1,182 @@
+import json
+import os
+
+from yapsy.IPluginLocator import IPluginLocator
+from yapsy.PluginFileLocator import PluginFileLocator
+from yapsy.PluginInfo import PluginInfo
+
+
+class ManifestPluginLocator(IPluginLocator):
+    """
+    Plugin locator which caches the located VAL plugins in a manifest file.
+    The engine of a plugin is read from the ``Engine`` option of the ``VAL`` section in its yapsy-plugin file, so the
+    engines can be registered without importing the plugin modules.
+    The manifest is only rebuild if a plugin directory or a plugin file has been changed.
+    The located candidates can be limited to a single engine via ``select`` to load only the plugins which are used.
+    """
+
+    def __init__(self, manifest_path=None, plugin_info_ext='yapsy-plugin'):
+        """
+        Constructor of the ManifestPluginLocator.
+
+        :param manifest_path: path of the manifest cache file. Default is None, which disables the cache.
+        :param plugin_info_ext: the extension of the plugin info files. Default is ``yapsy-plugin``.
+        """
+        self.manifest_path = manifest_path
+        self.file_locator = PluginFileLocator()
+        self.file_locator.setPluginInfoExtension(plugin_info_ext)
+        self.directories = []
+        self.manifest = None
+        self.selected_engine = None
+
+    def setPluginPlaces(self, directories_list):
+        """
+        Set the list of directories where to look for plugins.
+
+        :param directories_list: list of directories
+        """
+        self.directories = list(directories_list)
+        self.file_locator.setPluginPlaces(directories_list)
+        self.manifest = None
+
+    def updatePluginPlaces(self, directories_list):
+        """
+        Updates the list of directories where to look for plugins.
+
+        :param directories_list: list of directories
+        """
+        self.setPluginPlaces(self.directories + [directory for directory in directories_list
+                                                 if directory not in self.directories])
+
+    def gatherCorePluginInfo(self, directory, filename):
+        """
+        Return a ``PluginInfo`` as well as the ``ConfigParser`` used to build it.
+        Will be delegated to the yapsy ``PluginFileLocator``.
+        """
+        return self.file_locator.gatherCorePluginInfo(directory, filename)
+
+    def select(self, engine=None):
+        """
+        Limits the located candidates to the plugins of an engine.
+
+        :param engine: the engine to be located. Default is None, which will locate all plugins.
+        """
+        self.selected_engine = engine
+
+    def get_engines(self):
+        """
+        Returns the engines of all available plugins without importing the plugin modules.
+
+        :return: list with the engines in the order of the manifest
+        """
+        return [entry['engine'] for entry in self.get_manifest()['plugins']]
+
+    def locatePlugins(self):
+        """
+        Returns the candidates of the selected engine or of all plugins if no engine is selected.
+
+        :return: a tuple with the list of candidates and the number of candidates
+        """
+        candidates = []
+        for entry in self.get_manifest()['plugins']:
+            if self.selected_engine and entry['engine'] != self.selected_engine:
+                continue
+            candidates.append((entry['info_file'], entry['path'], PluginInfo(entry['name'], entry['path'])))
+        return candidates, len(candidates)
+
+    def get_manifest(self):
+        """
+        Returns the manifest with all available plugins.
+        The manifest will be loaded from the cache if it is still valid, otherwise the plugin directories will be
+        scanned and the cache will be updated.
+
+        :return: the manifest
+        """
+        if self.manifest and self.__is_valid(self.manifest):
+            return self.manifest
+
+        manifest = self.__read_cache()
+        if not manifest or not self.__is_valid(manifest):
+            manifest = self.__scan()
+            self.__write_cache(manifest)
+        self.manifest = manifest
+        return manifest
+
+    def __scan(self):
+        """
+        Scans the plugin directories and parses the plugin info files.
+
+        :return: the new manifest
+        """
+        plugins = []
+        candidates, number_of_candidates = self.file_locator.locatePlugins()
+        for info_file, path, plugin_info in candidates:
+            details = plugin_info.details
+            engine = details.get('VAL', 'Engine') if details.has_option('VAL', 'Engine') else plugin_info.name
+            plugins.append({
+                'engine': engine,
+                'name': plugin_info.name,
+                'info_file': info_file,
+                'path': path
+            })
+        return {
+            'directories': self.directories,
+            'signature': self.__signature(self.directories, [plugin['info_file'] for plugin in plugins]),
+            'plugins': plugins
+        }
+
+    def __is_valid(self, manifest):
+        """
+        Checks if a manifest still matches the plugin directories.
+
+        :param manifest: the manifest to check
+        :return: True if the manifest is still valid, otherwise False
+        """
+        if manifest.get('directories') != self.directories:
+            return False
+        info_files = [plugin['info_file'] for plugin in manifest.get('plugins', [])]
+        return manifest.get('signature') == self.__signature(self.directories, info_files)
+
+    def __signature(self, directories, info_files):
+        """
+        Returns the modification times of the plugin directories and the plugin info files.
+
+        :param directories: the plugin directories
+        :param info_files: the plugin info files
+        :return: dict with the paths and their modification times
+        """
+        signature = {}
+        for path in directories + info_files:
+            try:
+                signature[path] = os.stat(path).st_mtime
+            except OSError:
+                signature[path] = None
+        return signature
+
+    def __read_cache(self):
+        """
+        Reads the manifest from the cache file.
+
+        :return: the cached manifest or None if the cache does not exist or is invalid
+        """
+        if not self.manifest_path:
+            return None
+        try:
+            with open(self.manifest_path, 'r') as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+
+    def __write_cache(self, manifest):
+        """
+        Writes the manifest to the cache file.
+
+        :param manifest: the manifest to be cached
+        """
+        if not self.manifest_path:
+            return
+        try:
+            with open(self.manifest_path, 'w') as manifest_file:
+                json.dump(manifest, manifest_file)
+        except OSError:
+            pass
@@ -7,6 +7,8 @@ class AbstractVAL(IPlugin):
     Should be inherited to build an custom VAL plugin.
     A VAL plugin is implemented as an yapsy plugin.
     Each plugin must be configured via a yapsy-plugin file.
+    The engine of the plugin should be set via the ``Engine`` option in the ``VAL`` section of the yapsy-plugin file,
+    otherwise the plugin can not be loaded lazily.
     See more at http://yapsy.sourceforge.net/
     """
 
@@ -34,11 +36,12 @@ class AbstractVAL(IPlugin):
         """
         raise NotImplementedError("Should have implemented this")
 
-    def load_image(self, image_name):
+    def load_image(self, image_name, progress_callback=None):
         """
         Load the image to the device, but does not start the image himself.
 
         :param image_name: the image to be loaded.
+        :param progress_callback: optional callback which will be executed with the already loaded and the total bytes.
         """
         raise NotImplementedError("Should have implemented this")
 
@@ -47,12 +50,22 @@ class AbstractVAL(IPlugin):
         Delete an image, but not the instance of it.
 
         :param image_name: the image to be deleted.
+        :return: True if the image was deleted, otherwise False
+        """
+        raise NotImplementedError("Should have implemented this")
+
+    def has_image_instances(self, image_name):
+        """
+        Checks if instances of an image exist, no matter if they are running or not.
+
+        :param image_name: the name of the image
+        :return: True if at least one instance of the image exists, otherwise False
         """
         raise NotImplementedError("Should have implemented this")
 
     def create_instance(self, image_name, parameters={}):
         """
-        Create and start an instance of an image.
+        Create an instance of an image, but does not start the instance.
 
         :param image_name: the name of the image which should be created
         :param parameters: execution parameters
@@ -60,6 +73,23 @@ class AbstractVAL(IPlugin):
         """
         raise NotImplementedError("Should have implemented this")
 
+    def start_created_instance(self, instance_id):
+        """
+        Start an instance which was created via ``create_instance``.
+
+        :param instance_id: the id of the created instance
+        :return: the id of the started instance or None if something went wrong
+        """
+        raise NotImplementedError("Should have implemented this")
+
+    def remove_instance(self, instance_id):
+        """
+        Remove an instance which is not running.
+
+        :param instance_id: the id of the instance to be removed
+        """
+        raise NotImplementedError("Should have implemented this")
+
     def start_instance(self, instance_name, parameters={}):
         """
         Start an existing image instance.
@@ -95,6 +125,12 @@ class AbstractVAL(IPlugin):
         raise NotImplementedError("Should have implemented this")
 
     def get_image_instance_state(self, instance_name):
+        """
+        Returns the state of an instance.
+
+        :param instance_name: the name of the instance
+        :return: the ``ImageState`` of the instance
+        """
         raise NotImplementedError("Should have implemented this")
 
     def get_stats(self, instance_name):
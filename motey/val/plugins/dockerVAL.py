@@ -1,11 +1,17 @@
 import docker
 from docker.errors import APIError, NotFound, ContainerError, ImageNotFound
+from docker.utils import parse_repository_tag
 
 import motey.val.plugins.abstractVAL as abstractVAL
 from motey.configuration.configreader import config
 from motey.models.image_state import ImageState
 from motey.models.systemstatus import SystemStatus
 from motey.models.valinstancestatus import VALInstanceStatus
+from motey.utils import metrics, tracing
+from motey.val.plugins.docker_image_index import DockerImageIndex
+
+DOCKER_CALL_DURATION = metrics.registry.histogram('motey_docker_call_duration_seconds',
+                                                  'Duration of the calls to the docker daemon', ['operation'])
 
 
 class DockerVAL(abstractVAL.AbstractVAL):
@@ -19,6 +25,8 @@ class DockerVAL(abstractVAL.AbstractVAL):
 
         """
         super().__init__()
+        self.image_index = DockerImageIndex(get_docker_client=self.get_docker_client,
+                                            reconcile_interval=int(config['DOCKER']['image_index_reconcile_interval']))
 
     def get_docker_client(self):
         """
@@ -39,55 +47,94 @@ class DockerVAL(abstractVAL.AbstractVAL):
     def has_image(self, image_name):
         """
         Checks if an specific images exists.
+        The lookup is done in the ``DockerImageIndex`` and does not query the docker daemon. As long as the plugin is
+        not activated, only the requested image is looked up in the docker daemon.
 
-        :param image_name: the name of the image to search for. Can be the ``image.id`` or the ``image.short_id``.
+        :param image_name: the name of the image to search for. Can be the ``image.id``, the ``image.short_id`` or a
+                           repository tag like ``alpine`` or ``alpine:3.5``.
         :return: True if the image exist, otherwise False.
         """
-        client = self.get_docker_client()
-        images = []
-        try:
-            images = client.images.list()
-        except APIError as apie:
-            return False
-
-        for image in client.images.list():
-            if image.id == image_name or image.short_id == image_name or image.id == 'sha256:%s' % image_name or image.short_id == 'sha256:%s' % image_name:
-                return True
-        return False
+        if not self.image_index.started:
+            self.image_index.refresh(image_name)
+        return self.image_index.has(image_name)
 
-    def load_image(self, image_name):
+    @metrics.timed(DOCKER_CALL_DURATION, operation='load_image')
+    @tracing.traced('docker.load_image')
+    def load_image(self, image_name, progress_callback=None):
         """
         Load the image to the device, but does not start the image himself.
-        It is a wrapper around the ``docker.images.pull`` command.
+        It is a wrapper around the ``docker.api.pull`` command.
+        The pull progress of all layers will be summed up and passed to the ``progress_callback``.
 
         :param image_name: the image to be loaded.
+        :param progress_callback: optional callback which will be executed with the already loaded and the total bytes.
         """
         client = self.get_docker_client()
+        repository, tag = parse_repository_tag(image_name)
+        layers = {}
         try:
-            client.images.pull(image_name)
+            for event in client.api.pull(repository, tag=tag if tag else 'latest', stream=True, decode=True):
+                if 'error' in event:
+                    if self.logger:
+                        self.logger.error("load docker image > %s" % event['error'])
+                    break
+                progress_detail = event.get('progressDetail')
+                if not progress_callback or not progress_detail or 'id' not in event:
+                    continue
+                layers[event['id']] = (progress_detail.get('current', 0), progress_detail.get('total', 0))
+                progress_callback(sum(current for current, total in layers.values()),
+                                  sum(total for current, total in layers.values()))
         except APIError as apie:
-            pass
+            if self.logger:
+                self.logger.error("load docker image > api error")
+        self.image_index.refresh(image_name)
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='delete_image')
+    @tracing.traced('docker.delete_image')
     def delete_image(self, image_name):
         """
         Delete an image, but not the instance of it.
         It is a wrapper around the ``docker.images.remove`` command.
 
         :param image_name: the image to be deleted.
+        :return: True if the image was deleted, otherwise False
         """
         client = self.get_docker_client()
+        deleted = False
         try:
             client.images.remove(image_name)
-        except ContainerError as ce:
-            pass
-        except ImageNotFound as inf:
+            deleted = True
+        except ImageNotFound:
             pass
         except APIError as apie:
-            pass
+            if self.logger:
+                self.logger.error("delete docker image > %s" % apie)
+        self.image_index.refresh(image_name)
+        return deleted
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='has_image_instances')
+    def has_image_instances(self, image_name):
+        """
+        Checks if containers of an image exist, no matter if they are running or not.
+        It is a wrapper around the ``docker.containers.list(all=True, filters={'ancestor': image_name})`` command.
+
+        :param image_name: the name of the image
+        :return: True if at least one container of the image exists or if the daemon could not be asked,
+                 otherwise False
+        """
+        client = self.get_docker_client()
+        try:
+            return len(client.containers.list(all=True, filters={'ancestor': image_name})) > 0
+        except APIError as apie:
+            if self.logger:
+                self.logger.error("list docker containers > %s" % apie)
+            return True
+
+    @metrics.timed(DOCKER_CALL_DURATION, operation='create_instance')
+    @tracing.traced('docker.create_instance')
     def create_instance(self, image_name, parameters={}):
         """
-        Create and start an instance of an image.
+        Create an instance of an image, but does not start the instance.
         It is a wrapper around the ``docker.containers.create`` command.
 
         :param image_name: the name of the image which should be created
@@ -97,9 +144,10 @@ class DockerVAL(abstractVAL.AbstractVAL):
         container_id = None
         client = self.get_docker_client()
         try:
-            if 'detach' in parameters:
-                parameters.pop('detach')
-                container = client.containers.create(image_name, detach=True, **parameters)
+            create_parameters = dict(parameters)
+            create_parameters.pop('detach', None)
+            container = client.containers.create(image_name, **create_parameters)
+            container_id = container.id
         except ContainerError as ce:
             if self.logger:
                 self.logger.error("create docker instance > container could not be created")
@@ -111,6 +159,42 @@ class DockerVAL(abstractVAL.AbstractVAL):
                 self.logger.error("create docker instance > api error")
         return container_id
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='start_created_instance')
+    @tracing.traced('docker.start_created_instance')
+    def start_created_instance(self, instance_id):
+        """
+        Start an instance which was created via ``create_instance``.
+        It is a wrapper around the ``docker.containers.get(...).start`` command.
+
+        :param instance_id: the id of the created container
+        :return: the id of the started container or None if something went wrong
+        """
+        client = self.get_docker_client()
+        try:
+            client.containers.get(instance_id).start()
+        except (NotFound, APIError):
+            if self.logger:
+                self.logger.error("start created docker instance > container could not be started")
+            return None
+        return instance_id
+
+    @metrics.timed(DOCKER_CALL_DURATION, operation='remove_instance')
+    @tracing.traced('docker.remove_instance')
+    def remove_instance(self, instance_id):
+        """
+        Remove an instance which is not running.
+        It is a wrapper around the ``docker.containers.get(...).remove`` command.
+
+        :param instance_id: the id of the container to be removed
+        """
+        client = self.get_docker_client()
+        try:
+            client.containers.get(instance_id).remove(force=True)
+        except (NotFound, APIError):
+            pass
+
+    @metrics.timed(DOCKER_CALL_DURATION, operation='start_instance')
+    @tracing.traced('docker.start_instance')
     def start_instance(self, instance_name, parameters={}):
         """
         Start an existing image instance.
@@ -138,6 +222,8 @@ class DockerVAL(abstractVAL.AbstractVAL):
                 self.logger.error("start docker instance > api error")
         return container_id
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='stop_instance')
+    @tracing.traced('docker.stop_instance')
     def stop_instance(self, container_name):
         """
         Stop an existing image instance.
@@ -155,6 +241,7 @@ class DockerVAL(abstractVAL.AbstractVAL):
         except APIError as apie:
             pass
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='has_instance')
     def has_instance(self, container_name):
         """
         Checks if an image instance exists.
@@ -169,17 +256,27 @@ class DockerVAL(abstractVAL.AbstractVAL):
             return False
         return True
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='get_all_running_instances')
     def get_all_running_instances(self):
         """
         Returns a list with all running instance in this VAL.
         It is a wrapper around the ``docker.containers.list(filters={'status': 'running'})`` command.
 
-        :return: list of instances
+        :return: list with the ids of the running containers
         """
         client = self.get_docker_client()
-        return client.containers.list(filters={'status': 'running'})
+        return [container.id for container in client.containers.list(filters={'status': 'running'})]
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='get_image_instance_state')
+    @tracing.traced('docker.get_image_instance_state')
     def get_image_instance_state(self, container_name):
+        """
+        Returns the ``ImageState`` of a container.
+        It is a wrapper around the ``docker.containers.get`` command.
+
+        :param container_name: the name or id of the container
+        :return: the ``ImageState`` of the container or ``ImageState.ERROR`` if something went wrong
+        """
         client = self.get_docker_client()
         image_status = None
         try:
@@ -187,7 +284,7 @@ class DockerVAL(abstractVAL.AbstractVAL):
             status = container.attrs['State']['Status']
             if status == 'created':
                 image_status = ImageState.INSTANTIATING
-            if status == 'restarting':
+            elif status == 'restarting':
                 image_status = ImageState.INSTANTIATING
             elif status == 'running':
                 image_status = ImageState.RUNNING
@@ -203,7 +300,9 @@ class DockerVAL(abstractVAL.AbstractVAL):
                 image_status = ImageState.ERROR
         except (NotFound, APIError):
             image_status = ImageState.ERROR
+        return image_status
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='get_stats')
     def get_stats(self, container_name):
         """
         Returns object which is type of ``Status``. Represents the status of a container.
@@ -216,8 +315,8 @@ class DockerVAL(abstractVAL.AbstractVAL):
         try:
             container = client.containers.get(container_name)
             service_stats = container.stats(decode=True, stream=False)
-            status.image_name = container.attrs['Name']
-            status.image = container.attrs['Image']
+            status.name = container.attrs['Name']
+            status.image_name = container.attrs['Config']['Image']
             status.status = container.attrs['State']['Status']
             status.created_at = container.attrs['Created']
             status.ip = container.attrs['NetworkSettings']['IPAddress']
@@ -229,6 +328,7 @@ class DockerVAL(abstractVAL.AbstractVAL):
             return None
         return status
 
+    @metrics.timed(DOCKER_CALL_DURATION, operation='get_all_instances_stats')
     def get_all_instances_stats(self):
         """
         Returns object which is type of ``Status``. Represents the status of all docker container.
@@ -237,8 +337,8 @@ class DockerVAL(abstractVAL.AbstractVAL):
         """
         client = self.get_docker_client()
         system_status = SystemStatus()
-        for instance in self.get_all_running_instances():
-            container = client.containers.get(instance.id)
+        for container_id in self.get_all_running_instances():
+            container = client.containers.get(container_id)
             service_stats = container.stats(decode=True, stream=False)
             system_status.used_memory += int(service_stats['memory_stats']['usage'])
             system_status.used_cpu += int(service_stats['cpu_stats']['cpu_usage']['total_usage'])
@@ -246,3 +346,20 @@ class DockerVAL(abstractVAL.AbstractVAL):
             system_status.network_rx_bytes += int(service_stats['networks']['eth0']['rx_bytes'])
 
         return system_status
+
+    def activate(self):
+        """
+        Called at plugin activation.
+        Builds the image index and starts listening for docker image events.
+        """
+        super().activate()
+        self.image_index.logger = self.logger
+        self.image_index.start()
+
+    def deactivate(self):
+        """
+        Called when the plugin is disabled.
+        Stops listening for docker image events.
+        """
+        self.image_index.stop()
+        super().deactivate()
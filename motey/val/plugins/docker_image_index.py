@@ -0,0 +1,225 @@
+import threading
+from time import sleep
+
+from docker.errors import DockerException, NotFound
+from docker.utils import parse_repository_tag
+from requests import RequestException
+
+
+class DockerImageIndex(object):
+    """
+    In-memory index of all docker images which are available on the node.
+    Every image is indexed by its full id, its short id and all of its repository tags, so a lookup does not need to
+    query the docker daemon.
+    The index is kept fresh via the docker image events and will be completely rebuild in a configurable interval to
+    reconcile missed events.
+    """
+
+    def __init__(self, get_docker_client, logger=None, reconcile_interval=300):
+        """
+        Constructor of the DockerImageIndex.
+
+        :param get_docker_client: function which returns a docker client
+        :param logger: optional logger
+        :type logger: motey.utils.logger.Logger
+        :param reconcile_interval: the interval in seconds after the index will be rebuild. Default is ``300``.
+        """
+        self.get_docker_client = get_docker_client
+        self.logger = logger
+        self.reconcile_interval = reconcile_interval
+        self.keys = {}
+        self.image_keys = {}
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.started = False
+        self.event_stream = None
+
+        self.event_thread = threading.Thread(target=self.__run_event_thread, args=())
+        self.event_thread.daemon = True
+
+        self.reconcile_thread = threading.Thread(target=self.__run_reconcile_thread, args=())
+        self.reconcile_thread.daemon = True
+
+    def start(self):
+        """
+        Builds the index and starts the event and the reconciliation thread.
+        If the docker daemon is not available yet, the index is built after the event thread has connected.
+        """
+        self.reconcile()
+        self.started = True
+        self.event_thread.start()
+        self.reconcile_thread.start()
+
+    def stop(self):
+        """
+        Stops listening for docker image events.
+        """
+        self.stopped = True
+        if self.event_stream and hasattr(self.event_stream, 'close'):
+            self.event_stream.close()
+
+    def has(self, image_name):
+        """
+        Checks if an image exists in the index.
+
+        :param image_name: the name of the image to search for. Can be the ``image.id``, the ``image.short_id`` or a
+                           repository tag like ``alpine`` or ``alpine:3.5``.
+        :return: True if the image exist, otherwise False.
+        """
+        keys = self.keys
+        return image_name in keys or self.__normalize_tag(image_name) in keys
+
+    def reconcile(self):
+        """
+        Rebuilds the whole index from the images which are available in the docker daemon.
+        If the docker daemon is not available, the index is not changed.
+
+        :return: True if the index was rebuild, otherwise False
+        """
+        try:
+            images = self.get_docker_client().images.list()
+        except (DockerException, RequestException) as exception:
+            if self.logger:
+                self.logger.error("docker image index > could not reconcile the index: %s" % exception)
+            return False
+
+        keys = {}
+        image_keys = {}
+        for image in images:
+            image_keys[image.id] = self.__image_keys(image)
+            for key in image_keys[image.id]:
+                keys[key] = image.id
+
+        with self.lock:
+            self.keys = keys
+            self.image_keys = image_keys
+        return True
+
+    def refresh(self, image_name):
+        """
+        Updates a single image in the index.
+        If the image does not exist anymore, it will be removed from the index.
+
+        :param image_name: the id or a repository tag of the image
+        """
+        try:
+            image = self.get_docker_client().images.get(image_name)
+        except NotFound:
+            with self.lock:
+                image_id = self.keys.get(image_name, self.keys.get(self.__normalize_tag(image_name)))
+                if image_id:
+                    self.__remove(image_id)
+            return
+        except (DockerException, RequestException):
+            return
+
+        with self.lock:
+            self.__remove(image.id)
+            self.__add(image)
+
+    def handle_event(self, event):
+        """
+        Updates the index for a single docker image event.
+
+        :param event: the decoded docker event
+        :type event: dict
+        """
+        action = event.get('Action', event.get('status'))
+        image_name = event.get('id')
+        if not image_name:
+            return
+
+        if action == 'delete':
+            with self.lock:
+                image_id = self.keys.get(image_name)
+                if image_id:
+                    self.__remove(image_id)
+        else:
+            self.refresh(image_name)
+
+    def __add(self, image):
+        """
+        Adds an image to the index. The lock must be held by the caller.
+        The dicts will be copied before they are changed, so lookups are always done on a consistent state.
+
+        :param image: the docker image to be added
+        """
+        keys = dict(self.keys)
+        image_keys = dict(self.image_keys)
+        image_keys[image.id] = self.__image_keys(image)
+        for key in image_keys[image.id]:
+            keys[key] = image.id
+        self.keys = keys
+        self.image_keys = image_keys
+
+    def __remove(self, image_id):
+        """
+        Removes an image from the index. The lock must be held by the caller.
+
+        :param image_id: the full id of the image to be removed
+        """
+        if image_id not in self.image_keys:
+            return
+        keys = dict(self.keys)
+        image_keys = dict(self.image_keys)
+        for key in image_keys.pop(image_id):
+            if keys.get(key) == image_id:
+                keys.pop(key)
+        self.keys = keys
+        self.image_keys = image_keys
+
+    def __image_keys(self, image):
+        """
+        Returns all keys for which an image should be found.
+
+        :param image: the docker image
+        :return: a set with all keys
+        """
+        keys = {image.id, image.short_id, image.id.split(':', 1)[-1], image.short_id.split(':', 1)[-1]}
+        keys.update(image.tags)
+        return keys
+
+    def __normalize_tag(self, image_name):
+        """
+        Adds the default ``latest`` tag to an image name without a tag.
+
+        :param image_name: the name of the image
+        :return: the image name with a tag
+        """
+        repository, tag = parse_repository_tag(image_name)
+        return '%s:%s' % (repository, tag if tag else 'latest')
+
+    def __run_event_thread(self):
+        """
+        Private function which is be executed after the start method is called.
+        The method will wait for docker image events and will update the index.
+        If the connection to the docker daemon gets lost, the index will be reconciled after the reconnect.
+        """
+        reconnect = False
+        while not self.stopped:
+            try:
+                if reconnect:
+                    # events could have been missed while the connection was lost
+                    self.reconcile()
+                self.event_stream = self.get_docker_client().events(decode=True, filters={'type': 'image'})
+                for event in self.event_stream:
+                    self.handle_event(event)
+            except Exception:
+                if self.logger:
+                    self.logger.error("docker image index > lost connection to the docker events")
+            reconnect = True
+            if not self.stopped:
+                sleep(1)
+
+    def __run_reconcile_thread(self):
+        """
+        Private function which is be executed after the start method is called.
+        The method rebuilds the index in the configured interval.
+        """
+        while not self.stopped:
+            sleep(self.reconcile_interval)
+            try:
+                self.reconcile()
+            except Exception as exception:
+                if self.logger:
+                    self.logger.error("docker image index > could not reconcile the index: %s" % exception)
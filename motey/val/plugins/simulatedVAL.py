@@ -0,0 +1,298 @@
+import itertools
+import random
+import threading
+from collections import OrderedDict
+from time import sleep, time
+
+import motey.val.plugins.abstractVAL as abstractVAL
+from motey.configuration.configreader import config
+from motey.models.image_state import ImageState
+from motey.models.systemstatus import SystemStatus
+from motey.models.valinstancestatus import VALInstanceStatus
+
+
+class SimulatedVAL(abstractVAL.AbstractVAL):
+    """
+    Virtualization abstraction layer (VAL) which simulates a container engine in memory.
+    Pulling an image, starting and stopping an instance take the configured latencies, operations fail with the
+    configured failure rate and every running instance reports the configured resource usage. It can be used to
+    benchmark the placement and the deployment of many nodes on a single host without a container engine.
+    The plugin is configured in the ``SIMULATEDVAL`` section of the ``config.ini`` file. The engine ``simulated`` is
+    excluded by default, see ``excluded_engines`` in the ``VAL`` section.
+    """
+
+    def __init__(self, settings=None, random_generator=None):
+        """
+        Constructor of the SimulatedVAL.
+
+        :param settings: optional dict with the settings. Default is None, which will use the ``SIMULATEDVAL`` section
+                         of the ``config.ini`` file.
+        :param random_generator: optional random generator. Default is None, which will create a generator with the
+                                 configured ``seed``.
+        """
+        super().__init__()
+        settings = settings if settings is not None else config['SIMULATEDVAL']
+        self.pull_latency = float(settings.get('pull_latency', 0))
+        self.start_latency = float(settings.get('start_latency', 0))
+        self.stop_latency = float(settings.get('stop_latency', 0))
+        self.latency_jitter = float(settings.get('latency_jitter', 0))
+        self.failure_rate = float(settings.get('failure_rate', 0))
+        self.max_instances = int(settings.get('max_instances', 0))
+        self.memory_per_instance = int(settings.get('memory_per_instance', 0))
+        self.cpu_per_instance = int(settings.get('cpu_per_instance', 0))
+        self.network_bytes_per_second = int(settings.get('network_bytes_per_second', 0))
+        seed = settings.get('seed', '')
+        self.random = random_generator if random_generator else random.Random(int(seed) if seed else None)
+        self.images = set()
+        self.instances = OrderedDict()
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def get_plugin_type(self):
+        """
+        Returns the specific plugin type.
+
+        :return: the specific plugin type.
+        """
+        return 'simulated'
+
+    def has_image(self, image_name):
+        """
+        Checks if an specific images exists.
+
+        :param image_name: the name of the image to search for.
+        :return: True if the image exist, otherwise False.
+        """
+        return image_name in self.images
+
+    def load_image(self, image_name, progress_callback=None):
+        """
+        Simulates the pull of an image, which takes the ``pull_latency``.
+
+        :param image_name: the image to be loaded.
+        :param progress_callback: optional callback which will be executed with the already loaded and the total bytes.
+        """
+        self.__wait(self.pull_latency)
+        if self.__failed('load image `%s`' % image_name):
+            return
+        self.images.add(image_name)
+        if progress_callback:
+            progress_callback(self.memory_per_instance, self.memory_per_instance)
+
+    def delete_image(self, image_name):
+        """
+        Delete an image, but not the instance of it.
+
+        :param image_name: the image to be deleted.
+        :return: True if the image was deleted, otherwise False
+        """
+        if image_name not in self.images:
+            return False
+        self.images.discard(image_name)
+        return True
+
+    def has_image_instances(self, image_name):
+        """
+        Checks if instances of an image exist, no matter if they are running or not.
+
+        :param image_name: the name of the image
+        :return: True if at least one instance of the image exists, otherwise False
+        """
+        with self.lock:
+            return any(instance['image_name'] == image_name for instance in self.instances.values())
+
+    def create_instance(self, image_name, parameters={}):
+        """
+        Create an instance of an image, but does not start the instance.
+        A missing image will be pulled before.
+
+        :param image_name: the name of the image which should be created
+        :param parameters: execution parameters, the ``name`` will be used as name of the instance
+        :return: the id of the created instance or None if the creation failed or the node is full
+        """
+        if image_name not in self.images:
+            self.load_image(image_name)
+            if image_name not in self.images:
+                return None
+        if self.__failed('create instance of `%s`' % image_name):
+            return None
+
+        with self.lock:
+            if self.max_instances and len(self.instances) >= self.max_instances:
+                if self.logger:
+                    self.logger.error('simulated VAL > no capacity left for an instance of `%s`' % image_name)
+                return None
+            instance_id = '%032x' % next(self.counter)
+            self.instances[instance_id] = {
+                'name': parameters.get('name', instance_id) if parameters else instance_id,
+                'image_name': image_name,
+                'state': ImageState.INSTANTIATING,
+                'created_at': time(),
+                'started_at': None
+            }
+        return instance_id
+
+    def start_created_instance(self, instance_id):
+        """
+        Start an instance which was created via ``create_instance``, which takes the ``start_latency``.
+
+        :param instance_id: the id of the created instance
+        :return: the id of the started instance or None if something went wrong
+        """
+        self.__wait(self.start_latency)
+        instance = self.__find(instance_id)
+        if not instance or self.__failed('start instance `%s`' % instance_id):
+            return None
+        instance['state'] = ImageState.RUNNING
+        instance['started_at'] = time()
+        return instance_id
+
+    def remove_instance(self, instance_id):
+        """
+        Remove an instance.
+
+        :param instance_id: the id of the instance to be removed
+        """
+        with self.lock:
+            self.instances.pop(instance_id, None)
+
+    def start_instance(self, instance_name, parameters={}):
+        """
+        Creates and starts an instance of an image.
+
+        :param instance_name: the name of the image
+        :param parameters: execution parameters, the ``name`` will be used as name of the instance
+        :return: the id of the started instance or None if something went wrong
+        """
+        instance_id = self.create_instance(image_name=instance_name, parameters=parameters)
+        if not instance_id:
+            return None
+        if not self.start_created_instance(instance_id):
+            self.remove_instance(instance_id)
+            return None
+        return instance_id
+
+    def stop_instance(self, instance_name):
+        """
+        Stop an instance, which takes the ``stop_latency``. The instance will be kept in the ``TERMINATED`` state.
+
+        :param instance_name: the name or id of the instance to be stopped
+        """
+        self.__wait(self.stop_latency)
+        instance = self.__find(instance_name)
+        if instance:
+            instance['state'] = ImageState.TERMINATED
+
+    def has_instance(self, instance_name):
+        """
+        Checks if an instance exists.
+
+        :param instance_name: the name or id of an existing instance
+        """
+        return self.__find(instance_name) is not None
+
+    def get_all_running_instances(self):
+        """
+        Returns a list with all running instances.
+
+        :return: list with the ids of the running instances
+        """
+        with self.lock:
+            return [instance_id for instance_id, instance in self.instances.items()
+                    if instance['state'] == ImageState.RUNNING]
+
+    def get_image_instance_state(self, instance_name):
+        """
+        Returns the ``ImageState`` of an instance.
+
+        :param instance_name: the name or id of the instance
+        :return: the ``ImageState`` of the instance or ``ImageState.ERROR`` if it does not exist
+        """
+        instance = self.__find(instance_name)
+        return instance['state'] if instance else ImageState.ERROR
+
+    def get_stats(self, instance_name):
+        """
+        Returns the simulated resource usage of an instance.
+
+        :param instance_name: the name or id of the instance
+        :return: object from type ``VALInstanceStatus`` or None if the instance does not exist
+        """
+        instance = self.__find(instance_name)
+        if not instance:
+            return None
+        running = instance['state'] == ImageState.RUNNING
+        uptime = time() - instance['started_at'] if instance['started_at'] else 0
+        status = VALInstanceStatus()
+        status.name = instance['name']
+        status.image_name = instance['image_name']
+        status.created_at = instance['created_at']
+        status.status = 'running' if running else 'exited'
+        status.ip = '127.0.0.1'
+        status.used_memory = self.memory_per_instance if running else 0
+        status.used_cpu = self.cpu_per_instance if running else 0
+        status.network_tx_bytes = int(uptime * self.network_bytes_per_second)
+        status.network_rx_bytes = int(uptime * self.network_bytes_per_second)
+        return status
+
+    def get_all_instances_stats(self):
+        """
+        Returns the summed up resource usage of all running instances.
+
+        :return: object from type ``SystemStatus``
+        """
+        system_status = SystemStatus()
+        for instance_id in self.get_all_running_instances():
+            status = self.get_stats(instance_id)
+            if not status:
+                continue
+            system_status.used_memory += status.used_memory
+            system_status.used_cpu += status.used_cpu
+            system_status.network_tx_bytes += status.network_tx_bytes
+            system_status.network_rx_bytes += status.network_rx_bytes
+        return system_status
+
+    def deactivate(self):
+        """
+        Called when the plugin is disabled.
+        Removes all simulated instances.
+        """
+        with self.lock:
+            self.instances.clear()
+        super().deactivate()
+
+    def __find(self, instance_name):
+        """
+        Returns an instance by its id or name.
+
+        :param instance_name: the id or name of the instance
+        :return: the instance as dict or None if it does not exist
+        """
+        with self.lock:
+            instance = self.instances.get(instance_name)
+            if instance:
+                return instance
+            return next((instance for instance in self.instances.values() if instance['name'] == instance_name),
+                        None)
+
+    def __wait(self, latency):
+        """
+        Sleeps for the latency, which is varied by the ``latency_jitter``.
+
+        :param latency: the latency in seconds
+        """
+        if latency > 0:
+            sleep(max(0.0, latency * self.random.uniform(1 - self.latency_jitter, 1 + self.latency_jitter)))
+
+    def __failed(self, operation):
+        """
+        Decides if an operation fails, based on the ``failure_rate``.
+
+        :param operation: description of the operation for the log message
+        :return: True if the operation fails, otherwise False
+        """
+        if self.failure_rate <= 0 or self.random.random() >= self.failure_rate:
+            return False
+        if self.logger:
+            self.logger.error('simulated VAL > %s failed' % operation)
+        return True
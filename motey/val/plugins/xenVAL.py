@@ -8,15 +8,24 @@ class XenVAL(abstractVAL.AbstractVAL):
     def has_image(self, image_name):
         raise NotImplementedError("Should have implemented this")
 
-    def load_image(self, image_name):
+    def load_image(self, image_name, progress_callback=None):
         raise NotImplementedError("Should have implemented this")
 
     def delete_image(self, image_name):
         raise NotImplementedError("Should have implemented this")
 
+    def has_image_instances(self, image_name):
+        raise NotImplementedError("Should have implemented this")
+
     def create_instance(self, image_name, parameters={}):
         raise NotImplementedError("Should have implemented this")
 
+    def start_created_instance(self, instance_id):
+        raise NotImplementedError("Should have implemented this")
+
+    def remove_instance(self, instance_id):
+        raise NotImplementedError("Should have implemented this")
+
     def start_instance(self, container_name, parameters={}):
         raise NotImplementedError("Should have implemented this")
 
@@ -1,7 +1,11 @@
+import threading
+from collections import OrderedDict
+
 from rx.subjects import Subject
 
 from motey.models.image_state import ImageState
 from motey.utils.path_helper import absolute_file_path
+from motey.val.plugin_locator import ManifestPluginLocator
 
 
 class VALManager(object):
@@ -10,7 +14,8 @@ class VALManager(object):
     Loads the plugins and wrapps the commands.
     """
 
-    def __init__(self, logger, capability_repository, plugin_manager):
+    def __init__(self, logger, capability_repository, plugin_manager, default_engine=None, warm_pool=None,
+                 warm_pool_images=None, excluded_engines=None):
         """
         Constructor of the VALManger.
 
@@ -20,35 +25,170 @@ class VALManager(object):
         :type capability_repository: motey.repositories.capability_repository.CapabilityRepository
         :param plugin_manager: the DI injected plugin manager
         :type plugin_manager: yapsy.PluginManager.PluginManager
+        :param default_engine: the engine which is used for images without an engine. Default is None, which will
+                               use the first registered plugin.
+        :type default_engine: str
+        :param warm_pool: the DI injected warm pool. Default is None, which disables the warm pool.
+        :type warm_pool: motey.val.warm_pool.WarmPool
+        :param warm_pool_images: list of images which should always be kept in the warm pool. Default is None.
+        :type warm_pool_images: list
+        :param excluded_engines: list of engines whose plugins will not be registered, e.g. ``simulated`` on
+                                 production nodes. Default is None.
+        :type excluded_engines: list
         """
 
         self.logger = logger
         self.capability_repository = capability_repository
         self.plugin_manager = plugin_manager
+        self.plugins = OrderedDict()
+        self.engines = []
+        self.plugin_lock = threading.RLock()
+        self._default_engine = default_engine
+        self.warm_pool = warm_pool
+        self.warm_pool_images = warm_pool_images if warm_pool_images else []
+        self.excluded_engines = excluded_engines if excluded_engines else []
         self.plugin_stream = Subject()
+        self.instantiate_stream = Subject()
+
+    @property
+    def default_engine(self):
+        """
+        The engine which is used for images without an engine.
+        If no default engine is configured, the first registered engine will be used.
+        """
+        if self._default_engine:
+            return self._default_engine
+        return next(iter(self.engines), None)
 
     def start(self):
         """
         Starts the VALManager and register all the available plugins.
+        Afterwards the warm pool will be started.
         """
 
         self.register_plugins()
+        if self.warm_pool:
+            self.warm_pool.start()
 
     def register_plugins(self):
         """
         Register all the available plugins.
         A plugin has to be located under motey/val/plugins.
-        After all the available plugins are loaded, the ``activate`` method of the plugin will be executed and a
-        capability with the related plugin type will be added to the capability engine.
+        If the plugin manager uses a ``ManifestPluginLocator``, only the engines of the plugins will be registered and
+        the plugin modules will be loaded when their engine is used for the first time. Otherwise all plugins are loaded
+        directly.
+        After a plugin is loaded, the ``activate`` method of the plugin will be executed.
+        For each engine a capability with the related plugin type will be added to the capability engine.
+        All plugins are indexed by their plugin type to dispatch the commands without iterating over all plugins.
+        Plugins of the ``excluded_engines`` are skipped.
         """
 
         self.capability_repository.remove_all_from_type('plugin')
         self.plugin_manager.setPluginPlaces(directories_list=[absolute_file_path("motey/val/plugins")])
-        self.plugin_manager.collectPlugins()
-        for plugin in self.plugin_manager.getAllPlugins():
-            plugin.plugin_object.logger = self.logger
-            plugin.plugin_object.activate()
-            self.capability_repository.add(capability=plugin.plugin_object.get_plugin_type(), capability_type='plugin')
+        self.plugins = OrderedDict()
+        self.engines = []
+
+        plugin_locator = self.plugin_manager.getPluginLocator()
+        if not isinstance(plugin_locator, ManifestPluginLocator):
+            self.plugin_manager.collectPlugins()
+            for plugin in self.plugin_manager.getAllPlugins():
+                self.__activate_plugin(plugin.plugin_object)
+            return
+
+        for engine in plugin_locator.get_engines():
+            if engine in self.excluded_engines:
+                continue
+            if engine in self.engines:
+                self.logger.error('VAL plugin for engine `%s` is already registered' % engine)
+                continue
+            self.engines.append(engine)
+            self.capability_repository.add(capability=engine, capability_type='plugin')
+
+        # plugins with permanent warm pools have to be loaded directly to fill the pools
+        for image in self.warm_pool_images:
+            self.load_plugin(image.engine)
+
+    def load_plugin(self, engine):
+        """
+        Loads and activates the plugin of an engine if it is not loaded yet.
+        Errors while loading or activating the plugin are logged and the engine is unregistered, so the callers can
+        handle the engine like an unknown one.
+
+        :param engine: the engine of the plugin
+        :type engine: str
+        :return: the plugin or None if no plugin is available for the engine or it could not be activated
+        """
+        with self.plugin_lock:
+            if engine in self.plugins:
+                return self.plugins[engine]
+
+            plugin_locator = self.plugin_manager.getPluginLocator()
+            if engine not in self.engines or not isinstance(plugin_locator, ManifestPluginLocator):
+                return None
+
+            plugin_locator.select(engine)
+            try:
+                self.plugin_manager.locatePlugins()
+                loaded_plugins = self.plugin_manager.loadPlugins()
+            except Exception as exception:
+                self.logger.error('VAL plugin for engine `%s` could not be loaded: %s' % (engine, exception))
+                loaded_plugins = []
+            finally:
+                plugin_locator.select(None)
+            for plugin_info in loaded_plugins:
+                if plugin_info.plugin_object:
+                    self.__activate_plugin(plugin_info.plugin_object)
+
+            if engine not in self.plugins:
+                self.logger.error('VAL plugin for engine `%s` could not be loaded' % engine)
+                self.engines.remove(engine)
+                self.capability_repository.remove(capability=engine, capability_type='plugin')
+                return None
+            return self.plugins[engine]
+
+    def __activate_plugin(self, plugin_object):
+        """
+        Activates a loaded plugin and adds them to the plugin index.
+        Plugins which can not be activated are not added.
+
+        :param plugin_object: the loaded plugin
+        :type plugin_object: motey.val.plugins.abstractVAL.AbstractVAL
+        """
+        plugin_type = plugin_object.get_plugin_type()
+        if plugin_type in self.excluded_engines:
+            return
+        if plugin_type in self.plugins:
+            self.logger.error('VAL plugin for engine `%s` is already registered' % plugin_type)
+            return
+        plugin_object.logger = self.logger
+        try:
+            plugin_object.activate()
+        except Exception as exception:
+            self.logger.error('VAL plugin for engine `%s` could not be activated: %s' % (plugin_type, exception))
+            return
+        self.plugins[plugin_type] = plugin_object
+        if plugin_type not in self.engines:
+            self.engines.append(plugin_type)
+            self.capability_repository.add(capability=plugin_type, capability_type='plugin')
+        if self.warm_pool:
+            for image in self.warm_pool_images:
+                if image.engine == plugin_type:
+                    self.warm_pool.register(plugin=plugin_object, image=image, size=image.warm_pool,
+                                            permanent=True)
+
+    def get_plugin(self, image):
+        """
+        Returns the plugin which is related to the engine of an image.
+        If the image does not define an engine, the plugin of the default engine will be used.
+        If the plugin is not loaded yet, it will be loaded.
+
+        :param image: the image to be used
+        :type image: motey.models.image.Image
+        :return: the related plugin or None if no plugin is registered for the engine
+        """
+        engine = image.engine if image.engine else self.default_engine
+        plugin = self.plugins.get(engine)
+        return plugin if plugin else self.load_plugin(engine)
 
     def instantiate(self, image):
         """
@@ -58,42 +198,144 @@ class VALManager(object):
         :type image: motey.models.image.Image
         :return: the image id of the instantiated image
         """
-        image_id = None
-        for plugin in self.plugin_manager.getAllPlugins():
-            if image.engine and not plugin.plugin_object.get_plugin_type() == image.engine:
-                continue
+        plugin = self.get_plugin(image)
+        if not plugin:
+            return None
 
-            image_id = plugin.plugin_object.start_instance(instance_name=image.name, parameters=image.parameters)
+        image_id = self.instantiate_from_warm_pool(plugin=plugin, image=image)
+        if not image_id:
+            image_id = plugin.start_instance(instance_name=image.name, parameters=image.parameters)
+        if image_id:
+            self.instantiate_stream.on_next(image)
         return image_id
 
+    def instantiate_from_warm_pool(self, plugin, image):
+        """
+        Starts a pre-created instance of the warm pool.
+        If the image requests a warm pool, the pool will be registered and refilled in the background.
+        A pre-created instance which could not be started will be removed, because it is not part of the pool anymore.
+
+        :param plugin: the VAL plugin which should be used
+        :type plugin: motey.val.plugins.abstractVAL.AbstractVAL
+        :param image: the image which should be executed
+        :type image: motey.models.image.Image
+        :return: the id of the started instance or None if no pre-created instance is available
+        """
+        if not self.warm_pool:
+            return None
+
+        instance_id = self.warm_pool.acquire(image=image)
+        if image.warm_pool:
+            self.warm_pool.register(plugin=plugin, image=image, size=image.warm_pool)
+        if not instance_id:
+            return None
+        started_instance_id = plugin.start_created_instance(instance_id=instance_id)
+        if not started_instance_id:
+            plugin.remove_instance(instance_id)
+        return started_instance_id
+
+    def has_image(self, image):
+        """
+        Checks if an image exists on the node.
+
+        :param image: the image to search for
+        :type image: motey.models.image.Image
+        :return: True if the image exist, otherwise False
+        """
+        plugin = self.get_plugin(image)
+        return plugin.has_image(image_name=image.name) if plugin else False
+
+    def load_image(self, image, progress_callback=None):
+        """
+        Load an image to the node, but does not start the image himself.
+
+        :param image: the image to be loaded
+        :type image: motey.models.image.Image
+        :param progress_callback: optional callback which will be executed with the already loaded and the total bytes
+        """
+        plugin = self.get_plugin(image)
+        if plugin:
+            plugin.load_image(image_name=image.name, progress_callback=progress_callback)
+
+    def delete_image(self, image):
+        """
+        Delete an image from the node, but not the instance of it.
+
+        :param image: the image to be deleted
+        :type image: motey.models.image.Image
+        :return: True if the image was deleted, otherwise False
+        """
+        plugin = self.get_plugin(image)
+        return plugin.delete_image(image_name=image.name) if plugin else False
+
+    def has_image_instances(self, image):
+        """
+        Checks if instances of an image exist on the node, no matter if they are running or not.
+
+        :param image: the image to search for
+        :type image: motey.models.image.Image
+        :return: True if at least one instance of the image exists, otherwise False
+        """
+        plugin = self.get_plugin(image)
+        return plugin.has_image_instances(image_name=image.name) if plugin else False
+
     def get_instance_state(self, image):
-        state = ImageState.ERROR
-        for plugin in self.plugin_manager.getAllPlugins():
-            if image.engine and not plugin.plugin_object.get_plugin_type() == image.engine:
-                continue
-            state = plugin.plugin_object.get_image_instance_state()
-        return state
+        """
+        Returns the state of an image instance.
+
+        :param image: the image instance
+        :type image: motey.models.image.Image
+        :return: the ``ImageState`` of the instance or ``ImageState.ERROR`` if something went wrong
+        """
+        plugin = self.get_plugin(image)
+        if not plugin:
+            return ImageState.ERROR
+
+        state = plugin.get_image_instance_state(image.id)
+        return state if state is not None else ImageState.ERROR
+
+    def get_running_instances(self, images):
+        """
+        Returns the ids of the running instances of the plugins which are related to the images.
+        Every plugin is asked only once, independent of the number of images.
+
+        :param images: the images whose plugins should be asked
+        :type images: list
+        :return: a set with the ids of all running instances
+        """
+        plugins = []
+        for image in images:
+            plugin = self.get_plugin(image)
+            if plugin and plugin not in plugins:
+                plugins.append(plugin)
+
+        running_instances = set()
+        for plugin in plugins:
+            running_instances.update(plugin.get_all_running_instances())
+        return running_instances
 
     def terminate(self, image):
         """
         Terminate a running instance.
 
-        :param instance_name: the name of the instance
-        :type instance_name: str
+        :param image: the image instance to be terminated
+        :type image: motey.models.image.Image
         """
-        for plugin in self.plugin_manager.getAllPlugins():
-            if image.engine and not plugin.plugin_object.get_plugin_type() == image.engine:
-                continue
-
-            plugin.plugin_object.stop_instance(image.id)
+        plugin = self.get_plugin(image)
+        if plugin:
+            plugin.stop_instance(image.id)
 
     def close(self):
         """
         Will clean up the VALManager.
-        At first it will remove the capability from the capability engine and afterwards all the ``deactivate`` method
-        for each plugin will be executed.
+        At first the warm pool will be closed and all pre-created instances will be removed.
+        Afterwards it will remove the capabilities from the capability engine and the ``deactivate`` method for each
+        loaded plugin will be executed.
         """
 
-        for plugin in self.plugin_manager.getAllPlugins():
-            self.capability_repository.remove(capability=plugin.plugin_object.get_plugin_type())
-            plugin.plugin_object.deactivate()
+        if self.warm_pool:
+            self.warm_pool.close()
+        for engine in self.engines:
+            self.capability_repository.remove(capability=engine)
+        for plugin in self.plugins.values():
+            plugin.deactivate()
@@ -0,0 +1,203 @@
+import json
+import queue
+import threading
+from collections import deque
+from time import sleep, time
+
+
+class WarmPool(object):
+    """
+    Keeps pre-created, but not started, instances for images to avoid the cold start of an instance.
+    A pool is related to an image with a specific set of execution parameters. If an image with the same parameters
+    should be instantiated, a pre-created instance will be handed out and the pool will be refilled in the background.
+    Pools of images which are not used for a configurable time will be evicted. Pools which are configured in the
+    ``config.ini`` will never be evicted.
+    """
+
+    def __init__(self, logger, max_size=10, max_total=20, idle_timeout=600):
+        """
+        Constructor of the WarmPool.
+
+        :param logger: DI injected
+        :type logger: motey.utils.logger.Logger
+        :param max_size: the maximum number of pre-created instances for a single image. Default is ``10``.
+        :param max_total: the maximum number of pre-created instances for all images. Default is ``20``.
+        :param idle_timeout: the time in seconds after a pool which was not used will be evicted. Default is ``600``.
+        """
+        self.logger = logger
+        self.max_size = max_size
+        self.max_total = max_total
+        self.idle_timeout = idle_timeout
+        self.pools = {}
+        self.lock = threading.Lock()
+        self.refill_queue = queue.Queue()
+        self.stopped = False
+
+        self.refill_thread = threading.Thread(target=self.__run_refill_thread, args=())
+        self.refill_thread.daemon = True
+
+        self.eviction_thread = threading.Thread(target=self.__run_eviction_thread, args=())
+        self.eviction_thread.daemon = True
+
+    def start(self):
+        """
+        Starts the refill and the eviction thread.
+        """
+        self.refill_thread.start()
+        self.eviction_thread.start()
+
+    def close(self):
+        """
+        Stops the background threads and removes all pre-created instances.
+        """
+        self.stopped = True
+        self.refill_queue.put(None)
+        with self.lock:
+            pools = list(self.pools.values())
+            self.pools = {}
+        for pool in pools:
+            self.__remove_instances(pool, list(pool['instances']))
+
+    def get_key(self, image):
+        """
+        Returns the key of the pool which is related to an image.
+
+        :param image: the image
+        :type image: motey.models.image.Image
+        :return: the key of the pool
+        """
+        return image.engine, image.name, json.dumps(image.parameters, sort_keys=True)
+
+    def is_poolable(self, image):
+        """
+        Checks if instances of an image can be pre-created.
+        Images with a fixed instance name can not be pooled, because the names of the instances would collide.
+
+        :param image: the image
+        :type image: motey.models.image.Image
+        :return: True if the image can be pooled, otherwise False
+        """
+        return 'name' not in image.parameters
+
+    def register(self, plugin, image, size, permanent=False):
+        """
+        Registers a pool for an image and fills them in the background.
+        If the pool already exists, the size will be increased if necessary.
+
+        :param plugin: the VAL plugin which should be used to create the instances
+        :type plugin: motey.val.plugins.abstractVAL.AbstractVAL
+        :param image: the image to be pooled
+        :type image: motey.models.image.Image
+        :param size: the number of pre-created instances. Will be limited to ``max_size``.
+        :param permanent: if True the pool will never be evicted. Default is False.
+        """
+        if size <= 0 or not self.is_poolable(image):
+            return
+
+        key = self.get_key(image)
+        with self.lock:
+            pool = self.pools.get(key)
+            if not pool:
+                pool = {
+                    'plugin': plugin,
+                    'image': image,
+                    'size': 0,
+                    'permanent': permanent,
+                    'last_used': time(),
+                    'instances': deque()
+                }
+                self.pools[key] = pool
+            pool['size'] = min(max(pool['size'], size), self.max_size)
+            pool['permanent'] = pool['permanent'] or permanent
+        self.refill_queue.put(key)
+
+    def acquire(self, image):
+        """
+        Hands out a pre-created instance of an image and refills the pool in the background.
+
+        :param image: the image to be instantiated
+        :type image: motey.models.image.Image
+        :return: the id of a pre-created instance or None if no instance is available
+        """
+        key = self.get_key(image)
+        with self.lock:
+            pool = self.pools.get(key)
+            if not pool:
+                return None
+            pool['last_used'] = time()
+            instance_id = pool['instances'].popleft() if pool['instances'] else None
+        self.refill_queue.put(key)
+        return instance_id
+
+    def refill(self, key):
+        """
+        Creates instances until the pool is filled or the total limit of pre-created instances is reached.
+
+        :param key: the key of the pool
+        """
+        while not self.stopped:
+            with self.lock:
+                pool = self.pools.get(key)
+                total = sum(len(entry['instances']) for entry in self.pools.values())
+                if not pool or len(pool['instances']) >= pool['size'] or total >= self.max_total:
+                    return
+            image = pool['image']
+            instance_id = pool['plugin'].create_instance(image.name, parameters=image.parameters)
+            if not instance_id:
+                self.logger.error('warm pool > could not create instance of image `%s`' % image.name)
+                return
+            with self.lock:
+                if self.pools.get(key) is pool:
+                    pool['instances'].append(instance_id)
+                    continue
+            # pool was evicted or closed in the meantime
+            pool['plugin'].remove_instance(instance_id)
+            return
+
+    def evict_idle(self):
+        """
+        Evicts all pools which are not permanent and were not used within the ``idle_timeout``.
+        """
+        now = time()
+        evicted_pools = []
+        with self.lock:
+            for key, pool in list(self.pools.items()):
+                if not pool['permanent'] and now - pool['last_used'] > self.idle_timeout:
+                    evicted_pools.append(self.pools.pop(key))
+
+        for pool in evicted_pools:
+            self.logger.info('warm pool > evict idle pool of image `%s`' % pool['image'].name)
+            self.__remove_instances(pool, list(pool['instances']))
+
+    def __remove_instances(self, pool, instance_ids):
+        """
+        Removes pre-created instances of a pool.
+
+        :param pool: the pool of the instances
+        :param instance_ids: the ids of the instances to be removed
+        """
+        for instance_id in instance_ids:
+            pool['plugin'].remove_instance(instance_id)
+
+    def __run_refill_thread(self):
+        """
+        Private function which is be executed after the start method is called.
+        The method will wait for pools which should be refilled.
+        """
+        while not self.stopped:
+            key = self.refill_queue.get()
+            if key is None:
+                break
+            try:
+                self.refill(key)
+            except Exception as exception:
+                self.logger.error('warm pool > refill failed: %s' % exception)
+
+    def __run_eviction_thread(self):
+        """
+        Private function which is be executed after the start method is called.
+        The method evicts idle pools periodically.
+        """
+        while not self.stopped:
+            sleep(max(self.idle_timeout / 10, 1))
+            self.evict_idle()
@@ -0,0 +1,113 @@
+"""
+Stand-ins for the external systems of a node, so that the benchmarks can boot real Motey components without a MQTT
+broker. Docker is replaced by the ``SimulatedVAL`` plugin.
+"""
+import queue
+import threading
+
+import paho.mqtt.client as mqtt
+
+
+class LocalBroker(object):
+    """
+    In-process MQTT broker. Published messages are delivered from a single thread to all matching subscriptions, like
+    a broker delivers them from the network thread of the paho client.
+    """
+
+    def __init__(self):
+        self.clients = []
+        self.queue = queue.Queue()
+        self.delivered = 0
+        self.delivery_thread = threading.Thread(target=self.__run_delivery_thread, args=())
+        self.delivery_thread.daemon = True
+        self.delivery_thread.start()
+
+    def create_client(self, client_id='', clean_session=True, *args, **kwargs):
+        """
+        Factory with the signature of ``paho.mqtt.client.Client``.
+        """
+        client = LocalMQTTClient(self, client_id=client_id)
+        self.clients.append(client)
+        return client
+
+    def publish(self, topic, payload, qos):
+        self.queue.put((topic, payload, qos))
+
+    def join(self):
+        """
+        Blocks until all published messages are delivered.
+        """
+        self.queue.join()
+
+    def __run_delivery_thread(self):
+        while True:
+            topic, payload, qos = self.queue.get()
+            for client in list(self.clients):
+                client.deliver(topic, payload, qos)
+            self.queue.task_done()
+
+
+class LocalMQTTClient(object):
+    """
+    The part of the ``paho.mqtt.client.Client`` interface which is used by ``motey.communication.mqttserver``.
+    """
+
+    def __init__(self, broker, client_id=''):
+        self.broker = broker
+        self.client_id = client_id
+        self.subscriptions = set()
+        self.callbacks = []
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+        self.disconnected = threading.Event()
+
+    def max_inflight_messages_set(self, inflight):
+        pass
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def message_callback_add(self, sub, callback):
+        self.callbacks.append((sub, callback))
+
+    def subscribe(self, topic, qos=0):
+        self.subscriptions.add(topic)
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        self.broker.publish(topic, payload, qos)
+
+    def connect(self, host, port=1883, keepalive=60):
+        if self.on_connect:
+            self.on_connect(self, None, {'session present': 0}, 0)
+
+    def loop_forever(self):
+        self.disconnected.wait()
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        self.disconnected.set()
+
+    def disconnect(self):
+        self.disconnected.set()
+        if self.on_disconnect:
+            self.on_disconnect(self, None, 0)
+
+    def deliver(self, topic, payload, qos):
+        if not any(mqtt.topic_matches_sub(subscription, topic) for subscription in self.subscriptions):
+            return
+        message = mqtt.MQTTMessage(topic=topic.encode('utf-8'))
+        message.payload = payload
+        message.qos = qos
+        handled = False
+        for sub, callback in self.callbacks:
+            if mqtt.topic_matches_sub(sub, topic):
+                callback(self, None, message)
+                handled = True
+        if not handled and self.on_message:
+            self.on_message(self, None, message)
+        self.broker.delivered += 1
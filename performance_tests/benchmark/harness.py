@@ -0,0 +1,165 @@
+"""
+Measuring, storing and comparing benchmark results.
+"""
+import json
+import platform
+import subprocess
+import sys
+import threading
+from datetime import datetime
+from time import perf_counter
+
+# metrics which get worse if they increase, all other metrics get worse if they decrease
+LOWER_IS_BETTER = ('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'memory_bytes_per_image')
+
+
+def percentile(values, percent):
+    """
+    Returns the percentile of the values with the nearest rank method.
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, duration, errors=0):
+    """
+    Summarizes the latencies of the operations of a benchmark.
+
+    :param latencies: list with the latency of every operation in seconds
+    :param duration: the wall clock time of the benchmark in seconds
+    :param errors: the number of failed operations
+    :return: dict with the number of operations, the throughput and the latency percentiles in milliseconds
+    """
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return {
+        'operations': len(latencies),
+        'errors': errors,
+        'ops_per_sec': round(len(latencies) / duration, 2) if duration > 0 else 0,
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 4) if latencies_ms else 0,
+        'p50_ms': round(percentile(latencies_ms, 50), 4),
+        'p95_ms': round(percentile(latencies_ms, 95), 4),
+        'p99_ms': round(percentile(latencies_ms, 99), 4)
+    }
+
+
+def measure(operation, iterations, warmup=0, concurrency=1):
+    """
+    Executes an operation several times and measures the latency of every call.
+
+    :param operation: function which is called with the number of the iteration
+    :param iterations: the number of measured calls
+    :param warmup: the number of calls before the measurement starts
+    :param concurrency: the number of threads which execute the calls
+    :return: the summary of the measurement, see ``summarize``
+    """
+    for iteration in range(warmup):
+        operation(iteration)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def __worker(iterations_of_worker):
+        worker_latencies = []
+        worker_errors = 0
+        for iteration in iterations_of_worker:
+            start = perf_counter()
+            try:
+                operation(iteration)
+            except Exception:
+                worker_errors += 1
+                continue
+            worker_latencies.append(perf_counter() - start)
+        with lock:
+            latencies.extend(worker_latencies)
+            errors.append(worker_errors)
+
+    workers = [threading.Thread(target=__worker, args=(range(warmup + index, warmup + iterations, concurrency),))
+               for index in range(concurrency)]
+    start = perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return summarize(latencies, perf_counter() - start, sum(errors))
+
+
+def get_environment():
+    """
+    :return: dict with the information about the machine and the revision which are stored with the results
+    """
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                           stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'revision': revision,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine()
+    }
+
+
+def save(results, path):
+    """
+    Stores the results as JSON file.
+    """
+    with open(path, 'w') as result_file:
+        json.dump(results, result_file, indent=2, sort_keys=True)
+        result_file.write('\n')
+
+
+def load(path):
+    """
+    Loads results from a JSON file.
+    """
+    with open(path) as result_file:
+        return json.load(result_file)
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Compares the results of the benchmarks with a baseline.
+
+    :param results: the current results
+    :param baseline: the results of the baseline
+    :param tolerance: the relative change which is accepted, e.g. ``0.1`` for 10%
+    :return: list of tuples with the benchmark, the metric, the baseline value, the current value and the relative
+             change of all metrics which got worse by more than the tolerance
+    """
+    regressions = []
+    for name, current in sorted(results['benchmarks'].items()):
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        for metric in ('ops_per_sec',) + LOWER_IS_BETTER:
+            if not previous.get(metric) or metric not in current:
+                continue
+            change = (current[metric] - previous[metric]) / previous[metric]
+            if metric not in LOWER_IS_BETTER:
+                change = -change
+            if change > tolerance:
+                regressions.append((name, metric, previous[metric], current[metric], change))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    """
+    Prints a table with the results and the change compared to the baseline.
+    """
+    print('%-28s %9s %6s %12s %10s %10s %10s' % ('benchmark', 'ops', 'errors', 'ops/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for name, result in sorted(results['benchmarks'].items()):
+        line = '%-28s %9s %6s %12.1f %10.3f %10.3f %10.3f' % (
+            name, result['operations'], result['errors'], result['ops_per_sec'], result['p50_ms'], result['p95_ms'],
+            result['p99_ms'])
+        previous = baseline.get('benchmarks', {}).get(name) if baseline else None
+        if previous and previous.get('ops_per_sec') and previous.get('p95_ms'):
+            line += '   ops/s %+6.1f%%  p95 %+6.1f%%' % (
+                (result['ops_per_sec'] / previous['ops_per_sec'] - 1) * 100,
+                (result['p95_ms'] / previous['p95_ms'] - 1) * 100)
+        print(line)
@@ -0,0 +1,153 @@
+"""
+Boots the components of a Motey node in-process.
+
+The node uses the real repositories, the real ZeroMQ server and the real webserver on local ports. Docker is replaced
+by the ``SimulatedVAL`` and the MQTT broker by the ``LocalBroker``.
+"""
+import os
+import socket
+from time import sleep
+
+import dependency_injector.providers as providers
+import logbook
+import requests
+from yapsy.PluginManager import PluginManager
+
+from motey.capabilityengine.capability_engine import CapabilityEngine
+from motey.communication import mqttserver
+from motey.communication.apiserver import APIServer
+from motey.communication.communication_manager import CommunicationManager
+from motey.communication.event_broadcaster import EventBroadcaster
+from motey.communication.mqttserver import MQTTServer
+from motey.communication.node_announcer import NodeAnnouncer
+from motey.communication.zeromq_server import ZeroMQServer
+from motey.configuration.configreader import config
+from motey.orchestrator.inter_node_orchestrator import InterNodeOrchestrator
+from motey.repositories.capability_repository import CapabilityRepository
+from motey.repositories.job_repository import JobRepository
+from motey.repositories.nodes_repository import NodesRepository
+from motey.repositories.service_repository import ServiceRepository
+from motey.utils import tracing
+from motey.utils.node_identity import NodeIdentity
+from motey.val.plugins.simulatedVAL import SimulatedVAL
+from motey.val.valmanager import VALManager
+from performance_tests.benchmark.fakes import LocalBroker
+
+ZEROMQ_PORTS = ('capabilities_replier', 'deploy_image_replier', 'image_status_replier', 'image_terminate_replier',
+                'prepull_image_replier')
+
+
+def get_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+class LocalNode(object):
+    """
+    A node with the ip ``127.0.0.1`` which stores its databases in ``directory``.
+    Only one node can be booted per process, because the components read the shared configuration.
+    """
+
+    def __init__(self, directory, val_latency=0.0, batch_window=0.0, tracing_exporter='ring'):
+        """
+        :param directory: the folder for the databases and the ipc socket
+        :param val_latency: the time in seconds pulling an image, starting and stopping an instance take in the
+                            ``SimulatedVAL``
+        :param batch_window: the batch window of the capability engine
+        :param tracing_exporter: the exporter of the tracer, see ``motey.utils.tracing.configure``
+        """
+        config['DATABASE']['path'] = directory
+        config['ZEROMQ']['capability_engine_ipc_path'] = os.path.join(directory, 'capability_engine.ipc')
+        for name in ZEROMQ_PORTS:
+            config['ZEROMQ'][name] = str(get_free_port())
+        self.api_port = get_free_port()
+        self.api_url = 'http://127.0.0.1:%s' % self.api_port
+
+        self.logger = logbook.Logger('benchmark')
+        self.node_identity = NodeIdentity(logger=self.logger, advertise_address='127.0.0.1')
+        tracing.configure(logger=self.logger, exporter=tracing_exporter, node_identity=self.node_identity)
+        self.capability_repository = CapabilityRepository()
+        self.nodes_repository = NodesRepository()
+        self.service_repository = ServiceRepository()
+        self.job_repository = JobRepository()
+
+        self.val = SimulatedVAL(settings={'pull_latency': val_latency,
+                                          'start_latency': val_latency,
+                                          'stop_latency': val_latency,
+                                          'seed': '0'})
+        self.val.logger = self.logger
+        self.valmanager = VALManager(logger=self.logger,
+                                     capability_repository=self.capability_repository,
+                                     plugin_manager=PluginManager(),
+                                     default_engine=self.val.get_plugin_type())
+        self.valmanager.plugins[self.val.get_plugin_type()] = self.val
+        self.valmanager.engines.append(self.val.get_plugin_type())
+
+        self.broker = LocalBroker()
+        original_client = mqttserver.mqtt.Client
+        mqttserver.mqtt.Client = self.broker.create_client
+        try:
+            self.mqtt_server = MQTTServer(logger=self.logger,
+                                          nodes_repository=self.nodes_repository,
+                                          node_identity=self.node_identity,
+                                          client_id='benchmark')
+        finally:
+            mqttserver.mqtt.Client = original_client
+        self.zeromq_server = ZeroMQServer(logger=self.logger,
+                                          valmanager=self.valmanager,
+                                          capability_repository=self.capability_repository)
+        self.event_broadcaster = EventBroadcaster(logger=self.logger,
+                                                  service_repository=self.service_repository,
+                                                  nodes_repository=self.nodes_repository,
+                                                  capability_repository=self.capability_repository)
+        self.api_server = APIServer(logger=self.logger,
+                                    event_broadcaster=self.event_broadcaster,
+                                    tracer=tracing.tracer,
+                                    host='127.0.0.1',
+                                    port=self.api_port)
+        self.communication_manager = CommunicationManager(api_server=self.api_server,
+                                                          mqtt_server=self.mqtt_server,
+                                                          zeromq_server=self.zeromq_server,
+                                                          nodes_repository=self.nodes_repository,
+                                                          node_announcer=NodeAnnouncer(),
+                                                          node_identity=self.node_identity)
+        self.capability_engine = CapabilityEngine(logger=self.logger,
+                                                  capability_repository=self.capability_repository,
+                                                  communication_manager=self.communication_manager,
+                                                  batch_window=batch_window)
+        self.orchestrator = InterNodeOrchestrator(logger=self.logger,
+                                                  valmanager=self.valmanager,
+                                                  service_repository=self.service_repository,
+                                                  capability_repository=self.capability_repository,
+                                                  node_repository=self.nodes_repository,
+                                                  communication_manager=self.communication_manager,
+                                                  job_repository=self.job_repository,
+                                                  node_identity=self.node_identity)
+
+    def start(self, timeout=10):
+        """
+        Starts the communication components and the capability engine and waits until the webserver answers.
+        The API endpoints use the repositories of this node instead of the ones of the DI container.
+        """
+        from motey.di.app_module import DIRepositories
+        DIRepositories.capability_repository.override(providers.Object(self.capability_repository))
+        DIRepositories.nodes_repository.override(providers.Object(self.nodes_repository))
+        DIRepositories.service_repository.override(providers.Object(self.service_repository))
+        DIRepositories.job_repository.override(providers.Object(self.job_repository))
+
+        self.communication_manager.start()
+        self.capability_engine.start()
+        self.nodes_repository.add(self.node_identity.get_ip())
+
+        for _ in range(int(timeout / .05)):
+            try:
+                requests.get('%s/v1/nodes' % self.api_url, timeout=1)
+                return
+            except requests.ConnectionError:
+                sleep(.05)
+        raise RuntimeError('webserver of the benchmark node did not start')
+
+    def stop(self):
+        self.capability_engine.stop()
+        self.communication_manager.stop()
@@ -0,0 +1,72 @@
+"""
+Runs the benchmarks against a node which is booted in-process with a simulated VAL and a local MQTT broker.
+
+The results are printed as a table and can be stored as JSON file. If a baseline is given, every benchmark is compared
+with it and the script exits with code 1 if the throughput or a latency percentile got worse by more than the
+tolerance. Run it from the root folder of the repository:
+
+    $ python3 performance_tests/benchmark/run.py --save results.json
+    $ python3 performance_tests/benchmark/run.py --baseline results.json --tolerance 0.2
+    $ python3 performance_tests/benchmark/run.py --only rpc api --concurrency 4
+    $ python3 performance_tests/benchmark/run.py --only models --images 100000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+import logbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from performance_tests.benchmark import harness  # noqa: E402
+from performance_tests.benchmark.node import LocalNode  # noqa: E402
+from performance_tests.benchmark.scenarios import BENCHMARKS  # noqa: E402
+
+
+def run(args):
+    results = {'environment': harness.get_environment(), 'arguments': vars(args).copy(), 'benchmarks': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        node = LocalNode(directory, val_latency=args.val_latency, batch_window=args.batch_window,
+                         tracing_exporter=args.tracing)
+        node.start()
+        try:
+            for name, benchmark in BENCHMARKS:
+                if not args.only or name in args.only:
+                    results['benchmarks'].update(benchmark(node, args))
+        finally:
+            node.stop()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs the Motey benchmarks against an in-process node.')
+    parser.add_argument('--iterations', type=int, default=1000, help='number of measured operations per benchmark')
+    parser.add_argument('--warmup', type=int, default=50, help='number of operations before the measurement')
+    parser.add_argument('--concurrency', type=int, default=1, help='number of clients of the API benchmarks')
+    parser.add_argument('--only', nargs='+', choices=[name for name, _ in BENCHMARKS], help='benchmarks to run')
+    parser.add_argument('--val-latency', type=float, default=0.0, help='duration of a simulated image pull, instance start and stop in seconds')
+    parser.add_argument('--batch-window', type=float, default=0.0, help='batch window of the capability engine')
+    parser.add_argument('--tracing', default='ring', choices=['none', 'ring'], help='exporter of the tracer')
+    parser.add_argument('--timeout', type=float, default=60, help='maximum time in seconds to wait for events')
+    parser.add_argument('--images', type=int, default=100000, help='number of image models of the models benchmark')
+    parser.add_argument('--save', help='path of the JSON file the results will be stored in')
+    parser.add_argument('--baseline', help='path of a JSON file with results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='accepted relative regression, e.g. 0.1')
+    args = parser.parse_args()
+
+    logbook.NullHandler().push_application()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    results = run(args)
+    baseline = harness.load(args.baseline) if args.baseline else None
+    harness.print_results(results, baseline)
+    if args.save:
+        harness.save(results, args.save)
+
+    if baseline:
+        regressions = harness.compare(results, baseline, args.tolerance)
+        for name, metric, previous, current, change in regressions:
+            print('regression: %s %s %s -> %s (%+.1f%%)' % (name, metric, previous, current, change * 100))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,181 @@
+"""
+The benchmarks. Every benchmark takes the booted ``LocalNode`` and the parsed arguments and returns a dict with the
+summaries of its measurements, see ``harness.summarize``.
+"""
+import json
+import threading
+import tracemalloc
+import uuid
+from time import perf_counter, sleep
+
+import requests
+import zmq
+
+from motey.configuration.configreader import config
+from motey.models import model
+from motey.models.image import Image
+from motey.models.service import Service
+from performance_tests.benchmark.harness import measure, summarize
+
+
+def create_service(node, capabilities=None):
+    image = Image(name='alpine', engine=node.val.get_plugin_type(), parameters={},
+                  capabilities=capabilities if capabilities is not None else ['benchmark'])
+    return Service(service_name='benchmark', images=[image], id=uuid.uuid4().hex)
+
+
+def repository_benchmark(node, args):
+    """
+    Measures the operations of the repositories which are executed for every service and node.
+    """
+    services = [dict(create_service(node)) for _ in range(args.iterations)]
+    service_repository = node.service_repository
+    nodes_repository = node.nodes_repository
+
+    def __update(iteration):
+        services[iteration]['state_message'] = 'updated'
+        service_repository.update(services[iteration])
+
+    return {
+        'repository.service_add': measure(lambda iteration: service_repository.add(services[iteration]),
+                                          args.iterations),
+        'repository.service_has': measure(lambda iteration: service_repository.has(services[iteration]['id']),
+                                          args.iterations),
+        'repository.service_update': measure(__update, args.iterations),
+        'repository.nodes_add': measure(lambda iteration: nodes_repository.add('10.1.%s.%s' % (
+            iteration // 256 % 256, iteration % 256)), args.iterations)
+    }
+
+
+def deploy_benchmark(node, args):
+    """
+    Measures the placement and the deployment of services with a single image via the ZeroMQ request to the node.
+    """
+    node.capability_repository.add(capability='benchmark', capability_type='benchmark')
+    services = [create_service(node) for _ in range(args.iterations + args.warmup)]
+
+    def __deploy(iteration):
+        service = services[iteration]
+        node.service_repository.add(dict(service))
+        for image in service.images:
+            image.node = node.orchestrator.place_image(image)
+        node.orchestrator.deploy_service(service)
+        if not service.images[0].id:
+            raise RuntimeError('image was not deployed')
+
+    return {'deploy.service': measure(__deploy, args.iterations, warmup=args.warmup)}
+
+
+def rpc_benchmark(node, args):
+    """
+    Measures the latency of the ZeroMQ requests between the nodes.
+    """
+    image = Image(name='alpine', engine=node.val.get_plugin_type(), node=node.node_identity.get_ip())
+    image.id = node.communication_manager.deploy_image(image)
+
+    return {
+        'rpc.image_status': measure(lambda iteration: node.communication_manager.request_image_status(image),
+                                    args.iterations, warmup=args.warmup),
+        'rpc.capabilities': measure(lambda iteration: node.communication_manager.request_capabilities(
+            node.node_identity.get_ip()), args.iterations, warmup=args.warmup)
+    }
+
+
+def capability_events_benchmark(node, args):
+    """
+    Measures the time from publishing a capability event to the capability engine until the resulting delta was
+    received via MQTT.
+    """
+    sent_at = {}
+    latencies = []
+    completed = threading.Event()
+    lock = threading.Lock()
+
+    def __handle_delta(delta):
+        received_at = perf_counter()
+        with lock:
+            for entry in delta.get('added', []):
+                if entry['capability'] in sent_at:
+                    latencies.append(received_at - sent_at.pop(entry['capability']))
+            if len(latencies) >= args.iterations:
+                completed.set()
+
+    subscription = node.mqtt_server.capabilities_delta_stream.subscribe(__handle_delta)
+    context = zmq.Context()
+    publisher = context.socket(zmq.PUB)
+    publisher.connect('ipc://%s' % config['ZEROMQ']['capability_engine_ipc_path'])
+    # the subscriber drops all messages which are sent before the connection is established
+    sleep(.5)
+
+    start = perf_counter()
+    for iteration in range(args.iterations):
+        capability = 'event-%s' % iteration
+        with lock:
+            sent_at[capability] = perf_counter()
+        event = [{'capability': capability, 'capability_type': 'benchmark'}]
+        publisher.send_string('add_capability#%s' % json.dumps(event))
+    completed.wait(args.timeout)
+    duration = perf_counter() - start
+
+    subscription.dispose()
+    publisher.close()
+    return {'capability_events.ingest': summarize(latencies, duration, errors=args.iterations - len(latencies))}
+
+
+def api_benchmark(node, args):
+    """
+    Measures the REST API with ``concurrency`` clients.
+    """
+    sessions = threading.local()
+
+    def __get(path):
+        def __request(iteration):
+            if not hasattr(sessions, 'session'):
+                sessions.session = requests.Session()
+            response = sessions.session.get('%s%s' % (node.api_url, path), timeout=args.timeout)
+            response.raise_for_status()
+        return __request
+
+    return {
+        'api.capabilities': measure(__get('/v1/capabilities'), args.iterations, warmup=args.warmup,
+                                    concurrency=args.concurrency),
+        'api.nodes': measure(__get('/v1/nodes'), args.iterations, warmup=args.warmup, concurrency=args.concurrency)
+    }
+
+
+def model_benchmark(node, args):
+    """
+    Measures the memory and the codecs of ``images`` image models. ``to_bytes`` uses MessagePack if ``msgpack`` is
+    installed, otherwise compact JSON.
+    """
+    dicts = [{'id': 'instance-%s' % index, 'name': 'alpine', 'engine': 'docker', 'node': '192.168.0.%s' % (index % 250)}
+             for index in range(args.images)]
+    # the memory is measured separately, so the latencies of the measurement are not counted
+    tracemalloc.start()
+    allocated_before = tracemalloc.get_traced_memory()[0]
+    images = [Image.from_dict(data) for data in dicts]
+    allocated = tracemalloc.get_traced_memory()[0] - allocated_before
+    tracemalloc.stop()
+
+    from_dict = measure(lambda iteration: Image.from_dict(dicts[iteration]), args.images)
+    from_dict['memory_bytes_per_image'] = round(allocated / args.images, 1)
+
+    encoded = [image.to_bytes() for image in images]
+    to_bytes = measure(lambda iteration: images[iteration].to_bytes(), args.images)
+    to_bytes['codec'] = 'msgpack' if model.msgpack else 'json'
+    return {
+        'models.from_dict': from_dict,
+        'models.to_dict': measure(lambda iteration: images[iteration].to_dict(), args.images),
+        'models.to_bytes': to_bytes,
+        'models.from_bytes': measure(lambda iteration: Image.from_bytes(encoded[iteration]), args.images)
+    }
+
+
+BENCHMARKS = [
+    ('repository', repository_benchmark),
+    ('deploy', deploy_benchmark),
+    ('rpc', rpc_benchmark),
+    ('capability_events', capability_events_benchmark),
+    ('api', api_benchmark),
+    ('models', model_benchmark)
+]
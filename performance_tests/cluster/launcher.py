@@ -0,0 +1,248 @@
+"""
+Launches a cluster of Motey nodes on a single Linux host and optionally measures the placement and deployment of
+services.
+
+Every node is a separate ``main.py`` process with its own loopback address (``127.0.10.1``, ``127.0.10.2``, ...), so
+all nodes can use the default ports. The configuration of a node is written to ``<directory>/<address>/config.ini``
+and passed via the ``MOTEY_CONFIG`` environment variable. The nodes use the ``simulated`` VAL plugin instead of
+Docker and find each other via the first node as membership seed. A MQTT broker is optional.
+Every node gets one of ``--zones`` capabilities, e.g. ``zone-0``. The services require a random zone, so most of them
+are placed on another node than the one they were posted to.
+Run it from the root folder of the repository:
+
+    $ python3 performance_tests/cluster/launcher.py --nodes 30 --services 500 --start-latency 0.5
+    $ python3 performance_tests/cluster/launcher.py --nodes 10 --keep-running
+"""
+import argparse
+import configparser
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+from time import perf_counter, sleep
+
+import requests
+import zmq
+
+root_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, root_folder)
+
+from performance_tests.benchmark import harness  # noqa: E402
+
+
+class ClusterNode(object):
+    """
+    A Motey process with its own address, configuration and databases.
+    """
+
+    def __init__(self, address, directory, seed, args):
+        self.address = address
+        self.directory = os.path.join(directory, address)
+        self.api_url = 'http://%s:%s' % (address, args.api_port)
+        self.ipc_path = os.path.join(self.directory, 'capability_engine.ipc')
+        self.config_path = os.path.join(self.directory, 'config.ini')
+        self.process = None
+        os.makedirs(self.directory, exist_ok=True)
+        self.write_config(seed, args)
+
+    def write_config(self, seed, args):
+        overrides = configparser.ConfigParser()
+        overrides.read_dict({
+            'NODE': {'advertise_address': self.address, 'bind_address': self.address},
+            'LOGGER': {'log_path': self.directory + os.sep},
+            'WEBSERVER': {'ip': self.address, 'port': str(args.api_port)},
+            'MQTT': {'ip': args.mqtt_host, 'port': str(args.mqtt_port)},
+            'DATABASE': {'path': os.path.join(self.directory, 'databases')},
+            'ZEROMQ': {'capability_engine_ipc_path': self.ipc_path},
+            'MEMBERSHIP': {'seeds': seed if seed != self.address else ''},
+            'TRACING': {'file_path': os.path.join(self.directory, 'traces.jsonl')},
+            'VAL': {'default_engine': 'simulated', 'excluded_engines': ''},
+            'WARMPOOL': {'engine': 'simulated'},
+            'SIMULATEDVAL': {
+                'pull_latency': str(args.pull_latency),
+                'start_latency': str(args.start_latency),
+                'stop_latency': str(args.stop_latency),
+                'failure_rate': str(args.failure_rate),
+                'max_instances': str(args.max_instances)
+            }
+        })
+        with open(self.config_path, 'w') as config_file:
+            overrides.write(config_file)
+
+    def start(self):
+        environment = dict(os.environ, MOTEY_CONFIG=self.config_path)
+        with open(os.path.join(self.directory, 'stdout.log'), 'w') as output:
+            self.process = subprocess.Popen([sys.executable, 'main.py'], cwd=root_folder, env=environment,
+                                            stdout=output, stderr=subprocess.STDOUT)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.send_signal(signal.SIGINT)
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def get(self, path, timeout=5):
+        return requests.get('%s%s' % (self.api_url, path), timeout=timeout)
+
+    def is_up(self):
+        try:
+            self.get('/v1/nodes', timeout=1)
+            return True
+        except requests.RequestException:
+            return False
+
+    def add_capability(self, context, capability):
+        publisher = context.socket(zmq.PUB)
+        publisher.connect('ipc://%s' % self.ipc_path)
+        # the subscriber drops all messages which are sent before the connection is established
+        sleep(.2)
+        publisher.send_string('add_capability#%s' % json.dumps([{'capability': capability,
+                                                                 'capability_type': 'zone'}]))
+        publisher.close(linger=1000)
+
+
+def wait_until(condition, timeout, interval=.2):
+    start = perf_counter()
+    while perf_counter() - start < timeout:
+        if condition():
+            return perf_counter() - start
+        sleep(interval)
+    return None
+
+
+def has_capability(node, capability):
+    try:
+        return any(entry['capability'] == capability for entry in node.get('/v1/capabilities').json())
+    except (requests.RequestException, ValueError):
+        return False
+
+
+def count_known_nodes(node):
+    try:
+        return len(node.get('/v1/nodes?fields=ip').json())
+    except (requests.RequestException, ValueError):
+        return 0
+
+
+def deploy_services(nodes, args, random_generator):
+    """
+    Posts the services round-robin to the nodes and polls them until every service is deployed or failed.
+
+    :return: the summary of the deployments, the latency is the time until the deployment was seen by polling and
+             the services which are still pending after the timeout are counted as errors
+    """
+    posted = {}
+    for index in range(args.services):
+        node = nodes[index % len(nodes)]
+        blueprint = {
+            'service_name': 'load-%s' % index,
+            'images': [{'name': 'alpine', 'engine': 'simulated',
+                        'capabilities': ['zone-%s' % random_generator.randrange(args.zones)]}]
+        }
+        response = requests.post('%s/v1/service' % node.api_url, data=json.dumps(blueprint),
+                                 headers={'Content-Type': 'application/x-yaml'}, timeout=args.timeout)
+        for service_id in response.json() if response.status_code == 201 else []:
+            posted[service_id] = (node, perf_counter())
+
+    start = min((posted_at for _, posted_at in posted.values()), default=perf_counter())
+    latencies = []
+    failed = 0
+    finished_at = start
+    pending = dict(posted)
+    while pending and perf_counter() - start < args.timeout:
+        for node in nodes:
+            try:
+                services = node.get('/v1/service?fields=id,state,images').json()
+            except (requests.RequestException, ValueError):
+                continue
+            for service in services:
+                if service['id'] not in pending or pending[service['id']][0] is not node:
+                    continue
+                if service['state'] == 5:
+                    failed += 1
+                elif all(image.get('id') for image in service['images']):
+                    latencies.append(perf_counter() - pending[service['id']][1])
+                else:
+                    continue
+                del pending[service['id']]
+                finished_at = perf_counter()
+        sleep(args.poll_interval)
+
+    # services which are still pending after the timeout count as errors, but not for the throughput
+    return harness.summarize(latencies, finished_at - start, errors=failed + len(pending))
+
+
+def main(args):
+    random_generator = random.Random(args.seed)
+    directory = args.directory or tempfile.mkdtemp(prefix='motey-cluster-')
+    addresses = ['%s.%s' % (args.subnet, index + 1) for index in range(args.nodes)]
+    nodes = [ClusterNode(address, directory, addresses[0], args) for address in addresses]
+    print('starting %s nodes in %s' % (len(nodes), directory))
+
+    results = {'environment': harness.get_environment(), 'arguments': vars(args).copy(), 'benchmarks': {}}
+    try:
+        start = perf_counter()
+        for node in nodes:
+            node.start()
+        if wait_until(lambda: all(node.is_up() for node in nodes), args.timeout) is None:
+            print('not all nodes started, see the logs in %s' % directory)
+            return 1
+        print('all nodes answer after %.1fs' % (perf_counter() - start))
+
+        converged = wait_until(lambda: all(count_known_nodes(node) >= len(nodes) - 1 for node in nodes), args.timeout)
+        print('membership %s' % ('converged after %.1fs' % converged if converged is not None else 'not converged'))
+
+        context = zmq.Context()
+        for index, node in enumerate(nodes):
+            node.add_capability(context, 'zone-%s' % (index % args.zones))
+        if wait_until(lambda: all(has_capability(node, 'zone-%s' % (index % args.zones))
+                                  for index, node in enumerate(nodes)), args.timeout) is None:
+            print('not all nodes registered their zone capability')
+            return 1
+
+        if args.services:
+            results['benchmarks']['cluster.deploy'] = deploy_services(nodes, args, random_generator)
+            harness.print_results(results)
+            if args.save:
+                harness.save(results, args.save)
+
+        if args.keep_running:
+            print('nodes are running, stop them with Ctrl+C')
+            for node in nodes:
+                print('  %s' % node.api_url)
+            while True:
+                sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for node in nodes:
+            node.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Launches a cluster of Motey nodes on a single host.')
+    parser.add_argument('--nodes', type=int, default=10, help='number of nodes')
+    parser.add_argument('--subnet', default='127.0.10', help='the first three octets of the loopback addresses')
+    parser.add_argument('--api-port', type=int, default=5023, help='port of the webserver of every node')
+    parser.add_argument('--mqtt-host', default='127.0.0.1', help='host of the MQTT broker')
+    parser.add_argument('--mqtt-port', type=int, default=1883, help='port of the MQTT broker')
+    parser.add_argument('--directory', help='folder for the configurations, databases and logs of the nodes')
+    parser.add_argument('--zones', type=int, default=5, help='number of different capabilities')
+    parser.add_argument('--services', type=int, default=0, help='number of services which will be deployed')
+    parser.add_argument('--pull-latency', type=float, default=0.5, help='simulated image pull in seconds')
+    parser.add_argument('--start-latency', type=float, default=0.2, help='simulated instance start in seconds')
+    parser.add_argument('--stop-latency', type=float, default=0.1, help='simulated instance stop in seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='probability that a VAL operation fails')
+    parser.add_argument('--max-instances', type=int, default=0, help='instances per node, 0 is unlimited')
+    parser.add_argument('--poll-interval', type=float, default=0.2, help='time between two status polls')
+    parser.add_argument('--timeout', type=float, default=120, help='maximum time in seconds for every phase')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help='path of the JSON file the results will be stored in')
+    parser.add_argument('--keep-running', action='store_true', help='keep the nodes running until Ctrl+C')
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""
+Simulates a cluster which uses the SWIM membership protocol.
+
+All members are executed in-process on a simulated network with message loss and latency. After the cluster has
+converged, some members are killed and the time until all remaining members have declared them as dead is measured.
+Run it from the root folder of the repository:
+
+    $ python3 performance_tests/membership/simulation.py --nodes 500 --kill 5 --loss-rate 0.05
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from motey.membership.swim import Swim  # noqa: E402
+from motey.membership.transport import SimulatedNetwork  # noqa: E402
+from motey.models.member_state import MemberState  # noqa: E402
+
+
+def create_cluster(network, nodes, seeds, args, random_generator):
+    members = {}
+    for index in range(nodes):
+        address = 'node-%s' % index
+        member = Swim(address=address,
+                      transport=network.create_transport(address),
+                      seeds=seeds,
+                      protocol_period=args.protocol_period,
+                      ping_timeout=args.ping_timeout,
+                      suspicion_timeout=args.suspicion_timeout,
+                      random_generator=random.Random(random_generator.random()))
+        member.transport.start(member.handle_message)
+        members[address] = member
+    return members
+
+
+def run_until(network, members, now, condition, timeout, step):
+    start = now
+    while now - start < timeout:
+        now += step
+        network.deliver(now)
+        for member in members:
+            member.tick(now)
+        if condition():
+            return now, True
+    return now, False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulates a cluster which uses the SWIM membership protocol.')
+    parser.add_argument('--nodes', type=int, default=200, help='number of simulated nodes')
+    parser.add_argument('--kill', type=int, default=3, help='number of nodes which will be killed')
+    parser.add_argument('--loss-rate', type=float, default=0.01, help='probability that a message gets lost')
+    parser.add_argument('--protocol-period', type=float, default=1.0)
+    parser.add_argument('--ping-timeout', type=float, default=0.3)
+    parser.add_argument('--suspicion-timeout', type=float, default=5.0)
+    parser.add_argument('--timeout', type=float, default=300, help='maximum simulated seconds of each phase')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random_generator = random.Random(args.seed)
+    network = SimulatedNetwork(loss_rate=args.loss_rate, random_generator=random_generator)
+    members = create_cluster(network, args.nodes, ['node-0'], args, random_generator)
+    step = args.ping_timeout / 3
+
+    for member in members.values():
+        member.start()
+    now, converged = run_until(network, members.values(), 0,
+                               lambda: all(len(member.get_members()) == args.nodes - 1 for member in members.values()),
+                               args.timeout, step)
+    print('convergence of %s nodes: %s after %.1fs' % (args.nodes, 'done' if converged else 'failed', now))
+
+    sent_before = sum(network.sent_messages.values())
+    killed = random_generator.sample(sorted(members)[1:], args.kill)
+    for address in killed:
+        members.pop(address).transport.stop()
+    killed_at = now
+
+    def __detected():
+        return all(all(member.members.get(address, {}).get('state') == MemberState.DEAD for address in killed)
+                   for member in members.values())
+
+    now, detected = run_until(network, members.values(), now, __detected, args.timeout, step)
+    duration = now - killed_at
+    messages = sum(network.sent_messages.values()) - sent_before
+    false_positives = sum(1 for member in members.values() for address in member.get_members(MemberState.DEAD)
+                          if address not in killed)
+    print('detection of %s failed nodes: %s after %.1fs' % (args.kill, 'done' if detected else 'failed', duration))
+    print('%.2f messages per node and second' % (messages / float(len(members)) / max(duration, step)))
+    print('%s false positives' % false_positives)
@@ -0,0 +1,151 @@
+"""
+Simulates the MQTT traffic which is caused by joining nodes.
+
+Every joining node publishes a nodes request and the existing nodes answer it. The broker delivers most messages to
+all nodes, so the number of delivered messages is a good measure for the load of the broker. The following reply
+strategies are compared:
+
+ * ``legacy``: every node answers immediately with its own ip.
+ * ``jitter``: every node answers after a random delay, unless it was announced since the request.
+ * ``snapshot``: the designated node answers immediately with a snapshot of all nodes, which is only delivered to the
+   requesting node, and a small notice to all nodes that the request was answered. All other nodes behave like
+   ``jitter`` and only answer if the snapshot got lost.
+
+All existing nodes share the same view of the cluster, so the designated responder is computed once per request and
+announcements are only handed over to the nodes which are affected by them. The counters nevertheless reflect a
+delivery to every node.
+Run it from the root folder of the repository:
+
+    $ python3 performance_tests/mqtt/join_storm.py --nodes 2000 --joins 20
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from motey.communication.node_announcer import NodeAnnouncer  # noqa: E402
+
+
+class Simulation(object):
+    """
+    Simulated broker and nodes. Every published message is delivered to its receivers after a fixed latency.
+    """
+
+    def __init__(self, strategy, args):
+        self.strategy = strategy
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.now = 0
+        self.events = []
+        self.counter = itertools.count()
+        self.published = 0
+        self.delivered = 0
+        self.delivered_bytes = 0
+
+        ips = ['10.%s.%s.%s' % (index // 65536, index // 256 % 256, index % 256 + 1)
+               for index in range(args.nodes + args.joins)]
+        self.existing_ips, self.joining_ips = ips[:args.nodes], ips[args.nodes:]
+        self.announcers = {ip: NodeAnnouncer(reply_jitter=args.reply_jitter,
+                                             clock=lambda: self.now,
+                                             random_generator=self.random) for ip in ips}
+        self.dead_ips = {self.existing_ips[0]} if args.dead_responder else set()
+        self.cluster_ips = set(self.existing_ips)
+        self.connected_ips = set(self.existing_ips)
+        self.known_ips = {ip: set() for ip in self.joining_ips}
+        self.joined_at = {}
+        self.complete_at = {}
+
+    def schedule(self, delay, action):
+        heapq.heappush(self.events, (self.now + delay, next(self.counter), action))
+
+    def publish(self, topic, payload, receiver=None):
+        self.published += 1
+        self.schedule(self.args.latency, lambda: self.deliver(topic, payload, receiver))
+
+    def deliver(self, topic, payload, receiver):
+        receivers = 1 if receiver else len(self.connected_ips)
+        self.delivered += receivers
+        self.delivered_bytes += receivers * len(payload)
+        if topic == 'nodes_request':
+            self.handle_nodes_request(payload)
+        elif topic == 'register':
+            self.announcers[payload].record_announcement(payload)
+            self.learn(self.known_ips, [payload])
+        elif topic == 'nodes_snapshot':
+            self.learn({receiver: self.known_ips[receiver]}, json.loads(payload)['nodes'])
+        elif topic == 'nodes_answered':
+            for announcer in self.announcers.values():
+                announcer.record_answer(payload)
+
+    def join(self, ip):
+        self.joined_at[ip] = self.now
+        self.connected_ips.add(ip)
+        self.publish('nodes_request', ip)
+
+    def handle_nodes_request(self, requester_ip):
+        responders = [ip for ip in self.cluster_ips if ip not in self.dead_ips]
+        self.cluster_ips.add(requester_ip)
+        for ip in self.known_ips:
+            if ip in self.connected_ips:
+                self.known_ips[ip].add(requester_ip)
+        if self.strategy == 'legacy':
+            for ip in responders:
+                self.publish('register', ip)
+            return
+
+        designated_ip = None
+        if self.strategy == 'snapshot':
+            designated_ip = self.announcers[requester_ip].designated_responder(requester_ip, self.cluster_ips)
+            if designated_ip not in self.dead_ips:
+                self.publish('nodes_snapshot', json.dumps({'ip': designated_ip, 'nodes': sorted(self.cluster_ips)}),
+                             receiver=requester_ip)
+                self.publish('nodes_answered', requester_ip)
+        for ip in responders:
+            if ip != designated_ip:
+                self.schedule(self.announcers[ip].reply_delay(),
+                              lambda ip=ip, since=self.now: self.reply(ip, requester_ip, since))
+
+    def reply(self, ip, requester_ip, since):
+        if self.announcers[ip].should_reply(ip, requester_ip, since=since):
+            self.publish('register', ip)
+
+    def learn(self, receivers, ips):
+        expected_ips = self.cluster_ips - self.dead_ips
+        for joining_ip, known_ips in receivers.items():
+            if joining_ip not in self.connected_ips or joining_ip in self.complete_at:
+                continue
+            known_ips.update(ips)
+            if expected_ips - {joining_ip} <= known_ips:
+                self.complete_at[joining_ip] = self.now
+
+    def run(self):
+        for ip in self.joining_ips:
+            self.schedule(self.random.uniform(0, self.args.join_window), lambda ip=ip: self.join(ip))
+        while self.events:
+            self.now, _, action = heapq.heappop(self.events)
+            action()
+
+        durations = [self.complete_at[ip] - self.joined_at[ip] for ip in self.complete_at]
+        print('%-8s published: %7s  delivered: %10s  delivered MB: %8.1f  complete joins: %s/%s  '
+              'max join time: %.2fs' % (self.strategy, self.published, self.delivered, self.delivered_bytes / 1e6,
+                                        len(durations), len(self.joining_ips), max(durations) if durations else 0))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulates the MQTT traffic which is caused by joining nodes.')
+    parser.add_argument('--nodes', type=int, default=1000, help='number of existing nodes')
+    parser.add_argument('--joins', type=int, default=10, help='number of joining nodes')
+    parser.add_argument('--join-window', type=float, default=1.0, help='time in seconds in which the nodes join')
+    parser.add_argument('--reply-jitter', type=float, default=2.0, help='maximum reply delay in seconds')
+    parser.add_argument('--latency', type=float, default=0.005, help='latency of the broker in seconds')
+    parser.add_argument('--dead-responder', action='store_true', help='the designated responder does not answer')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for strategy in ('legacy', 'jitter', 'snapshot'):
+        Simulation(strategy, args).run()
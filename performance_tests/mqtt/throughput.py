@@ -0,0 +1,106 @@
+"""
+Measures the throughput and the latency of the MQTT broker for different client configurations.
+
+Every configuration publishes the same number of events from one client to another client. The events are sent with
+the given QoS level, clean session flag and inflight window. If the batch size is greater than one, several events are
+packed into a single message like the ``batch`` route of ``motey.communication.mqttserver.MQTTServer`` does.
+The latency of an event is the time between the call of ``publish`` and the receiving of the message.
+Run it from the root folder of the repository with a running broker:
+
+    $ python3 performance_tests/mqtt/throughput.py --host 127.0.0.1 --events 10000
+"""
+import argparse
+import json
+import threading
+import uuid
+from time import perf_counter
+
+import paho.mqtt.client as mqtt
+
+CONFIGURATIONS = [
+    # name, qos, clean session, max inflight, batch size
+    ('qos0', 0, True, 20, 1),
+    ('qos1', 1, True, 20, 1),
+    ('qos1-inflight100', 1, True, 100, 1),
+    ('qos1-persistent', 1, False, 20, 1),
+    ('qos2', 2, True, 20, 1),
+    ('qos1-batch10', 1, True, 20, 10),
+    ('qos1-batch50', 1, True, 20, 50),
+]
+
+
+def percentile(values, percent):
+    """
+    Returns the percentile of the values with the nearest rank method.
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def create_client(args, client_id, clean_session, max_inflight):
+    client = mqtt.Client(client_id=client_id, clean_session=clean_session)
+    client.max_inflight_messages_set(max_inflight)
+    if args.username and args.password:
+        client.username_pw_set(username=args.username, password=args.password)
+    client.connect(host=args.host, port=args.port)
+    client.loop_start()
+    return client
+
+
+def run_configuration(args, name, qos, clean_session, max_inflight, batch_size):
+    topic = 'motey/performance/%s' % uuid.uuid4().hex
+    latencies = []
+    completed = threading.Event()
+    subscribed = threading.Event()
+
+    def handle_message(client, userdata, message):
+        received_at = perf_counter()
+        for sent_at in json.loads(message.payload.decode('utf-8'))['sent']:
+            latencies.append(received_at - sent_at)
+        if len(latencies) >= args.events:
+            completed.set()
+
+    receiver = create_client(args, 'receiver-%s' % uuid.uuid4().hex, clean_session, max_inflight)
+    receiver.on_message = handle_message
+    receiver.on_subscribe = lambda client, userdata, mid, granted_qos: subscribed.set()
+    receiver.subscribe(topic=topic, qos=qos)
+    subscribed.wait(args.timeout)
+    sender = create_client(args, 'sender-%s' % uuid.uuid4().hex, clean_session, max_inflight)
+
+    padding = 'x' * args.payload_size
+    start = perf_counter()
+    for offset in range(0, args.events, batch_size):
+        count = min(batch_size, args.events - offset)
+        now = perf_counter()
+        sender.publish(topic=topic, payload=json.dumps({'sent': [now] * count, 'padding': [padding] * count}),
+                       qos=qos)
+    completed.wait(args.timeout)
+    duration = perf_counter() - start
+
+    sender.loop_stop()
+    sender.disconnect()
+    receiver.loop_stop()
+    receiver.disconnect()
+
+    latencies_ms = [latency * 1000 for latency in latencies]
+    print('%-18s events: %6s/%-6s  throughput: %9.1f events/s  latency p50: %7.2fms  p95: %7.2fms  '
+          'p99: %7.2fms' % (name, len(latencies), args.events, len(latencies) / duration,
+                            percentile(latencies_ms, 50), percentile(latencies_ms, 95), percentile(latencies_ms, 99)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the throughput and latency of the MQTT broker.')
+    parser.add_argument('--host', default='127.0.0.1', help='host of the MQTT broker')
+    parser.add_argument('--port', type=int, default=1883, help='port of the MQTT broker')
+    parser.add_argument('--username', default=None)
+    parser.add_argument('--password', default=None)
+    parser.add_argument('--events', type=int, default=10000, help='number of events per configuration')
+    parser.add_argument('--payload-size', type=int, default=20, help='size of the payload of a single event')
+    parser.add_argument('--timeout', type=float, default=60, help='maximum time in seconds per configuration')
+    args = parser.parse_args()
+
+    for configuration in CONFIGURATIONS:
+        run_configuration(args, *configuration)
@@ -0,0 +1,66 @@
+"""
+Measures the import and the boot time of Motey.
+
+The import time is the time a fresh interpreter needs to import ``motey.di.app_module``.
+The boot time is the time from starting ``main.py`` until the webserver answers on the heartbeat endpoint.
+Run it on the target hardware (e.g. a Raspberry Pi) from the root folder of the repository:
+
+    $ python3 performance_tests/startup/startup_time.py --runs 10
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+from statistics import median
+from time import perf_counter, sleep
+
+root_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def measure_import_time():
+    start_time = perf_counter()
+    subprocess.check_call([sys.executable, '-c', 'import motey.di.app_module'], cwd=root_folder)
+    return perf_counter() - start_time
+
+
+def measure_boot_time(port, timeout):
+    start_time = perf_counter()
+    process = subprocess.Popen([sys.executable, 'main.py'], cwd=root_folder,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while perf_counter() - start_time < timeout:
+            try:
+                urllib.request.urlopen('http://127.0.0.1:%s/v1/heartbeat' % port, timeout=1)
+                return perf_counter() - start_time
+            except urllib.error.HTTPError:
+                # the webserver answers, even if the heartbeat is not healthy
+                return perf_counter() - start_time
+            except (urllib.error.URLError, ConnectionError):
+                sleep(.01)
+        return None
+    finally:
+        process.send_signal(signal.SIGINT)
+        process.wait()
+
+
+def print_result(name, results):
+    results = [result for result in results if result is not None]
+    if not results:
+        print('%s: no successful run' % name)
+        return
+    print('%s: min %.3fs, median %.3fs, max %.3fs (%s runs)' % (
+        name, min(results), median(results), max(results), len(results)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the import and the boot time of Motey.')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs for each measurement')
+    parser.add_argument('--port', type=int, default=5023, help='port of the Motey webserver')
+    parser.add_argument('--timeout', type=float, default=60, help='maximum boot time in seconds')
+    args = parser.parse_args()
+
+    print_result('import time', [measure_import_time() for run in range(args.runs)])
+    print_result('boot time', [measure_boot_time(args.port, args.timeout) for run in range(args.runs)])
@@ -0,0 +1,60 @@
+"""
+Measures the cost of a single schema validation.
+
+Compares ``jsonschema.validate``, which creates a new validator for every call, with the precompiled validators of
+``motey.models.schemas``. Install ``fastjsonschema`` to measure the compiled validators.
+Run it from the root folder of the repository:
+
+    $ python3 performance_tests/validation/validation_benchmark.py --runs 10000
+"""
+import argparse
+import os
+import sys
+from timeit import timeit
+
+from jsonschema import validate
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from motey.models import schemas  # noqa: E402
+
+capability_message = [
+    {'capability': 'zigbee', 'capability_type': 'hardware'},
+    {'capability': 'wifi', 'capability_type': 'hardware'},
+    {'capability': 'temperature', 'capability_type': 'sensor'}
+]
+
+blueprint = {
+    'service_name': 'benchmark_service',
+    'images': [
+        {
+            'name': 'alpine',
+            'engine': 'docker',
+            'parameters': {'ports': {'80/tcp': 8080}},
+            'capabilities': ['docker', 'zigbee']
+        },
+        {
+            'name': 'busybox',
+            'engine': 'docker'
+        }
+    ]
+}
+
+
+def print_result(name, runs, before, after):
+    print('%s: %.2fus before, %.2fus after per message (%.1fx)' % (
+        name, before / runs * 1e6, after / runs * 1e6, before / after))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the cost of a single schema validation.')
+    parser.add_argument('--runs', type=int, default=10000, help='number of validations for each measurement')
+    args = parser.parse_args()
+
+    print('compiled with %s' % ('fastjsonschema' if schemas.fastjsonschema else 'jsonschema'))
+    print_result('capability event', args.runs,
+                 timeit(lambda: validate(capability_message, schemas.capability_json_schema), number=args.runs),
+                 timeit(lambda: schemas.validate_capabilities(capability_message), number=args.runs))
+    print_result('blueprint', args.runs,
+                 timeit(lambda: validate(blueprint, schemas.blueprint_yaml_schema), number=args.runs),
+                 timeit(lambda: schemas.validate_blueprint(blueprint), number=args.runs))
@@ -111,6 +111,9 @@ setup(
         'Yapsy==1.11.223',
         'zerorpc==0.6.1'
     ],
+    extras_require = {
+        'fast': ['fastjsonschema'],
+    },
     tests_require = {
         'pycodestyle==2.3.1',
         'pytest',
@@ -1,4 +1,6 @@
+import threading
 import unittest
+from time import sleep
 from unittest import mock
 
 from rx.subjects import Subject
@@ -21,7 +23,9 @@ class TestCapabilityEngine(unittest.TestCase):
         self.communication_manager.remove_capability_event_stream = mock.Mock(Subject)
         self.capability_engine = CapabilityEngine(logger=self.logger,
                                                   capability_repository=self.capability_repository,
-                                                  communication_manager=self.communication_manager)
+                                                  communication_manager=self.communication_manager,
+                                                  batch_window=0)
+        self.capability_repository.apply_changes = mock.MagicMock(side_effect=lambda added, removed: (added, removed))
 
     def assertCapabilityEqual(self, left, right):
         for left_entry, right_entry in zip(left, right):
@@ -68,22 +72,104 @@ class TestCapabilityEngine(unittest.TestCase):
     def test_perform_add_capability(self):
         self.capability_engine\
             .perform_add_capability(data='[{"capability": "test capability", "capability_type": "test capability type"}]')
-        self.assertTrue(self.capability_repository.add.called)
+        self.capability_repository.apply_changes.assert_called_once_with(
+            added=[('test capability', 'test capability type')], removed=[])
+        self.assertTrue(self.communication_manager.publish_capabilities_delta.called)
 
     def test_perform_add_capability_bad_input(self):
         self.capability_engine\
             .perform_add_capability(data='[{"capability": "test capability"}]')
-        self.assertFalse(self.capability_repository.add.called)
+        self.assertFalse(self.capability_repository.apply_changes.called)
 
     def test_perform_remove_capability(self):
         self.capability_engine \
             .perform_remove_capability(data='[{"capability": "test capability", "capability_type": "test capability type"}]')
-        self.assertTrue(self.capability_repository.remove.called)
+        self.capability_repository.apply_changes.assert_called_once_with(
+            added=[], removed=[('test capability', 'test capability type')])
 
     def test_perform_remove_capability_bad_input(self):
         self.capability_engine \
             .perform_remove_capability(data='[{"capability": "test capability"}]')
-        self.assertFalse(self.capability_repository.remove.called)
+        self.assertFalse(self.capability_repository.apply_changes.called)
+
+    def test_batch_is_applied_once(self):
+        self.capability_engine.batch_window = 10
+        self.capability_engine.perform_add_capability(data='[{"capability": "a", "capability_type": "t"}]')
+        self.capability_engine.perform_add_capability(data='[{"capability": "b", "capability_type": "t"}]')
+        self.assertFalse(self.capability_repository.apply_changes.called)
+
+        self.capability_engine.flush()
+
+        self.capability_repository.apply_changes.assert_called_once_with(added=[('a', 't'), ('b', 't')], removed=[])
+        self.communication_manager.publish_capabilities_delta.assert_called_once_with(
+            added=[{'capability': 'a', 'capability_type': 't'}, {'capability': 'b', 'capability_type': 't'}],
+            removed=[])
+
+    def test_batch_last_event_wins(self):
+        self.capability_engine.batch_window = 10
+        self.capability_engine.perform_add_capability(data='[{"capability": "a", "capability_type": "t"}]')
+        self.capability_engine.perform_remove_capability(data='[{"capability": "a", "capability_type": "t"}]')
+        self.capability_engine.perform_add_capability(data='[{"capability": "b", "capability_type": "t"}]')
+        self.capability_engine.perform_remove_capability(data='[{"capability": "b", "capability_type": "t"}]')
+        self.capability_engine.perform_add_capability(data='[{"capability": "b", "capability_type": "t"}]')
+
+        self.capability_engine.flush()
+
+        self.capability_repository.apply_changes.assert_called_once_with(added=[('b', 't')], removed=[('a', 't')])
+
+    def test_flush_without_net_change_does_not_publish(self):
+        self.capability_repository.apply_changes = mock.MagicMock(return_value=([], []))
+        self.capability_engine.perform_remove_capability(data='[{"capability": "a", "capability_type": "t"}]')
+
+        self.assertTrue(self.capability_repository.apply_changes.called)
+        self.assertFalse(self.communication_manager.publish_capabilities_delta.called)
+
+    def test_flush_without_pending_changes(self):
+        self.capability_engine.flush()
+
+        self.assertFalse(self.capability_repository.apply_changes.called)
+
+    def test_stop_flushes_pending_changes(self):
+        self.capability_engine.batch_window = 10
+        self.capability_engine.perform_add_capability(data='[{"capability": "a", "capability_type": "t"}]')
+
+        self.capability_engine.stop()
+
+        self.assertTrue(self.capability_repository.apply_changes.called)
+
+    def test_concurrent_flushes_are_serialized(self):
+        active_flushes = []
+        concurrent_flushes = []
+
+        def __apply_changes(added, removed):
+            active_flushes.append(1)
+            concurrent_flushes.append(len(active_flushes))
+            sleep(0.05)
+            active_flushes.pop()
+            return added, removed
+
+        self.capability_repository.apply_changes = mock.MagicMock(side_effect=__apply_changes)
+        self.capability_engine.batch_window = 10
+        self.capability_engine.perform_add_capability(data='[{"capability": "a", "capability_type": "t"}]')
+        flush_thread = threading.Thread(target=self.capability_engine.flush)
+        flush_thread.start()
+        sleep(0.01)
+        self.capability_engine.perform_add_capability(data='[{"capability": "b", "capability_type": "t"}]')
+
+        self.capability_engine.flush()
+        flush_thread.join()
+
+        self.assertEqual(concurrent_flushes, [1, 1])
+
+    def test_stop_waits_for_the_flush_thread(self):
+        self.capability_engine.batch_window = 0.05
+        self.capability_engine.start()
+        self.capability_engine.perform_add_capability(data='[{"capability": "a", "capability_type": "t"}]')
+
+        self.capability_engine.stop()
+
+        self.assertFalse(self.capability_engine.flush_thread.is_alive())
+        self.assertEqual(self.capability_repository.apply_changes.call_count, 1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,112 @@
+import unittest
+from unittest import mock
+
+from flask import Flask
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from motey.communication.api_routes import listing
+from motey.repositories import base_repository
+
+
+class TestListing(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.config_patcher = mock.patch.object(base_repository, 'config', {'DATABASE': {'path': '/tmp/testpath'}})
+        self.config_patcher.start()
+        self.listing_config_patcher = mock.patch.object(listing, 'config', {'WEBSERVER': {'max_page_size': '2'}})
+        self.listing_config_patcher.start()
+        self.webserver = Flask(__name__)
+        self.repository = base_repository.BaseRepository()
+        self.repository.db = TinyDB(storage=MemoryStorage)
+        self.repository.db.insert_multiple([
+            {'id': 'first', 'state': 1, 'images': [{'node': '127.0.0.1'}]},
+            {'id': 'second', 'state': 2, 'images': [{'node': '127.0.0.2'}]},
+            {'id': 'third', 'state': 2, 'images': [{'node': '127.0.0.1'}, {'node': '127.0.0.3'}]}
+        ])
+        self.filters = {
+            'state': lambda service: [service.get('state')],
+            'node': lambda service: [image.get('node') for image in service.get('images', [])]
+        }
+
+    def tearDown(self):
+        self.config_patcher.stop()
+        self.listing_config_patcher.stop()
+
+    def list_entries(self, query_string='', headers=None):
+        with self.webserver.test_request_context('/?%s' % query_string, headers=headers):
+            return listing.list_entries(self.repository, filters=self.filters)
+
+    def test_list_all(self):
+        response = self.list_entries()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['id'] for entry in response.get_json()], ['first', 'second', 'third'])
+        self.assertIsNotNone(response.get_etag()[0])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_pagination(self):
+        response = self.list_entries('limit=1')
+
+        self.assertEqual([entry['id'] for entry in response.get_json()], ['first'])
+        cursor = response.headers['X-Next-Cursor']
+
+        response = self.list_entries('limit=5&cursor=%s' % cursor)
+
+        self.assertEqual([entry['id'] for entry in response.get_json()], ['second', 'third'])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_pagination_limited_to_max_page_size(self):
+        response = self.list_entries('limit=100')
+
+        self.assertEqual(len(response.get_json()), 2)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+    def test_invalid_parameter(self):
+        result = self.list_entries('limit=abc')
+
+        self.assertEqual(result[1], 400)
+
+    def test_filter(self):
+        response = self.list_entries('state=2')
+
+        self.assertEqual([entry['id'] for entry in response.get_json()], ['second', 'third'])
+
+    def test_filter_multiple_values(self):
+        response = self.list_entries('node=127.0.0.3&node=127.0.0.2')
+
+        self.assertEqual([entry['id'] for entry in response.get_json()], ['second', 'third'])
+
+    def test_filter_combined(self):
+        response = self.list_entries('node=127.0.0.1&state=2')
+
+        self.assertEqual([entry['id'] for entry in response.get_json()], ['third'])
+
+    def test_projection(self):
+        response = self.list_entries('fields=id,state')
+
+        self.assertEqual(response.get_json()[0], {'id': 'first', 'state': 1})
+
+    def test_not_modified(self):
+        etag = self.list_entries('state=2').get_etag()[0]
+        self.repository.db.all = mock.MagicMock()
+
+        response = self.list_entries('state=2', headers={'If-None-Match': '"%s"' % etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(self.repository.db.all.called)
+
+    def test_modified_after_change(self):
+        etag = self.list_entries().get_etag()[0]
+        self.repository.changed()
+
+        response = self.list_entries(headers={'If-None-Match': '"%s"' % etag})
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_query(self):
+        self.assertNotEqual(self.list_entries('state=1').get_etag()[0], self.list_entries('state=2').get_etag()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
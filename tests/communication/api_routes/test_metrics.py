@@ -0,0 +1,33 @@
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from motey.communication.api_routes import metrics as metrics_route
+from motey.utils.metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.counter('motey_test_requests', 'Number of test requests').inc()
+        self.registry_patcher = mock.patch.object(metrics_route.metrics, 'registry', self.registry)
+        self.registry_patcher.start()
+        self.webserver = Flask(__name__)
+        self.webserver.add_url_rule('/v1/metrics', view_func=metrics_route.Metrics.as_view('metrics'))
+
+    @classmethod
+    def tearDown(self):
+        self.registry_patcher.stop()
+
+    def test_get(self):
+        response = self.webserver.test_client().get('/v1/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn('motey_test_requests_total 1.0', response.get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
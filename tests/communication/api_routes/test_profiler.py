@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from motey.communication.api_routes import profiler as profiler_route
+from motey.utils.profiling import SamplingProfiler
+
+
+class TestProfiler(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.profiler = mock.Mock(SamplingProfiler)
+        self.profiler.get_status.return_value = {'running': True, 'duration': 10}
+        self.profiler_patcher = mock.patch.object(profiler_route.profiling, 'profiler', self.profiler)
+        self.profiler_patcher.start()
+        self.webserver = Flask(__name__)
+        self.webserver.add_url_rule('/v1/profiler', view_func=profiler_route.Profiler.as_view('profiler'))
+
+    @classmethod
+    def tearDown(self):
+        self.profiler_patcher.stop()
+
+    def test_get(self):
+        response = self.webserver.test_client().get('/v1/profiler')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'running': True, 'duration': 10})
+
+    def test_get_collapsed(self):
+        self.profiler.get_collapsed.return_value = 'MainThread;run (core.py) 3\n'
+
+        response = self.webserver.test_client().get('/v1/profiler?format=collapsed')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True), 'MainThread;run (core.py) 3\n')
+
+    def test_post(self):
+        self.profiler.start.return_value = True
+
+        response = self.webserver.test_client().post('/v1/profiler', json={'duration': 10, 'interval': 0.005})
+
+        self.assertEqual(response.status_code, 202)
+        self.profiler.start.assert_called_once_with(10.0, interval=0.005)
+
+    def test_post_already_running(self):
+        self.profiler.start.return_value = False
+
+        response = self.webserver.test_client().post('/v1/profiler', json={'duration': 10})
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_post_invalid_duration(self):
+        response = self.webserver.test_client().post('/v1/profiler', json={'duration': 'long'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.profiler.start.called)
+
+    def test_delete(self):
+        response = self.webserver.test_client().delete('/v1/profiler')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.profiler.stop.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
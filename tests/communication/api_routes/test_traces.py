@@ -0,0 +1,43 @@
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from motey.communication.api_routes import traces as traces_route
+from motey.utils.tracing import RingBufferExporter, Tracer
+
+
+class TestTraces(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.tracer = Tracer(exporter=RingBufferExporter())
+        self.tracer_patcher = mock.patch.object(traces_route.tracing, 'tracer', self.tracer)
+        self.tracer_patcher.start()
+        self.webserver = Flask(__name__)
+        self.webserver.add_url_rule('/v1/traces', view_func=traces_route.Traces.as_view('traces'))
+
+    @classmethod
+    def tearDown(self):
+        self.tracer_patcher.stop()
+
+    def test_get(self):
+        with self.tracer.span('first') as first:
+            pass
+        with self.tracer.span('second'):
+            pass
+
+        response = self.webserver.test_client().get('/v1/traces?trace_id=%s' % first.trace_id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([span['name'] for span in response.get_json()], ['first'])
+
+    def test_get_without_ring_buffer(self):
+        self.tracer.exporter = None
+
+        response = self.webserver.test_client().get('/v1/traces')
+
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
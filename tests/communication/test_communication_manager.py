@@ -1,11 +1,15 @@
 import unittest
 from unittest import mock
 
+from rx.subjects import Subject
+
 from motey.communication.apiserver import APIServer
 from motey.communication.communication_manager import CommunicationManager
 from motey.communication.mqttserver import MQTTServer
+from motey.communication.node_announcer import NodeAnnouncer
 from motey.communication.zeromq_server import ZeroMQServer
 from motey.models.image import Image
+from motey.utils.node_identity import NodeIdentity
 
 
 class TestCommunicationManager(unittest.TestCase):
@@ -13,6 +17,14 @@ class TestCommunicationManager(unittest.TestCase):
     def setUp(self):
         self.api_server = mock.Mock(APIServer)
         self.mqtt_server = mock.Mock(MQTTServer)
+        self.mqtt_server.node_announcement_stream = Subject()
+        self.mqtt_server.nodes_answered_stream = Subject()
+        self.nodes_repository = mock.Mock()
+        self.nodes_repository.all = mock.MagicMock(return_value=[{'ip': '127.0.0.2'}, {'ip': '127.0.0.3'}])
+        self.node_announcer = NodeAnnouncer(reply_jitter=0)
+        self.node_identity = mock.Mock(NodeIdentity)
+        self.node_identity.ip_change_stream = Subject()
+        self.node_identity.get_ip = mock.MagicMock(return_value='127.0.0.1')
         self.zeromq_server = mock.Mock(ZeroMQServer)
         self.zeromq_server.deploy_image = mock.MagicMock(return_value='abc123')
         self.zeromq_server.request_image_status = mock.MagicMock(return_value=2)
@@ -20,7 +32,10 @@ class TestCommunicationManager(unittest.TestCase):
             return_value={'capability': 'test capability', 'capability_type': 'test capability type'})
         self.communication_manager = CommunicationManager(api_server=self.api_server,
                                                           mqtt_server=self.mqtt_server,
-                                                          zeromq_server=self.zeromq_server)
+                                                          zeromq_server=self.zeromq_server,
+                                                          nodes_repository=self.nodes_repository,
+                                                          node_announcer=self.node_announcer,
+                                                          node_identity=self.node_identity)
         self.test_image = Image(name='test image', engine='test engine')
 
     def test_start(self):
@@ -62,6 +77,82 @@ class TestCommunicationManager(unittest.TestCase):
 
         self.assertTrue(self.zeromq_server.terminate_image.called)
 
+    def test_publish_capabilities_delta(self):
+        self.communication_manager.publish_capabilities_delta(
+            added=[{'capability': 'test capability', 'capability_type': 'test capability type'}], removed=[])
+
+        self.assertTrue(self.mqtt_server.publish_capabilities_delta.called)
+
+    def test_publish_heartbeat(self):
+        self.communication_manager.publish_heartbeat()
+
+        self.assertTrue(self.mqtt_server.publish_heartbeat.called)
+
+    def test_after_connect_subscribes_snapshot_before_request(self):
+        self.mqtt_server.after_connect()
+
+        self.mqtt_server.subscribe_nodes_snapshot.assert_called_once_with('127.0.0.1')
+        self.mqtt_server.publish_node_request.assert_called_once_with('127.0.0.1')
+
+    def test_ip_change_announces_current_ip(self):
+        self.node_identity.get_node_id = mock.MagicMock(return_value='abc123')
+
+        self.node_identity.ip_change_stream.on_next({'previous': '127.0.0.1', 'current': '127.0.0.5'})
+
+        self.assertFalse(self.mqtt_server.remove_node.called)
+        self.mqtt_server.publish_ip_change.assert_called_once_with(node_id='abc123', previous='127.0.0.1',
+                                                                   current='127.0.0.5')
+        self.mqtt_server.subscribe_nodes_snapshot.assert_called_once_with('127.0.0.5')
+        self.mqtt_server.publish_new_node.assert_called_once_with('127.0.0.5')
+
+    def request_nodes(self, own_ip, requester_ip):
+        message = mock.Mock(payload=requester_ip.encode('utf-8'))
+        self.node_identity.get_ip.return_value = own_ip
+        with mock.patch('motey.communication.communication_manager.threading.Timer') as timer:
+            self.mqtt_server.nodes_request_callback(None, None, message)
+        return timer
+
+    def test_nodes_request_designated_responder_sends_snapshot(self):
+        timer = self.request_nodes(own_ip='127.0.0.2', requester_ip='127.0.0.1')
+
+        self.mqtt_server.publish_nodes_snapshot.assert_called_once_with(
+            ip='127.0.0.2', requester_ip='127.0.0.1', nodes=['127.0.0.1', '127.0.0.2', '127.0.0.3'])
+        self.assertFalse(timer.called)
+
+    def test_nodes_request_other_nodes_reply_delayed(self):
+        timer = self.request_nodes(own_ip='127.0.0.3', requester_ip='127.0.0.1')
+
+        self.assertFalse(self.mqtt_server.publish_nodes_snapshot.called)
+        self.assertTrue(timer.return_value.start.called)
+        delayed_announcement = timer.call_args[0][1]
+        delayed_announcement(*timer.call_args[1]['args'])
+
+        self.mqtt_server.publish_new_node.assert_called_once_with('127.0.0.3')
+
+    def test_nodes_request_reply_suppressed_after_announcement(self):
+        timer = self.request_nodes(own_ip='127.0.0.3', requester_ip='127.0.0.1')
+        delayed_announcement = timer.call_args[0][1]
+
+        self.mqtt_server.node_announcement_stream.on_next('127.0.0.3')
+        delayed_announcement(*timer.call_args[1]['args'])
+
+        self.assertFalse(self.mqtt_server.publish_new_node.called)
+
+    def test_nodes_request_reply_suppressed_after_answer(self):
+        timer = self.request_nodes(own_ip='127.0.0.3', requester_ip='127.0.0.1')
+        delayed_announcement = timer.call_args[0][1]
+
+        self.mqtt_server.nodes_answered_stream.on_next('127.0.0.1')
+        delayed_announcement(*timer.call_args[1]['args'])
+
+        self.assertFalse(self.mqtt_server.publish_new_node.called)
+
+    def test_nodes_request_of_own_node(self):
+        timer = self.request_nodes(own_ip='127.0.0.1', requester_ip='127.0.0.1')
+
+        self.assertFalse(self.mqtt_server.publish_nodes_snapshot.called)
+        self.assertFalse(timer.called)
+
 
 if __name__ == '__main__':
     unittest.main()
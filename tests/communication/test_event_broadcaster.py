@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+from rx.subjects import Subject
+
+from motey.communication.event_broadcaster import EventBroadcaster
+from motey.repositories.capability_repository import CapabilityRepository
+from motey.repositories.nodes_repository import NodesRepository
+from motey.repositories.service_repository import ServiceRepository
+from motey.utils.logger import Logger
+
+
+class TestEventBroadcaster(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.logger = mock.Mock(Logger)
+        self.service_repository = mock.Mock(ServiceRepository)
+        self.service_repository.change_stream = Subject()
+        self.nodes_repository = mock.Mock(NodesRepository)
+        self.nodes_repository.change_stream = Subject()
+        self.capability_repository = mock.Mock(CapabilityRepository)
+        self.capability_repository.change_stream = Subject()
+        self.event_broadcaster = EventBroadcaster(logger=self.logger,
+                                                  service_repository=self.service_repository,
+                                                  nodes_repository=self.nodes_repository,
+                                                  capability_repository=self.capability_repository,
+                                                  queue_size=2,
+                                                  keepalive_interval=0.01)
+        self.event_broadcaster.start()
+
+    def tearDown(self):
+        self.event_broadcaster.stop()
+
+    def test_publish_repository_changes(self):
+        client = self.event_broadcaster.register()
+
+        self.nodes_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.1'}})
+
+        self.assertEqual(client['queue'].get_nowait(), 'id: 1\nevent: node_added\ndata: {"ip": "127.0.0.1"}\n\n')
+
+    def test_publish_only_registered_topics(self):
+        client = self.event_broadcaster.register(topics=['services'])
+
+        self.nodes_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.1'}})
+        self.service_repository.change_stream.on_next({'event': 'service_removed', 'data': {'id': 'abc'}})
+
+        self.assertEqual(client['queue'].qsize(), 1)
+        self.assertIn('event: service_removed', client['queue'].get_nowait())
+
+    def test_publish_drops_oldest_events_of_slow_clients(self):
+        client = self.event_broadcaster.register()
+
+        for ip in ('first', 'second', 'third'):
+            self.nodes_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': ip}})
+
+        self.assertIn('second', client['queue'].get_nowait())
+        self.assertIn('third', client['queue'].get_nowait())
+
+    def test_unregister(self):
+        client = self.event_broadcaster.register()
+        self.event_broadcaster.unregister(client)
+
+        self.nodes_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.1'}})
+
+        self.assertTrue(client['queue'].empty())
+
+    def test_stream(self):
+        client = self.event_broadcaster.register()
+        stream = self.event_broadcaster.stream(client)
+
+        self.assertEqual(next(stream), 'retry: 1000\n\n')
+        self.assertEqual(next(stream), ': keepalive\n\n')
+
+        self.capability_repository.change_stream.on_next({'event': 'capabilities_changed', 'data': {}})
+
+        self.assertIn('event: capabilities_changed', next(stream))
+
+    def test_stream_ends_after_stop(self):
+        client = self.event_broadcaster.register()
+        stream = self.event_broadcaster.stream(client)
+        next(stream)
+
+        self.event_broadcaster.stop()
+
+        self.assertEqual(list(stream), [])
+        self.assertNotIn(client, self.event_broadcaster.clients)
+
+    def test_stop_disposes_subscriptions(self):
+        client = self.event_broadcaster.register()
+        self.event_broadcaster.stop()
+        client['queue'].get_nowait()
+
+        self.nodes_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.1'}})
+
+        self.assertTrue(client['queue'].empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import json
+import unittest
+from unittest import mock
+
+from motey.communication.mqttserver import MQTTServer
+from motey.utils.node_identity import NodeIdentity
+
+
+class TestMQTTServer(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.logger = mock.Mock()
+        self.nodes_repository = mock.Mock()
+        self.node_identity = mock.Mock(NodeIdentity)
+        self.node_identity.get_node_id = mock.MagicMock(return_value='abc123')
+        self.mqtt_server = MQTTServer(logger=self.logger, nodes_repository=self.nodes_repository,
+                                      node_identity=self.node_identity)
+        self.mqtt_server.client = mock.Mock()
+        self.batching_mqtt_server = MQTTServer(logger=self.logger, nodes_repository=self.nodes_repository,
+                                               node_identity=self.node_identity, batch_interval=1, batch_size=3)
+        self.batching_mqtt_server.client = mock.Mock()
+
+    def test_publish_uses_qos_of_route(self):
+        self.mqtt_server.publish_new_node('127.0.0.1')
+        self.mqtt_server.publish_heartbeat('127.0.0.1')
+
+        self.mqtt_server.client.publish.assert_has_calls([
+            mock.call(topic='motey/v1/register', payload='127.0.0.1', qos=1),
+            mock.call(topic='motey/v1/heartbeat', payload='127.0.0.1', qos=0)
+        ])
+
+    def test_publish_nodes_snapshot_to_requester(self):
+        self.mqtt_server.publish_nodes_snapshot(ip='127.0.0.2', requester_ip='127.0.0.1', nodes=['127.0.0.2'])
+
+        self.mqtt_server.client.publish.assert_has_calls([
+            mock.call(topic='motey/v1/nodes_snapshot/127.0.0.1', payload=json.dumps({'ip': '127.0.0.2',
+                                                                                      'nodes': ['127.0.0.2']}),
+                      qos=1),
+            mock.call(topic='motey/v1/nodes_answered', payload='127.0.0.1', qos=0)
+        ])
+
+    def test_on_connect_subscribes_with_qos(self):
+        client = mock.Mock()
+
+        self.mqtt_server.handle_on_connect(client, None, {}, 0)
+
+        client.subscribe.assert_any_call(topic='motey/v1/register', qos=1)
+        client.subscribe.assert_any_call(topic='motey/v1/heartbeat', qos=0)
+        subscribed_topics = [call[1]['topic'] for call in client.subscribe.call_args_list]
+        self.assertNotIn('motey/v1/nodes_snapshot/+', subscribed_topics)
+
+    def test_persistent_session_uses_stable_client_id(self):
+        server = MQTTServer(logger=self.logger, nodes_repository=self.nodes_repository,
+                            node_identity=self.node_identity, clean_session=False)
+
+        self.assertEqual(server.client_id, 'motey-abc123')
+
+    def test_batchable_messages_are_queued(self):
+        self.batching_mqtt_server.publish_new_node('127.0.0.1')
+        self.batching_mqtt_server.publish_capabilities_delta(ip='127.0.0.1', added=[{'capability': 'zigbee',
+                                                                                    'capability_type': 'hardware'}])
+
+        self.assertFalse(self.batching_mqtt_server.client.publish.called)
+        self.assertEqual(len(self.batching_mqtt_server.pending_messages), 2)
+
+    def test_not_batchable_messages_are_sent_immediately(self):
+        self.batching_mqtt_server.publish_heartbeat('127.0.0.1')
+
+        self.batching_mqtt_server.client.publish.assert_called_once_with(topic='motey/v1/heartbeat',
+                                                                         payload='127.0.0.1', qos=0)
+
+    def test_flush(self):
+        self.batching_mqtt_server.publish_new_node('127.0.0.1')
+        self.batching_mqtt_server.remove_node('127.0.0.2')
+
+        self.batching_mqtt_server.flush()
+
+        self.batching_mqtt_server.client.publish.assert_called_once_with(
+            topic='motey/v1/batch',
+            payload=json.dumps([{'route': 'register_node', 'payload': '127.0.0.1'},
+                                {'route': 'remove_node', 'payload': '127.0.0.2'}]),
+            qos=1)
+        self.assertEqual(self.batching_mqtt_server.pending_messages, [])
+
+    def test_flush_without_messages(self):
+        self.batching_mqtt_server.flush()
+
+        self.assertFalse(self.batching_mqtt_server.client.publish.called)
+
+    def test_full_batch_is_sent_immediately(self):
+        for index in range(3):
+            self.batching_mqtt_server.publish_new_node('127.0.0.%s' % index)
+
+        self.assertEqual(self.batching_mqtt_server.client.publish.call_count, 1)
+        self.assertEqual(self.batching_mqtt_server.pending_messages, [])
+
+    def test_stop_sends_pending_messages(self):
+        self.batching_mqtt_server.publish_new_node('127.0.0.1')
+
+        self.batching_mqtt_server.stop()
+        self.batching_mqtt_server.remove_node('127.0.0.1')
+
+        self.assertEqual(self.batching_mqtt_server.client.publish.call_count, 2)
+
+    def test_handle_batch(self):
+        message = mock.Mock(payload=json.dumps([{'route': 'register_node', 'payload': '127.0.0.1'},
+                                                {'route': 'remove_node', 'payload': '127.0.0.2'}]).encode('utf-8'))
+
+        self.mqtt_server.handle_batch(None, None, message)
+
+        self.nodes_repository.add.assert_called_once_with(ip='127.0.0.1')
+        self.nodes_repository.remove.assert_called_once_with(ip='127.0.0.2')
+
+    def test_handle_batch_ignores_not_batchable_routes(self):
+        message = mock.Mock(payload=json.dumps([{'route': 'nodes_request', 'payload': '127.0.0.1'},
+                                                {'route': 'unknown', 'payload': '127.0.0.1'},
+                                                'invalid']).encode('utf-8'))
+
+        self.mqtt_server.handle_batch(None, None, message)
+
+        self.assertFalse(self.nodes_repository.add.called)
+        self.assertEqual(self.logger.error.call_count, 3)
+
+    def test_publish_ip_change(self):
+        self.mqtt_server.publish_ip_change(node_id='abc123', previous='127.0.0.1', current='127.0.0.5')
+
+        self.mqtt_server.client.publish.assert_called_once_with(
+            topic='motey/v1/ip_change', payload=json.dumps({'node_id': 'abc123', 'previous': '127.0.0.1',
+                                                            'current': '127.0.0.5'}), qos=1)
+
+    def test_handle_ip_change(self):
+        message = mock.Mock(payload=json.dumps({'node_id': 'abc123', 'previous': '127.0.0.1',
+                                                'current': '127.0.0.5'}).encode('utf-8'))
+
+        self.mqtt_server.handle_ip_change(None, None, message)
+
+        self.nodes_repository.rename.assert_called_once_with(previous='127.0.0.1', current='127.0.0.5')
+        self.assertFalse(self.nodes_repository.remove.called)
+
+    def test_handle_invalid_ip_change(self):
+        self.mqtt_server.handle_ip_change(None, None, mock.Mock(payload=b'{"previous": "127.0.0.1"}'))
+
+        self.assertFalse(self.nodes_repository.rename.called)
+        self.logger.error.assert_called_once_with('received an invalid ip change')
+
+    def test_handle_invalid_batch(self):
+        self.mqtt_server.handle_batch(None, None, mock.Mock(payload=b'{"route": "register_node"}'))
+
+        self.logger.error.assert_called_once_with('received an invalid batch')
+
+
+if __name__ == '__main__':
+    unittest.main()
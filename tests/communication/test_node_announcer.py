@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from motey.communication.node_announcer import NodeAnnouncer
+
+
+class TestNodeAnnouncer(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.now = 100
+        self.node_announcer = NodeAnnouncer(reply_jitter=2.0,
+                                            clock=lambda: self.now,
+                                            random_generator=random.Random(1))
+
+    def test_designated_responder_has_lowest_ip(self):
+        known_ips = ['10.0.0.10', '10.0.0.9', '10.0.0.100']
+
+        self.assertTrue(self.node_announcer.is_designated_responder('10.0.0.9', '10.0.0.1', known_ips))
+        self.assertFalse(self.node_announcer.is_designated_responder('10.0.0.10', '10.0.0.1', known_ips))
+
+    def test_requester_is_not_designated_responder(self):
+        self.assertTrue(self.node_announcer.is_designated_responder('10.0.0.2', '10.0.0.1', ['10.0.0.1']))
+
+    def test_designated_responder_with_invalid_ips(self):
+        self.assertTrue(self.node_announcer.is_designated_responder('10.0.0.2', '10.0.0.1', ['localhost']))
+
+    def test_designated_responder(self):
+        self.assertEqual(self.node_announcer.designated_responder('10.0.0.1', ['10.0.0.1', '10.0.0.3', '10.0.0.2']),
+                         '10.0.0.2')
+        self.assertIsNone(self.node_announcer.designated_responder('10.0.0.1', ['10.0.0.1']))
+
+    def test_reply_delay(self):
+        for _ in range(100):
+            self.assertTrue(0.5 <= self.node_announcer.reply_delay() <= 2.0)
+
+    def test_should_reply(self):
+        self.assertTrue(self.node_announcer.should_reply('10.0.0.2', '10.0.0.1', since=94))
+
+    def test_should_not_reply_after_announcement(self):
+        self.node_announcer.record_announcement('10.0.0.2', now=95)
+
+        self.assertFalse(self.node_announcer.should_reply('10.0.0.2', '10.0.0.1', since=94))
+        self.assertTrue(self.node_announcer.should_reply('10.0.0.3', '10.0.0.1', since=94))
+
+    def test_should_not_reply_after_answer(self):
+        self.node_announcer.record_answer('10.0.0.1')
+
+        self.assertFalse(self.node_announcer.should_reply('10.0.0.2', '10.0.0.1', since=99))
+        self.assertTrue(self.node_announcer.should_reply('10.0.0.2', '10.0.0.4', since=99))
+
+    def test_should_reply_after_announcement_before_request(self):
+        self.node_announcer.record_announcement('10.0.0.2', now=98)
+        self.node_announcer.record_answer('10.0.0.1', now=98)
+
+        self.assertTrue(self.node_announcer.should_reply('10.0.0.2', '10.0.0.1', since=99))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import threading
+import unittest
+from time import time
+from unittest import mock
+
+import zmq
+
+from motey.communication.zeromq_server import ZeroMQServer
+from motey.models import model
+from motey.models.image import Image
+from motey.models.image_state import ImageState
+
+
+class TestZeroMQServer(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.zeromq_server = ZeroMQServer(logger=mock.Mock(), valmanager=mock.Mock(),
+                                          capability_repository=mock.Mock(), request_timeout=0.2, deploy_timeout=0.2)
+        self.replier = self.zeromq_server.context.socket(zmq.REP)
+        self.replier.setsockopt(zmq.LINGER, 0)
+        port = self.replier.bind_to_random_port('tcp://127.0.0.1')
+        self.ports = {key: str(port) for key in ('capabilities_replier', 'deploy_image_replier', 'image_status_replier',
+                                                 'image_terminate_replier', 'prepull_image_replier')}
+        self.config_patcher = mock.patch('motey.communication.zeromq_server.config', {'ZEROMQ': self.ports})
+        self.config_patcher.start()
+        self.image = Image(name='alpine', engine='docker', id='instance', node='127.0.0.1')
+
+    @classmethod
+    def tearDown(self):
+        self.config_patcher.stop()
+        self.zeromq_server.context.destroy(linger=0)
+
+    def reply_once(self, reply, requests=None):
+        def __reply():
+            request = self.replier.recv()
+            if requests is not None:
+                requests.append(request)
+            self.replier.send_string(reply)
+
+        replier_thread = threading.Thread(target=__reply)
+        replier_thread.daemon = True
+        replier_thread.start()
+        return replier_thread
+
+    def test_request_image_status(self):
+        self.reply_once(str(ImageState.RUNNING))
+
+        self.assertEqual(self.zeromq_server.request_image_status(self.image), ImageState.RUNNING)
+
+    def test_image_is_sent_with_the_model_codec(self):
+        requests = []
+        replier_thread = self.reply_once('instance', requests)
+
+        self.assertEqual(self.zeromq_server.deploy_image(self.image), 'instance')
+        replier_thread.join(1)
+        self.assertEqual(Image.from_bytes(requests[0]).to_dict(), self.image.to_dict())
+        self.assertEqual(requests[0][:1] != b'{', bool(model.msgpack))
+
+    def test_peer_which_never_answers(self):
+        started_at = time()
+
+        self.assertIsNone(self.zeromq_server.request_image_status(self.image))
+        self.assertIsNone(self.zeromq_server.deploy_image(self.image))
+        self.assertFalse(self.zeromq_server.terminate_image(self.image))
+        self.assertEqual(self.zeromq_server.request_capabilities('127.0.0.1'), [])
+        self.assertLess(time() - started_at, 5)
+
+    def test_prepull_image_does_not_wait_for_a_reply(self):
+        started_at = time()
+
+        self.zeromq_server.prepull_image(self.image)
+
+        self.assertLess(time() - started_at, 1)
+        self.assertTrue(self.replier.poll(1000))
+
+    def test_prepull_image_of_unavailable_node_is_bounded(self):
+        self.image.node = '127.0.0.1'
+        self.ports['prepull_image_replier'] = '1'
+        started_at = time()
+
+        self.zeromq_server.prepull_image(self.image)
+
+        self.assertLess(time() - started_at, 1)
+
+    def test_deploy_image_without_instance(self):
+        self.reply_once('')
+
+        self.assertIsNone(self.zeromq_server.deploy_image(self.image))
+
+
+if __name__ == '__main__':
+    unittest.main()
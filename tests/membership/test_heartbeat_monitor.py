@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+
+from motey.communication.communication_manager import CommunicationManager
+from motey.membership.heartbeat_monitor import HeartbeatMonitor
+from motey.utils.logger import Logger
+from motey.utils.node_identity import NodeIdentity
+
+
+class TestHeartbeatMonitor(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.logger = mock.Mock(Logger)
+        self.nodes_repository = mock.Mock()
+        self.node_identity = mock.Mock(NodeIdentity)
+        self.node_identity.get_ip = mock.MagicMock(return_value='127.0.0.1')
+        self.communication_manager = mock.Mock(CommunicationManager)
+        self.heartbeat_monitor = HeartbeatMonitor(logger=self.logger,
+                                                  nodes_repository=self.nodes_repository,
+                                                  node_identity=self.node_identity,
+                                                  communication_manager=self.communication_manager,
+                                                  interval=5,
+                                                  timeout=15)
+        self.heartbeat_monitor.heartbeat_thread = mock.Mock()
+
+    def test_start(self):
+        self.heartbeat_monitor.start()
+
+        self.assertTrue(self.heartbeat_monitor.heartbeat_thread.start.called)
+
+    def test_stop(self):
+        self.heartbeat_monitor.stop()
+
+        self.assertTrue(self.heartbeat_monitor.stopped)
+
+    def test_evict_stale_nodes(self):
+        self.nodes_repository.find_stale = mock.MagicMock(return_value=[{'ip': '127.0.0.2', 'last_seen': 1}])
+
+        result = self.heartbeat_monitor.evict_stale_nodes(now=100)
+
+        self.nodes_repository.find_stale.assert_called_once_with(15, now=100)
+        self.nodes_repository.remove.assert_called_once_with('127.0.0.2')
+        self.assertEqual(result, ['127.0.0.2'])
+
+    def test_evict_stale_nodes_keeps_own_node(self):
+        self.nodes_repository.find_stale = mock.MagicMock(return_value=[{'ip': '127.0.0.1', 'last_seen': 1}])
+
+        result = self.heartbeat_monitor.evict_stale_nodes(now=100)
+
+        self.assertFalse(self.nodes_repository.remove.called)
+        self.assertEqual(result, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
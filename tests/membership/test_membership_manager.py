@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+
+from rx.subjects import Subject
+
+from motey.membership.membership_manager import MembershipManager
+from motey.membership.transport import UdpTransport
+from motey.models.member_state import MemberState
+from motey.utils.logger import Logger
+from motey.utils.node_identity import NodeIdentity
+
+
+class TestMembershipManager(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.logger = mock.Mock(Logger)
+        self.nodes_repository = mock.Mock()
+        self.nodes_repository.change_stream = Subject()
+        self.node_identity = mock.Mock(NodeIdentity)
+        self.node_identity.get_ip = mock.MagicMock(return_value='127.0.0.1')
+        self.transport = mock.Mock(UdpTransport)
+        self.membership_manager = MembershipManager(logger=self.logger,
+                                                    nodes_repository=self.nodes_repository,
+                                                    node_identity=self.node_identity,
+                                                    transport=self.transport,
+                                                    seeds=['127.0.0.2'])
+        self.membership_manager.protocol_thread = mock.Mock()
+
+    def test_start(self):
+        self.membership_manager.start()
+
+        self.assertEqual(self.membership_manager.swim.address, '127.0.0.1')
+        self.assertTrue(self.transport.start.called)
+        self.assertTrue(self.membership_manager.protocol_thread.start.called)
+        address, message = self.transport.send.call_args[0]
+        self.assertEqual(address, '127.0.0.2')
+        self.assertEqual(message['type'], 'join')
+
+    def test_stop(self):
+        self.membership_manager.start()
+
+        self.membership_manager.stop()
+
+        self.assertTrue(self.membership_manager.stopped)
+        self.assertTrue(self.membership_manager.swim.left)
+        self.assertTrue(self.transport.stop.called)
+
+    def test_alive_member_is_added(self):
+        self.membership_manager.start()
+
+        self.membership_manager.swim.change_stream.on_next({'address': '127.0.0.3', 'state': MemberState.ALIVE})
+
+        self.nodes_repository.add.assert_called_once_with('127.0.0.3')
+
+    def test_suspected_member_is_kept(self):
+        self.membership_manager.start()
+
+        self.membership_manager.swim.change_stream.on_next({'address': '127.0.0.3', 'state': MemberState.SUSPECT})
+
+        self.assertFalse(self.nodes_repository.add.called)
+        self.assertFalse(self.nodes_repository.remove.called)
+
+    def test_dead_member_is_removed(self):
+        self.membership_manager.start()
+
+        self.membership_manager.swim.change_stream.on_next({'address': '127.0.0.3', 'state': MemberState.DEAD})
+
+        self.nodes_repository.remove.assert_called_once_with('127.0.0.3')
+
+    def test_unknown_node_is_joined(self):
+        self.membership_manager.start()
+        self.transport.send.reset_mock()
+
+        self.nodes_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.4'}})
+
+        address, message = self.transport.send.call_args[0]
+        self.assertEqual(address, '127.0.0.4')
+        self.assertEqual(message['type'], 'join')
+
+    def test_renamed_node_is_joined_at_current_ip(self):
+        self.membership_manager.start()
+        self.transport.send.reset_mock()
+
+        self.nodes_repository.change_stream.on_next({'event': 'node_renamed',
+                                                     'data': {'previous': '127.0.0.4', 'current': '127.0.0.5'}})
+
+        address, message = self.transport.send.call_args[0]
+        self.assertEqual(address, '127.0.0.5')
+        self.assertEqual(message['type'], 'join')
+
+    def test_known_node_is_not_joined(self):
+        self.membership_manager.start()
+        self.membership_manager.swim.handle_message({'type': 'ack', 'from': '127.0.0.4', 'incarnation': 0})
+        self.transport.send.reset_mock()
+
+        self.nodes_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.4'}})
+
+        self.assertFalse(self.transport.send.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import random
+import unittest
+from unittest import mock
+
+from motey.membership.swim import Swim
+from motey.membership.transport import SimulatedNetwork
+from motey.models.member_state import MemberState
+
+
+class TestSwim(unittest.TestCase):
+    def setUp(self):
+        self.network = SimulatedNetwork(random_generator=random.Random(1))
+        self.members = {}
+        self.now = 0
+        for index in range(5):
+            self.add_member('node-%s' % index)
+
+    def add_member(self, address):
+        member = Swim(address=address,
+                      transport=self.network.create_transport(address),
+                      seeds=['node-0'],
+                      random_generator=random.Random(address))
+        member.transport.start(member.handle_message)
+        self.members[address] = member
+        return member
+
+    def run_for(self, seconds, members=None):
+        members = members if members is not None else self.members.values()
+        end = self.now + seconds
+        while self.now < end:
+            self.now += 0.1
+            self.network.deliver(self.now)
+            for member in members:
+                member.tick(self.now)
+
+    def start_cluster(self):
+        for member in self.members.values():
+            member.start()
+        self.run_for(10)
+
+    def test_join(self):
+        self.start_cluster()
+
+        for address, member in self.members.items():
+            self.assertCountEqual(member.get_members(), [other for other in self.members if other != address])
+
+    def test_join_emits_changes(self):
+        changes = []
+        self.members['node-1'].change_stream.subscribe(changes.append)
+
+        self.start_cluster()
+
+        self.assertIn({'address': 'node-0', 'state': MemberState.ALIVE}, changes)
+        self.assertIn({'address': 'node-4', 'state': MemberState.ALIVE}, changes)
+
+    def test_join_with_lost_messages(self):
+        self.network.loss_rate = 0.2
+
+        self.start_cluster()
+        self.run_for(20)
+
+        for member in self.members.values():
+            self.assertEqual(len(member.get_members()), 4)
+
+    def test_detect_failed_member(self):
+        self.start_cluster()
+        changes = []
+        self.members['node-1'].change_stream.subscribe(changes.append)
+
+        failed = self.members.pop('node-3')
+        failed.transport.stop()
+        self.run_for(15)
+
+        for member in self.members.values():
+            self.assertEqual(member.get_members(MemberState.DEAD), ['node-3'])
+            self.assertNotIn('node-3', member.get_members())
+        self.assertEqual(changes, [{'address': 'node-3', 'state': MemberState.SUSPECT},
+                                   {'address': 'node-3', 'state': MemberState.DEAD}])
+
+    def test_refute_suspicion(self):
+        self.start_cluster()
+        member = self.members['node-2']
+
+        self.members['node-1'].handle_message({'type': 'ack', 'from': 'node-4', 'incarnation': 0,
+                                               'updates': [{'address': 'node-2',
+                                                            'state': MemberState.SUSPECT,
+                                                            'incarnation': 0}]}, self.now)
+        self.assertIn('node-2', self.members['node-1'].get_members(MemberState.SUSPECT))
+        self.run_for(2)
+
+        self.assertEqual(member.incarnation, 1)
+        for address, other in self.members.items():
+            if address != 'node-2':
+                self.assertIn('node-2', other.get_members())
+
+    def test_outdated_alive_does_not_override_suspicion(self):
+        member = Swim(address='node-0', transport=mock.Mock())
+        member.handle_message({'type': 'ack', 'from': 'node-1', 'incarnation': 2}, 0)
+        member.handle_message({'type': 'ack', 'from': 'node-2', 'incarnation': 0,
+                               'updates': [{'address': 'node-1', 'state': MemberState.SUSPECT, 'incarnation': 2}]}, 0)
+
+        member.handle_message({'type': 'ack', 'from': 'node-2', 'incarnation': 0,
+                               'updates': [{'address': 'node-1', 'state': MemberState.ALIVE, 'incarnation': 2}]}, 0)
+
+        self.assertEqual(member.get_members(MemberState.SUSPECT), ['node-1'])
+
+    def test_dead_overrides_suspicion(self):
+        member = Swim(address='node-0', transport=mock.Mock())
+        member.handle_message({'type': 'ack', 'from': 'node-1', 'incarnation': 1}, 0)
+
+        member.handle_message({'type': 'ack', 'from': 'node-2', 'incarnation': 0,
+                               'updates': [{'address': 'node-1', 'state': MemberState.DEAD, 'incarnation': 1}]}, 0)
+
+        self.assertEqual(member.get_members(MemberState.DEAD), ['node-1'])
+
+    def test_piggyback_is_limited(self):
+        transport = mock.Mock()
+        member = Swim(address='node-0', transport=transport, max_piggyback=2)
+        member.handle_message({'type': 'join', 'from': 'node-1', 'incarnation': 0, 'seq': 1,
+                               'members': [{'address': 'node-%s' % index, 'state': MemberState.ALIVE,
+                                            'incarnation': 0} for index in range(2, 6)]}, 0)
+
+        address, message = transport.send.call_args[0]
+        self.assertEqual(address, 'node-1')
+        self.assertEqual(message['type'], 'ack')
+        self.assertEqual(len(message['updates']), 2)
+        self.assertEqual(message['updates'][0]['address'], 'node-1')
+        self.assertEqual(len(message['members']), 5)
+
+    def test_leave(self):
+        self.start_cluster()
+
+        self.members.pop('node-4').leave()
+        self.run_for(5)
+
+        for member in self.members.values():
+            self.assertEqual(member.get_members(MemberState.DEAD), ['node-4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import random
+import unittest
+
+from motey.membership.transport import SimulatedNetwork
+
+
+class TestSimulatedNetwork(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.network = SimulatedNetwork(min_latency=0.1, max_latency=0.1, random_generator=random.Random(1))
+        self.received = []
+        self.sender = self.network.create_transport('node-0')
+        self.receiver = self.network.create_transport('node-1')
+        self.receiver.start(lambda message, now: self.received.append((message, now)))
+
+    def test_deliver_after_latency(self):
+        self.sender.send('node-1', {'type': 'ping'})
+
+        self.network.deliver(0.05)
+        self.assertEqual(self.received, [])
+        self.network.deliver(0.2)
+        self.assertEqual(self.received, [({'type': 'ping'}, 0.1)])
+        self.assertEqual(self.network.sent_messages['node-0'], 1)
+
+    def test_drop_messages(self):
+        self.network.loss_rate = 1.0
+
+        self.sender.send('node-1', {'type': 'ping'})
+        self.network.deliver(1)
+
+        self.assertEqual(self.received, [])
+
+    def test_stopped_member_does_not_receive(self):
+        self.receiver.stop()
+
+        self.sender.send('node-1', {'type': 'ping'})
+        self.network.deliver(1)
+
+        self.assertEqual(self.received, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
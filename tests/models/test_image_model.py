@@ -1,5 +1,6 @@
 import unittest
 
+from motey.models import model
 from motey.models.image import Image
 
 
@@ -12,7 +13,8 @@ class TestImageModel(unittest.TestCase):
             'engine': 'test engine',
             'parameters': {'testparam': 'test param value'},
             'capabilities': {'capability': 'test capability', 'capability_type': 'test capability type'},
-            'node': {'ip': '127.0.0.42'}
+            'node': {'ip': '127.0.0.42'},
+            'warm_pool': 2
         }
         self.expecting_image = Image(id='abc123',
                                      name='test name',
@@ -20,7 +22,8 @@ class TestImageModel(unittest.TestCase):
                                      parameters={'testparam': 'test param value'},
                                      capabilities={'capability': 'test capability',
                                                    'capability_type': 'test capability type'},
-                                     node={'ip': '127.0.0.42'})
+                                     node={'ip': '127.0.0.42'},
+                                     warm_pool=2)
 
     def test_image_construction(self):
         resulting_image = Image(id='abc123',
@@ -45,7 +48,8 @@ class TestImageModel(unittest.TestCase):
                         resulting_image.engine == self.expecting_image.engine and
                         resulting_image.parameters == self.expecting_image.parameters and
                         resulting_image.capabilities == self.expecting_image.capabilities and
-                        resulting_image.node == self.expecting_image.node)
+                        resulting_image.node == self.expecting_image.node and
+                        resulting_image.warm_pool == self.expecting_image.warm_pool)
 
     def test_dict_to_none(self):
         resulting_image = Image.transform(data={'name': 'test name'})
@@ -61,4 +65,41 @@ class TestImageModel(unittest.TestCase):
                         resulting_dict['engine'] == self.test_dict['engine'] and
                         resulting_dict['parameters'] == self.test_dict['parameters'] and
                         resulting_dict['capabilities'] == self.test_dict['capabilities'] and
-                        resulting_dict['node'] == self.test_dict['node'])
+                        resulting_dict['node'] == self.test_dict['node'] and
+                        resulting_dict['warm_pool'] == self.test_dict['warm_pool'])
+
+    def test_default_containers_are_not_shared(self):
+        first_image = Image(name='first', engine='test engine')
+        second_image = Image(name='second', engine='test engine')
+        first_image.parameters['testparam'] = 'test param value'
+
+        self.assertEqual(second_image.parameters, {})
+        self.assertIsNot(first_image.capabilities, second_image.capabilities)
+
+    def test_image_has_slots(self):
+        self.assertFalse(hasattr(self.expecting_image, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.expecting_image.unknown = 'test'
+
+    def test_bytes_round_trip(self):
+        resulting_image = Image.from_bytes(self.expecting_image.to_bytes())
+
+        self.assertEqual(resulting_image.to_dict(), self.test_dict)
+
+    @unittest.skipUnless(model.msgpack, 'msgpack is not installed')
+    def test_msgpack_bytes_round_trip(self):
+        encoded_image = self.expecting_image.to_bytes()
+
+        self.assertNotEqual(encoded_image[:1], b'{')
+        self.assertEqual(Image.from_bytes(encoded_image).to_dict(), self.test_dict)
+
+    def test_invalid_bytes(self):
+        with self.assertRaises(ValueError):
+            Image.from_bytes(b'\xc1')
+
+    def test_json_bytes_to_image(self):
+        resulting_image = Image.from_bytes(b'{"name": "test name", "engine": "test engine"}')
+
+        self.assertEqual(resulting_image.name, 'test name')
+        self.assertEqual(resulting_image.parameters, {})
+        self.assertIsNone(resulting_image.node)
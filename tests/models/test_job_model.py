@@ -0,0 +1,49 @@
+import unittest
+
+from motey.models.job import Job
+from motey.models.job_state import JobState
+
+
+class TestJobModel(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.test_dict = {
+            'id': 'abc123',
+            'action': Job.INSTANTIATE,
+            'service_ids': ['first', 'second'],
+            'state': JobState.RUNNING,
+            'completed': ['first'],
+            'failed': [],
+            'finished_at': None
+        }
+
+    def test_job_construction(self):
+        resulting_job = Job(action=Job.TERMINATE, service_ids=['first'])
+
+        self.assertIsNotNone(resulting_job.id)
+        self.assertEqual(resulting_job.action, Job.TERMINATE)
+        self.assertEqual(resulting_job.state, JobState.QUEUED)
+        self.assertEqual(resulting_job.completed, [])
+        self.assertEqual(resulting_job.failed, [])
+
+    def test_job_construction_generates_unique_ids(self):
+        self.assertNotEqual(Job(action=Job.TERMINATE, service_ids=[]).id, Job(action=Job.TERMINATE, service_ids=[]).id)
+
+    def test_dict_to_job(self):
+        resulting_job = Job.transform(data=self.test_dict)
+
+        self.assertEqual(resulting_job.id, 'abc123')
+        self.assertEqual(resulting_job.service_ids, ['first', 'second'])
+        self.assertEqual(resulting_job.state, JobState.RUNNING)
+        self.assertEqual(resulting_job.completed, ['first'])
+
+    def test_dict_to_none(self):
+        self.assertIsNone(Job.transform(data={'action': Job.INSTANTIATE}))
+        self.assertIsNone(Job.transform(data={'service_ids': []}))
+
+    def test_job_to_dict(self):
+        self.assertEqual(dict(Job.transform(data=self.test_dict)), self.test_dict)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,12 @@
 import unittest
+from unittest import mock
 
 from jsonschema import ValidationError
 from jsonschema import validate
 
 from motey.models.schemas import blueprint_yaml_schema
 from motey.models.schemas import capability_json_schema
+from motey.models import schemas
 
 
 class TestSchemas(unittest.TestCase):
@@ -66,3 +68,40 @@ class TestSchemas(unittest.TestCase):
         }]
         with self.assertRaises(ValidationError) as cm:
             validate(data, capability_json_schema)
+
+    def test_validate_blueprint(self):
+        data = {
+            'service_name': 'test_service_name',
+            'images': [{'name': 'test_image_name', 'engine': 'docker'}]
+        }
+        self.assertEqual(schemas.validate_blueprint(data), None)
+
+    def test_validate_blueprint_error(self):
+        with self.assertRaises(ValidationError):
+            schemas.validate_blueprint({'service_name': 'test_service_name'})
+
+    def test_validate_capabilities(self):
+        data = [{"capability": 'test capability', "capability_type": 'test capability type'}]
+        self.assertEqual(schemas.validate_capabilities(data), None)
+
+    def test_validate_capabilities_error(self):
+        with self.assertRaises(ValidationError):
+            schemas.validate_capabilities([{"capability_type": 'test capability type'}])
+
+    def test_compile_validator_without_fastjsonschema(self):
+        with mock.patch.object(schemas, 'fastjsonschema', None):
+            validate_capabilities = schemas.compile_validator(capability_json_schema)
+
+        self.assertEqual(validate_capabilities([]), None)
+        with self.assertRaises(ValidationError):
+            validate_capabilities([{"capability_type": 'test capability type'}])
+
+    def test_compile_validator_translates_fastjsonschema_errors(self):
+        fastjsonschema = mock.Mock()
+        fastjsonschema.JsonSchemaException = ValueError
+        fastjsonschema.compile = mock.MagicMock(return_value=mock.MagicMock(side_effect=ValueError('invalid')))
+        with mock.patch.object(schemas, 'fastjsonschema', fastjsonschema):
+            validate_capabilities = schemas.compile_validator(capability_json_schema)
+
+        with self.assertRaises(ValidationError):
+            validate_capabilities([])
@@ -61,7 +61,8 @@ class TestServiceModel(unittest.TestCase):
                         'engine': 'test engine',
                         'node': None,
                         'capabilities': {},
-                        'parameters': {}}, ],
+                        'parameters': {},
+                        'warm_pool': 0}, ],
             'state_message': 'test state message'
         }
         resulting_dict = dict(self.expecting_service)
@@ -70,3 +71,21 @@ class TestServiceModel(unittest.TestCase):
                         resulting_dict['state'] == test_dict['state'] and
                         resulting_dict['images'] == test_dict['images'] and
                         resulting_dict['state_message'] == test_dict['state_message'])
+
+    def test_service_ids_are_unique(self):
+        first_service = Service(service_name='first', images=[])
+        second_service = Service(service_name='second', images=[])
+
+        self.assertNotEqual(first_service.id, second_service.id)
+
+    def test_dict_without_id_to_service(self):
+        resulting_service = Service.transform(data={'service_name': 'test name', 'images': []})
+
+        self.assertEqual(len(resulting_service.id), 32)
+        self.assertEqual(resulting_service.state, ServiceState.INITIAL)
+
+    def test_bytes_round_trip(self):
+        resulting_service = Service.from_bytes(self.expecting_service.to_bytes())
+
+        self.assertEqual(resulting_service.to_dict(), self.expecting_service.to_dict())
+        self.assertIsInstance(resulting_service.images[0], Image)
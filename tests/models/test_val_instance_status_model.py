@@ -15,3 +15,10 @@ class TestVALInstanceStatus(unittest.TestCase):
                         resulting_val_instance_status.used_memory == 0 and
                         resulting_val_instance_status.network_tx_bytes == 0 and
                         resulting_val_instance_status.network_rx_bytes == 0)
+
+    def test_val_instance_status_to_dict(self):
+        resulting_dict = VALInstanceStatus(name='test instance', used_memory=42).to_dict()
+
+        self.assertEqual(resulting_dict['name'], 'test instance')
+        self.assertEqual(resulting_dict['used_memory'], 42)
+        self.assertEqual(resulting_dict['ip'], '0.0.0.0')
@@ -3,24 +3,43 @@ from unittest import mock
 
 from rx.subjects import Subject
 
+from motey.communication.api_routes.service_batch import ServiceBatch
 from motey.communication.communication_manager import CommunicationManager
 from motey.models.image import Image
 from motey.models.image_state import ImageState
+from motey.models.job import Job
+from motey.models.job_state import JobState
 from motey.models.service import Service
 from motey.models.service_state import ServiceState
 from motey.orchestrator import inter_node_orchestrator
 from motey.repositories.capability_repository import CapabilityRepository
+from motey.repositories.job_repository import JobRepository
 from motey.repositories.nodes_repository import NodesRepository
 from motey.repositories.service_repository import ServiceRepository
 from motey.utils.logger import Logger
+from motey.utils.node_identity import NodeIdentity
 from motey.val.valmanager import VALManager
 
 
+class SynchronousThread(object):
+    """
+    Thread replacement which executes the target in the calling thread.
+    """
+
+    def __init__(self, target, args=()):
+        self.target = target
+        self.args = args
+        self.daemon = False
+
+    def start(self):
+        self.target(*self.args)
+
+
 class TestInterNodeOrchestrator(unittest.TestCase):
     @classmethod
     def setUp(self):
         inter_node_orchestrator.ServiceEndpoint = mock.Mock(inter_node_orchestrator.ServiceEndpoint)
-        inter_node_orchestrator.get_own_ip = mock.MagicMock(return_value='127.0.0.42')
+        inter_node_orchestrator.ServiceBatchEndpoint = mock.Mock(ServiceBatch)
 
         self.test_image = Image(name='test image name', engine='test engine', capabilities=['first', 'second', 'third'])
         self.test_service = Service(service_name='test service name', images=[self.test_image])
@@ -30,7 +49,13 @@ class TestInterNodeOrchestrator(unittest.TestCase):
         self.service_repository = mock.Mock(ServiceRepository)
         self.capability_repository = mock.Mock(CapabilityRepository)
         self.node_repository = mock.Mock(NodesRepository)
+        self.node_repository.change_stream = Subject()
         self.communication_manager = mock.Mock(CommunicationManager)
+        self.communication_manager.capabilities_delta_stream = Subject()
+        self.job_repository = mock.Mock(JobRepository)
+        self.node_identity = mock.Mock(NodeIdentity)
+        self.node_identity.get_ip = mock.MagicMock(return_value='127.0.0.42')
+        self.image_prepull_manager = mock.Mock()
 
         self.inter_node_orchestrator = inter_node_orchestrator.InterNodeOrchestrator(
             logger=self.logger,
@@ -38,7 +63,10 @@ class TestInterNodeOrchestrator(unittest.TestCase):
             service_repository=self.service_repository,
             capability_repository=self.capability_repository,
             node_repository=self.node_repository,
-            communication_manager=self.communication_manager
+            communication_manager=self.communication_manager,
+            job_repository=self.job_repository,
+            node_identity=self.node_identity,
+            image_prepull_manager=self.image_prepull_manager
         )
 
         self.inter_node_orchestrator.yaml_post_stream = mock.Mock(Subject)
@@ -92,6 +120,23 @@ class TestInterNodeOrchestrator(unittest.TestCase):
         self.assertTrue(self.service_repository.update.called)
         self.assertFalse(self.communication_manager.deploy_image.called)
 
+    def test_prepull_local_image(self):
+        self.test_image.node = '127.0.0.42'
+
+        self.inter_node_orchestrator.prepull_image(self.test_image)
+
+        self.image_prepull_manager.prepull.assert_called_once_with(self.test_image)
+        self.assertFalse(self.communication_manager.prepull_image.called)
+
+    def test_prepull_remote_image_failure_is_ignored(self):
+        self.test_image.node = '127.0.0.23'
+        self.communication_manager.prepull_image = mock.MagicMock(side_effect=ValueError('node is not available'))
+
+        self.inter_node_orchestrator.prepull_image(self.test_image)
+
+        self.assertFalse(self.image_prepull_manager.prepull.called)
+        self.assertTrue(self.logger.error.called)
+
     def test_deploy_service(self):
         self.communication_manager.deploy_image = mock.MagicMock(return_value='abc123')
         self.service_repository.update = mock.MagicMock(return_value=None)
@@ -210,6 +255,73 @@ class TestInterNodeOrchestrator(unittest.TestCase):
         self.assertTrue(self.node_repository.all.called)
         self.assertTrue(self.communication_manager.request_capabilities.called)
 
+    def test_find_node_uses_cached_capabilities(self):
+        test_node = {'ip': '127.0.0.42'}
+        self.node_repository.all = mock.MagicMock(return_value=[test_node])
+        self.communication_manager.request_capabilities = mock.MagicMock(
+            return_value=[{'capability': 'first'}, {'capability': 'second'}, {'capability': 'third'}])
+
+        self.inter_node_orchestrator.find_node(image=self.test_image)
+        result = self.inter_node_orchestrator.find_node(image=self.test_image)
+
+        self.assertEqual(test_node['ip'], result['ip'])
+        self.assertEqual(self.communication_manager.request_capabilities.call_count, 1)
+
+    def test_find_node_requests_expired_capabilities(self):
+        test_node = {'ip': '127.0.0.42'}
+        self.node_repository.all = mock.MagicMock(return_value=[test_node])
+        self.communication_manager.request_capabilities = mock.MagicMock(return_value=[{'capability': 'first'}])
+        self.inter_node_orchestrator.capabilities_ttl = 0
+
+        self.inter_node_orchestrator.find_node(image=self.test_image)
+        self.inter_node_orchestrator.find_node(image=self.test_image)
+
+        self.assertEqual(self.communication_manager.request_capabilities.call_count, 2)
+
+    def test_capabilities_delta_updates_cached_capabilities(self):
+        test_node = {'ip': '127.0.0.42'}
+        self.node_repository.all = mock.MagicMock(return_value=[test_node])
+        self.communication_manager.request_capabilities = mock.MagicMock(
+            return_value=[{'capability': 'first', 'type': 'test type'}, {'capability': 'second', 'type': 'test type'},
+                          {'capability': 'obsolete', 'type': 'test type'}])
+        self.inter_node_orchestrator.get_node_capabilities('127.0.0.42')
+
+        self.communication_manager.capabilities_delta_stream.on_next({
+            'ip': '127.0.0.42',
+            'added': [{'capability': 'third', 'capability_type': 'test type'}],
+            'removed': [{'capability': 'obsolete', 'capability_type': 'test type'}]
+        })
+        result = self.inter_node_orchestrator.find_node(image=self.test_image)
+
+        self.assertEqual(test_node['ip'], result['ip'])
+        self.assertEqual(self.communication_manager.request_capabilities.call_count, 1)
+        self.assertEqual([entry['capability'] for entry in self.inter_node_orchestrator.get_node_capabilities('127.0.0.42')],
+                         ['first', 'second', 'third'])
+
+    def test_capabilities_delta_of_unknown_node(self):
+        self.communication_manager.capabilities_delta_stream.on_next({
+            'ip': '127.0.0.43',
+            'added': [{'capability': 'first', 'capability_type': 'test type'}],
+            'removed': []
+        })
+
+        self.assertNotIn('127.0.0.43', self.inter_node_orchestrator.node_capabilities)
+
+    def test_invalid_capabilities_delta(self):
+        self.communication_manager.capabilities_delta_stream.on_next({'added': []})
+
+        self.assertTrue(self.logger.error.called)
+
+    def test_node_change_drops_cached_capabilities(self):
+        self.communication_manager.request_capabilities = mock.MagicMock(return_value=[{'capability': 'first'}])
+        self.service_repository.find_by_node = mock.MagicMock(return_value=[])
+        self.inter_node_orchestrator.get_node_capabilities('127.0.0.42')
+
+        self.node_repository.change_stream.on_next({'event': 'node_renamed',
+                                                    'data': {'previous': '127.0.0.42', 'current': '127.0.0.43'}})
+
+        self.assertNotIn('127.0.0.42', self.inter_node_orchestrator.node_capabilities)
+
     def test_terminate_service_service_exist(self):
         self.service_repository.has = mock.MagicMock(return_value=True)
 
@@ -229,6 +341,182 @@ class TestInterNodeOrchestrator(unittest.TestCase):
         self.assertFalse(self.communication_manager.terminate_image.called)
         self.assertTrue(self.logger.error.called)
 
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_instantiate_services(self):
+        test_service = Service(service_name='test service name',
+                               images=[Image(name='test image name', engine='test engine')])
+        second_test_service = Service(service_name='second test service name', images=[self.test_image], id='second')
+        self.capability_repository.has = mock.MagicMock(return_value=False)
+        self.node_repository.all = mock.MagicMock(return_value=[])
+        job = Job(action=Job.INSTANTIATE, service_ids=[test_service.id, second_test_service.id])
+
+        self.inter_node_orchestrator.instantiate_services(job=job, services=[test_service, second_test_service])
+
+        self.job_repository.set_state.assert_called_once_with(job.id, JobState.RUNNING)
+        self.assertEqual(self.service_repository.add_multiple.call_count, 1)
+        self.assertEqual(len(self.service_repository.add_multiple.call_args[0][0]), 2)
+        self.job_repository.mark_service.assert_any_call(job.id, test_service.id, True)
+        self.job_repository.mark_service.assert_any_call(job.id, 'second', False)
+        self.assertEqual(self.communication_manager.deploy_image.call_count, 1)
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_terminate_services(self):
+        self.service_repository.has = mock.MagicMock(side_effect=[True, False])
+        second_test_service = Service(service_name='second test service name', images=[self.test_image], id='second')
+        job = Job(action=Job.TERMINATE, service_ids=[self.test_service.id, second_test_service.id])
+
+        self.inter_node_orchestrator.terminate_services(job=job, services=[self.test_service, second_test_service])
+
+        self.job_repository.set_state.assert_called_once_with(job.id, JobState.RUNNING)
+        self.job_repository.mark_service.assert_any_call(job.id, self.test_service.id, True)
+        self.job_repository.mark_service.assert_any_call(job.id, 'second', False)
+        self.assertEqual(self.communication_manager.terminate_image.call_count, 1)
+        self.job_repository.finish.assert_called_once_with(job.id)
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_terminate_services_with_failing_service(self):
+        self.service_repository.has = mock.MagicMock(side_effect=[ValueError('broken database'), True])
+        second_test_service = Service(service_name='second test service name', images=[self.test_image], id='second')
+        job = Job(action=Job.TERMINATE, service_ids=[self.test_service.id, second_test_service.id])
+
+        self.inter_node_orchestrator.terminate_services(job=job, services=[self.test_service, second_test_service])
+
+        self.job_repository.mark_service.assert_any_call(job.id, self.test_service.id, False)
+        self.job_repository.mark_service.assert_any_call(job.id, 'second', True)
+        self.job_repository.finish.assert_called_once_with(job.id)
+        self.assertTrue(self.logger.error.called)
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_instantiate_services_with_failed_deployment(self):
+        self.capability_repository.has = mock.MagicMock(return_value=True)
+        self.communication_manager.deploy_image = mock.MagicMock(return_value=None)
+        job = Job(action=Job.INSTANTIATE, service_ids=[self.test_service.id])
+
+        self.inter_node_orchestrator.instantiate_services(job=job, services=[self.test_service])
+
+        self.job_repository.mark_service.assert_called_once_with(job.id, self.test_service.id, False)
+        updated_service = self.service_repository.update.call_args[0][0]
+        self.assertEqual(updated_service['state'], ServiceState.ERROR)
+        self.assertIn(self.test_image.name, updated_service['state_message'])
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_instantiate_services_finishes_failed_job(self):
+        self.service_repository.add_multiple = mock.MagicMock(side_effect=ValueError('broken database'))
+        job = Job(action=Job.INSTANTIATE, service_ids=[self.test_service.id])
+
+        self.inter_node_orchestrator.instantiate_services(job=job, services=[self.test_service])
+
+        self.assertFalse(self.job_repository.mark_service.called)
+        self.job_repository.finish.assert_called_once_with(job.id)
+        self.assertTrue(self.logger.error.called)
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_reschedule_images_of_removed_node(self):
+        local_image = Image(name='local image', engine='test engine', node='127.0.0.42', id='local')
+        lost_image = Image(name='lost image', engine='test engine', node='127.0.0.23', id='lost')
+        test_service = Service(service_name='test service name', images=[local_image, lost_image],
+                               state=ServiceState.RUNNING)
+        self.service_repository.find_by_node = mock.MagicMock(return_value=[dict(test_service)])
+        self.communication_manager.deploy_image = mock.MagicMock(return_value='rescheduled')
+
+        self.node_repository.change_stream.on_next({'event': 'node_removed', 'data': {'ip': '127.0.0.23'}})
+
+        self.service_repository.find_by_node.assert_called_once_with('127.0.0.23')
+        self.assertEqual(self.communication_manager.deploy_image.call_count, 1)
+        updated_service = self.service_repository.update.call_args[0][0]
+        self.assertEqual(updated_service['state'], ServiceState.RUNNING)
+        self.assertEqual(updated_service['images'][0]['id'], 'local')
+        self.assertEqual(updated_service['images'][1]['node'], '127.0.0.42')
+        self.assertEqual(updated_service['images'][1]['id'], 'rescheduled')
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_reschedule_without_suitable_node(self):
+        lost_image = Image(name='lost image', engine='test engine', capabilities=['first'], node='127.0.0.23')
+        test_service = Service(service_name='test service name', images=[lost_image], state=ServiceState.RUNNING)
+        self.service_repository.find_by_node = mock.MagicMock(return_value=[dict(test_service)])
+        self.capability_repository.has = mock.MagicMock(return_value=False)
+        self.node_repository.all = mock.MagicMock(return_value=[])
+
+        self.inter_node_orchestrator.reschedule_node('127.0.0.23')
+
+        self.assertFalse(self.communication_manager.deploy_image.called)
+        self.assertEqual(self.service_repository.update.call_args[0][0]['state'], ServiceState.ERROR)
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_reschedule_with_failed_deployment(self):
+        lost_image = Image(name='lost image', engine='test engine', node='127.0.0.23', id='lost')
+        test_service = Service(service_name='test service name', images=[lost_image], state=ServiceState.RUNNING)
+        self.service_repository.find_by_node = mock.MagicMock(return_value=[dict(test_service)])
+        self.communication_manager.deploy_image = mock.MagicMock(return_value=None)
+
+        self.inter_node_orchestrator.reschedule_node('127.0.0.23')
+
+        updated_service = self.service_repository.update.call_args[0][0]
+        self.assertEqual(updated_service['state'], ServiceState.ERROR)
+        self.assertIn('lost image', updated_service['state_message'])
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_reschedule_ignores_terminated_services(self):
+        lost_image = Image(name='lost image', engine='test engine', node='127.0.0.23')
+        test_service = Service(service_name='test service name', images=[lost_image], state=ServiceState.TERMINATED)
+        self.service_repository.find_by_node = mock.MagicMock(return_value=[dict(test_service)])
+
+        self.inter_node_orchestrator.reschedule_node('127.0.0.23')
+
+        self.assertFalse(self.communication_manager.deploy_image.called)
+        self.assertFalse(self.service_repository.update.called)
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_superseded_images_are_terminated_if_node_rejoins(self):
+        lost_image = Image(name='lost image', engine='test engine', node='127.0.0.23', id='lost')
+        test_service = Service(service_name='test service name', images=[lost_image], state=ServiceState.RUNNING)
+        self.service_repository.find_by_node = mock.MagicMock(return_value=[dict(test_service)])
+        self.node_repository.has = mock.MagicMock(return_value=False)
+        self.communication_manager.deploy_image = mock.MagicMock(return_value='rescheduled')
+        self.communication_manager.terminate_image = mock.MagicMock(side_effect=[False, True])
+
+        self.node_repository.change_stream.on_next({'event': 'node_removed', 'data': {'ip': '127.0.0.23'}})
+
+        self.assertFalse(self.communication_manager.terminate_image.called)
+
+        self.node_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.23'}})
+        self.node_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.23'}})
+        self.node_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.23'}})
+
+        self.assertEqual(self.communication_manager.terminate_image.call_count, 2)
+        terminated_image = self.communication_manager.terminate_image.call_args[0][0]
+        self.assertEqual((terminated_image.id, terminated_image.node), ('lost', '127.0.0.23'))
+        self.assertEqual(self.inter_node_orchestrator.superseded_images, {})
+
+    @mock.patch.object(inter_node_orchestrator, 'threading', mock.Mock(Thread=SynchronousThread))
+    def test_superseded_images_are_terminated_if_node_rejoined_during_reschedule(self):
+        lost_image = Image(name='lost image', engine='test engine', node='127.0.0.23', id='lost')
+        test_service = Service(service_name='test service name', images=[lost_image], state=ServiceState.RUNNING)
+        self.service_repository.find_by_node = mock.MagicMock(return_value=[dict(test_service)])
+        self.node_repository.has = mock.MagicMock(return_value=True)
+        self.communication_manager.terminate_image = mock.MagicMock(return_value=True)
+
+        self.inter_node_orchestrator.reschedule_node('127.0.0.23')
+
+        self.assertEqual(self.communication_manager.terminate_image.call_args[0][0].id, 'lost')
+
+    def test_renamed_node_is_not_rescheduled(self):
+        moved_image = Image(name='moved image', engine='test engine', node='127.0.0.23', id='moved')
+        test_service = Service(service_name='test service name', images=[moved_image], state=ServiceState.RUNNING)
+        self.service_repository.find_by_node = mock.MagicMock(return_value=[dict(test_service)])
+
+        self.node_repository.change_stream.on_next({'event': 'node_renamed',
+                                                    'data': {'previous': '127.0.0.23', 'current': '127.0.0.24'}})
+
+        self.assertFalse(self.communication_manager.deploy_image.called)
+        updated_image = self.service_repository.update.call_args[0][0]['images'][0]
+        self.assertEqual((updated_image['node'], updated_image['id']), ('127.0.0.24', 'moved'))
+
+    def test_added_node_is_not_rescheduled(self):
+        self.node_repository.change_stream.on_next({'event': 'node_added', 'data': {'ip': '127.0.0.23'}})
+
+        self.assertFalse(self.service_repository.find_by_node.called)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+from unittest import mock
+
+from rx.subjects import Subject
+
+from motey.models.image import Image
+from motey.models.image_state import ImageState
+from motey.models.service import Service
+from motey.models.service_state import ServiceState
+from motey.orchestrator.service_reconciler import ServiceReconciler
+
+
+class TestServiceReconciler(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.service_repository = mock.Mock()
+        self.service_repository.change_stream = Subject()
+        self.valmanager = mock.Mock()
+        self.communication_manager = mock.Mock()
+        self.inter_node_orchestrator = mock.Mock()
+        self.node_identity = mock.Mock()
+        self.node_identity.get_ip = mock.MagicMock(return_value='127.0.0.1')
+        self.service_reconciler = ServiceReconciler(logger=mock.Mock(),
+                                                    service_repository=self.service_repository,
+                                                    valmanager=self.valmanager,
+                                                    communication_manager=self.communication_manager,
+                                                    inter_node_orchestrator=self.inter_node_orchestrator,
+                                                    node_identity=self.node_identity,
+                                                    resync_shards=4,
+                                                    rate=0)
+        self.service = Service(service_name='test service', state=ServiceState.RUNNING,
+                               images=[Image(name='alpine', engine='docker', id='local-instance', node='127.0.0.1'),
+                                       Image(name='busybox', engine='docker', id='remote-instance',
+                                             node='127.0.0.2')])
+
+    def store(self, service):
+        self.service_repository.find_by_ids = mock.MagicMock(return_value=[service.to_dict()])
+
+    def test_service_in_sync(self):
+        self.store(self.service)
+        self.valmanager.get_instance_state = mock.MagicMock(return_value=ImageState.RUNNING)
+        self.communication_manager.request_image_status = mock.MagicMock(return_value=ImageState.RUNNING)
+
+        self.assertTrue(self.service_reconciler.reconcile(self.service.id))
+        self.assertFalse(self.service_repository.update.called)
+
+    def test_instantiated_service_becomes_running(self):
+        self.service.state = ServiceState.INSTANTIATING
+        self.store(self.service)
+        self.valmanager.get_instance_state = mock.MagicMock(return_value=ImageState.RUNNING)
+        self.communication_manager.request_image_status = mock.MagicMock(return_value=ImageState.RUNNING)
+
+        self.assertTrue(self.service_reconciler.reconcile(self.service.id))
+        self.assertEqual(self.service_repository.update.call_args[0][0]['state'], ServiceState.RUNNING)
+
+    def test_starting_images_keep_the_service_state(self):
+        self.service.state = ServiceState.INSTANTIATING
+        self.store(self.service)
+        self.valmanager.get_instance_state = mock.MagicMock(return_value=ImageState.RUNNING)
+        self.communication_manager.request_image_status = mock.MagicMock(return_value=ImageState.INSTANTIATING)
+        self.service_reconciler.work_queue.add_after = mock.MagicMock()
+
+        self.assertTrue(self.service_reconciler.reconcile(self.service.id))
+        self.assertFalse(self.service_repository.update.called)
+        self.service_reconciler.work_queue.add_after.assert_called_once_with(self.service.id, 5)
+        self.assertFalse(self.communication_manager.deploy_image.called)
+
+    def test_failed_local_image_is_restarted(self):
+        self.store(self.service)
+        self.valmanager.get_instance_state = mock.MagicMock(return_value=ImageState.TERMINATED)
+        self.valmanager.instantiate = mock.MagicMock(return_value='new-instance')
+        self.communication_manager.request_image_status = mock.MagicMock(return_value=ImageState.RUNNING)
+
+        self.assertTrue(self.service_reconciler.reconcile(self.service.id))
+        updated_images = self.service_repository.update.call_args[0][0]['images']
+        self.assertEqual(updated_images[0]['id'], 'new-instance')
+        self.assertFalse(self.inter_node_orchestrator.place_image.called)
+
+    def test_failed_remote_image_is_rescheduled(self):
+        self.store(self.service)
+        self.valmanager.get_instance_state = mock.MagicMock(return_value=ImageState.RUNNING)
+        self.communication_manager.request_image_status = mock.MagicMock(return_value=ImageState.ERROR)
+        self.communication_manager.deploy_image = mock.MagicMock(side_effect=[None, 'rescheduled-instance'])
+        self.inter_node_orchestrator.place_image = mock.MagicMock(return_value='127.0.0.3')
+
+        self.assertTrue(self.service_reconciler.reconcile(self.service.id))
+        updated_image = self.service_repository.update.call_args[0][0]['images'][1]
+        self.assertEqual((updated_image['node'], updated_image['id']), ('127.0.0.3', 'rescheduled-instance'))
+
+    def test_unreachable_node_is_retried(self):
+        self.store(self.service)
+        self.valmanager.get_instance_state = mock.MagicMock(return_value=ImageState.RUNNING)
+        self.communication_manager.request_image_status = mock.MagicMock(return_value=None)
+
+        self.assertFalse(self.service_reconciler.reconcile(self.service.id))
+        self.assertFalse(self.communication_manager.deploy_image.called)
+
+    def test_inactive_and_deploying_services_are_ignored(self):
+        self.service.state = ServiceState.STOPPING
+        self.store(self.service)
+        self.assertTrue(self.service_reconciler.reconcile(self.service.id))
+
+        self.service.state = ServiceState.INSTANTIATING
+        self.service.images[1].id = ''
+        self.store(self.service)
+        self.assertTrue(self.service_reconciler.reconcile(self.service.id))
+
+        self.assertFalse(self.valmanager.get_instance_state.called)
+
+    def test_service_is_set_to_error_after_max_retries(self):
+        self.store(self.service)
+
+        self.service_reconciler.fail(self.service.id)
+
+        updated_service = self.service_repository.update.call_args[0][0]
+        self.assertEqual(updated_service['state'], ServiceState.ERROR)
+
+    def test_changed_services_are_queued(self):
+        self.service_reconciler.worker_threads = []
+        self.service_reconciler.resync_interval = 0
+        self.service_reconciler.start()
+
+        self.service_repository.change_stream.on_next({'event': 'service_updated', 'data': {'id': 'updated'}})
+        self.service_reconciler.handle_service_change({'event': 'service_added', 'data': {'id': 'added'}})
+        self.service_reconciler.handle_service_change({'event': 'service_removed', 'data': {'id': 'removed'}})
+
+        self.assertEqual(self.service_reconciler.work_queue.get(), 'updated')
+        self.assertEqual(self.service_reconciler.work_queue.get(), 'added')
+        self.assertEqual(len(self.service_reconciler.work_queue), 0)
+        self.service_reconciler.stop()
+
+    def test_resync_queues_active_services_of_one_shard(self):
+        entries = [{'id': 'service-%s' % index, 'state': ServiceState.RUNNING} for index in range(40)]
+        entries.append({'id': 'terminated', 'state': ServiceState.TERMINATED})
+        self.service_repository.all = mock.MagicMock(return_value=entries)
+
+        counts = [self.service_reconciler.resync(shard) for shard in range(4)]
+
+        self.assertEqual(sum(counts), 40)
+        self.assertTrue(all(count < 40 for count in counts))
+        self.assertEqual(len(self.service_reconciler.work_queue), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+from unittest import mock
+
+from motey.models.image import Image
+from motey.models.service import Service
+from motey.models.service_state import ServiceState
+from motey.orchestrator.service_recovery import ServiceRecovery
+
+
+class TestServiceRecovery(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.service_repository = mock.Mock()
+        self.valmanager = mock.Mock()
+        self.valmanager.get_running_instances = mock.MagicMock(return_value={'running-instance'})
+        self.communication_manager = mock.Mock()
+        self.inter_node_orchestrator = mock.Mock()
+        self.node_identity = mock.Mock()
+        self.node_identity.get_ip = mock.MagicMock(return_value='127.0.0.1')
+        self.service_recovery = ServiceRecovery(logger=mock.Mock(),
+                                                service_repository=self.service_repository,
+                                                valmanager=self.valmanager,
+                                                communication_manager=self.communication_manager,
+                                                inter_node_orchestrator=self.inter_node_orchestrator,
+                                                node_identity=self.node_identity)
+
+    def store(self, *services):
+        self.service_repository.all = mock.MagicMock(return_value=[service.to_dict() for service in services])
+
+    def updated_services(self):
+        return {service['id']: service for service in self.service_repository.update_multiple.call_args[0][0]}
+
+    def test_running_images_are_kept(self):
+        service = Service(service_name='kept', state=ServiceState.INSTANTIATING,
+                          images=[Image(name='alpine', engine='docker', id='running-instance', node='127.0.0.1')])
+        self.store(service)
+
+        results = self.service_recovery.recover()
+
+        self.assertEqual(results, {'kept': 1})
+        self.assertFalse(self.valmanager.instantiate.called)
+        self.assertEqual(self.updated_services()[service.id]['state'], ServiceState.RUNNING)
+
+    def test_running_instances_are_requested_once(self):
+        self.store(*[Service(service_name='service %s' % index, state=ServiceState.RUNNING,
+                             images=[Image(name='alpine', engine='docker', id='running-instance', node='127.0.0.1')])
+                     for index in range(3)])
+
+        self.service_recovery.recover()
+
+        self.assertEqual(self.valmanager.get_running_instances.call_count, 1)
+        self.assertEqual(len(self.valmanager.get_running_instances.call_args[0][0]), 3)
+        self.service_repository.update_multiple.assert_called_once_with([])
+
+    def test_stopped_local_image_is_redeployed(self):
+        self.valmanager.instantiate = mock.MagicMock(return_value='new-instance')
+        service = Service(service_name='redeployed', state=ServiceState.RUNNING,
+                          images=[Image(name='alpine', engine='docker', id='stopped-instance', node='127.0.0.1')])
+        self.store(service)
+
+        results = self.service_recovery.recover()
+
+        self.assertEqual(results, {'redeployed': 1})
+        updated_service = self.updated_services()[service.id]
+        self.assertEqual(updated_service['images'][0]['id'], 'new-instance')
+        self.assertEqual(updated_service['state'], ServiceState.RUNNING)
+
+    def test_interrupted_placement_is_resumed(self):
+        self.inter_node_orchestrator.place_image = mock.MagicMock(return_value='127.0.0.2')
+        self.communication_manager.deploy_image = mock.MagicMock(return_value='remote-instance')
+        service = Service(service_name='resumed', state=ServiceState.INSTANTIATING,
+                          images=[Image(name='alpine', engine='docker', id='running-instance', node='127.0.0.1'),
+                                  Image(name='busybox', engine='docker')])
+        self.store(service)
+
+        results = self.service_recovery.recover()
+
+        self.assertEqual(results, {'kept': 1, 'redeployed': 1})
+        updated_images = self.updated_services()[service.id]['images']
+        self.assertEqual((updated_images[1]['node'], updated_images[1]['id']), ('127.0.0.2', 'remote-instance'))
+
+    def test_remote_images_with_instance_are_not_redeployed(self):
+        service = Service(service_name='remote', state=ServiceState.RUNNING,
+                          images=[Image(name='alpine', engine='docker', id='remote-instance', node='127.0.0.2')])
+        self.store(service)
+
+        results = self.service_recovery.recover()
+
+        self.assertEqual(results, {'remote': 1})
+        self.assertFalse(self.valmanager.get_running_instances.called)
+        self.assertFalse(self.communication_manager.deploy_image.called)
+
+    def test_failed_deployment(self):
+        self.valmanager.instantiate = mock.MagicMock(return_value=None)
+        service = Service(service_name='failed', state=ServiceState.INSTANTIATING,
+                          images=[Image(name='alpine', engine='docker', node='127.0.0.1')])
+        self.store(service)
+
+        results = self.service_recovery.recover()
+
+        self.assertEqual(results, {'failed': 1})
+        self.assertEqual(self.updated_services()[service.id]['state'], ServiceState.ERROR)
+
+    def test_interrupted_termination_is_finished(self):
+        service = Service(service_name='stopping', state=ServiceState.STOPPING,
+                          images=[Image(name='alpine', engine='docker', id='running-instance', node='127.0.0.1'),
+                                  Image(name='busybox', engine='docker', id='remote-instance', node='127.0.0.2')])
+        self.store(service)
+
+        self.service_recovery.recover()
+
+        self.assertEqual(self.valmanager.terminate.call_args[0][0].id, 'running-instance')
+        self.assertEqual(self.communication_manager.terminate_image.call_args[0][0].id, 'remote-instance')
+        self.assertEqual(self.updated_services()[service.id]['state'], ServiceState.TERMINATED)
+
+    def test_unreachable_nodes_are_counted_as_failed(self):
+        self.communication_manager.terminate_image = mock.MagicMock(return_value=False)
+        self.communication_manager.deploy_image = mock.MagicMock(return_value=None)
+        stopping = Service(service_name='stopping', state=ServiceState.STOPPING,
+                           images=[Image(name='alpine', engine='docker', id='remote-instance', node='127.0.0.2')])
+        deploying = Service(service_name='deploying', state=ServiceState.INSTANTIATING,
+                            images=[Image(name='busybox', engine='docker', node='127.0.0.2')])
+        self.store(stopping, deploying)
+
+        results = self.service_recovery.recover()
+
+        self.assertEqual(results, {'failed': 2})
+        updated_services = self.updated_services()
+        self.assertNotIn(stopping.id, updated_services)
+        self.assertEqual(updated_services[deploying.id]['state'], ServiceState.ERROR)
+
+    def test_finished_services_are_ignored(self):
+        self.store(Service(service_name='terminated', state=ServiceState.TERMINATED,
+                           images=[Image(name='alpine', engine='docker', id='old-instance', node='127.0.0.1')]))
+
+        self.assertEqual(self.service_recovery.recover(), {})
+        self.assertFalse(self.valmanager.get_running_instances.called)
+        self.assertFalse(self.service_repository.update_multiple.called)
+
+    def test_finished_is_set_after_failed_recovery(self):
+        self.service_repository.all = mock.MagicMock(side_effect=ValueError('broken database'))
+
+        self.service_recovery.start()
+
+        self.assertTrue(self.service_recovery.finished.wait(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 from unittest import mock
 
 from tinydb import TinyDB
+from tinydb.database import Element
 
 from motey.repositories import base_repository
 
@@ -47,6 +48,16 @@ class TestBaseRepository(unittest.TestCase):
 
         self.assertIsNone(result)
 
+    def test_all_with_empty_database(self):
+        test_base_repository = base_repository.BaseRepository()
+        test_base_repository.db = mock.MagicMock(TinyDB)
+        test_base_repository.db.__len__.return_value = 0
+        test_base_repository.db.all = mock.MagicMock(return_value=[])
+
+        result = test_base_repository.all()
+
+        self.assertEqual(result, [])
+
     def test_all_with_database(self):
         test_base_repository = base_repository.BaseRepository()
         test_base_repository.db = mock.Mock(TinyDB)
@@ -65,6 +76,36 @@ class TestBaseRepository(unittest.TestCase):
 
         self.assertTrue(test_base_repository.db.purge.called)
 
+    def test_clear_changes_version(self):
+        test_base_repository = base_repository.BaseRepository()
+        test_base_repository.db = mock.Mock(TinyDB)
+        test_base_repository.db.purge = mock.MagicMock(return_value=None)
+
+        test_base_repository.clear()
+
+        self.assertEqual(test_base_repository.version, 1)
+
+    def test_find_page_no_database(self):
+        test_base_repository = base_repository.BaseRepository()
+
+        self.assertEqual(test_base_repository.find_page(), ([], None))
+
+    def test_find_page(self):
+        test_base_repository = base_repository.BaseRepository()
+        test_base_repository.db = mock.Mock(TinyDB)
+        entries = [Element({'entry': eid}, eid) for eid in (3, 1, 2, 4)]
+        test_base_repository.db.all = mock.MagicMock(return_value=entries)
+
+        result, cursor = test_base_repository.find_page(predicate=lambda entry: entry['entry'] != 3, cursor=1, limit=1)
+
+        self.assertEqual(result, [{'entry': 2}])
+        self.assertEqual(cursor, 2)
+
+        result, cursor = test_base_repository.find_page(predicate=lambda entry: entry['entry'] != 3, cursor=cursor)
+
+        self.assertEqual(result, [{'entry': 4}])
+        self.assertIsNone(cursor)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -2,6 +2,8 @@ import unittest
 from unittest import mock
 
 from tinydb import TinyDB, Query
+from tinydb.database import Element
+from tinydb.storages import MemoryStorage
 
 from motey.repositories import capability_repository
 
@@ -47,9 +49,57 @@ class TestCapabilityRepository(unittest.TestCase):
         self.assertTrue(self.test_capability_repository.db.remove.called)
 
     def test_remove_all_from_type(self):
+        self.test_capability_repository.db.search = mock.MagicMock(
+            return_value=[{'capability': self.test_capability, 'type': self.test_capability_type}])
+        events = []
+        self.test_capability_repository.change_stream.subscribe(events.append)
+
         self.test_capability_repository.remove_all_from_type(capability_type=self.test_capability_type)
 
         self.assertTrue(self.test_capability_repository.db.remove.called)
+        self.assertEqual(events, [{'event': 'capabilities_changed', 'data': {
+            'added': [],
+            'removed': [{'capability': self.test_capability, 'capability_type': self.test_capability_type}]
+        }}])
+
+    def test_apply_changes(self):
+        self.test_capability_repository.db.all = mock.MagicMock(return_value=[
+            Element({'capability': 'existing', 'type': 'test type'}, eid=1),
+            Element({'capability': 'removed', 'type': 'test type'}, eid=2)
+        ])
+
+        added, removed = self.test_capability_repository.apply_changes(
+            added=[('existing', 'test type'), ('new', 'test type')],
+            removed=[('removed', 'test type'), ('unknown', 'test type')])
+
+        self.assertEqual(added, [('new', 'test type')])
+        self.assertEqual(removed, [('removed', 'test type')])
+        self.test_capability_repository.db.remove.assert_called_once_with(eids=[2])
+        self.test_capability_repository.db.insert_multiple.assert_called_once_with(
+            [{'capability': 'new', 'type': 'test type'}])
+
+    def test_apply_changes_without_net_change(self):
+        self.test_capability_repository.db.all = mock.MagicMock(return_value=[
+            Element({'capability': 'existing', 'type': 'test type'}, eid=1)
+        ])
+
+        result = self.test_capability_repository.apply_changes(added=[('existing', 'test type')],
+                                                               removed=[('unknown', 'test type')])
+
+        self.assertEqual(result, ([], []))
+        self.assertFalse(self.test_capability_repository.db.remove.called)
+        self.assertFalse(self.test_capability_repository.db.insert_multiple.called)
+
+    def test_apply_changes_with_real_database(self):
+        self.test_capability_repository.db = TinyDB(storage=MemoryStorage)
+        self.test_capability_repository.db.insert_multiple([{'capability': 'existing', 'type': 'test type'},
+                                                            {'capability': 'removed', 'type': 'test type'}])
+
+        self.test_capability_repository.apply_changes(added=[('new', 'test type'), ('removed', 'test type')],
+                                                      removed=[('removed', 'test type')])
+
+        self.assertEqual(sorted((entry['capability'], entry['type']) for entry in self.test_capability_repository.db.all()),
+                         [('existing', 'test type'), ('new', 'test type'), ('removed', 'test type')])
 
     def test_has_entry(self):
         self.test_capability_repository.db.search = mock.MagicMock(return_value=[1, 2])
@@ -0,0 +1,99 @@
+import unittest
+from time import time
+from unittest import mock
+
+from motey.models.job import Job
+from motey.models.job_state import JobState
+from motey.repositories import base_repository
+from motey.repositories.job_repository import JobRepository
+
+
+class TestJobRepository(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.config_patcher = mock.patch.object(base_repository, 'config', {'DATABASE': {'path': '/tmp/testpath'}})
+        self.config_patcher.start()
+        self.test_job = Job(action=Job.INSTANTIATE, service_ids=['first', 'second'])
+        self.test_job_repository = JobRepository()
+        self.test_job_repository.add(dict(self.test_job))
+
+    def tearDown(self):
+        self.config_patcher.stop()
+
+    def test_get(self):
+        result = self.test_job_repository.get(self.test_job.id)
+
+        self.assertEqual(result['service_ids'], ['first', 'second'])
+        self.assertEqual(result['state'], JobState.QUEUED)
+
+    def test_get_unknown_job(self):
+        self.assertIsNone(self.test_job_repository.get('unknown'))
+
+    def test_set_state(self):
+        self.test_job_repository.set_state(self.test_job.id, JobState.RUNNING)
+
+        self.assertEqual(self.test_job_repository.get(self.test_job.id)['state'], JobState.RUNNING)
+
+    def test_mark_service(self):
+        self.test_job_repository.mark_service(self.test_job.id, 'first', True)
+
+        result = self.test_job_repository.get(self.test_job.id)
+        self.assertEqual(result['completed'], ['first'])
+        self.assertEqual(result['state'], JobState.QUEUED)
+
+        self.test_job_repository.mark_service(self.test_job.id, 'second', False)
+
+        result = self.test_job_repository.get(self.test_job.id)
+        self.assertEqual(result['failed'], ['second'])
+        self.assertEqual(result['state'], JobState.FINISHED)
+
+    def test_mark_duplicated_service(self):
+        job = Job(action=Job.TERMINATE, service_ids=['first', 'first', 'second'])
+        self.test_job_repository.add(dict(job))
+
+        self.test_job_repository.mark_service(job.id, 'first', True)
+        self.test_job_repository.mark_service(job.id, 'first', True)
+
+        self.assertEqual(self.test_job_repository.get(job.id)['state'], JobState.QUEUED)
+
+        self.test_job_repository.mark_service(job.id, 'second', True)
+
+        result = self.test_job_repository.get(job.id)
+        self.assertEqual(result['state'], JobState.FINISHED)
+        self.assertIsNotNone(result['finished_at'])
+
+    def test_finish(self):
+        self.test_job_repository.mark_service(self.test_job.id, 'first', True)
+
+        self.test_job_repository.finish(self.test_job.id)
+
+        result = self.test_job_repository.get(self.test_job.id)
+        self.assertEqual(result['state'], JobState.FINISHED)
+        self.assertEqual(result['completed'], ['first'])
+        self.assertEqual(result['failed'], ['second'])
+
+    def test_expired_jobs_are_removed(self):
+        self.test_job_repository.ttl = 60
+        expired_job = Job(action=Job.INSTANTIATE, service_ids=['first'], state=JobState.FINISHED,
+                          finished_at=time() - 120)
+        self.test_job_repository.add(dict(expired_job))
+
+        self.test_job_repository.add(dict(Job(action=Job.INSTANTIATE, service_ids=['first'])))
+
+        self.assertIsNone(self.test_job_repository.get(expired_job.id))
+        self.assertIsNotNone(self.test_job_repository.get(self.test_job.id))
+
+    def test_oldest_finished_jobs_are_removed(self):
+        self.test_job_repository.max_jobs = 2
+        finished_jobs = [Job(action=Job.INSTANTIATE, service_ids=['first'], state=JobState.FINISHED, finished_at=time())
+                         for _ in range(2)]
+        for job in finished_jobs:
+            self.test_job_repository.add(dict(job))
+
+        self.assertIsNone(self.test_job_repository.get(finished_jobs[0].id))
+        self.assertIsNotNone(self.test_job_repository.get(finished_jobs[1].id))
+        self.assertIsNotNone(self.test_job_repository.get(self.test_job.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
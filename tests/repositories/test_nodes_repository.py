@@ -40,6 +40,66 @@ class TestNodeRepository(unittest.TestCase):
 
         self.assertTrue(self.test_node_repository.db.remove.called)
 
+    def test_remove_not_existing(self):
+        self.test_node_repository.db.remove = mock.MagicMock(return_value=[])
+        self.test_node_repository.changed = mock.MagicMock()
+
+        self.test_node_repository.remove(self.test_ip)
+
+        self.assertFalse(self.test_node_repository.changed.called)
+
+    def test_rename(self):
+        self.test_node_repository.has = mock.MagicMock(return_value=False)
+        self.test_node_repository.changed = mock.MagicMock()
+
+        self.test_node_repository.rename(previous=self.test_ip, current='127.0.0.43')
+
+        self.assertTrue(self.test_node_repository.db.remove.called)
+        self.assertEqual(self.test_node_repository.db.insert.call_args[0][0]['ip'], '127.0.0.43')
+        self.test_node_repository.changed.assert_called_once_with('node_renamed', {'previous': self.test_ip,
+                                                                                   'current': '127.0.0.43'})
+
+    def test_add_multiple(self):
+        self.test_node_repository.db.search = mock.MagicMock(return_value=[{'ip': self.test_ip}])
+
+        self.test_node_repository.add_multiple([self.test_ip, '127.0.0.43'])
+
+        self.assertEqual(self.test_node_repository.db.insert_multiple.call_count, 1)
+        inserted = self.test_node_repository.db.insert_multiple.call_args[0][0]
+        self.assertEqual([node['ip'] for node in inserted], ['127.0.0.43'])
+
+    def test_add_multiple_all_exist(self):
+        self.test_node_repository.db.search = mock.MagicMock(return_value=[{'ip': self.test_ip}])
+
+        self.test_node_repository.add_multiple([self.test_ip])
+
+        self.assertFalse(self.test_node_repository.db.insert_multiple.called)
+
+    def test_touch_existing(self):
+        self.test_node_repository.db.search = mock.MagicMock(return_value=[{'ip': self.test_ip}])
+
+        self.test_node_repository.touch(self.test_ip)
+
+        self.assertTrue(self.test_node_repository.db.update.called)
+        self.assertFalse(self.test_node_repository.db.insert_multiple.called)
+
+    def test_touch_not_existing(self):
+        self.test_node_repository.db.search = mock.MagicMock(return_value=[])
+
+        self.test_node_repository.touch(self.test_ip)
+
+        self.assertFalse(self.test_node_repository.db.update.called)
+        self.assertEqual(self.test_node_repository.db.insert_multiple.call_args[0][0][0]['ip'], self.test_ip)
+
+    def test_find_stale(self):
+        self.test_node_repository.db.all = mock.MagicMock(return_value=[{'ip': self.test_ip, 'last_seen': 80},
+                                                                         {'ip': '127.0.0.43', 'last_seen': 90},
+                                                                         {'ip': '127.0.0.44'}])
+
+        result = self.test_node_repository.find_stale(15, now=100)
+
+        self.assertEqual(result, [{'ip': self.test_ip, 'last_seen': 80}, {'ip': '127.0.0.44'}])
+
     def test_has_entry(self):
         self.test_node_repository.db.search = mock.MagicMock(return_value=[1, 2])
 
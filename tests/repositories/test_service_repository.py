@@ -3,6 +3,8 @@ import uuid
 from unittest import mock
 
 from tinydb import TinyDB, Query
+from tinydb.database import Element
+from tinydb.storages import MemoryStorage
 
 from motey.repositories import service_repository
 
@@ -37,11 +39,73 @@ class TestServiceRepository(unittest.TestCase):
 
         self.assertFalse(self.test_service_repository.db.insert.called)
 
+    def test_add_multiple(self):
+        second_service = dict(self.test_service, id='second')
+        self.test_service_repository.find_by_ids = mock.MagicMock(return_value=[second_service])
+
+        self.test_service_repository.add_multiple(services=[self.test_service, second_service])
+
+        self.test_service_repository.db.insert_multiple.assert_called_once_with([self.test_service])
+
+    def test_add_multiple_all_exist(self):
+        self.test_service_repository.find_by_ids = mock.MagicMock(return_value=[self.test_service])
+
+        self.test_service_repository.add_multiple(services=[self.test_service])
+
+        self.assertFalse(self.test_service_repository.db.insert_multiple.called)
+
+    def test_find_by_ids(self):
+        self.test_service_repository.db.search = mock.MagicMock(return_value=[self.test_service])
+
+        result = self.test_service_repository.find_by_ids(service_ids=[self.text_service_id])
+
+        self.assertTrue(self.test_service_repository.db.search.called)
+        self.assertEqual(result, [self.test_service])
+
+    def test_find_by_node(self):
+        self.test_service_repository.db.search = mock.MagicMock(return_value=[self.test_service])
+
+        result = self.test_service_repository.find_by_node('127.0.0.1')
+
+        self.assertTrue(self.test_service_repository.db.search.called)
+        self.assertEqual(result, [self.test_service])
+
     def test_udpate(self):
         self.test_service_repository.update(service=self.test_service)
 
         self.assertTrue(self.test_service_repository.db.update.called)
 
+    def test_update_multiple(self):
+        self.test_service_repository.db.search = mock.MagicMock(return_value=[
+            Element({'id': self.text_service_id, 'service_name': 'test service name', 'state': 1}, eid=1)
+        ])
+        updated_service = dict(self.test_service, state=2)
+
+        self.test_service_repository.update_multiple(services=[updated_service, {'id': 'unknown', 'state': 2}])
+
+        self.test_service_repository.db.update.assert_called_once_with(updated_service, eids=[1])
+
+    def test_update_multiple_without_services(self):
+        self.test_service_repository.update_multiple(services=[])
+
+        self.assertFalse(self.test_service_repository.db.search.called)
+        self.assertFalse(self.test_service_repository.db.update.called)
+
+    def test_update_multiple_with_real_database(self):
+        service_repository.Query = Query
+        self.test_service_repository.db = TinyDB(storage=MemoryStorage)
+        self.test_service_repository.db.insert_multiple([
+            {'id': self.text_service_id, 'service_name': 'test service name', 'state': 1},
+            {'id': 'other', 'service_name': 'other service name', 'state': 1}
+        ])
+
+        self.test_service_repository.update_multiple(services=[{'id': self.text_service_id, 'state': 2},
+                                                               {'id': 'unknown', 'state': 2}])
+
+        self.assertEqual({entry['id']: (entry['service_name'], entry['state'])
+                          for entry in self.test_service_repository.db.all()},
+                         {'other': ('other service name', 1), self.text_service_id: ('test service name', 2)})
+
     def test_remove(self):
         self.test_service_repository.remove(service_id=self.test_service['id'])
 
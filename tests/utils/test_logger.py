@@ -0,0 +1,141 @@
+import json
+import random
+import threading
+import unittest
+from unittest import mock
+
+import logbook
+from logbook import DEBUG, INFO, WARNING, LogRecord
+
+from motey.utils import logger as logger_module
+from motey.utils.logger import AsyncHandler, LevelSampler, Logger, json_formatter
+from motey.utils.tracing import RingBufferExporter, Tracer
+
+
+class TestAsyncHandler(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.test_handler = logbook.TestHandler()
+        self.async_handler = AsyncHandler([self.test_handler], queue_size=10)
+
+    @classmethod
+    def tearDown(self):
+        self.async_handler.close()
+
+    def test_records_are_written_by_writer_thread(self):
+        threads = []
+        self.test_handler.emit = mock.MagicMock(side_effect=lambda record: threads.append(threading.current_thread()))
+
+        with self.async_handler.applicationbound():
+            logger_module.LogbookLogger('test').info('hello {}', 'world')
+        self.async_handler.flush()
+
+        self.assertEqual(threads, [self.async_handler.writer_thread])
+
+    def test_thread_of_logging_thread_is_kept(self):
+        with self.async_handler.applicationbound():
+            logger_module.LogbookLogger('test').info('hello {}', 'world')
+        self.async_handler.flush()
+
+        record, = self.test_handler.records
+        self.assertEqual(record.message, 'hello world')
+        self.assertEqual(record.thread_name, threading.current_thread().name)
+        self.assertIsNone(record.frame)
+
+    def test_records_are_dropped_if_queue_is_full(self):
+        blocker = threading.Event()
+        self.test_handler.emit = mock.MagicMock(side_effect=lambda record: blocker.wait())
+        dropped = logger_module.DROPPED_RECORDS.get()
+
+        with self.async_handler.applicationbound():
+            for index in range(20):
+                logger_module.LogbookLogger('test').info('message {}', index)
+        blocker.set()
+        self.async_handler.flush()
+
+        self.assertGreater(logger_module.DROPPED_RECORDS.get(), dropped)
+        self.assertLess(self.test_handler.emit.call_count, 20)
+
+    def test_close_writes_queued_records(self):
+        with self.async_handler.applicationbound():
+            for index in range(5):
+                logger_module.LogbookLogger('test').info('message {}', index)
+
+        self.async_handler.close()
+
+        self.assertEqual(len(self.test_handler.records), 5)
+        self.assertFalse(self.async_handler.writer_thread.is_alive())
+
+
+class TestLevelSampler(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.sampler = LevelSampler({'debug': 0.25, 'INFO': 1}, random_generator=random.Random(1))
+
+    def test_sampled_level(self):
+        kept = [self.sampler(LogRecord('test', DEBUG, 'message'), None) for _ in range(1000)]
+
+        self.assertTrue(150 < kept.count(True) < 350)
+
+    def test_other_levels_are_kept(self):
+        self.assertTrue(all(self.sampler(LogRecord('test', level, 'message'), None)
+                            for level in (INFO, WARNING) for _ in range(100)))
+
+    def test_parse(self):
+        self.assertEqual(LevelSampler.parse('debug:0.01, info:0.5'), {'debug': 0.01, 'info': 0.5})
+        self.assertEqual(LevelSampler.parse(''), {})
+
+
+class TestLogger(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.test_handler = logbook.TestHandler()
+        self.setup_patcher = mock.patch.object(logger_module, 'setup')
+        self.setup = self.setup_patcher.start()
+        self.tracer = Tracer(exporter=RingBufferExporter())
+        self.tracer_patcher = mock.patch.object(logger_module.tracing, 'tracer', self.tracer)
+        self.tracer_patcher.start()
+
+    @classmethod
+    def tearDown(self):
+        self.setup_patcher.stop()
+        self.tracer_patcher.stop()
+
+    @mock.patch('motey.utils.logger.os.makedirs')
+    def test_json_output_with_trace_id(self, makedirs):
+        logger = Logger()
+        with self.test_handler.applicationbound():
+            with self.tracer.span('request') as span:
+                logger.info('deployed {}', 'alpine', extra={'node': '192.168.0.5'})
+            try:
+                raise ValueError('failed')
+            except ValueError:
+                logger.exception('deployment failed')
+
+        first, second = [json.loads(json_formatter(record, self.test_handler)) for record in self.test_handler.records]
+        self.assertEqual(first['message'], 'deployed alpine')
+        self.assertEqual(first['level'], 'INFO')
+        self.assertEqual(first['trace_id'], span.trace_id)
+        self.assertEqual(first['node'], '192.168.0.5')
+        self.assertNotIn('exception', first)
+        self.assertNotIn('trace_id', second)
+        self.assertIn('ValueError: failed', second['exception'])
+
+    @mock.patch('motey.utils.logger.os.makedirs')
+    @mock.patch('motey.utils.logger.RotatingFileHandler')
+    @mock.patch('motey.utils.logger.AsyncHandler')
+    def test_handlers_are_installed_once(self, async_handler, rotating_file_handler, makedirs):
+        self.setup_patcher.stop()
+        try:
+            with mock.patch.object(logger_module, 'application_handler', None):
+                Logger()
+                Logger()
+
+                self.assertEqual(async_handler.call_count, 1)
+                self.assertEqual(async_handler.return_value.push_application.call_count, 1)
+        finally:
+            self.setup_patcher.start()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import threading
+import unittest
+
+from motey.utils import metrics
+from motey.utils.metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter('motey_test_requests', 'Number of test requests')
+
+        counter.inc()
+        counter.inc(2)
+
+        self.assertEqual(counter.get(), 3)
+        self.assertRaises(ValueError, counter.inc, -1)
+
+    def test_counter_with_multiple_threads(self):
+        counter = self.registry.counter('motey_test_requests', 'Number of test requests')
+
+        def increase():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=increase) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc()
+
+        self.assertEqual(counter.get(), 4001)
+        self.assertEqual(counter.get(), 4001)
+
+    def test_cells_of_finished_threads_are_merged_without_collect(self):
+        counter = self.registry.counter('motey_test_requests', 'Number of test requests')
+
+        for _ in range(10):
+            thread = threading.Thread(target=counter.inc)
+            thread.start()
+            thread.join()
+
+        self.assertLessEqual(len(counter.cells.cells), 1)
+        self.assertEqual(counter.get(), 10)
+
+    def test_labels(self):
+        counter = self.registry.counter('motey_test_requests', 'Number of test requests', ['endpoint'])
+
+        counter.labels(endpoint='first').inc()
+        counter.labels(endpoint='first').inc()
+        counter.labels(endpoint='second').inc()
+
+        self.assertEqual(counter.labels(endpoint='first').get(), 2)
+        self.assertEqual(counter.labels(endpoint='second').get(), 1)
+        self.assertRaises(ValueError, counter.labels, method='GET')
+
+    def test_gauge(self):
+        gauge = self.registry.gauge('motey_test_nodes', 'Number of test nodes')
+
+        gauge.set(5)
+        gauge.inc()
+        gauge.dec(2)
+
+        self.assertEqual(gauge.get(), 4)
+
+        gauge.set_function(lambda: 42)
+
+        self.assertEqual(gauge.get(), 42)
+
+    def test_histogram(self):
+        histogram = self.registry.histogram('motey_test_duration_seconds', 'Duration of the test', buckets=(1, 5))
+
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.get(), ([2, 3, 4], 4, 14.5))
+
+    def test_histogram_time(self):
+        histogram = self.registry.histogram('motey_test_duration_seconds', 'Duration of the test')
+
+        with histogram.time():
+            pass
+
+        self.assertEqual(histogram.get()[1], 1)
+
+    def test_registry_returns_existing_metric(self):
+        counter = self.registry.counter('motey_test_requests', 'Number of test requests', ['endpoint'])
+
+        self.assertIs(self.registry.counter('motey_test_requests', 'Number of test requests', ['endpoint']), counter)
+        self.assertRaises(ValueError, self.registry.gauge, 'motey_test_requests', 'Number of test requests')
+
+    def test_render(self):
+        self.registry.counter('motey_test_requests', 'Number of\ntest requests', ['endpoint']).labels(
+            endpoint='/v1/"test"').inc()
+        self.registry.gauge('motey_test_nodes', 'Number of test nodes').set(2)
+        self.registry.histogram('motey_test_duration_seconds', 'Duration of the test', buckets=(1,)).observe(0.5)
+
+        self.assertEqual(self.registry.render(), '\n'.join([
+            '# HELP motey_test_duration_seconds Duration of the test',
+            '# TYPE motey_test_duration_seconds histogram',
+            'motey_test_duration_seconds_bucket{le="1.0"} 1.0',
+            'motey_test_duration_seconds_bucket{le="+Inf"} 1.0',
+            'motey_test_duration_seconds_count 1.0',
+            'motey_test_duration_seconds_sum 0.5',
+            '# HELP motey_test_nodes Number of test nodes',
+            '# TYPE motey_test_nodes gauge',
+            'motey_test_nodes 2.0',
+            '# HELP motey_test_requests_total Number of\\ntest requests',
+            '# TYPE motey_test_requests_total counter',
+            'motey_test_requests_total{endpoint="/v1/\\"test\\""} 1.0',
+        ]) + '\n')
+
+    def test_timed(self):
+        histogram = self.registry.histogram('motey_test_duration_seconds', 'Duration of the test', ['operation'])
+
+        @metrics.timed(histogram, operation='fail')
+        def fail():
+            raise RuntimeError()
+
+        self.assertRaises(RuntimeError, fail)
+        self.assertEqual(histogram.labels(operation='fail').get()[1], 1)
+
+    def test_counted(self):
+        counter = self.registry.counter('motey_test_calls', 'Number of calls')
+
+        @metrics.counted(counter)
+        def call(value):
+            return value
+
+        self.assertEqual(call(3), 3)
+        self.assertEqual(counter.get(), 1)
+
+    def test_timed_methods(self):
+        histogram = self.registry.histogram('motey_test_duration_seconds', 'Duration of the test',
+                                            ['repository', 'operation'])
+
+        class Base(object):
+            def all(self):
+                return []
+
+        @metrics.timed_methods(histogram, exclude=('changed',), repository='test')
+        class Repository(Base):
+            def add(self, value):
+                return value
+
+            def changed(self):
+                pass
+
+            def _private(self):
+                pass
+
+            @staticmethod
+            def helper(value):
+                return value
+
+        repository = Repository()
+        repository.add(1)
+        repository.all()
+        repository.changed()
+        repository._private()
+
+        self.assertEqual(Repository.helper(2), 2)
+        self.assertEqual(sorted(histogram.children), [('test', 'add'), ('test', 'all')])
+
+
+if __name__ == '__main__':
+    unittest.main()
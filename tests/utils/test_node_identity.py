@@ -0,0 +1,103 @@
+import os
+import socket
+import tempfile
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from motey.utils import node_identity
+from motey.utils.logger import Logger
+from motey.utils.node_identity import NodeIdentity
+
+Address = namedtuple('Address', ['family', 'address'])
+Stats = namedtuple('Stats', ['isup'])
+
+
+class TestNodeIdentity(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.clock = mock.MagicMock(return_value=100)
+        self.logger = mock.Mock(Logger)
+        self.node_identity = NodeIdentity(logger=self.logger, ttl=300, interface_check_interval=5, clock=self.clock)
+        self.interfaces = {
+            'lo': [Address(socket.AF_INET, '127.0.0.1')],
+            'eth0': [Address(socket.AF_INET, '192.168.0.5'), Address(socket.AF_INET6, 'fe80::1')]
+        }
+        self.get_own_ip = mock.MagicMock(return_value='192.168.0.5')
+        self.patches = [
+            mock.patch.object(node_identity.network_utils, 'get_own_ip', self.get_own_ip),
+            mock.patch.object(node_identity.psutil, 'net_if_addrs', lambda: self.interfaces),
+            mock.patch.object(node_identity.psutil, 'net_if_stats',
+                              lambda: {name: Stats(True) for name in self.interfaces})
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    @classmethod
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_get_ip_is_cached(self):
+        self.assertEqual(self.node_identity.get_ip(), '192.168.0.5')
+        self.clock.return_value = 110
+        self.assertEqual(self.node_identity.get_ip(), '192.168.0.5')
+
+        self.assertEqual(self.get_own_ip.call_count, 1)
+
+    def test_get_ip_after_ttl(self):
+        self.node_identity.get_ip()
+        self.clock.return_value = 401
+
+        self.node_identity.get_ip()
+
+        self.assertEqual(self.get_own_ip.call_count, 2)
+
+    def test_get_ip_after_interface_change(self):
+        changes = []
+        self.node_identity.ip_change_stream.subscribe(changes.append)
+        self.node_identity.get_ip()
+        self.interfaces['eth0'] = [Address(socket.AF_INET, '192.168.0.6')]
+        self.get_own_ip.return_value = '192.168.0.6'
+
+        self.clock.return_value = 101
+        self.assertEqual(self.node_identity.get_ip(), '192.168.0.5')
+        self.clock.return_value = 106
+        self.assertEqual(self.node_identity.get_ip(), '192.168.0.6')
+
+        self.assertEqual(changes, [{'previous': '192.168.0.5', 'current': '192.168.0.6'}])
+
+    def test_get_ip_with_advertise_address(self):
+        self.node_identity.advertise_address = '10.0.0.1'
+
+        self.assertEqual(self.node_identity.get_ip(), '10.0.0.1')
+        self.assertFalse(self.get_own_ip.called)
+
+    def test_resolve_ip_without_default_route(self):
+        self.get_own_ip.side_effect = OSError('Network is unreachable')
+
+        self.assertEqual(self.node_identity.resolve_ip(), '192.168.0.5')
+
+    def test_resolve_ip_without_network(self):
+        self.get_own_ip.side_effect = OSError('Network is unreachable')
+        del self.interfaces['eth0']
+
+        self.assertEqual(self.node_identity.resolve_ip(), '127.0.0.1')
+
+    def test_get_node_id_is_persisted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'databases', 'node_id')
+            node_id = NodeIdentity(logger=self.logger, node_id_path=path).get_node_id()
+
+            self.assertEqual(NodeIdentity(logger=self.logger, node_id_path=path).get_node_id(), node_id)
+            self.assertTrue(os.path.isfile(path))
+
+    def test_get_node_id_without_path(self):
+        node_id = self.node_identity.get_node_id()
+
+        self.assertEqual(len(node_id), 32)
+        self.assertEqual(self.node_identity.get_node_id(), node_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from motey.utils import profiling
+from motey.utils.logger import Logger
+from motey.utils.profiling import SamplingProfiler, SlowOperationRecorder
+from motey.utils.tracing import RingBufferExporter, Tracer
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.output_path = tempfile.mkdtemp()
+        self.profiler = SamplingProfiler(logger=mock.Mock(Logger), interval=0.001, output_path=self.output_path,
+                                         max_duration=5)
+        self.stop_event = threading.Event()
+        self.worker = threading.Thread(target=self.stop_event.wait, name='worker')
+        self.worker.start()
+
+    @classmethod
+    def tearDown(self):
+        self.stop_event.set()
+        self.worker.join()
+
+    def test_sample_all_threads(self):
+        self.profiler.status = {'samples': 0}
+
+        self.profiler.sample()
+
+        stacks = self.profiler.get_collapsed().splitlines()
+        worker_stacks = [stack for stack in stacks if stack.startswith('worker;')]
+        self.assertEqual(len(worker_stacks), 1)
+        stack, count = worker_stacks[0].rsplit(' ', 1)
+        self.assertEqual(count, '1')
+        self.assertTrue(stack.endswith('wait (threading.py)'))
+        self.assertEqual(self.profiler.status['samples'], 1)
+
+    def test_start_writes_profile(self):
+        self.assertTrue(self.profiler.start(0.05))
+        self.profiler.sampling_thread.join()
+
+        status = self.profiler.get_status()
+        self.assertFalse(status['running'])
+        self.assertGreater(status['samples'], 0)
+        self.assertEqual(os.path.dirname(status['path']), self.output_path)
+        with open(status['path']) as profile_file:
+            self.assertIn('worker;', profile_file.read())
+
+    def test_start_already_running(self):
+        self.assertTrue(self.profiler.start(5))
+
+        self.assertFalse(self.profiler.start(5))
+
+        self.profiler.stop()
+        self.assertFalse(self.profiler.is_running())
+
+    def test_start_limited_to_max_duration(self):
+        self.profiler.start(600)
+        self.profiler.stop()
+
+        self.assertEqual(self.profiler.get_status()['duration'], 5)
+
+
+class TestSlowOperationRecorder(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.recorder = SlowOperationRecorder(threshold=1.0, size=2)
+        self.clock = mock.MagicMock(return_value=100.0)
+        self.clock_patcher = mock.patch.object(profiling, 'perf_counter', self.clock)
+        self.clock_patcher.start()
+
+    @classmethod
+    def tearDown(self):
+        self.clock_patcher.stop()
+
+    def test_fast_operation_is_not_recorded(self):
+        token = self.recorder.begin('fast')
+        self.clock.return_value = 100.5
+        self.recorder.end(token)
+
+        self.assertEqual(self.recorder.get_operations(), [])
+        self.assertEqual(self.recorder.running, {})
+
+    def test_slow_operation_is_recorded(self):
+        token = self.recorder.begin('slow')
+        self.clock.return_value = 102.0
+        self.recorder.end(token, trace_id='abc', error='TimeoutError: timeout')
+
+        operation, = self.recorder.get_operations()
+        self.assertEqual(operation['name'], 'slow')
+        self.assertEqual(operation['duration'], 2.0)
+        self.assertEqual(operation['trace_id'], 'abc')
+        self.assertEqual(operation['error'], 'TimeoutError: timeout')
+
+    def test_check_captures_stack_of_running_operation(self):
+        token = self.recorder.begin('slow')
+        self.clock.return_value = 101.5
+
+        self.recorder.check()
+        self.recorder.end(token)
+
+        stack = self.recorder.get_operations()[0]['stack']
+        self.assertTrue(stack[-1].startswith('check (profiling.py:'))
+
+    def test_size_and_filter(self):
+        for name in ('first', 'second', 'third'):
+            self.clock.return_value = 100.0
+            token = self.recorder.begin(name)
+            self.clock.return_value = 101.0
+            self.recorder.end(token)
+
+        self.assertEqual([operation['name'] for operation in self.recorder.get_operations()], ['third', 'second'])
+        self.assertEqual(len(self.recorder.get_operations(name='second')), 1)
+
+    def test_disabled(self):
+        self.recorder.threshold = 0
+
+        self.assertIsNone(self.recorder.begin('slow'))
+        self.recorder.end(None)
+        self.assertEqual(self.recorder.get_operations(), [])
+
+    def test_spans_are_recorded_without_sampling(self):
+        tracer = Tracer(exporter=RingBufferExporter(), sample_rate=0)
+        with mock.patch.object(profiling, 'slow_operations', self.recorder):
+            with self.assertRaises(ValueError):
+                with tracer.span('docker.start_instance'):
+                    self.clock.return_value = 103.0
+                    raise ValueError('failed')
+
+        operation, = self.recorder.get_operations()
+        self.assertEqual(operation['name'], 'docker.start_instance')
+        self.assertIsNone(operation['trace_id'])
+        self.assertEqual(operation['error'], 'ValueError: failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from motey.utils import tracing
+from motey.utils.logger import Logger
+from motey.utils.node_identity import NodeIdentity
+from motey.utils.tracing import FileExporter, OtlpExporter, RingBufferExporter, Tracer
+
+
+class TestTracing(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.exporter = RingBufferExporter(size=10)
+        self.node_identity = mock.Mock(NodeIdentity)
+        self.node_identity.get_ip.return_value = '192.168.0.5'
+        self.tracer = Tracer(exporter=self.exporter, node_identity=self.node_identity)
+
+    def test_nested_spans(self):
+        with self.tracer.span('parent') as parent:
+            with self.tracer.span('child', attributes={'node': '192.168.0.6'}) as child:
+                self.assertIs(self.tracer.current_span(), child)
+            self.assertIs(self.tracer.current_span(), parent)
+        self.assertIsNone(self.tracer.current_span())
+
+        child_span, parent_span = self.exporter.get_spans()
+        self.assertEqual(child_span['name'], 'child')
+        self.assertEqual(child_span['trace_id'], parent_span['trace_id'])
+        self.assertEqual(child_span['parent_id'], parent_span['span_id'])
+        self.assertEqual(child_span['attributes'], {'node': '192.168.0.6'})
+        self.assertEqual(child_span['node'], '192.168.0.5')
+        self.assertIsNone(parent_span['parent_id'])
+
+    def test_span_records_exception(self):
+        def fail():
+            with self.tracer.span('fail'):
+                raise RuntimeError('no node found')
+
+        self.assertRaises(RuntimeError, fail)
+        self.assertEqual(self.exporter.get_spans()[0]['error'], 'RuntimeError: no node found')
+        self.assertIsNone(self.tracer.current_span())
+
+    def test_inject_and_extract(self):
+        with self.tracer.span('request') as span:
+            message = json.loads(json.dumps(self.tracer.inject({'image_name': 'busybox'})))
+
+        context = self.tracer.extract(message)
+
+        self.assertEqual(context, span.context)
+        self.assertEqual(message, {'image_name': 'busybox'})
+
+        with self.tracer.span('reply', parent=context) as reply:
+            self.assertEqual(reply.trace_id, span.trace_id)
+            self.assertEqual(reply.parent_id, span.span_id)
+
+    def test_inject_without_active_span(self):
+        self.assertEqual(self.tracer.inject({}), {})
+
+    def test_extract_invalid_context(self):
+        self.assertIsNone(self.tracer.extract({'_trace': 'invalid'}))
+        self.assertIsNone(self.tracer.extract({'_trace': {'trace_id': 1}}))
+        self.assertIsNone(self.tracer.extract(''))
+
+    def test_spans_are_thread_local(self):
+        contexts = []
+        with self.tracer.span('request'):
+            thread = threading.Thread(target=lambda: contexts.append(self.tracer.current_context()))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(contexts, [None])
+
+    def test_sampling(self):
+        self.tracer.sample_rate = 0
+
+        with self.tracer.span('request') as span:
+            self.assertIsNone(span)
+            self.assertEqual(self.tracer.inject({}), {})
+
+        with self.tracer.span('reply', parent={'trace_id': 'a' * 32, 'span_id': 'b' * 16}) as span:
+            self.assertIsNotNone(span)
+
+    def test_disabled(self):
+        self.tracer.exporter = None
+
+        with self.tracer.span('request') as span:
+            self.assertIsNone(span)
+
+    def test_traced(self):
+        @tracing.traced('operation')
+        def operation(value):
+            return value
+
+        with mock.patch.object(tracing, 'tracer', self.tracer):
+            self.assertEqual(operation(3), 3)
+
+        self.assertEqual(self.exporter.get_spans()[0]['name'], 'operation')
+
+    def test_ring_buffer(self):
+        for index in range(12):
+            with self.tracer.span('span %s' % index):
+                pass
+
+        spans = self.exporter.get_spans()
+        self.assertEqual(len(spans), 10)
+        self.assertEqual(spans[0]['name'], 'span 2')
+        self.assertEqual(self.exporter.get_spans(trace_id=spans[3]['trace_id']), [spans[3]])
+
+    def test_file_exporter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traces.jsonl')
+            self.tracer.exporter = FileExporter(path=path)
+            with self.tracer.span('first'):
+                with self.tracer.span('second'):
+                    pass
+
+            with open(path) as trace_file:
+                names = [json.loads(line)['name'] for line in trace_file]
+            self.assertEqual(names, ['second', 'first'])
+
+    def test_otlp_encode(self):
+        with self.tracer.span('parent', attributes={'service_id': 42}):
+            with self.tracer.span('child'):
+                pass
+
+        request = OtlpExporter.encode(self.exporter.get_spans())
+        child, parent = request['resourceSpans'][0]['scopeSpans'][0]['spans']
+
+        self.assertEqual(child['parentSpanId'], parent['spanId'])
+        self.assertNotIn('parentSpanId', parent)
+        self.assertEqual(parent['attributes'], [
+            {'key': 'service_id', 'value': {'stringValue': '42'}},
+            {'key': 'motey.node', 'value': {'stringValue': '192.168.0.5'}}
+        ])
+        self.assertLessEqual(int(parent['startTimeUnixNano']), int(parent['endTimeUnixNano']))
+
+    @mock.patch.object(tracing.requests, 'post')
+    def test_otlp_flush(self, post):
+        exporter = OtlpExporter(logger=mock.Mock(Logger), endpoint='http://127.0.0.1:4318/v1/traces', interval=60)
+        self.tracer.exporter = exporter
+        with self.tracer.span('request'):
+            pass
+
+        exporter.flush()
+
+        self.assertEqual(post.call_args[0], ('http://127.0.0.1:4318/v1/traces',))
+        self.assertEqual(post.call_args[1]['json']['resourceSpans'][0]['scopeSpans'][0]['spans'][0]['name'], 'request')
+
+    def test_configure(self):
+        with mock.patch.object(tracing, 'tracer', Tracer()):
+            configured = tracing.configure(logger=mock.Mock(Logger), exporter='none')
+
+            self.assertIs(configured, tracing.tracer)
+            self.assertIsNone(configured.exporter)
+
+
+if __name__ == '__main__':
+    unittest.main()
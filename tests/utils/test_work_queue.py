@@ -0,0 +1,84 @@
+import threading
+import unittest
+from unittest import mock
+
+from motey.utils.work_queue import RateLimiter, WorkQueue
+
+
+class TestWorkQueue(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.clock = mock.MagicMock(return_value=100.0)
+        self.work_queue = WorkQueue(backoff_base=1, backoff_max=5, clock=self.clock)
+
+    def test_key_is_queued_once(self):
+        self.work_queue.add('first')
+        self.work_queue.add('second')
+        self.work_queue.add('first')
+
+        self.assertEqual(len(self.work_queue), 2)
+        self.assertEqual(self.work_queue.get(), 'first')
+        self.assertEqual(self.work_queue.get(), 'second')
+
+    def test_key_added_while_processing_is_queued_after_done(self):
+        self.work_queue.add('first')
+        key = self.work_queue.get()
+
+        self.work_queue.add('first')
+        self.assertEqual(len(self.work_queue), 0)
+
+        self.work_queue.done(key)
+        self.assertEqual(len(self.work_queue), 1)
+
+    def test_add_after(self):
+        self.work_queue.add_after('delayed', 2)
+        self.work_queue.add('ready')
+
+        self.assertEqual(self.work_queue.get(), 'ready')
+        self.clock.return_value = 102.0
+        self.assertEqual(self.work_queue.get(), 'delayed')
+
+    def test_add_rate_limited(self):
+        delays = [self.work_queue.add_rate_limited('failed') for _ in range(5)]
+
+        self.assertEqual(delays, [1, 2, 4, 5, 5])
+        self.assertEqual(self.work_queue.retries('failed'), 5)
+        self.work_queue.forget('failed')
+        self.assertEqual(self.work_queue.retries('failed'), 0)
+
+    def test_shut_down_wakes_up_workers(self):
+        keys = []
+        worker = threading.Thread(target=lambda: keys.append(self.work_queue.get()))
+        worker.start()
+
+        self.work_queue.shut_down()
+        worker.join(1)
+
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(keys, [None])
+
+
+class TestRateLimiter(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.clock = mock.MagicMock(return_value=100.0)
+        self.rate_limiter = RateLimiter(rate=10, burst=2, clock=self.clock)
+
+    def test_burst(self):
+        self.assertEqual([self.rate_limiter.reserve() for _ in range(3)], [0, 0, 0.1])
+
+    def test_tokens_are_refilled(self):
+        for _ in range(2):
+            self.rate_limiter.reserve()
+        self.clock.return_value = 100.2
+
+        self.assertEqual(self.rate_limiter.reserve(), 0)
+
+    def test_disabled(self):
+        rate_limiter = RateLimiter(rate=0, clock=self.clock)
+
+        self.assertEqual([rate_limiter.reserve() for _ in range(100)], [0] * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+import unittest
+
+import yaml
+
+from motey.utils import yaml_loader
+from motey.utils.yaml_loader import YAMLLimitError
+
+
+class TestYAMLLoader(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.test_document = 'service_name: test service\nimages:\n  - name: alpine\n    engine: docker\n'
+
+    def test_load_all_multiple_documents(self):
+        result = list(yaml_loader.load_all('%s---\n%s' % (self.test_document, self.test_document)))
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0]['service_name'], 'test service')
+        self.assertEqual(result[1]['images'][0]['engine'], 'docker')
+
+    def test_load_all_from_stream(self):
+        result = list(yaml_loader.load_all(io.BytesIO(self.test_document.encode('utf-8'))))
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['images'][0]['name'], 'alpine')
+
+    def test_load_all_yields_documents_before_an_error(self):
+        documents = yaml_loader.load_all('a: 1\n---\nb: [\n')
+
+        self.assertEqual(next(documents), {'a': 1})
+        with self.assertRaises(yaml.YAMLError):
+            next(documents)
+
+    def test_load_all_rejects_python_objects(self):
+        with self.assertRaises(yaml.YAMLError):
+            list(yaml_loader.load_all('test: !!python/object/apply:os.system ["ls"]'))
+
+    def test_load_all_max_size(self):
+        with self.assertRaises(YAMLLimitError):
+            list(yaml_loader.load_all(self.test_document, max_size=10))
+
+    def test_load_all_max_size_of_stream(self):
+        with self.assertRaises(YAMLLimitError):
+            list(yaml_loader.load_all(io.BytesIO(self.test_document.encode('utf-8') * 100), max_size=100))
+
+    def test_load_all_max_documents(self):
+        with self.assertRaises(YAMLLimitError):
+            list(yaml_loader.load_all('a: 1\n---\nb: 2\n---\nc: 3\n', max_documents=2))
+
+    def test_load_all_max_depth(self):
+        self.assertEqual(list(yaml_loader.load_all('[[[1]]]', max_depth=4)), [[[[1]]]])
+        with self.assertRaises(YAMLLimitError):
+            list(yaml_loader.load_all('[[[[1]]]]', max_depth=4))
+
+    def test_load_all_max_depth_with_aliases(self):
+        with self.assertRaises(YAMLLimitError):
+            list(yaml_loader.load_all('a: &a [[1]]\nb: [[*a]]\n', max_depth=4))
+
+    def test_load_all_recursive_alias(self):
+        with self.assertRaises(YAMLLimitError):
+            list(yaml_loader.load_all('a: &a [*a]'))
+
+    def test_load_all_max_nodes_with_expanded_aliases(self):
+        data = 'a: &a [x, x, x, x]\nb: &b [*a, *a, *a, *a]\nc: [*b, *b, *b, *b]\n'
+        self.assertEqual(len(list(yaml_loader.load_all(data))), 1)
+        with self.assertRaises(YAMLLimitError):
+            list(yaml_loader.load_all(data, max_nodes=50))
+
+    def test_load(self):
+        result = yaml_loader.load(self.test_document)
+
+        self.assertEqual(result['service_name'], 'test service')
+
+    def test_load_empty(self):
+        self.assertIsNone(yaml_loader.load(''))
+
+    def test_load_multiple_documents(self):
+        with self.assertRaises(YAMLLimitError):
+            yaml_loader.load('a: 1\n---\nb: 2\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
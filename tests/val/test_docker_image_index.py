@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+
+from docker.errors import DockerException, NotFound
+from requests import ConnectionError
+
+from motey.val.plugins.docker_image_index import DockerImageIndex
+
+
+class TestDockerImageIndex(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.test_image = mock.Mock()
+        self.test_image.id = 'sha256:1234567890abcdef'
+        self.test_image.short_id = 'sha256:1234567890'
+        self.test_image.tags = ['alpine:latest', 'alpine:3.5']
+        self.client = mock.Mock()
+        self.client.images.list = mock.MagicMock(return_value=[self.test_image])
+        self.client.images.get = mock.MagicMock(return_value=self.test_image)
+        self.image_index = DockerImageIndex(get_docker_client=mock.MagicMock(return_value=self.client))
+        self.image_index.reconcile()
+
+    def test_has_by_id(self):
+        self.assertTrue(self.image_index.has('sha256:1234567890abcdef'))
+        self.assertTrue(self.image_index.has('1234567890abcdef'))
+        self.assertTrue(self.image_index.has('sha256:1234567890'))
+        self.assertTrue(self.image_index.has('1234567890'))
+
+    def test_has_by_tag(self):
+        self.assertTrue(self.image_index.has('alpine'))
+        self.assertTrue(self.image_index.has('alpine:3.5'))
+        self.assertFalse(self.image_index.has('alpine:3.6'))
+
+    def test_has_does_not_query_daemon(self):
+        self.client.images.list.reset_mock()
+
+        self.image_index.has('alpine')
+
+        self.assertFalse(self.client.images.list.called)
+        self.assertFalse(self.client.images.get.called)
+
+    def test_handle_event_delete(self):
+        self.image_index.handle_event({'Action': 'delete', 'id': 'sha256:1234567890abcdef'})
+
+        self.assertFalse(self.image_index.has('alpine'))
+        self.assertFalse(self.image_index.has('sha256:1234567890abcdef'))
+
+    def test_handle_event_pull(self):
+        new_image = mock.Mock()
+        new_image.id = 'sha256:fedcba0987654321'
+        new_image.short_id = 'sha256:fedcba0987'
+        new_image.tags = ['busybox:latest']
+        self.client.images.get = mock.MagicMock(return_value=new_image)
+
+        self.image_index.handle_event({'Action': 'pull', 'id': 'busybox:latest'})
+
+        self.assertTrue(self.image_index.has('busybox'))
+        self.assertTrue(self.image_index.has('alpine'))
+
+    def test_handle_event_untag(self):
+        self.test_image.tags = ['alpine:3.5']
+
+        self.image_index.handle_event({'Action': 'untag', 'id': 'sha256:1234567890abcdef'})
+
+        self.assertFalse(self.image_index.has('alpine'))
+        self.assertTrue(self.image_index.has('alpine:3.5'))
+
+    def test_refresh_image_not_found(self):
+        self.client.images.get = mock.MagicMock(side_effect=NotFound('not found'))
+
+        self.image_index.refresh('alpine')
+
+        self.assertFalse(self.image_index.has('alpine:3.5'))
+        self.assertFalse(self.image_index.has('sha256:1234567890abcdef'))
+
+    def test_reconcile_without_daemon(self):
+        self.image_index.get_docker_client = mock.MagicMock(side_effect=DockerException('daemon is not running'))
+        self.assertFalse(self.image_index.reconcile())
+
+        self.image_index.get_docker_client = mock.MagicMock(return_value=self.client)
+        self.client.images.list = mock.MagicMock(side_effect=ConnectionError('connection refused'))
+        self.assertFalse(self.image_index.reconcile())
+
+        self.assertTrue(self.image_index.has('alpine'))
+
+    def test_start_without_daemon(self):
+        self.image_index.get_docker_client = mock.MagicMock(side_effect=DockerException('daemon is not running'))
+
+        self.image_index.start()
+
+        self.assertTrue(self.image_index.started)
+        self.assertTrue(self.image_index.event_thread.is_alive())
+        self.image_index.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+from unittest import mock
+
+from rx.subjects import Subject
+
+from motey.models.image import Image
+from motey.models.pull_state import PullState
+from motey.models.service import Service
+from motey.repositories.capability_repository import CapabilityRepository
+from motey.utils.logger import Logger
+from motey.val.image_prepull_manager import ImagePrePullManager
+from motey.val.valmanager import VALManager
+
+
+class TestImagePrePullManager(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.test_image = Image(name='test image', engine='test engine')
+        self.logger = mock.Mock(Logger)
+        self.valmanager = mock.Mock(VALManager)
+        self.valmanager.instantiate_stream = mock.Mock(Subject)
+        self.valmanager.has_image_instances = mock.MagicMock(return_value=False)
+        self.valmanager.delete_image = mock.MagicMock(return_value=True)
+        self.capability_repository = mock.Mock(CapabilityRepository)
+        self.service_stream = Subject()
+        self.prepull_image_stream = Subject()
+        self.image_prepull_manager = ImagePrePullManager(logger=self.logger,
+                                                         valmanager=self.valmanager,
+                                                         capability_repository=self.capability_repository,
+                                                         service_stream=self.service_stream,
+                                                         prepull_image_stream=self.prepull_image_stream,
+                                                         cache_size=2,
+                                                         workers=1)
+
+    def test_start_subscribes_to_the_streams(self):
+        self.capability_repository.has = mock.MagicMock(return_value=True)
+        self.image_prepull_manager.worker_threads = []
+        self.image_prepull_manager.start()
+
+        self.service_stream.on_next(Service(service_name='test service', images=[self.test_image]))
+        self.prepull_image_stream.on_next(Image(name='remote image', engine='test engine'))
+
+        self.assertEqual(self.image_prepull_manager.pull_queue.qsize(), 2)
+        self.image_prepull_manager.stop()
+
+    def test_prepull_service_capabilities_fulfilled(self):
+        self.capability_repository.has = mock.MagicMock(return_value=True)
+        test_service = Service(service_name='test service', images=[Image(name='test image', engine='test engine',
+                                                                          capabilities=['first'])])
+
+        self.image_prepull_manager.prepull_service(test_service)
+
+        self.assertEqual(self.image_prepull_manager.pull_queue.qsize(), 1)
+        self.assertEqual(self.image_prepull_manager.get_progress('test image')['state'], PullState.QUEUED)
+
+    def test_prepull_service_capabilities_not_fulfilled(self):
+        self.capability_repository.has = mock.MagicMock(return_value=False)
+        test_service = Service(service_name='test service', images=[Image(name='test image', engine='test engine',
+                                                                          capabilities=['first'])])
+
+        self.image_prepull_manager.prepull_service(test_service)
+
+        self.assertEqual(self.image_prepull_manager.pull_queue.qsize(), 0)
+        self.assertIsNone(self.image_prepull_manager.get_progress('test image'))
+
+    def test_prepull_already_queued(self):
+        self.image_prepull_manager.prepull(self.test_image)
+        self.image_prepull_manager.prepull(self.test_image)
+
+        self.assertEqual(self.image_prepull_manager.pull_queue.qsize(), 1)
+
+    def test_pull_image_does_not_exist(self):
+        self.valmanager.has_image = mock.MagicMock(side_effect=[False, True])
+
+        result = self.image_prepull_manager.pull(self.test_image)
+
+        self.assertTrue(result)
+        self.assertTrue(self.valmanager.load_image.called)
+        self.assertEqual(self.image_prepull_manager.get_progress('test image')['state'], PullState.PULLED)
+        self.assertIn('test image', self.image_prepull_manager.cache)
+
+    def test_pull_image_exist(self):
+        self.valmanager.has_image = mock.MagicMock(return_value=True)
+
+        result = self.image_prepull_manager.pull(self.test_image)
+
+        self.assertTrue(result)
+        self.assertFalse(self.valmanager.load_image.called)
+
+    def test_pull_failed(self):
+        self.valmanager.has_image = mock.MagicMock(return_value=False)
+
+        result = self.image_prepull_manager.pull(self.test_image)
+
+        self.assertFalse(result)
+        self.assertTrue(self.logger.error.called)
+        self.assertEqual(self.image_prepull_manager.get_progress('test image')['state'], PullState.ERROR)
+        self.assertNotIn('test image', self.image_prepull_manager.cache)
+
+    def test_touch_evicts_least_recently_used(self):
+        first_image = Image(name='first image', engine='test engine')
+        second_image = Image(name='second image', engine='test engine')
+        third_image = Image(name='third image', engine='test engine')
+
+        self.image_prepull_manager.touch(first_image)
+        self.image_prepull_manager.touch(second_image)
+        self.image_prepull_manager.touch(first_image)
+        self.image_prepull_manager.touch(third_image)
+
+        self.assertEqual(list(self.image_prepull_manager.cache.keys()), ['first image', 'third image'])
+        self.valmanager.delete_image.assert_called_once_with(second_image)
+
+    def test_touch_keeps_images_with_instances(self):
+        first_image = Image(name='first image', engine='test engine')
+        second_image = Image(name='second image', engine='test engine')
+        third_image = Image(name='third image', engine='test engine')
+        self.valmanager.has_image_instances = mock.MagicMock(side_effect=lambda image: image is first_image)
+
+        self.image_prepull_manager.touch(first_image)
+        self.image_prepull_manager.touch(second_image)
+        self.image_prepull_manager.touch(third_image)
+
+        self.assertFalse(self.valmanager.delete_image.called)
+        self.assertEqual(list(self.image_prepull_manager.cache.keys()), ['second image', 'third image', 'first image'])
+
+    def test_failed_eviction_is_logged(self):
+        self.valmanager.delete_image = mock.MagicMock(return_value=False)
+
+        for name in ('first image', 'second image', 'third image'):
+            self.image_prepull_manager.touch(Image(name=name, engine='test engine'))
+
+        self.assertTrue(self.logger.error.called)
+
+    def test_failed_pull_of_an_evicted_image(self):
+        def __evict_and_fail(image):
+            if image is self.test_image:
+                self.image_prepull_manager.progress.pop(image.name)
+                raise ValueError('docker is not available')
+            return True
+
+        self.valmanager.has_image = mock.MagicMock(side_effect=__evict_and_fail)
+        self.image_prepull_manager.prepull(self.test_image)
+        self.image_prepull_manager.prepull(Image(name='next image', engine='test engine'))
+        self.image_prepull_manager.pull_queue.put(None)
+
+        worker_thread = self.image_prepull_manager.worker_threads[0]
+        worker_thread.start()
+        worker_thread.join(1)
+
+        self.assertIsNone(self.image_prepull_manager.get_progress('test image'))
+        self.assertEqual(self.image_prepull_manager.get_progress('next image')['state'], PullState.PULLED)
+
+
+if __name__ == '__main__':
+    unittest.main()
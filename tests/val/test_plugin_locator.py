@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from yapsy.PluginManager import PluginManager
+
+from motey.repositories.capability_repository import CapabilityRepository
+from motey.utils.logger import Logger
+from motey.val import valmanager
+from motey.val.plugin_locator import ManifestPluginLocator
+
+PLUGIN_INFO = """[Core]
+Name = Test Plugin
+Module = testVAL
+
+[VAL]
+Engine = test engine
+"""
+
+PLUGIN_MODULE = """import motey.val.plugins.abstractVAL as abstractVAL
+
+
+class TestVAL(abstractVAL.AbstractVAL):
+    def get_plugin_type(self):
+        return 'test engine'
+
+    def start_instance(self, instance_name, parameters={}):
+        return 'abc123'
+"""
+
+
+class TestManifestPluginLocator(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.plugin_directory = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(tempfile.mkdtemp(), 'plugin_manifest.json')
+        with open(os.path.join(self.plugin_directory, 'testVAL.yapsy-plugin'), 'w') as info_file:
+            info_file.write(PLUGIN_INFO)
+        with open(os.path.join(self.plugin_directory, 'testVAL.py'), 'w') as module_file:
+            module_file.write(PLUGIN_MODULE)
+        self.plugin_locator = ManifestPluginLocator(manifest_path=self.manifest_path)
+        self.plugin_locator.setPluginPlaces([self.plugin_directory])
+
+    def tearDown(self):
+        shutil.rmtree(self.plugin_directory)
+        shutil.rmtree(os.path.dirname(self.manifest_path))
+
+    def test_get_engines(self):
+        self.assertEqual(self.plugin_locator.get_engines(), ['test engine'])
+        self.assertTrue(os.path.exists(self.manifest_path))
+
+    def test_manifest_loaded_from_cache(self):
+        self.plugin_locator.get_engines()
+        cached_plugin_locator = ManifestPluginLocator(manifest_path=self.manifest_path)
+        cached_plugin_locator.setPluginPlaces([self.plugin_directory])
+        cached_plugin_locator.file_locator = mock.Mock()
+
+        result = cached_plugin_locator.get_engines()
+
+        self.assertEqual(result, ['test engine'])
+        self.assertFalse(cached_plugin_locator.file_locator.locatePlugins.called)
+
+    def test_manifest_invalid_after_change(self):
+        self.plugin_locator.get_engines()
+        with open(os.path.join(self.plugin_directory, 'otherVAL.yapsy-plugin'), 'w') as info_file:
+            info_file.write(PLUGIN_INFO.replace('test engine', 'other engine').replace('testVAL', 'otherVAL'))
+        with open(os.path.join(self.plugin_directory, 'otherVAL.py'), 'w') as module_file:
+            module_file.write(PLUGIN_MODULE.replace('test engine', 'other engine'))
+        os.utime(self.plugin_directory, (0, 0))
+
+        result = self.plugin_locator.get_engines()
+
+        self.assertEqual(sorted(result), ['other engine', 'test engine'])
+
+    def test_locate_selected_engine(self):
+        self.plugin_locator.select('unknown engine')
+        candidates, number_of_candidates = self.plugin_locator.locatePlugins()
+        self.assertEqual(number_of_candidates, 0)
+
+        self.plugin_locator.select('test engine')
+        candidates, number_of_candidates = self.plugin_locator.locatePlugins()
+        self.assertEqual(number_of_candidates, 1)
+
+    def test_valmanager_loads_plugin_lazily(self):
+        valmanager.absolute_file_path = mock.MagicMock(return_value=self.plugin_directory)
+        test_valmanager = valmanager.VALManager(logger=mock.Mock(Logger),
+                                                capability_repository=mock.Mock(CapabilityRepository),
+                                                plugin_manager=PluginManager(plugin_locator=self.plugin_locator))
+
+        test_valmanager.register_plugins()
+
+        self.assertEqual(test_valmanager.engines, ['test engine'])
+        self.assertEqual(len(test_valmanager.plugins), 0)
+        self.assertTrue(test_valmanager.capability_repository.add.called)
+
+        test_image = mock.Mock()
+        test_image.engine = 'test engine'
+        plugin = test_valmanager.get_plugin(test_image)
+
+        self.assertIsNotNone(plugin)
+        self.assertEqual(plugin.get_plugin_type(), 'test engine')
+        self.assertIs(test_valmanager.get_plugin(test_image), plugin)
+
+    def test_valmanager_lazy_activation_fails(self):
+        with open(os.path.join(self.plugin_directory, 'testVAL.py'), 'a') as module_file:
+            module_file.write("""
+    def activate(self):
+        raise ConnectionError('docker is not running')
+""")
+        valmanager.absolute_file_path = mock.MagicMock(return_value=self.plugin_directory)
+        test_valmanager = valmanager.VALManager(logger=mock.Mock(Logger),
+                                                capability_repository=mock.Mock(CapabilityRepository),
+                                                plugin_manager=PluginManager(plugin_locator=self.plugin_locator))
+        test_valmanager.register_plugins()
+
+        test_image = mock.Mock()
+        test_image.engine = 'test engine'
+
+        self.assertIsNone(test_valmanager.get_plugin(test_image))
+        self.assertIsNone(test_valmanager.instantiate(test_image))
+        self.assertTrue(test_valmanager.logger.error.called)
+        self.assertEqual(test_valmanager.engines, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
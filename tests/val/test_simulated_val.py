@@ -0,0 +1,134 @@
+import random
+import unittest
+from unittest import mock
+
+from motey.models.image_state import ImageState
+from motey.utils.logger import Logger
+from motey.val.plugins.simulatedVAL import SimulatedVAL
+
+
+class TestSimulatedVAL(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.settings = {'memory_per_instance': '100', 'cpu_per_instance': '5', 'network_bytes_per_second': '0'}
+        self.simulated_val = SimulatedVAL(settings=self.settings, random_generator=random.Random(1))
+        self.simulated_val.logger = mock.Mock(Logger)
+
+    def test_get_plugin_type(self):
+        self.assertEqual(self.simulated_val.get_plugin_type(), 'simulated')
+
+    def test_load_image(self):
+        progress_callback = mock.MagicMock()
+
+        self.simulated_val.load_image('alpine', progress_callback=progress_callback)
+
+        self.assertTrue(self.simulated_val.has_image('alpine'))
+        progress_callback.assert_called_once_with(100, 100)
+
+    def test_delete_image(self):
+        self.simulated_val.load_image('alpine')
+
+        self.assertTrue(self.simulated_val.delete_image('alpine'))
+
+        self.assertFalse(self.simulated_val.has_image('alpine'))
+        self.assertFalse(self.simulated_val.delete_image('alpine'))
+
+    def test_has_image_instances(self):
+        self.assertFalse(self.simulated_val.has_image_instances('alpine'))
+
+        self.simulated_val.create_instance('alpine')
+
+        self.assertTrue(self.simulated_val.has_image_instances('alpine'))
+
+    def test_start_instance(self):
+        instance_id = self.simulated_val.start_instance('alpine', parameters={'name': 'web'})
+
+        self.assertTrue(self.simulated_val.has_image('alpine'))
+        self.assertTrue(self.simulated_val.has_instance(instance_id))
+        self.assertTrue(self.simulated_val.has_instance('web'))
+        self.assertEqual(self.simulated_val.get_image_instance_state(instance_id), ImageState.RUNNING)
+        self.assertEqual(self.simulated_val.get_all_running_instances(), [instance_id])
+
+    def test_create_instance_is_not_running(self):
+        instance_id = self.simulated_val.create_instance('alpine')
+
+        self.assertEqual(self.simulated_val.get_image_instance_state(instance_id), ImageState.INSTANTIATING)
+        self.assertEqual(self.simulated_val.get_all_running_instances(), [])
+
+    def test_stop_instance(self):
+        instance_id = self.simulated_val.start_instance('alpine')
+
+        self.simulated_val.stop_instance(instance_id)
+
+        self.assertEqual(self.simulated_val.get_image_instance_state(instance_id), ImageState.TERMINATED)
+        self.assertEqual(self.simulated_val.get_all_running_instances(), [])
+
+    def test_remove_instance(self):
+        instance_id = self.simulated_val.start_instance('alpine')
+
+        self.simulated_val.remove_instance(instance_id)
+
+        self.assertFalse(self.simulated_val.has_instance(instance_id))
+        self.assertEqual(self.simulated_val.get_image_instance_state(instance_id), ImageState.ERROR)
+
+    def test_start_instance_max_instances_reached(self):
+        self.simulated_val.max_instances = 1
+
+        self.assertIsNotNone(self.simulated_val.start_instance('alpine'))
+        self.assertIsNone(self.simulated_val.start_instance('alpine'))
+        self.assertTrue(self.simulated_val.logger.error.called)
+
+    def test_start_instance_failure_rate(self):
+        self.simulated_val.failure_rate = 1
+
+        self.assertIsNone(self.simulated_val.start_instance('alpine'))
+        self.assertFalse(self.simulated_val.has_image('alpine'))
+        self.assertTrue(self.simulated_val.logger.error.called)
+
+    def test_failures_are_reproducible_with_seed(self):
+        results = []
+        for _ in range(2):
+            simulated_val = SimulatedVAL(settings=dict(self.settings, failure_rate='0.5', seed='42'))
+            results.append([simulated_val.start_instance('alpine') is None for _ in range(20)])
+
+        self.assertEqual(results[0], results[1])
+        self.assertIn(True, results[0])
+        self.assertIn(False, results[0])
+
+    def test_get_stats(self):
+        instance_id = self.simulated_val.start_instance('alpine', parameters={'name': 'web'})
+
+        status = self.simulated_val.get_stats(instance_id)
+
+        self.assertEqual(status.name, 'web')
+        self.assertEqual(status.image_name, 'alpine')
+        self.assertEqual(status.status, 'running')
+        self.assertEqual(status.used_memory, 100)
+        self.assertEqual(status.used_cpu, 5)
+
+    def test_get_stats_instance_does_not_exist(self):
+        self.assertIsNone(self.simulated_val.get_stats('unknown'))
+
+    def test_get_all_instances_stats(self):
+        self.simulated_val.start_instance('alpine')
+        self.simulated_val.start_instance('alpine')
+        self.simulated_val.stop_instance(self.simulated_val.start_instance('alpine'))
+
+        system_status = self.simulated_val.get_all_instances_stats()
+
+        self.assertEqual(system_status.used_memory, 200)
+        self.assertEqual(system_status.used_cpu, 10)
+
+    @mock.patch('motey.val.plugins.simulatedVAL.sleep')
+    def test_latency_with_jitter(self, sleep):
+        simulated_val = SimulatedVAL(settings={'pull_latency': '1', 'latency_jitter': '0.5'},
+                                     random_generator=random.Random(1))
+
+        simulated_val.load_image('alpine')
+
+        latency = sleep.call_args[0][0]
+        self.assertTrue(0.5 <= latency <= 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,7 @@ from motey.repositories.capability_repository import CapabilityRepository
 from motey.utils.logger import Logger
 from motey.val.plugins.dockerVAL import DockerVAL
 from motey.val.valmanager import VALManager
+from motey.val.warm_pool import WarmPool
 
 
 class TestVALManager(unittest.TestCase):
@@ -27,6 +28,7 @@ class TestVALManager(unittest.TestCase):
 
         self.plugin_manager.setPluginPlaces = mock.MagicMock(return_value=None)
         self.plugin_manager.collectPlugins = mock.MagicMock(return_value=None)
+        self.plugin_manager.getPluginLocator = mock.MagicMock(return_value=None)
         self.plugin_manager.getAllPlugins = mock.MagicMock(return_value=[self.plugin_object])
 
         self.val_manager = VALManager(logger=self.logger,
@@ -55,67 +57,217 @@ class TestVALManager(unittest.TestCase):
         self.assertTrue(self.docker_val.activate.called)
         self.assertTrue(self.capability_repository.add.called)
 
+    def test_register_plugins_activation_fails(self):
+        self.docker_val.activate = mock.MagicMock(side_effect=ConnectionError('docker is not running'))
+
+        self.val_manager.register_plugins()
+
+        self.assertEqual(len(self.val_manager.plugins), 0)
+        self.assertTrue(self.logger.error.called)
+
+    def test_register_plugins_indexed_by_engine(self):
+        self.val_manager.register_plugins()
+
+        self.assertEqual(self.val_manager.plugins, {'test engine': self.docker_val})
+        self.assertEqual(self.val_manager.default_engine, 'test engine')
+
+    def test_register_plugins_duplicate_engine(self):
+        self.plugin_manager.getAllPlugins = mock.MagicMock(return_value=[self.plugin_object, self.plugin_object])
+
+        self.val_manager.register_plugins()
+
+        self.assertEqual(len(self.val_manager.plugins), 1)
+        self.assertTrue(self.logger.error.called)
+
+    def test_register_plugins_excluded_engine(self):
+        self.val_manager.excluded_engines = ['test engine']
+
+        self.val_manager.register_plugins()
+
+        self.assertEqual(self.val_manager.plugins, {})
+        self.assertFalse(self.docker_val.activate.called)
+        self.assertFalse(self.capability_repository.add.called)
+
     def test_instantiate_engine_exists(self):
         self.plugin_object.plugin_object.start_instance = mock.MagicMock(return_value='abc123')
+        self.val_manager.register_plugins()
+        self.plugin_manager.getAllPlugins.reset_mock()
 
         result = self.val_manager.instantiate(image=self.test_image)
 
         self.assertEqual(result, 'abc123')
-        self.assertTrue(self.plugin_manager.getAllPlugins.called)
-        self.assertTrue(self.docker_val.get_plugin_type.called)
+        self.assertFalse(self.plugin_manager.getAllPlugins.called)
         self.assertTrue(self.docker_val.start_instance.called)
 
     def test_instantiate_engine_does_not_exists(self):
         self.plugin_object.plugin_object.get_plugin_type = mock.MagicMock(return_value='test engine unknown')
         self.plugin_object.plugin_object.start_instance = mock.MagicMock(return_value='abc123')
+        self.val_manager.register_plugins()
 
         result = self.val_manager.instantiate(image=self.test_image)
 
         self.assertEqual(result, None)
-        self.assertTrue(self.plugin_manager.getAllPlugins.called)
-        self.assertTrue(self.docker_val.get_plugin_type.called)
         self.assertFalse(self.docker_val.start_instance.called)
 
+    def test_instantiate_without_engine_uses_default_engine(self):
+        other_val = mock.Mock(DockerVAL)
+        other_val.get_plugin_type = mock.MagicMock(return_value='other engine')
+        other_val.start_instance = mock.MagicMock(return_value='def456')
+        other_plugin_object = mock.Mock(PluginInfo)
+        other_plugin_object.plugin_object = other_val
+        self.plugin_manager.getAllPlugins = mock.MagicMock(return_value=[self.plugin_object, other_plugin_object])
+        self.plugin_object.plugin_object.start_instance = mock.MagicMock(return_value='abc123')
+        self.val_manager = VALManager(logger=self.logger,
+                                      capability_repository=self.capability_repository,
+                                      plugin_manager=self.plugin_manager,
+                                      default_engine='test engine')
+        self.val_manager.register_plugins()
+
+        result = self.val_manager.instantiate(image=Image(name='test image', engine=''))
+
+        self.assertEqual(result, 'abc123')
+        self.assertTrue(self.docker_val.start_instance.called)
+        self.assertFalse(other_val.start_instance.called)
+
+    def test_instantiate_from_warm_pool(self):
+        self.val_manager.warm_pool = mock.Mock(WarmPool)
+        self.val_manager.warm_pool.acquire = mock.MagicMock(return_value='abc123')
+        self.plugin_object.plugin_object.start_created_instance = mock.MagicMock(return_value='abc123')
+        self.val_manager.register_plugins()
+
+        result = self.val_manager.instantiate(image=self.test_image)
+
+        self.assertEqual(result, 'abc123')
+        self.assertTrue(self.docker_val.start_created_instance.called)
+        self.assertFalse(self.docker_val.start_instance.called)
+
+    def test_instantiate_from_warm_pool_removes_failed_instance(self):
+        self.val_manager.warm_pool = mock.Mock(WarmPool)
+        self.val_manager.warm_pool.acquire = mock.MagicMock(return_value='abc123')
+        self.plugin_object.plugin_object.start_created_instance = mock.MagicMock(return_value=None)
+        self.plugin_object.plugin_object.start_instance = mock.MagicMock(return_value='def456')
+        self.val_manager.register_plugins()
+
+        result = self.val_manager.instantiate(image=self.test_image)
+
+        self.assertEqual(result, 'def456')
+        self.docker_val.remove_instance.assert_called_once_with('abc123')
+        self.assertTrue(self.docker_val.start_instance.called)
+
+    def test_instantiate_warm_pool_empty(self):
+        self.val_manager.warm_pool = mock.Mock(WarmPool)
+        self.val_manager.warm_pool.acquire = mock.MagicMock(return_value=None)
+        self.plugin_object.plugin_object.start_instance = mock.MagicMock(return_value='abc123')
+        self.val_manager.register_plugins()
+        test_image = Image(name='test image', engine='test engine', warm_pool=2)
+
+        result = self.val_manager.instantiate(image=test_image)
+
+        self.assertEqual(result, 'abc123')
+        self.assertTrue(self.val_manager.warm_pool.register.called)
+        self.assertFalse(self.docker_val.start_created_instance.called)
+        self.assertTrue(self.docker_val.start_instance.called)
+
     def test_get_instance_state_engine_exists(self):
         self.plugin_object.plugin_object.get_image_instance_state = mock.MagicMock(return_value=2)
+        self.val_manager.register_plugins()
 
         result = self.val_manager.get_instance_state(image=self.test_image)
 
         self.assertEqual(result, 2)
-        self.assertTrue(self.plugin_manager.getAllPlugins.called)
-        self.assertTrue(self.docker_val.get_plugin_type.called)
         self.assertTrue(self.docker_val.get_image_instance_state.called)
 
     def test_get_instance_state_engine_does_not_exists(self):
         self.plugin_object.plugin_object.get_plugin_type = mock.MagicMock(return_value='test engine unknown')
+        self.val_manager.register_plugins()
 
         result = self.val_manager.get_instance_state(image=self.test_image)
 
         self.assertEqual(result, 5)
-        self.assertTrue(self.plugin_manager.getAllPlugins.called)
-        self.assertTrue(self.docker_val.get_plugin_type.called)
         self.assertFalse(self.docker_val.get_image_instance_state.called)
 
+    def test_get_running_instances(self):
+        self.docker_val.get_all_running_instances = mock.MagicMock(return_value=['first id', 'second id'])
+        self.val_manager.register_plugins()
+
+        result = self.val_manager.get_running_instances(images=[self.test_image, self.test_image])
+
+        self.assertEqual(result, {'first id', 'second id'})
+        self.assertEqual(self.docker_val.get_all_running_instances.call_count, 1)
+
+    def test_get_running_instances_engine_does_not_exist(self):
+        self.plugin_object.plugin_object.get_plugin_type = mock.MagicMock(return_value='test engine unknown')
+        self.val_manager.register_plugins()
+
+        result = self.val_manager.get_running_instances(images=[self.test_image])
+
+        self.assertEqual(result, set())
+        self.assertFalse(self.docker_val.get_all_running_instances.called)
+
     def test_terminate_engine_exist(self):
+        self.val_manager.register_plugins()
+
         self.val_manager.terminate(image=self.test_image)
 
-        self.assertTrue(self.plugin_manager.getAllPlugins.called)
-        self.assertTrue(self.docker_val.get_plugin_type.called)
         self.assertTrue(self.docker_val.stop_instance.called)
 
     def test_terminate_engine_does_not_exist(self):
         self.plugin_object.plugin_object.get_plugin_type = mock.MagicMock(return_value='test engine unknown')
+        self.val_manager.register_plugins()
 
         self.val_manager.terminate(image=self.test_image)
 
-        self.assertTrue(self.plugin_manager.getAllPlugins.called)
-        self.assertTrue(self.docker_val.get_plugin_type.called)
         self.assertFalse(self.docker_val.stop_instance.called)
 
+    def test_has_image_engine_exists(self):
+        self.plugin_object.plugin_object.has_image = mock.MagicMock(return_value=True)
+        self.val_manager.register_plugins()
+
+        result = self.val_manager.has_image(image=self.test_image)
+
+        self.assertTrue(result)
+        self.assertTrue(self.docker_val.has_image.called)
+
+    def test_has_image_engine_does_not_exists(self):
+        self.plugin_object.plugin_object.get_plugin_type = mock.MagicMock(return_value='test engine unknown')
+        self.val_manager.register_plugins()
+
+        result = self.val_manager.has_image(image=self.test_image)
+
+        self.assertFalse(result)
+        self.assertFalse(self.docker_val.has_image.called)
+
+    def test_load_image_engine_exists(self):
+        self.val_manager.register_plugins()
+
+        self.val_manager.load_image(image=self.test_image)
+
+        self.assertTrue(self.docker_val.load_image.called)
+
+    def test_delete_image_engine_exists(self):
+        self.val_manager.register_plugins()
+
+        self.val_manager.delete_image(image=self.test_image)
+
+        self.assertTrue(self.docker_val.delete_image.called)
+
+    def test_has_image_instances_engine_exists(self):
+        self.plugin_object.plugin_object.has_image_instances = mock.MagicMock(return_value=True)
+        self.val_manager.register_plugins()
+
+        self.assertTrue(self.val_manager.has_image_instances(image=self.test_image))
+
+    def test_has_image_instances_engine_does_not_exists(self):
+        self.plugin_object.plugin_object.get_plugin_type = mock.MagicMock(return_value='test engine unknown')
+        self.val_manager.register_plugins()
+
+        self.assertFalse(self.val_manager.has_image_instances(image=self.test_image))
+
     def test_close(self):
+        self.val_manager.register_plugins()
+
         self.val_manager.close()
 
-        self.assertTrue(self.plugin_manager.getAllPlugins.called)
         self.assertTrue(self.capability_repository.remove.called)
         self.assertTrue(self.docker_val.deactivate.called)
 
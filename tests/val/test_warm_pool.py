@@ -0,0 +1,95 @@
+import unittest
+from unittest import mock
+
+from motey.models.image import Image
+from motey.utils.logger import Logger
+from motey.val.plugins.dockerVAL import DockerVAL
+from motey.val.warm_pool import WarmPool
+
+
+class TestWarmPool(unittest.TestCase):
+    @classmethod
+    def setUp(self):
+        self.test_image = Image(name='test image', engine='test engine', parameters={'ports': {'80/tcp': 8080}})
+        self.logger = mock.Mock(Logger)
+        self.plugin = mock.Mock(DockerVAL)
+        self.plugin.create_instance = mock.MagicMock(side_effect=['first', 'second', 'third', 'fourth'])
+        self.warm_pool = WarmPool(logger=self.logger, max_size=3, max_total=4, idle_timeout=600)
+
+    def test_register_and_refill(self):
+        self.warm_pool.register(plugin=self.plugin, image=self.test_image, size=2)
+        self.warm_pool.refill(self.warm_pool.get_key(self.test_image))
+
+        pool = self.warm_pool.pools[self.warm_pool.get_key(self.test_image)]
+        self.assertEqual(list(pool['instances']), ['first', 'second'])
+        self.assertEqual(self.plugin.create_instance.call_count, 2)
+
+    def test_register_limited_to_max_size(self):
+        self.warm_pool.register(plugin=self.plugin, image=self.test_image, size=10)
+
+        self.assertEqual(self.warm_pool.pools[self.warm_pool.get_key(self.test_image)]['size'], 3)
+
+    def test_refill_limited_to_max_total(self):
+        other_image = Image(name='other image', engine='test engine')
+        self.warm_pool.register(plugin=self.plugin, image=self.test_image, size=3)
+        self.warm_pool.register(plugin=self.plugin, image=other_image, size=3)
+
+        self.warm_pool.refill(self.warm_pool.get_key(self.test_image))
+        self.warm_pool.refill(self.warm_pool.get_key(other_image))
+
+        self.assertEqual(self.plugin.create_instance.call_count, 4)
+
+    def test_register_image_with_fixed_name(self):
+        test_image = Image(name='test image', engine='test engine', parameters={'name': 'fixed name'})
+
+        self.warm_pool.register(plugin=self.plugin, image=test_image, size=2)
+
+        self.assertEqual(self.warm_pool.pools, {})
+
+    def test_acquire(self):
+        self.warm_pool.register(plugin=self.plugin, image=self.test_image, size=2)
+        self.warm_pool.refill(self.warm_pool.get_key(self.test_image))
+
+        result = self.warm_pool.acquire(Image(name='test image', engine='test engine',
+                                              parameters={'ports': {'80/tcp': 8080}}))
+
+        self.assertEqual(result, 'first')
+
+    def test_acquire_other_parameters(self):
+        self.warm_pool.register(plugin=self.plugin, image=self.test_image, size=2)
+        self.warm_pool.refill(self.warm_pool.get_key(self.test_image))
+
+        result = self.warm_pool.acquire(Image(name='test image', engine='test engine'))
+
+        self.assertIsNone(result)
+
+    def test_evict_idle(self):
+        self.warm_pool.register(plugin=self.plugin, image=self.test_image, size=2)
+        self.warm_pool.refill(self.warm_pool.get_key(self.test_image))
+        self.warm_pool.pools[self.warm_pool.get_key(self.test_image)]['last_used'] -= 601
+
+        self.warm_pool.evict_idle()
+
+        self.assertEqual(self.warm_pool.pools, {})
+        self.assertEqual(self.plugin.remove_instance.call_count, 2)
+
+    def test_evict_idle_permanent(self):
+        self.warm_pool.register(plugin=self.plugin, image=self.test_image, size=2, permanent=True)
+        self.warm_pool.pools[self.warm_pool.get_key(self.test_image)]['last_used'] -= 601
+
+        self.warm_pool.evict_idle()
+
+        self.assertEqual(len(self.warm_pool.pools), 1)
+
+    def test_close(self):
+        self.warm_pool.register(plugin=self.plugin, image=self.test_image, size=2)
+        self.warm_pool.refill(self.warm_pool.get_key(self.test_image))
+
+        self.warm_pool.close()
+
+        self.assertEqual(self.warm_pool.pools, {})
+        self.assertEqual(self.plugin.remove_instance.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
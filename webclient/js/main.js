@@ -8,6 +8,15 @@ var ServiceListing = {
   template: '#services-template',
   mounted: function() {
     this.fetchServices();
+    this.events = new EventSource('http://172.18.0.10:5023/v1/events?topics=services');
+    this.events.addEventListener('service_added', this.updateService);
+    this.events.addEventListener('service_updated', this.updateService);
+    this.events.addEventListener('service_removed', this.removeService);
+    // fetch the whole list again after a reconnect, events could be missed in the meantime
+    this.events.addEventListener('open', this.fetchServices);
+  },
+  beforeDestroy: function() {
+    this.events.close();
   },
   data: function() {
     return {
@@ -21,6 +30,19 @@ var ServiceListing = {
       }, response => {
         console.error(response.body);
       });
+    },
+    updateService: function(event) {
+      var service = JSON.parse(event.data);
+      var index = this.services.findIndex(entry => entry.id === service.id);
+      if (index >= 0) {
+        this.services.splice(index, 1, service);
+      } else {
+        this.services.push(service);
+      }
+    },
+    removeService: function(event) {
+      var service = JSON.parse(event.data);
+      this.services = this.services.filter(entry => entry.id !== service.id);
     }
   }
 };
@@ -30,6 +52,14 @@ var NodesListing = {
   template: '#nodes-template',
   mounted: function() {
     this.fetchNodes();
+    this.events = new EventSource('http://172.18.0.10:5023/v1/events?topics=nodes');
+    this.events.addEventListener('node_added', this.addNode);
+    this.events.addEventListener('node_removed', this.removeNode);
+    // fetch the whole list again after a reconnect, events could be missed in the meantime
+    this.events.addEventListener('open', this.fetchNodes);
+  },
+  beforeDestroy: function() {
+    this.events.close();
   },
   data: function() {
     return {
@@ -39,11 +69,20 @@ var NodesListing = {
   methods: {
     fetchNodes: function() {
       this.$http.get('http://172.18.0.10:5023/v1/nodes').then(response => {
-        console.log(response.body);
         this.nodes = response.body;
       }, response => {
         console.error(response.body);
       });
+    },
+    addNode: function(event) {
+      var node = JSON.parse(event.data);
+      if (!this.nodes.some(entry => entry.ip === node.ip)) {
+        this.nodes.push(node);
+      }
+    },
+    removeNode: function(event) {
+      var node = JSON.parse(event.data);
+      this.nodes = this.nodes.filter(entry => entry.ip !== node.ip);
     }
   }
 };